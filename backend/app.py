@@ -281,6 +281,11 @@ def index():
 from utils.db_commands import register_commands
 register_commands(app)
 
+# Off-peak forecast precompute (dashboard forecasts refreshed before shops open);
+# started per worker on its first request when FORECAST_PRECOMPUTE_ENABLED
+from services import forecast_precompute_service
+forecast_precompute_service.init_app(app)
+
 # Serve Uploaded Files
 @app.route('/uploads/<path:filename>')
 def serve_uploads(filename):
@@ -292,16 +297,8 @@ if __name__ == "__main__":
     os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
     with app.app_context():
         db.create_all()
-
-        # Enable SQLite WAL mode for better concurrent access
-        try:
-            from sqlalchemy import text
-            db.session.execute(text("PRAGMA journal_mode=WAL"))
-            db.session.execute(text("PRAGMA busy_timeout=60000"))  # 60 second timeout
-            db.session.commit()
-            print("[SQLite] WAL mode enabled for better concurrency")
-        except Exception as e:
-            print(f"[SQLite] Could not enable WAL mode: {e}")
+        # SQLite PRAGMAs (WAL, busy_timeout, cache sizing) are applied per-connection
+        # by the engine "connect" listener in models/model.py
 
         # Run comprehensive seeding on startup for development
         if os.getenv("AUTO_SEED", "true").lower() == "true":
@@ -314,6 +311,15 @@ if __name__ == "__main__":
                 print(f"Seeding failed: {e}")
                 print("Continuing with application startup...")
 
+        try:
+            from services.distributor_summary_service import ensure_distributor_summaries
+            built = ensure_distributor_summaries()
+            if built:
+                print(f"Built {built} distributor summary rows")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Distributor summary build failed: {e}")
+
         # Initialize AI Services after DB is ready
         rag_service.load_from_disk_startup(BASE_DIR)
 
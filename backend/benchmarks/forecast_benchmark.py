@@ -0,0 +1,484 @@
+# backend/benchmarks/forecast_benchmark.py
+"""
+Offline forecast accuracy and latency benchmark.
+
+Replays the demo-datasets CSVs and a fixed set of synthetic series through
+rolling-origin backtests of TextileProphetManager.forecast_sales (MAPE, sMAPE,
+interval coverage, cold fit+predict and cached timings per series), and times
+forecasting_service.forecast_sales and SalesAnalyticsService.get_quarterly_demand_forecast
+end to end. Results are written as JSON. `compare` re-runs with the baseline's
+settings (or loads --current) and exits with status 1 when accuracy or latency
+regressed past the tolerances.
+
+    cd backend
+    python -m benchmarks.forecast_benchmark run --output benchmarks/baseline.json
+    python -m benchmarks.forecast_benchmark compare --baseline benchmarks/baseline.json
+"""
+
+import argparse
+import json
+import logging
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+DEMO_DIR = Path(__file__).resolve().parents[2] / "demo-datasets"
+
+DEFAULT_SETTINGS = {
+    "horizon": 7,
+    "folds": 3,
+    "model": "auto",
+    "demo": True,
+    "synthetic": True,
+    "scenarios": True,
+}
+
+
+# ============================================================================
+# Series
+# ============================================================================
+
+def load_demo_sales():
+    """All weekly sales demo uploads as one frame with a `shop` column and revenue."""
+    frames = []
+    for path in sorted((DEMO_DIR / "02-sales-data").glob("*/*.csv")):
+        df = pd.read_csv(path)
+        df["shop"] = path.parent.name
+        frames.append(df)
+    if not frames:
+        return pd.DataFrame(columns=["date", "sku", "product_name", "category", "quantity_sold",
+                                     "selling_price", "region", "shop", "revenue"])
+    sales = pd.concat(frames, ignore_index=True)
+    sales["date"] = pd.to_datetime(sales["date"])
+    sales["revenue"] = sales["quantity_sold"] * sales["selling_price"]
+    return sales
+
+
+def _daily(df, date_col, value_col):
+    daily = df.groupby(date_col)[value_col].sum().reset_index()
+    daily.columns = ["ds", "y"]
+    return daily
+
+
+def demo_series():
+    """Daily revenue / quantity per demo shop and daily sales per distributor product."""
+    series = {}
+    sales = load_demo_sales()
+    for shop, shop_sales in sales.groupby("shop"):
+        series[f"demo/{shop}/revenue"] = _daily(shop_sales, "date", "revenue")
+        series[f"demo/{shop}/quantity"] = _daily(shop_sales, "date", "quantity_sold")
+
+    regional_path = DEMO_DIR / "04-distributor" / "regional_sales.csv"
+    if regional_path.exists():
+        regional = pd.read_csv(regional_path, parse_dates=["Date"])
+        series["demo/distributor/total"] = _daily(regional, "Date", "Sales")
+        for product, product_sales in regional.groupby("Product"):
+            series[f"demo/distributor/{product}"] = _daily(product_sales, "Date", "Sales")
+    return series
+
+
+def synthetic_series(seed=42):
+    """Deterministic series covering the shapes shops upload: short, seasonal, trending, sparse."""
+    rng = np.random.default_rng(seed)
+
+    def frame(values, start="2024-01-01"):
+        return pd.DataFrame({
+            "ds": pd.date_range(start, periods=len(values), freq="D"),
+            "y": np.clip(values, 1, None),
+        })
+
+    t60, t120, t180, t730 = (np.arange(n) for n in (60, 120, 180, 730))
+    intermittent = frame(400 + rng.normal(0, 60, 90))
+    intermittent = intermittent[rng.random(90) >= 0.4].reset_index(drop=True)  # days without sales are absent
+
+    return {
+        "synthetic/short_20d": frame(500 + rng.normal(0, 40, 20)),
+        "synthetic/weekly_60d": frame(1000 + 300 * np.sin(2 * np.pi * t60 / 7) + rng.normal(0, 80, 60)),
+        "synthetic/intermittent_90d": intermittent,
+        "synthetic/level_shift_120d": frame(np.where(t120 < 80, 600, 900) + rng.normal(0, 50, 120)),
+        "synthetic/trend_weekly_180d": frame(
+            800 + 3 * t180 + 200 * np.sin(2 * np.pi * t180 / 7) + rng.normal(0, 70, 180)
+        ),
+        "synthetic/yearly_730d": frame(
+            1500 + 500 * np.sin(2 * np.pi * t730 / 365.25) + 250 * np.sin(2 * np.pi * t730 / 7)
+            + rng.normal(0, 120, 730)
+        ),
+    }
+
+
+# ============================================================================
+# Accuracy metrics
+# ============================================================================
+
+def mape(actual, predicted):
+    """Mean absolute percentage error (%) over points with non-zero actuals."""
+    actual, predicted = np.asarray(actual, float), np.asarray(predicted, float)
+    mask = actual != 0
+    if not mask.any():
+        return float("nan")
+    return float(np.mean(np.abs(actual[mask] - predicted[mask]) / np.abs(actual[mask])) * 100)
+
+
+def smape(actual, predicted):
+    """Symmetric MAPE (%), 0-200."""
+    actual, predicted = np.asarray(actual, float), np.asarray(predicted, float)
+    denom = np.abs(actual) + np.abs(predicted)
+    mask = denom != 0
+    if not mask.any():
+        return 0.0
+    return float(np.mean(2 * np.abs(actual[mask] - predicted[mask]) / denom[mask]) * 100)
+
+
+def coverage(actual, lower, upper):
+    """Share of actuals inside the forecast interval."""
+    actual = np.asarray(actual, float)
+    if len(actual) == 0:
+        return float("nan")
+    return float(np.mean((actual >= np.asarray(lower, float)) & (actual <= np.asarray(upper, float))))
+
+
+def _nanmean(values):
+    values = [v for v in values if v is not None and not np.isnan(v)]
+    return round(float(np.mean(values)), 4) if values else None
+
+
+def _percentile(values, q):
+    return round(float(np.percentile(values, q)), 4) if values else None
+
+
+# ============================================================================
+# Backtests
+# ============================================================================
+
+def backtest_series(df, horizon, folds, model, manager):
+    """
+    Rolling-origin backtest of manager.forecast_sales on a daily ds/y frame.
+    Each fold trains on days before the cutoff and scores the next `horizon` days.
+    """
+    df = df.sort_values("ds").reset_index(drop=True)
+    last = df["ds"].max()
+    scores, cold, warm, models, errors = [], [], [], {}, []
+
+    for i in range(folds, 0, -1):
+        cutoff = last - timedelta(days=horizon * i - 1)
+        train = df[df["ds"] < cutoff]
+        test = df[(df["ds"] >= cutoff) & (df["ds"] < cutoff + timedelta(days=horizon))]
+        if len(train) < 5 or test.empty:
+            continue
+        try:
+            started = time.perf_counter()
+            forecast, metrics = manager.forecast_sales(train.copy(), periods=horizon, model=model)
+            cold.append(time.perf_counter() - started)
+
+            # Same request again: the cached path (model / selection caches)
+            started = time.perf_counter()
+            manager.forecast_sales(train.copy(), periods=horizon, model=model)
+            warm.append(time.perf_counter() - started)
+        except Exception as e:
+            errors.append(str(e)[:200])
+            continue
+
+        joined = test.merge(forecast.assign(ds=forecast["ds"].dt.normalize()), on="ds", how="inner")
+        if joined.empty:
+            continue
+        scores.append((
+            mape(joined["y"], joined["yhat"]),
+            smape(joined["y"], joined["yhat"]),
+            coverage(joined["y"], joined["yhat_lower"], joined["yhat_upper"]),
+        ))
+        chosen = metrics.get("model", "prophet")
+        models[chosen] = models.get(chosen, 0) + 1
+
+    return {
+        "points": int(len(df)),
+        "folds": len(scores),
+        "failed_folds": len(errors),
+        "errors": errors[:3],
+        "mape": _nanmean([s[0] for s in scores]),
+        "smape": _nanmean([s[1] for s in scores]),
+        "coverage": _nanmean([s[2] for s in scores]),
+        "fit_predict_seconds": _nanmean(cold),
+        "cached_seconds": _nanmean(warm),
+        "models": models,
+    }
+
+
+# ============================================================================
+# End-to-end scenarios
+# ============================================================================
+
+def bench_product_forecasts():
+    """forecasting_service.forecast_sales over every demo product (Product/Date/Sales)."""
+    from config import Config
+    from services.forecasting_service import forecast_sales
+
+    sales = load_demo_sales()
+    frame = pd.DataFrame({"Product": sales["product_name"], "Date": sales["date"], "Sales": sales["revenue"]})
+    regional_path = DEMO_DIR / "04-distributor" / "regional_sales.csv"
+    if regional_path.exists():
+        regional = pd.read_csv(regional_path, parse_dates=["Date"])
+        frame = pd.concat([frame, regional[["Product", "Date", "Sales"]]], ignore_index=True)
+
+    started = time.perf_counter()
+    results = forecast_sales(frame, wait=Config.FORECAST_TIMEOUT_SECONDS)
+    return {
+        "products": int(frame["Product"].nunique()),
+        "forecasted": sum(1 for r in results if r["status"] == "ready"),
+        "computing": sum(1 for r in results if r["status"] != "ready"),
+        "seconds": round(time.perf_counter() - started, 4),
+    }
+
+
+def _benchmark_app(db, path):
+    from flask import Flask
+
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{path}"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    return app
+
+
+def bench_quarterly_forecast(timeout=300):
+    """
+    get_quarterly_demand_forecast for each demo shop on a scratch SQLite database, with
+    dates shifted to end yesterday. Times the cold call (until the forecast is ready)
+    and the cached call.
+    """
+    from models.model import db, User, Shop, Product
+    from services.sales_analytics_service import SalesAnalyticsService
+    from services.sales_ingest_service import ingest_sales_dataframe
+    from utils.data_version import bump_data_version
+
+    sales = load_demo_sales()
+    sales["date"] += (pd.Timestamp(datetime.now().date()) - timedelta(days=1)) - sales["date"].max()
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp, _benchmark_app(db, Path(tmp) / "benchmark.db").app_context():
+        db.create_all()
+        owner = User(full_name="Benchmark", username="benchmark", password="x", role="shop_owner")
+        db.session.add(owner)
+        db.session.flush()
+        for shop_name, shop_sales in sales.groupby("shop"):
+            shop = Shop(name=f"Benchmark {shop_name}", owner_id=owner.id)
+            db.session.add(shop)
+            db.session.flush()
+            for product in shop_sales.drop_duplicates("sku").itertuples(index=False):
+                db.session.add(Product(name=product.product_name, sku=product.sku, category=product.category,
+                                       price=product.selling_price, shop_id=shop.id))
+            db.session.flush()
+            ingest_sales_dataframe(shop_sales, shop.id)
+            bump_data_version(shop.id, sales=True)
+            db.session.commit()
+
+            service = SalesAnalyticsService(shop.id)
+            started = time.perf_counter()
+            result = service.get_quarterly_demand_forecast()
+            while (result.get("status") == "computing" or result.get("refreshing")) \
+                    and time.perf_counter() - started < timeout:
+                time.sleep(0.25)
+                result = service.get_quarterly_demand_forecast()
+            cold = time.perf_counter() - started
+
+            started = time.perf_counter()
+            service.get_quarterly_demand_forecast()
+            cached = time.perf_counter() - started
+
+            revenue_model = result.get("model_metrics", {}).get("revenue_model", {})
+            results[shop_name] = {
+                "status": result.get("status"),
+                "model": revenue_model.get("model"),
+                "seconds": round(cold, 4),
+                "cached_seconds": round(cached, 4),
+            }
+        db.session.remove()
+    return results
+
+
+# ============================================================================
+# Run / compare
+# ============================================================================
+
+def run_benchmark(settings=None):
+    """Run the suite and return the result document."""
+    from services.prophet_service import TextileProphetManager
+    from utils.prophet_model_store import ProphetModelStore
+
+    settings = {**DEFAULT_SETTINGS, **(settings or {})}
+    series = {}
+    if settings["demo"]:
+        series.update(demo_series())
+    if settings["synthetic"]:
+        series.update(synthetic_series())
+
+    report = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        # Fresh model store and manager per series: fit timings are cold, not cross-series cache hits
+        store = ProphetModelStore(str(Path(tmp) / "models.sqlite"))
+        for name, df in series.items():
+            manager = TextileProphetManager(model_store=store)
+            report[name] = backtest_series(df, settings["horizon"], settings["folds"], settings["model"], manager)
+            print(f"[Benchmark] {name}: {report[name]['folds']} folds, MAPE {report[name]['mape']}, "
+                  f"{report[name]['fit_predict_seconds']}s")
+
+    scored = [r for r in report.values() if r["folds"]]
+    fit_times = [r["fit_predict_seconds"] for r in scored]
+    cached_times = [r["cached_seconds"] for r in scored]
+    summary = {
+        "series": len(report),
+        "scored_series": len(scored),
+        "mean_mape": _nanmean([r["mape"] for r in scored]),
+        "mean_smape": _nanmean([r["smape"] for r in scored]),
+        "mean_coverage": _nanmean([r["coverage"] for r in scored]),
+        "fit_predict_seconds_p50": _percentile(fit_times, 50),
+        "fit_predict_seconds_p95": _percentile(fit_times, 95),
+        "cached_seconds_p50": _percentile(cached_times, 50),
+    }
+
+    scenarios = {}
+    if settings["scenarios"]:
+        scenarios["product_forecasts"] = bench_product_forecasts()
+        scenarios["quarterly_forecast"] = bench_quarterly_forecast()
+
+    import prophet
+    return {
+        "generated_at": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "prophet": prophet.__version__,
+            "machine": platform.machine(),
+        },
+        "settings": settings,
+        "summary": summary,
+        "series": report,
+        "scenarios": scenarios,
+    }
+
+
+def _worse(current, baseline, tolerance, higher_is_worse=True, floor=0.0):
+    """True when `current` is worse than `baseline` by more than tolerance (relative) and floor (absolute)."""
+    if current is None or baseline is None:
+        return False
+    delta = current - baseline if higher_is_worse else baseline - current
+    return delta > floor and delta > abs(baseline) * tolerance
+
+
+def compare_results(baseline, current, accuracy_tolerance=0.10, latency_tolerance=0.50,
+                    coverage_tolerance=0.10, min_latency_seconds=0.05):
+    """List of human-readable regressions of `current` against `baseline` (empty when none)."""
+    regressions = []
+
+    def check_accuracy(label, base, cur):
+        for metric in ("mape", "smape"):
+            key = metric if metric in base else f"mean_{metric}"
+            if _worse(cur.get(key), base.get(key), accuracy_tolerance):
+                regressions.append(f"{label}: {metric} {base[key]} -> {cur[key]}")
+        key = "coverage" if "coverage" in base else "mean_coverage"
+        if _worse(cur.get(key), base.get(key), 0.0, higher_is_worse=False, floor=coverage_tolerance):
+            regressions.append(f"{label}: coverage {base[key]} -> {cur[key]}")
+
+    def check_latency(label, base, cur, keys):
+        for key in keys:
+            if _worse(cur.get(key), base.get(key), latency_tolerance, floor=min_latency_seconds):
+                regressions.append(f"{label}: {key} {base[key]}s -> {cur[key]}s")
+
+    check_accuracy("summary", baseline["summary"], current["summary"])
+    check_latency("summary", baseline["summary"], current["summary"],
+                  ("fit_predict_seconds_p50", "fit_predict_seconds_p95", "cached_seconds_p50"))
+
+    for name, base in baseline["series"].items():
+        cur = current["series"].get(name)
+        if cur is None:
+            continue
+        if base["folds"] and not cur["folds"]:
+            regressions.append(f"{name}: no fold could be scored ({'; '.join(cur['errors']) or 'no data'})")
+            continue
+        check_accuracy(name, base, cur)
+        check_latency(name, base, cur, ("fit_predict_seconds", "cached_seconds"))
+
+    base_scenarios, cur_scenarios = baseline.get("scenarios", {}), current.get("scenarios", {})
+    if "product_forecasts" in base_scenarios and "product_forecasts" in cur_scenarios:
+        check_latency("product_forecasts", base_scenarios["product_forecasts"],
+                      cur_scenarios["product_forecasts"], ("seconds",))
+    for shop, base in base_scenarios.get("quarterly_forecast", {}).items():
+        cur = cur_scenarios.get("quarterly_forecast", {}).get(shop)
+        if cur:
+            check_latency(f"quarterly_forecast/{shop}", base, cur, ("seconds", "cached_seconds"))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Forecast accuracy and latency benchmark")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="Run the suite and write a JSON result")
+    run_parser.add_argument("--output", default="benchmarks/forecast_results.json")
+    run_parser.add_argument("--horizon", type=int, default=DEFAULT_SETTINGS["horizon"])
+    run_parser.add_argument("--folds", type=int, default=DEFAULT_SETTINGS["folds"])
+    run_parser.add_argument("--model", choices=["auto", "fast", "prophet"], default=DEFAULT_SETTINGS["model"])
+    run_parser.add_argument("--no-demo", action="store_true", help="Skip the demo-datasets series")
+    run_parser.add_argument("--no-synthetic", action="store_true", help="Skip the synthetic series")
+    run_parser.add_argument("--no-scenarios", action="store_true", help="Skip the end-to-end timings")
+
+    compare_parser = sub.add_parser("compare", help="Fail when results regress against a baseline")
+    compare_parser.add_argument("--baseline", required=True)
+    compare_parser.add_argument("--current", help="Existing result to compare (default: run now)")
+    compare_parser.add_argument("--output", help="Also write the fresh result here")
+    compare_parser.add_argument("--accuracy-tolerance", type=float, default=0.10,
+                                help="Allowed relative MAPE/sMAPE increase (0.10 = 10%%)")
+    compare_parser.add_argument("--latency-tolerance", type=float, default=0.50,
+                                help="Allowed relative slowdown (0.50 = 50%%)")
+    compare_parser.add_argument("--coverage-tolerance", type=float, default=0.10,
+                                help="Allowed absolute drop in interval coverage")
+    args = parser.parse_args(argv)
+
+    logging.getLogger("services.prophet_service").setLevel(logging.WARNING)
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+
+    if args.command == "run":
+        result = run_benchmark({
+            "horizon": args.horizon,
+            "folds": args.folds,
+            "model": args.model,
+            "demo": not args.no_demo,
+            "synthetic": not args.no_synthetic,
+            "scenarios": not args.no_scenarios,
+        })
+        Path(args.output).write_text(json.dumps(result, indent=2))
+        print(f"[Benchmark] Wrote {args.output}: {json.dumps(result['summary'])}")
+        return 0
+
+    baseline = json.loads(Path(args.baseline).read_text())
+    if args.current:
+        current = json.loads(Path(args.current).read_text())
+    else:
+        current = run_benchmark(baseline.get("settings"))
+        if args.output:
+            Path(args.output).write_text(json.dumps(current, indent=2))
+
+    regressions = compare_results(
+        baseline, current,
+        accuracy_tolerance=args.accuracy_tolerance,
+        latency_tolerance=args.latency_tolerance,
+        coverage_tolerance=args.coverage_tolerance,
+    )
+    if regressions:
+        print(f"[Benchmark] {len(regressions)} regression(s) against {args.baseline}:")
+        for line in regressions:
+            print(f"  - {line}")
+        return 1
+    print(f"[Benchmark] No regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
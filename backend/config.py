@@ -27,19 +27,47 @@ class Config:
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
-    # Connection Pool Settings (optimized for SQLite)
-    SQLALCHEMY_ENGINE_OPTIONS = {
-        "pool_size": 10,
-        "max_overflow": 20,
-        "pool_timeout": 30,
-        "pool_recycle": 1800,
-        "pool_pre_ping": True,
-        "connect_args": {
-            "check_same_thread": False,
-            "timeout": 30
-        }
+    # SQLite per-connection tuning (applied by the engine "connect" listener in models/model.py)
+    # Profiles: "performance" (default), "durable", "off"
+    SQLITE_PRAGMA_PROFILE = os.getenv("SQLITE_PRAGMA_PROFILE", "performance").lower()
+    SQLITE_PRAGMA_PROFILES = {
+        "performance": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "cache_size": -64000,          # ~64MB page cache (negative = KiB)
+            "mmap_size": 268435456,        # 256MB memory-mapped I/O
+            "temp_store": "MEMORY",
+            "busy_timeout": 60000,         # 60 second lock wait
+        },
+        "durable": {
+            "journal_mode": "WAL",
+            "synchronous": "FULL",
+            "cache_size": -16000,
+            "mmap_size": 0,
+            "temp_store": "MEMORY",
+            "busy_timeout": 60000,
+        },
+        "off": {},
     }
 
+    # Connection Pool Settings (dialect-aware: pool sizing only applies to server databases)
+    if SQLALCHEMY_DATABASE_URI.startswith("sqlite"):
+        SQLALCHEMY_ENGINE_OPTIONS = {
+            "pool_pre_ping": True,
+            "connect_args": {
+                "check_same_thread": False,
+                "timeout": 30
+            }
+        }
+    else:
+        SQLALCHEMY_ENGINE_OPTIONS = {
+            "pool_size": 10,
+            "max_overflow": 20,
+            "pool_timeout": 30,
+            "pool_recycle": 1800,
+            "pool_pre_ping": True,
+        }
+
     # AI & API INTEGRATIONS
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
@@ -53,6 +81,59 @@ class Config:
     AI_TEXT_MODEL = os.getenv("AI_TEXT_MODEL", "meta/llama-3.1-8b-instruct")
     AI_IMAGE_MODEL = os.getenv("AI_IMAGE_MODEL", "black-forest-labs/flux.1-kontext-dev")
     AI_VISION_MODEL = os.getenv("AI_VISION_MODEL", "meta/llama-3.2-90b-vision-instruct")
+    # Distributor AI chat: prompt context budget (approx. tokens) and distributors kept cached
+    AI_CHAT_CONTEXT_TOKENS = int(os.getenv("AI_CHAT_CONTEXT_TOKENS", 3000))
+    AI_CHAT_CONTEXT_CACHE_SIZE = int(os.getenv("AI_CHAT_CONTEXT_CACHE_SIZE", 64))
+
+    # BACKGROUND SALES UPLOADS
+    # When enabled, /upload_sales_data returns 202 with a job id unless the client sends async=false
+    SALES_UPLOAD_ASYNC = os.getenv("SALES_UPLOAD_ASYNC", "False").lower() in ["1", "true", "yes"]
+    SALES_UPLOAD_WORKERS = int(os.getenv("SALES_UPLOAD_WORKERS", 2))
+    # CSV uploads are streamed to disk and parsed in chunks, so the cap is about disk, not RAM
+    SALES_UPLOAD_MAX_MB = int(os.getenv("SALES_UPLOAD_MAX_MB", 100))
+    # Per-shop columnar sales frames kept decoded in memory (LRU entries)
+    SALES_STORE_LRU_SIZE = int(os.getenv("SALES_STORE_LRU_SIZE", 32))
+    # Memory cap for the versioned sales analytics query cache
+    SALES_QUERY_CACHE_MB = int(os.getenv("SALES_QUERY_CACHE_MB", 64))
+    # Regional-demand uploads are parsed once per file content and kept as columnar snapshots
+    REGIONAL_UPLOAD_CACHE_SIZE = int(os.getenv("REGIONAL_UPLOAD_CACHE_SIZE", 16))
+    REGIONAL_UPLOAD_SNAPSHOT_DAYS = int(os.getenv("REGIONAL_UPLOAD_SNAPSHOT_DAYS", 7))
+    # Low-stock alert stream: wakes on committed stock changes, polls as a cross-process fallback.
+    # Each open stream holds a request worker until MAX_SECONDS, so the default is a
+    # long-poll length; raise it only with threaded/async workers (gunicorn gthread/gevent)
+    LOW_STOCK_STREAM_POLL_SECONDS = float(os.getenv("LOW_STOCK_STREAM_POLL_SECONDS", 10))
+    LOW_STOCK_STREAM_HEARTBEAT_SECONDS = float(os.getenv("LOW_STOCK_STREAM_HEARTBEAT_SECONDS", 15))
+    LOW_STOCK_STREAM_MAX_SECONDS = float(os.getenv("LOW_STOCK_STREAM_MAX_SECONDS", 25))
+
+    # FORECASTING
+    # Prophet fits run in a process pool; requests wait briefly, then report "computing"
+    FORECAST_WORKERS = int(os.getenv("FORECAST_WORKERS", 2))
+    FORECAST_MAX_INFLIGHT = int(os.getenv("FORECAST_MAX_INFLIGHT", 8))
+    FORECAST_TIMEOUT_SECONDS = float(os.getenv("FORECAST_TIMEOUT_SECONDS", 120))
+    FORECAST_WAIT_SECONDS = float(os.getenv("FORECAST_WAIT_SECONDS", 3))
+    # Series shorter than this (in periods) use the NumPy fast tier only, in-process
+    FAST_FORECAST_MAX_POINTS = int(os.getenv("FAST_FORECAST_MAX_POINTS", 90))
+    # Time allowed for backtesting Prophet against the fast tier on longer series
+    FORECAST_SELECTION_BUDGET_SECONDS = float(os.getenv("FORECAST_SELECTION_BUDGET_SECONDS", 15))
+    # Default Prophet interval tier for request-time forecasts: exact / sampled / analytic
+    # (nightly precompute always uses exact); "sampled" draws this many Monte-Carlo samples
+    FORECAST_UNCERTAINTY_MODE = os.getenv("FORECAST_UNCERTAINTY_MODE", "sampled")
+    FORECAST_SAMPLED_UNCERTAINTY_SAMPLES = int(os.getenv("FORECAST_SAMPLED_UNCERTAINTY_SAMPLES", 100))
+    # Fitted Prophet models persisted by series fingerprint, shared by all workers (LRU limits)
+    PROPHET_MODEL_STORE_PATH = os.getenv(
+        "PROPHET_MODEL_STORE_PATH", os.path.join(DATA_DIR, "prophet_models.sqlite")
+    )
+    PROPHET_MODEL_STORE_MAX_ENTRIES = int(os.getenv("PROPHET_MODEL_STORE_MAX_ENTRIES", 500))
+    PROPHET_MODEL_STORE_MAX_MB = int(os.getenv("PROPHET_MODEL_STORE_MAX_MB", 256))
+    # Nightly precompute of dashboard forecasts for shops whose sales changed (local time window)
+    FORECAST_PRECOMPUTE_ENABLED = os.getenv("FORECAST_PRECOMPUTE_ENABLED", "false").lower() == "true"
+    FORECAST_PRECOMPUTE_WINDOW = os.getenv("FORECAST_PRECOMPUTE_WINDOW", "02:00-05:00")
+    FORECAST_PRECOMPUTE_CONCURRENCY = int(os.getenv("FORECAST_PRECOMPUTE_CONCURRENCY", 2))
+    FORECAST_PRECOMPUTE_CHECK_SECONDS = int(os.getenv("FORECAST_PRECOMPUTE_CHECK_SECONDS", 600))
+    # Only the worker holding this file lock runs the scheduler checks
+    FORECAST_PRECOMPUTE_LOCK_PATH = os.getenv(
+        "FORECAST_PRECOMPUTE_LOCK_PATH", os.path.join(DATA_DIR, "forecast_precompute.lock")
+    )
 
     # FILE MANAGEMENT
     UPLOAD_FOLDER = os.getenv("UPLOAD_FOLDER", os.path.join(BASE_DIR, "uploads"))
@@ -60,6 +141,8 @@ class Config:
         "FAISS_INDEX_PATH",
         os.path.join(DATA_DIR, "faiss", "index.faiss")
     )
+    # Bundled city gazetteer used for all city -> coordinate lookups
+    GAZETTEER_PATH = os.getenv("GAZETTEER_PATH", os.path.join(BASE_DIR, "data", "indian_cities.csv"))
 
     # Ensure necessary directories exist
     for path in [UPLOAD_FOLDER, os.path.dirname(FAISS_INDEX_PATH), DATA_DIR]:
@@ -3,7 +3,9 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 from sqlalchemy import event, Index, func
+from sqlalchemy.engine import Engine
 import os
+import sqlite3
 
 db = SQLAlchemy()
 
@@ -380,6 +382,8 @@ class Product(db.Model, TimestampMixin, SerializerMixin):
         Index('idx_product_shop_active', 'shop_id', 'is_active'),
         Index('idx_product_category_trending', 'category', 'is_trending'),
         Index('idx_product_shop_category', 'shop_id', 'category'),
+        Index('idx_product_created', 'created_at', 'id'),  # keyset "newest"
+        Index('idx_product_rating', 'rating', 'is_trending', 'id'),  # keyset default sort
         db.UniqueConstraint('shop_id', 'sku', name='uq_product_shop_sku'),
     )
 
@@ -727,6 +731,8 @@ class Review(db.Model, TimestampMixin, SerializerMixin):
         Index('idx_review_shop_rating', 'shop_id', 'rating'),
         Index('idx_review_product_rating', 'product_id', 'rating'),
         Index('idx_review_user_shop', 'user_id', 'shop_id'),
+        Index('idx_review_shop_created', 'shop_id', 'created_at', 'id'),  # keyset listings
+        Index('idx_review_product_created', 'product_id', 'created_at', 'id'),
     )
 
     def __repr__(self):
@@ -1129,6 +1135,7 @@ class CachedAIInsight(db.Model, TimestampMixin):
     demand_summary = db.Column(db.Text)
     recommendation = db.Column(db.Text)
     data_hash = db.Column(db.String(128))  # Hash of source data to detect staleness
+    data_version = db.Column(db.Integer)  # ShopDataVersion.sales_version the insights were built from
     is_stale = db.Column(db.Boolean, default=False, index=True)
     expires_at = db.Column(db.DateTime, index=True)
     
@@ -1152,6 +1159,7 @@ class CachedAIInsight(db.Model, TimestampMixin):
             "demand_summary": self.demand_summary,
             "recommendation": self.recommendation,
             "is_stale": self.is_stale,
+            "data_version": self.data_version,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "expires_at": self.expires_at.isoformat() if self.expires_at else None
         }
@@ -1170,9 +1178,10 @@ class CachedForecast(db.Model, TimestampMixin):
     
     id = db.Column(db.Integer, primary_key=True)
     shop_id = db.Column(db.Integer, db.ForeignKey("shops.id"), nullable=False, index=True)
-    forecast_type = db.Column(db.String(50), nullable=False, index=True)  # 'quarterly', 'weekly_trend', 'monthly_trend', 'yearly_trend'
+    forecast_type = db.Column(db.String(50), nullable=False, index=True)  # 'quarterly', 'sales_summary', 'weekly_trend', 'monthly_trend', 'yearly_trend'
     forecast_json = db.Column(db.Text)  # Full forecast response as JSON
     data_hash = db.Column(db.String(128))  # Hash of source data to detect staleness
+    data_version = db.Column(db.Integer)  # ShopDataVersion.sales_version the forecast was built from
     is_stale = db.Column(db.Boolean, default=False, index=True)
     expires_at = db.Column(db.DateTime, index=True)
     
@@ -1194,11 +1203,88 @@ class CachedForecast(db.Model, TimestampMixin):
             "forecast_type": self.forecast_type,
             "forecast": json.loads(self.forecast_json) if self.forecast_json else {},
             "is_stale": self.is_stale,
+            "data_version": self.data_version,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "expires_at": self.expires_at.isoformat() if self.expires_at else None
         }
 
 
+# ============================================================================
+# SHOP DATA VERSION / DASHBOARD CACHE MODELS
+# ============================================================================
+
+class ShopDataVersion(db.Model):
+    """
+    Monotonic per-shop change counters used as cache keys.
+    `version` moves on any change visible on the dashboard (sales, inventory, reviews);
+    `sales_version` only when SalesData changes.
+    """
+    __tablename__ = "shop_data_versions"
+
+    shop_id = db.Column(db.Integer, db.ForeignKey("shops.id"), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    sales_version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ShopDataVersion shop={self.shop_id} v={self.version} sales_v={self.sales_version}>"
+
+
+class CachedDashboard(db.Model):
+    """
+    Computed shop dashboard payload shared across worker processes.
+    Valid while data_version matches ShopDataVersion.version and computed_on is today.
+    """
+    __tablename__ = "cached_dashboards"
+
+    shop_id = db.Column(db.Integer, db.ForeignKey("shops.id"), primary_key=True)
+    data_version = db.Column(db.Integer, nullable=False)
+    computed_on = db.Column(db.Date, nullable=False)
+    payload_json = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<CachedDashboard shop={self.shop_id} v={self.data_version}>"
+
+
+# ============================================================================
+# SALES ROLLUP MODEL
+# ============================================================================
+
+class SalesRollup(db.Model):
+    """
+    Pre-aggregated SalesData per shop at day, ISO-week and month grain, split by
+    product, category and region. Maintained by services.sales_rollup_service
+    whenever sales are upserted; analytics read periods instead of raw rows.
+    Missing dimensions are stored as 0 / '' so they take part in the unique key.
+    """
+    __tablename__ = "sales_rollups"
+
+    GRAINS = ("day", "week", "month")
+
+    id = db.Column(db.Integer, primary_key=True)
+    shop_id = db.Column(db.Integer, db.ForeignKey("shops.id"), nullable=False)
+    grain = db.Column(db.String(10), nullable=False)  # 'day', 'week' (ISO, Monday start), 'month'
+    period_start = db.Column(db.Date, nullable=False)
+    product_id = db.Column(db.Integer, nullable=False, default=0)
+    category = db.Column(db.String(100), nullable=False, default="")
+    region = db.Column(db.String(120), nullable=False, default="")
+    quantity_sold = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+    row_count = db.Column(db.Integer, nullable=False, default=0)  # SalesData rows folded in
+
+    __table_args__ = (
+        db.UniqueConstraint(
+            'shop_id', 'grain', 'period_start', 'product_id', 'category', 'region',
+            name='uq_sales_rollup_key'
+        ),
+        Index('idx_sales_rollup_shop_grain_period', 'shop_id', 'grain', 'period_start'),
+    )
+
+    def __repr__(self):
+        return f"<SalesRollup shop={self.shop_id} {self.grain} {self.period_start}>"
+
+
 # ============================================================================
 # SALES UPLOAD LOG MODEL
 # ============================================================================
@@ -1211,7 +1297,7 @@ class SalesUploadLog(db.Model, SerializerMixin):
     
     _serializable_fields = [
         'id', 'shop_id', 'file_name', 'file_hash', 'started_at', 'completed_at',
-        'duration_ms', 'status', 'rows_processed', 'sla_breached', 'duplicate_of', 'message'
+        'duration_ms', 'status', 'phase', 'rows_processed', 'sla_breached', 'duplicate_of', 'message'
     ]
 
     id = db.Column(db.Integer, primary_key=True)
@@ -1222,6 +1308,8 @@ class SalesUploadLog(db.Model, SerializerMixin):
     completed_at = db.Column(db.DateTime)
     duration_ms = db.Column(db.Integer)
     status = db.Column(db.String(40), default="in_progress", index=True)
+    # Pipeline step for background uploads: queued, parsing, upserting, saving, insights, done
+    phase = db.Column(db.String(40))
     rows_processed = db.Column(db.Integer, default=0)
     sla_breached = db.Column(db.Boolean, default=False, index=True)
     duplicate_of = db.Column(db.Integer, db.ForeignKey("sales_upload_log.id"))
@@ -1246,6 +1334,7 @@ class SalesUploadLog(db.Model, SerializerMixin):
             "completed_at": self.completed_at.isoformat() if self.completed_at else None,
             "duration_ms": self.duration_ms,
             "status": self.status,
+            "phase": self.phase,
             "rows_processed": self.rows_processed,
             "sla_breached": self.sla_breached,
             "duplicate_of": self.duplicate_of,
@@ -1257,6 +1346,63 @@ class SalesUploadLog(db.Model, SerializerMixin):
         return f"<SalesUploadLog shop={self.shop_id} status={self.status}>"
 
 
+class ForecastPrecomputeRun(db.Model, SerializerMixin):
+    """One pass of the off-peak forecast precompute scheduler (or a manual trigger)."""
+    __tablename__ = "forecast_precompute_runs"
+
+    _serializable_fields = [
+        'id', 'trigger', 'status', 'started_at', 'completed_at', 'duration_ms',
+        'shops_considered', 'shops_refreshed', 'shops_failed', 'message'
+    ]
+
+    id = db.Column(db.Integer, primary_key=True)
+    trigger = db.Column(db.String(20), nullable=False, default="schedule")  # schedule / manual
+    status = db.Column(db.String(20), nullable=False, default="queued", index=True)  # queued, running, completed, failed
+    started_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    completed_at = db.Column(db.DateTime)
+    duration_ms = db.Column(db.Integer)
+    shops_considered = db.Column(db.Integer, default=0)
+    shops_refreshed = db.Column(db.Integer, default=0)
+    shops_failed = db.Column(db.Integer, default=0)
+    message = db.Column(db.String(255))
+    # True while queued/running, NULL afterwards: the unique index admits one active run
+    # across all workers (NULLs never collide)
+    active_lock = db.Column(db.Boolean, unique=True)
+
+    shop_logs = db.relationship("ForecastPrecomputeShopLog", backref="run", lazy="dynamic",
+                                cascade="all, delete-orphan")
+
+    def __repr__(self):
+        return f"<ForecastPrecomputeRun {self.id} status={self.status}>"
+
+
+class ForecastPrecomputeShopLog(db.Model, SerializerMixin):
+    """Per-shop outcome and duration within a forecast precompute run."""
+    __tablename__ = "forecast_precompute_shop_logs"
+
+    _serializable_fields = [
+        'id', 'run_id', 'shop_id', 'sales_version', 'status', 'started_at',
+        'duration_ms', 'forecast_types', 'error'
+    ]
+
+    id = db.Column(db.Integer, primary_key=True)
+    run_id = db.Column(db.Integer, db.ForeignKey("forecast_precompute_runs.id"), nullable=False, index=True)
+    shop_id = db.Column(db.Integer, db.ForeignKey("shops.id"), nullable=False, index=True)
+    sales_version = db.Column(db.Integer)  # ShopDataVersion.sales_version the forecasts were built from
+    status = db.Column(db.String(20), nullable=False)  # success / failed
+    started_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    duration_ms = db.Column(db.Integer)
+    forecast_types = db.Column(db.String(255))  # comma-separated CachedForecast types written
+    error = db.Column(db.String(255))
+
+    __table_args__ = (
+        Index('idx_precompute_log_shop_status', 'shop_id', 'status'),
+    )
+
+    def __repr__(self):
+        return f"<ForecastPrecomputeShopLog run={self.run_id} shop={self.shop_id} status={self.status}>"
+
+
 # ============================================================================
 # DISTRIBUTOR SUPPLY MODEL
 # ============================================================================
@@ -1308,6 +1454,92 @@ class DistributorSupply(db.Model):
         }
 
 
+# ============================================================================
+# DISTRIBUTOR SUMMARY MODELS
+# ============================================================================
+
+class DistributorStockSummary(db.Model):
+    """
+    Materialized distributor link: one row per (distributor, shop, product) supplied,
+    with supply totals, shop/product details, inventory, unit sales and derived stock
+    status. Rebuilt per shop by services.distributor_summary_service whenever the
+    shop's data version moves; source_version is the version it was built from.
+    """
+    __tablename__ = "distributor_stock_summaries"
+
+    id = db.Column(db.Integer, primary_key=True)
+    distributor_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    shop_id = db.Column(db.Integer, db.ForeignKey("shops.id"), nullable=False, index=True)
+    product_id = db.Column(db.Integer, db.ForeignKey("products.id"), nullable=False)
+    first_supply_id = db.Column(db.Integer, nullable=False)  # display order
+    quantity_supplied = db.Column(db.Integer, nullable=False, default=0)
+    supply_value = db.Column(db.Float, nullable=False, default=0.0)
+    shop_name = db.Column(db.String(200))
+    shop_city = db.Column(db.String(100))
+    shop_lat = db.Column(db.Float)
+    shop_lon = db.Column(db.Float)
+    product_name = db.Column(db.String(200))
+    category = db.Column(db.String(100))
+    price = db.Column(db.Float, nullable=False, default=0.0)
+    qty_available = db.Column(db.Integer, nullable=False, default=0)
+    safety_stock = db.Column(db.Integer, nullable=False, default=0)
+    total_sold = db.Column(db.Integer, nullable=False, default=0)
+    transaction_count = db.Column(db.Integer, nullable=False, default=0)
+    last_sale_date = db.Column(db.Date)
+    stock_ratio = db.Column(db.Float, nullable=False, default=0.0)
+    status = db.Column(db.String(20), nullable=False)  # critical, low, healthy
+    stock_value = db.Column(db.Float, nullable=False, default=0.0)
+    sell_through_rate = db.Column(db.Float, nullable=False, default=0.0)
+    source_version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('distributor_id', 'shop_id', 'product_id', name='uq_distributor_stock_summary'),
+        Index('idx_distributor_stock_summary_order', 'distributor_id', 'first_supply_id'),
+    )
+
+    def __repr__(self):
+        return f"<DistributorStockSummary distributor={self.distributor_id} shop={self.shop_id} product={self.product_id}>"
+
+
+class DistributorProductSummary(db.Model):
+    """
+    Per (distributor, product) performance across shops, folded from
+    distributor_stock_summaries whenever one of the product's rows is rebuilt.
+    """
+    __tablename__ = "distributor_product_summaries"
+
+    id = db.Column(db.Integer, primary_key=True)
+    distributor_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey("products.id"), nullable=False)
+    first_supply_id = db.Column(db.Integer, nullable=False)
+    product_name = db.Column(db.String(200))
+    category = db.Column(db.String(100))
+    price = db.Column(db.Float, nullable=False, default=0.0)
+    qty_supplied = db.Column(db.Integer, nullable=False, default=0)
+    qty_sold = db.Column(db.Integer, nullable=False, default=0)
+    qty_available = db.Column(db.Integer, nullable=False, default=0)
+    safety_stock = db.Column(db.Integer, nullable=False, default=0)
+    stock_ratio = db.Column(db.Float, nullable=False, default=0.0)
+    stock_status = db.Column(db.String(20), nullable=False)
+    supply_value = db.Column(db.Float, nullable=False, default=0.0)
+    transaction_count = db.Column(db.Integer, nullable=False, default=0)
+    last_sale_date = db.Column(db.Date)
+    shop_names = db.Column(db.Text)  # JSON list, in supply order
+    shops_count = db.Column(db.Integer, nullable=False, default=0)
+    sell_through_rate = db.Column(db.Float, nullable=False, default=0.0)
+    avg_quantity_per_sale = db.Column(db.Float, nullable=False, default=0.0)
+    performance = db.Column(db.String(20), nullable=False)  # excellent, good, average, poor
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('distributor_id', 'product_id', name='uq_distributor_product_summary'),
+    )
+
+    def __repr__(self):
+        return f"<DistributorProductSummary distributor={self.distributor_id} product={self.product_id}>"
+
+
 # ============================================================================
 # DB SETUP & EVENT LISTENERS
 # ============================================================================
@@ -1322,3 +1554,136 @@ def init_db(app):
 def default_user_approved(mapper, connection, target):
     if target.role == "shop_owner" and target.approved is None:
         target.approved = False
+
+
+def get_dialect_insert():
+    """Dialect insert() supporting on_conflict_do_update (SQLite and PostgreSQL)."""
+    dialect = db.engine.dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        raise RuntimeError(f"Upserts are not supported for dialect '{dialect}'")
+    return insert
+
+
+def get_sqlite_pragmas(profile=None):
+    """
+    Resolve the PRAGMA settings for a SQLite tuning profile.
+    Uses the active Flask app config when available, otherwise the Config defaults.
+    """
+    from config import Config
+    from flask import current_app, has_app_context
+
+    source = current_app.config if has_app_context() else vars(Config)
+    profiles = source.get("SQLITE_PRAGMA_PROFILES") or Config.SQLITE_PRAGMA_PROFILES
+    profile = (profile or source.get("SQLITE_PRAGMA_PROFILE") or Config.SQLITE_PRAGMA_PROFILE).lower()
+    return profiles.get(profile, profiles.get("performance", {}))
+
+
+@event.listens_for(Engine, "connect")
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Apply the configured SQLite tuning profile on every new DBAPI connection.
+    Runs for all entrypoints (app.py, gunicorn, flask CLI, tests) since it hooks
+    the Engine class rather than a specific engine instance.
+    """
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in get_sqlite_pragmas().items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    except sqlite3.DatabaseError as e:
+        print(f"[SQLite] Could not apply PRAGMA settings: {e}")
+    finally:
+        cursor.close()
+
+
+# ============================================================================
+# FULL-TEXT SEARCH INDEX (SQLite FTS5)
+# ============================================================================
+
+# External-content FTS5 tables mirroring the searchable text columns. The index
+# stores only tokens; rows are read back from the source table by rowid (= id).
+FTS_INDEXES = {
+    "products_fts": {"table": "products", "columns": ("name", "category", "description")},
+    "shops_fts": {"table": "shops", "columns": ("name", "description", "city", "address")},
+    "product_catalog_fts": {"table": "product_catalog", "columns": ("product_name",)},
+}
+
+
+def _fts_ddl(index, spec):
+    """CREATE statements for one FTS5 table and the triggers keeping it in sync."""
+    table, cols = spec["table"], spec["columns"]
+    col_list = ", ".join(cols)
+    new_vals = ", ".join(f"new.{c}" for c in cols)
+    old_vals = ", ".join(f"old.{c}" for c in cols)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {index} USING fts5("
+        f"{col_list}, content='{table}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER IF NOT EXISTS {index}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {index}(rowid, {col_list}) VALUES (new.id, {new_vals}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {index}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {index}({index}, rowid, {col_list}) VALUES ('delete', old.id, {old_vals}); END",
+        # Only re-index when a searchable column changes (rating/stock updates skip it)
+        f"CREATE TRIGGER IF NOT EXISTS {index}_au AFTER UPDATE OF {col_list} ON {table} BEGIN "
+        f"INSERT INTO {index}({index}, rowid, {col_list}) VALUES ('delete', old.id, {old_vals}); "
+        f"INSERT INTO {index}(rowid, {col_list}) VALUES (new.id, {new_vals}); END",
+    ]
+
+
+def ensure_fts_index(connection, rebuild=False):
+    """
+    Create the FTS5 tables and sync triggers if missing.
+    Newly created indexes (or all of them with rebuild=True) are backfilled from
+    their source tables. Returns the list of index names that were (re)built.
+    """
+    if connection.dialect.name != "sqlite":
+        return []
+
+    from sqlalchemy import text
+
+    existing = {
+        row[0] for row in connection.execute(
+            text("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE '%_fts'")
+        )
+    }
+    built = []
+    try:
+        for index, spec in FTS_INDEXES.items():
+            for stmt in _fts_ddl(index, spec):
+                connection.execute(text(stmt))
+            if rebuild or index not in existing:
+                connection.execute(text(f"INSERT INTO {index}({index}) VALUES ('rebuild')"))
+                built.append(index)
+    except Exception as e:
+        # SQLite builds without FTS5 fall back to LIKE search (see utils.fts_search)
+        print(f"[FTS] Full-text index unavailable: {e}")
+    return built
+
+
+def drop_fts_index(connection):
+    """Drop the FTS5 tables and their triggers."""
+    if connection.dialect.name != "sqlite":
+        return
+
+    from sqlalchemy import text
+
+    for index in FTS_INDEXES:
+        for suffix in ("ai", "ad", "au"):
+            connection.execute(text(f"DROP TRIGGER IF EXISTS {index}_{suffix}"))
+        connection.execute(text(f"DROP TABLE IF EXISTS {index}"))
+
+
+@event.listens_for(db.Model.metadata, "after_create")
+def create_fts_index(target, connection, **kw):
+    ensure_fts_index(connection)
+
+
+@event.listens_for(db.Model.metadata, "before_drop")
+def remove_fts_index(target, connection, **kw):
+    drop_fts_index(connection)
@@ -1,6 +1,7 @@
 from flask import Blueprint, jsonify, request
 from models.model import db, ProductCatalog
 from utils.auth_utils import token_required, roles_required
+from utils.fts_search import apply_text_search
 import pandas as pd
 from pathlib import Path
 import random
@@ -110,7 +111,8 @@ def search_catalog():
         if usage:
             query = query.filter(ProductCatalog.usage.ilike(f"%{usage}%"))
         if keyword:
-            query = query.filter(ProductCatalog.product_name.ilike(f"%{keyword}%"))
+            # Ranked FTS5 match on product_name (ILIKE fallback without the index)
+            query = apply_text_search(query, ProductCatalog, "product_catalog_fts", keyword)
 
         results = query.limit(100).all()
 
@@ -15,11 +15,19 @@ from services.search_service import (
     get_search_service_status,
     rebuild_search_indices
 )
-from utils.response_helpers import success_response, error_response, handle_exceptions
+from utils.response_helpers import (
+    success_response, error_response, handle_exceptions,
+    keyset_paginate, keyset_order_by, approximate_count, cursor_pagination_info
+)
 from utils.auth_utils import token_required
+from utils.fts_search import apply_text_search
+from utils.inventory_utils import ensure_keyset_indexes
 
 customer_bp = Blueprint('customer', __name__)
 
+# Cursor-paginated listings stop counting past this many rows
+APPROX_TOTAL_CAP = 1000
+
 
 # ============================================================================
 # SEARCH ENDPOINTS
@@ -606,9 +614,17 @@ def get_shop_products(shop_id):
 @customer_bp.route('/products', methods=['GET'])
 @handle_exceptions("Browse Products")
 def browse_products():
-    """Browse products with filtering and pagination."""
+    """
+    Browse products with filtering and pagination.
+    
+    Pass `cursor` (empty for the first page, then the returned `next_cursor`)
+    for keyset pagination; `include_total=true` adds an approximate total.
+    Requests without `cursor` keep the legacy page/offset pagination.
+    """
+    cursor = request.args.get('cursor')
     page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 20, type=int)
+    per_page = max(1, min(request.args.get('per_page', 20, type=int), 100))
+    include_total = request.args.get('include_total', 'false').lower() == 'true'
     category = request.args.get('category')
     search = request.args.get('search')
     min_price = request.args.get('min_price', type=float)
@@ -617,20 +633,15 @@ def browse_products():
     lat = request.args.get('lat', type=float)
     lon = request.args.get('lon', type=float)
     
+    ensure_keyset_indexes()
     query = Product.query.filter(Product.is_active == True)
     
     if category:
         query = query.filter(Product.category.ilike(f'%{category}%'))
     
     if search:
-        pattern = f'%{search}%'
-        query = query.filter(
-            or_(
-                Product.name.ilike(pattern),
-                Product.description.ilike(pattern),
-                Product.category.ilike(pattern)
-            )
-        )
+        # FTS5 filter only; ordering stays on the requested sort keys
+        query = apply_text_search(query, Product, 'products_fts', search, ranked=False)
     
     if min_price is not None:
         query = query.filter(Product.price >= min_price)
@@ -638,27 +649,30 @@ def browse_products():
     if max_price is not None:
         query = query.filter(Product.price <= max_price)
     
-    # Sorting
-    if sort_by == 'price_asc':
-        query = query.order_by(Product.price.asc())
-    elif sort_by == 'price_desc':
-        query = query.order_by(Product.price.desc())
-    elif sort_by == 'newest':
-        query = query.order_by(Product.created_at.desc())
-    elif sort_by == 'distance' and lat is not None and lon is not None:
+    # Sorting - every order ends with Product.id so (sort value, id) is a unique keyset
+    sort_keys = _product_sort_keys(sort_by, lat, lon)
+    if sort_by == 'distance' and lat is not None and lon is not None:
         # Join with Shop to access location
         query = query.join(Shop)
-        # Calculate squared Euclidean distance for sorting (faster than Haversine and sufficient for sorting)
-        # (lat1-lat2)^2 + (lon1-lon2)^2
-        distance_expr = func.pow(Shop.lat - lat, 2) + func.pow(Shop.lon - lon, 2)
-        query = query.order_by(distance_expr.asc())
-    else:
-        query = query.order_by(Product.rating.desc(), Product.is_trending.desc())
     
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+    if cursor is not None:
+        # Keyset pagination: seek past the previous page's last row, no OFFSET / COUNT(*)
+        items, next_cursor = keyset_paginate(
+            query, sort_keys[0][0], sort_keys, cursor=cursor or None, per_page=per_page
+        )
+        total, total_is_exact = (None, None)
+        if include_total:
+            total, total_is_exact = approximate_count(query, cap=APPROX_TOTAL_CAP)
+        pagination_info = cursor_pagination_info(next_cursor, per_page, total, total_is_exact)
+    else:
+        # Legacy page/offset mode for existing clients
+        query = query.order_by(*keyset_order_by(sort_keys))
+        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        items = pagination.items
+        pagination_info = None
     
     products = []
-    for p in pagination.items:
+    for p in items:
         product_dict = p.to_card_dict()
         product_dict['shop'] = p.shop.to_card_dict() if p.shop else None
         
@@ -671,6 +685,16 @@ def browse_products():
         product_dict['stock_qty'] = stock_qty
         products.append(product_dict)
 
+    if pagination_info is not None:
+        return jsonify({
+            'status': 'success',
+            'products': products,
+            'pagination': pagination_info,
+            'next_cursor': pagination_info['next_cursor'],
+            'has_more': pagination_info['has_next'],
+            'total': pagination_info.get('total')
+        }), 200
+
     return jsonify({
         'status': 'success',
         'products': products,
@@ -680,6 +704,27 @@ def browse_products():
     }), 200
 
 
+def _product_sort_keys(sort_by, lat=None, lon=None):
+    """Keyset sort keys (name, expression, descending) for product listings."""
+    if sort_by == 'price_asc':
+        return [('price_asc', Product.price, False), ('id', Product.id, False)]
+    if sort_by == 'price_desc':
+        return [('price_desc', Product.price, True), ('id', Product.id, True)]
+    # Raw columns (NULLs sort last) so indexes such as idx_product_created serve the seek
+    if sort_by == 'newest':
+        return [('newest', Product.created_at, True), ('id', Product.id, True)]
+    if sort_by == 'distance' and lat is not None and lon is not None:
+        # Squared Euclidean distance is sufficient for ordering (cheaper than Haversine);
+        # shops without coordinates give NULL and come last
+        distance_expr = func.pow(Shop.lat - lat, 2) + func.pow(Shop.lon - lon, 2)
+        return [('distance', distance_expr, False), ('id', Product.id, False)]
+    return [
+        ('rating', Product.rating, True),
+        ('trending', Product.is_trending, True),
+        ('id', Product.id, True)
+    ]
+
+
 @customer_bp.route('/products/<int:product_id>', methods=['GET'])
 @handle_exceptions("Product Details")
 def get_product_details(product_id):
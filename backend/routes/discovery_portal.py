@@ -5,6 +5,7 @@ from models.model import db, Product, Shop, SalesData
 from sqlalchemy import or_, func
 from utils.image_utils import resolve_product_image, resolve_shop_image
 from utils.performance_utils import batch_ai_captions, performance_monitor
+from utils.gazetteer import city_coordinates
 from config import Config
 import requests
 from decimal import Decimal
@@ -156,14 +157,21 @@ def get_popular_shops():
                     shops_to_update.append({"id": shop.id, "lat": lat, "lon": lon})
                     shop.lat, shop.lon = lat, lon
 
+            lat, lon = shop.lat, shop.lon
+            if lat is None or lon is None:
+                # City centre from the local gazetteer; not stored, so a real geocode can still fill it
+                coords = city_coordinates(shop.city or shop.location)
+                if coords:
+                    lat, lon = coords["lat"], coords["lon"]
+
             results.append({
                 "id": shop.id,
                 "name": shop.name,
                 "description": shop.description or "",
                 "rating": round(shop.rating or 0, 1),
                 "location": shop.location or "",
-                "lat": shop.lat,
-                "lon": shop.lon,
+                "lat": lat,
+                "lon": lon,
                 "image": resolve_shop_image(shop)
             })
 
@@ -4,15 +4,25 @@ import pandas as pd
 from datetime import datetime
 import os
 import io
-from sqlalchemy import func
 from services.ai_providers import get_provider
 from utils.auth_utils import token_required, roles_required
 from utils.performance_utils import performance_monitor
-from utils.file_processing_utils import safe_file_processing, FileProcessingError
+from utils.file_processing_utils import FileProcessingError
+from utils.gazetteer import city_coordinates
 from utils.validation import  validate_file_upload
-from services.prophet_service import prophet_manager
+from services.prophet_service import prophet_manager, resolve_uncertainty_mode
+from services.forecast_executor import forecast_executor
+from services.distributor_analytics_service import get_distributor_analytics
+from services.distributor_chat_context_service import distributor_chat_context
+from services.regional_demand_service import (
+    load_regional_upload,
+    parse_filters,
+    region_summary,
+    UploadSnapshotNotFound,
+)
 from services.forecasting_service import (
     compute_regional_summary,
+    forecast_sales,
     top_trending_products,
 )
 from services.ai_service import (
@@ -20,87 +30,11 @@ from services.ai_service import (
     generate_recommendation,
 )
 from routes.pdf_service import generate_pdf_report
-from models.model import db, Product, SalesData, Shop, Inventory, DistributorSupply, User
+from models.model import Product, SalesData
+from config import Config
 
 distributor_bp = Blueprint("distributor", __name__)
 
-# Indian city coordinates for heatmap
-INDIAN_CITY_COORDINATES = {
-    # Major cities
-    "Mumbai": {"lat": 19.0760, "lon": 72.8777},
-    "Delhi": {"lat": 28.6139, "lon": 77.2090},
-    "Bangalore": {"lat": 12.9716, "lon": 77.5946},
-    "Bengaluru": {"lat": 12.9716, "lon": 77.5946},
-    "Chennai": {"lat": 13.0827, "lon": 80.2707},
-    "Kolkata": {"lat": 22.5726, "lon": 88.3639},
-    "Hyderabad": {"lat": 17.3850, "lon": 78.4867},
-    "Pune": {"lat": 18.5204, "lon": 73.8567},
-    "Ahmedabad": {"lat": 23.0225, "lon": 72.5714},
-    "Jaipur": {"lat": 26.9124, "lon": 75.7873},
-    "Surat": {"lat": 21.1702, "lon": 72.8311},
-    "Lucknow": {"lat": 26.8467, "lon": 80.9462},
-    "Kanpur": {"lat": 26.4499, "lon": 80.3319},
-    "Nagpur": {"lat": 21.1458, "lon": 79.0882},
-    "Indore": {"lat": 22.7196, "lon": 75.8577},
-    "Thane": {"lat": 19.2183, "lon": 72.9781},
-    "Bhopal": {"lat": 23.2599, "lon": 77.4126},
-    "Visakhapatnam": {"lat": 17.6868, "lon": 83.2185},
-    "Patna": {"lat": 25.5941, "lon": 85.1376},
-    "Vadodara": {"lat": 22.3072, "lon": 73.1812},
-    "Ghaziabad": {"lat": 28.6692, "lon": 77.4538},
-    "Ludhiana": {"lat": 30.9010, "lon": 75.8573},
-    "Agra": {"lat": 27.1767, "lon": 78.0081},
-    "Nashik": {"lat": 19.9975, "lon": 73.7898},
-    "Faridabad": {"lat": 28.4089, "lon": 77.3178},
-    "Meerut": {"lat": 28.9845, "lon": 77.7064},
-    "Rajkot": {"lat": 22.3039, "lon": 70.8022},
-    "Varanasi": {"lat": 25.3176, "lon": 82.9739},
-    "Srinagar": {"lat": 34.0837, "lon": 74.7973},
-    "Aurangabad": {"lat": 19.8762, "lon": 75.3433},
-    "Dhanbad": {"lat": 23.7957, "lon": 86.4304},
-    "Amritsar": {"lat": 31.6340, "lon": 74.8723},
-    "Navi Mumbai": {"lat": 19.0330, "lon": 73.0297},
-    "Allahabad": {"lat": 25.4358, "lon": 81.8463},
-    "Prayagraj": {"lat": 25.4358, "lon": 81.8463},
-    "Ranchi": {"lat": 23.3441, "lon": 85.3096},
-    "Howrah": {"lat": 22.5958, "lon": 88.2636},
-    "Coimbatore": {"lat": 11.0168, "lon": 76.9558},
-    "Jabalpur": {"lat": 23.1815, "lon": 79.9864},
-    "Gwalior": {"lat": 26.2183, "lon": 78.1828},
-    "Vijayawada": {"lat": 16.5062, "lon": 80.6480},
-    "Jodhpur": {"lat": 26.2389, "lon": 73.0243},
-    "Madurai": {"lat": 9.9252, "lon": 78.1198},
-    "Raipur": {"lat": 21.2514, "lon": 81.6296},
-    "Kota": {"lat": 25.2138, "lon": 75.8648},
-    "Chandigarh": {"lat": 30.7333, "lon": 76.7794},
-    "Guwahati": {"lat": 26.1445, "lon": 91.7362},
-    "Solapur": {"lat": 17.6599, "lon": 75.9064},
-    "Hubli": {"lat": 15.3647, "lon": 75.1240},
-    "Tiruchirappalli": {"lat": 10.7905, "lon": 78.7047},
-    "Bareilly": {"lat": 28.3670, "lon": 79.4304},
-    "Mysore": {"lat": 12.2958, "lon": 76.6394},
-    "Mysuru": {"lat": 12.2958, "lon": 76.6394},
-    "Tiruppur": {"lat": 11.1085, "lon": 77.3411},
-    "Gurgaon": {"lat": 28.4595, "lon": 77.0266},
-    "Gurugram": {"lat": 28.4595, "lon": 77.0266},
-    "Noida": {"lat": 28.5355, "lon": 77.3910},
-    "Salem": {"lat": 11.6643, "lon": 78.1460},
-    "Bhubaneswar": {"lat": 20.2961, "lon": 85.8245},
-    "Warangal": {"lat": 17.9784, "lon": 79.5941},
-    "Guntur": {"lat": 16.3067, "lon": 80.4365},
-    "Bikaner": {"lat": 28.0229, "lon": 73.3119},
-    "Kochi": {"lat": 9.9312, "lon": 76.2673},
-    "Cochin": {"lat": 9.9312, "lon": 76.2673},
-    "Thiruvananthapuram": {"lat": 8.5241, "lon": 76.9366},
-    "Trivandrum": {"lat": 8.5241, "lon": 76.9366},
-    # Region names (fallback)
-    "North": {"lat": 28.6139, "lon": 77.2090},
-    "South": {"lat": 12.9716, "lon": 77.5946},
-    "East": {"lat": 22.5726, "lon": 88.3639},
-    "West": {"lat": 19.0760, "lon": 72.8777},
-    "Central": {"lat": 23.2599, "lon": 77.4126},
-}
-
 # Global AI provider
 ai_provider = None
 try:
@@ -111,6 +45,27 @@ except Exception as e:
     ai_provider = None
 
 
+def _regional_upload_from_request():
+    """
+    Resolve the parsed upload for a regional-demand request: a new `file`, or the
+    `file_hash` returned by an earlier response (filter changes need no re-upload).
+    Returns (upload, None) or (None, error response).
+    """
+    file = request.files.get("file")
+    file_hash = request.values.get("file_hash")
+    if not file and not file_hash:
+        return None, (jsonify({"status": "error", "message": "No input file provided"}), 400)
+    try:
+        return load_regional_upload(file=file, file_hash=file_hash), None
+    except UploadSnapshotNotFound:
+        return None, (jsonify({
+            "status": "error",
+            "message": "Uploaded file has expired, please upload it again"
+        }), 404)
+    except FileProcessingError as e:
+        return None, (jsonify({"status": "error", "message": str(e)}), 400)
+
+
 # POST: Regional Demand & AI Forecast Insights
 @distributor_bp.route("/regional-demand", methods=["POST"])
 @token_required
@@ -122,32 +77,17 @@ def get_regional_demand(current_user):
     Combines Prophet forecasting and Gemini AI-generated business insights.
     """
     try:
-        file = request.files.get("file")
-
-        if not file:
-            return jsonify({"status": "error", "message": "No input file provided"}), 400
-        
-        # Define required columns for sales data
-        required_columns = ['Date', 'Region', 'Product', 'Sales', 'Quantity']
-        
-        # Process file safely with optimizations
-        file_result = safe_file_processing(file, file.filename.split('.')[-1], required_columns)
-        
-        if file_result['status'] == 'error':
-            return jsonify({
-                "status": "error", 
-                "message": file_result['message']
-            }), 400
-        
-        df = file_result['data']
-        
-        # Log processing stats for monitoring
-        print(f"[PERF] Processed {file_result['rows']} rows, {file_result['memory_usage']} bytes")
+        upload, error = _regional_upload_from_request()
+        if error:
+            return error
 
         # Data processing through forecasting services
-        regional_data = compute_regional_summary(df)
-        trending_products = top_trending_products(df)
-        forecasts = prophet_manager.forecast_sales(df)
+        regional_data = compute_regional_summary(upload.groups)
+        trending_products = top_trending_products(upload.rows.copy())
+        # Per-product weekly forecasts on the forecast pool; products still fitting
+        # come back as 'computing' entries and the client re-posts with file_hash
+        forecasts = forecast_sales(upload.rows)
+        pending = [f for f in forecasts if f["status"] != "ready"]
 
         # AI Insights from Gemini
         top_product = trending_products[0]["Product"] if trending_products else "Fabric"
@@ -161,9 +101,18 @@ def get_regional_demand(current_user):
             "top_products": trending_products,
             "forecast": forecasts,
             "generated_at": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
-            "analyst": current_user.get("username")
+            "analyst": current_user.get("username"),
+            "file_hash": upload.file_hash
         }
 
+        if pending:
+            return jsonify({
+                "status": "computing",
+                "message": f"Forecasts for {len(pending)} products are being computed; retry shortly",
+                "retry_after_seconds": 5,
+                "data": insights
+            }), 202
+
         return jsonify({
             "status": "success",
             "message": "AI regional demand insights generated successfully.",
@@ -194,67 +143,27 @@ def get_regional_demand_heatmap(current_user):
     Generate interactive heatmap data from uploaded CSV.
     Returns region coordinates with demand intensity for map visualization.
     Expected CSV columns: Date, Product, Region, Sales, Quantity
+    Send `file_hash` from a previous response instead of `file` to change the
+    optional filters (region, product, start_date, end_date) without re-uploading.
     """
     try:
-        file = request.files.get("file")
+        upload, error = _regional_upload_from_request()
+        if error:
+            return error
+        try:
+            filters = parse_filters(request.values)
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+
+        # Aggregated per (region, filters) from the upload snapshot, not the raw file
+        region_summary_df = region_summary(upload, filters)
 
-        if not file:
-            return jsonify({"status": "error", "message": "No input file provided"}), 400
-        
-        # Define required columns for heatmap data
-        required_columns = ['Date', 'Region', 'Product', 'Sales', 'Quantity']
-        
-        # Process file safely
-        file_result = safe_file_processing(file, file.filename.split('.')[-1], required_columns)
-        
-        if file_result['status'] == 'error':
-            return jsonify({
-                "status": "error", 
-                "message": file_result['message']
-            }), 400
-        
-        df = file_result['data']
-        
-        # Convert Sales and Quantity to numeric
-        df['Sales'] = pd.to_numeric(df['Sales'], errors='coerce').fillna(0)
-        df['Quantity'] = pd.to_numeric(df['Quantity'], errors='coerce').fillna(0)
-        
-        # Aggregate data by region
-        region_summary = df.groupby('Region').agg({
-            'Sales': 'sum',
-            'Quantity': 'sum'
-        }).reset_index()
-        
-        # Get top product per region
-        top_products_by_region = df.groupby(['Region', 'Product'])['Sales'].sum().reset_index()
-        top_products_by_region = top_products_by_region.loc[
-            top_products_by_region.groupby('Region')['Sales'].idxmax()
-        ][['Region', 'Product']].rename(columns={'Product': 'TopProduct'})
-        
-        region_summary = region_summary.merge(top_products_by_region, on='Region', how='left')
-        
-        # Calculate heatmap intensity (normalized 0-1)
-        min_sales = region_summary['Sales'].min()
-        max_sales = region_summary['Sales'].max()
-        if max_sales > min_sales:
-            region_summary['Intensity'] = (region_summary['Sales'] - min_sales) / (max_sales - min_sales)
-        else:
-            region_summary['Intensity'] = 0.5
-        
         # Build heatmap points with coordinates
         heatmap_points = []
-        for _, row in region_summary.iterrows():
+        for _, row in region_summary_df.iterrows():
             region_name = row['Region'].strip().title()
-            
-            # Get coordinates from predefined list
-            coords = INDIAN_CITY_COORDINATES.get(region_name)
-            if not coords:
-                # Try matching with different cases
-                for key in INDIAN_CITY_COORDINATES:
-                    if key.lower() == region_name.lower():
-                        coords = INDIAN_CITY_COORDINATES[key]
-                        break
-            
+            coords = city_coordinates(region_name)
+
             if coords:
                 heatmap_points.append({
                     "region": region_name,
@@ -272,9 +181,9 @@ def get_regional_demand_heatmap(current_user):
         heatmap_points.sort(key=lambda x: x['sales'], reverse=True)
         
         # Calculate summary statistics
-        total_sales = float(region_summary['Sales'].sum())
-        total_quantity = int(region_summary['Quantity'].sum())
-        avg_sales_per_region = float(region_summary['Sales'].mean())
+        total_sales = float(region_summary_df['Sales'].sum())
+        total_quantity = int(region_summary_df['Quantity'].sum())
+        avg_sales_per_region = float(region_summary_df['Sales'].mean()) if not region_summary_df.empty else 0.0
         
         # Determine demand level for each region
         for point in heatmap_points:
@@ -302,6 +211,15 @@ def get_regional_demand_heatmap(current_user):
                     "mediumDemandRegions": len([p for p in heatmap_points if p['demandLevel'] == 'medium']),
                     "lowDemandRegions": len([p for p in heatmap_points if p['demandLevel'] == 'low'])
                 },
+                "fileHash": upload.file_hash,
+                "filters": {
+                    "region": list(filters["regions"]),
+                    "product": list(filters["products"]),
+                    "start_date": filters["start_date"],
+                    "end_date": filters["end_date"],
+                },
+                "filterOptions": upload.filter_options(),
+                "source": upload.source,
                 "generatedAt": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
             }
         }), 200
@@ -338,18 +256,10 @@ def get_stock_heatmap(current_user):
         if not distributor_id:
             return jsonify({"status": "error", "message": "User ID not found"}), 400
         
-        # Get all products this distributor supplies and to which shops
-        distributor_supplies = db.session.query(
-            DistributorSupply.shop_id,
-            DistributorSupply.product_id,
-            DistributorSupply.quantity_supplied,
-            DistributorSupply.unit_price,
-            DistributorSupply.status
-        ).filter(
-            DistributorSupply.distributor_id == distributor_id
-        ).all()
-        
-        if not distributor_supplies:
+        # Every linked shop/product in one grouped query (memoized by data version)
+        heatmap = get_distributor_analytics(distributor_id).stock_heatmap()
+        
+        if not heatmap:
             return jsonify({
                 "status": "success",
                 "message": "No shops found for this distributor",
@@ -371,250 +281,22 @@ def get_stock_heatmap(current_user):
                 }
             }), 200
         
-        # Build lookup of which products go to which shops
-        shop_product_map = {}  # shop_id -> list of product_ids
-        product_supply_info = {}  # product_id -> supply info
-        for supply in distributor_supplies:
-            if supply.shop_id not in shop_product_map:
-                shop_product_map[supply.shop_id] = []
-            shop_product_map[supply.shop_id].append(supply.product_id)
-            product_supply_info[supply.product_id] = {
-                'quantity_supplied': supply.quantity_supplied,
-                'unit_price': supply.unit_price,
-                'status': supply.status
-            }
-        
-        shop_ids = list(shop_product_map.keys())
-        product_ids = list(set([p for products in shop_product_map.values() for p in products]))
-        
-        # Get shops with their details
-        shops = Shop.query.filter(Shop.id.in_(shop_ids)).all()
-        shops_dict = {s.id: s for s in shops}
-        
-        # Get all relevant products
-        products = Product.query.filter(Product.id.in_(product_ids)).all()
-        products_dict = {p.id: p for p in products}
-        
-        # Get inventory for all relevant products
-        inventories = Inventory.query.filter(Inventory.product_id.in_(product_ids)).all()
-        inventory_dict = {i.product_id: i for i in inventories}
-        
-        # Get sales data for these products (aggregate sales performance - units only, not revenue)
-        sales_data = db.session.query(
-            SalesData.product_id,
-            SalesData.shop_id,
-            func.sum(SalesData.quantity_sold).label('total_sold'),
-            func.count(SalesData.id).label('transaction_count')
-        ).filter(
-            SalesData.product_id.in_(product_ids)
-        ).group_by(SalesData.product_id, SalesData.shop_id).all()
-        
-        # Build sales lookup: (product_id, shop_id) -> sales info (no revenue - privacy)
-        sales_lookup = {}
-        for sale in sales_data:
-            key = (sale.product_id, sale.shop_id)
-            sales_lookup[key] = {
-                'total_sold': sale.total_sold or 0,
-                'transaction_count': sale.transaction_count or 0
-            }
-        
-        heatmap_points = []
-        all_critical_products = []
-        all_low_products = []
-        total_products = 0
-        total_stock_value = 0
-        
-        for shop_id, supplied_product_ids in shop_product_map.items():
-            shop = shops_dict.get(shop_id)
-            if not shop:
-                continue
-            
-            # Calculate stock health for products supplied to this shop
-            shop_stock_data = []
-            critical_products = []
-            low_products = []
-            critical_count = 0
-            low_count = 0
-            healthy_count = 0
-            shop_total_stock = 0
-            shop_total_value = 0
-            shop_total_sold = 0
-            
-            for product_id in set(supplied_product_ids):  # Remove duplicates
-                product = products_dict.get(product_id)
-                if not product:
-                    continue
-                    
-                inventory = inventory_dict.get(product_id)
-                supply_info = product_supply_info.get(product_id, {})
-                sales_info = sales_lookup.get((product_id, shop_id), {'total_sold': 0, 'transaction_count': 0})
-                
-                qty_available = inventory.qty_available if inventory else 0
-                safety_stock = inventory.safety_stock if inventory else 0
-                
-                # Determine stock health
-                if safety_stock > 0:
-                    stock_ratio = qty_available / safety_stock
-                else:
-                    stock_ratio = 1.0 if qty_available > 0 else 0
-                
-                # Categorize: critical (<50% of safety), low (50-100% of safety), healthy (>100%)
-                if stock_ratio < 0.5:
-                    critical_count += 1
-                    status = 'critical'
-                elif stock_ratio < 1.0:
-                    low_count += 1
-                    status = 'low'
-                else:
-                    healthy_count += 1
-                    status = 'healthy'
-                
-                shop_total_stock += qty_available
-                shop_total_value += float(product.price or 0) * qty_available
-                shop_total_sold += sales_info['total_sold']
-                
-                product_detail = {
-                    "product_id": product.id,
-                    "product_name": product.name,
-                    "category": product.category,
-                    "qty_available": qty_available,
-                    "safety_stock": safety_stock,
-                    "stock_ratio": round(stock_ratio, 2),
-                    "status": status,
-                    "price": float(product.price or 0),
-                    "quantity_supplied": supply_info.get('quantity_supplied', 0),
-                    "total_sold": sales_info['total_sold'],
-                    "sell_through_rate": round((sales_info['total_sold'] / supply_info.get('quantity_supplied', 1)) * 100, 1) if supply_info.get('quantity_supplied', 0) > 0 else 0
-                }
-                
-                shop_stock_data.append(product_detail)
-                
-                # Track critical and low products for global list
-                if status == 'critical':
-                    critical_products.append({
-                        **product_detail,
-                        "shop_id": shop_id,
-                        "shop_name": shop.name,
-                        "region": shop.city or "Unknown"
-                    })
-                elif status == 'low':
-                    low_products.append({
-                        **product_detail,
-                        "shop_id": shop_id,
-                        "shop_name": shop.name,
-                        "region": shop.city or "Unknown"
-                    })
-            
-            # Sort stock data by status priority (critical first) then by stock ratio
-            status_priority = {'critical': 0, 'low': 1, 'healthy': 2}
-            shop_stock_data.sort(key=lambda x: (status_priority.get(x['status'], 3), x['stock_ratio']))
-            
-            all_critical_products.extend(critical_products)
-            all_low_products.extend(low_products)
-            
-            total_products += len(set(supplied_product_ids))
-            total_stock_value += shop_total_value
-            
-            # Calculate overall shop stock health score (0-1, lower is worse)
-            total_items = critical_count + low_count + healthy_count
-            if total_items > 0:
-                # Weighted score: critical=0, low=0.5, healthy=1
-                health_score = (critical_count * 0 + low_count * 0.5 + healthy_count * 1) / total_items
-            else:
-                health_score = 1.0
-            
-            # Determine stock level for color coding
-            if health_score < 0.5:
-                stock_level = 'critical'
-                color = '#dc3545'  # Red
-            elif health_score < 0.8:
-                stock_level = 'low'
-                color = '#ffc107'  # Yellow
-            else:
-                stock_level = 'healthy'
-                color = '#28a745'  # Green
-            
-            # Get top selling product for this shop
-            top_selling = max(shop_stock_data, key=lambda x: x['total_sold']) if shop_stock_data else None
-            top_product_name = top_selling['product_name'] if top_selling else "N/A"
-            
-            # Use shop coordinates or fallback to city coordinates
-            lat = shop.lat
-            lon = shop.lon
-            
-            if not lat or not lon:
-                city = (shop.city or "").strip().title()
-                coords = INDIAN_CITY_COORDINATES.get(city)
+        # Shops without stored coordinates fall back to their city
+        for point in heatmap["heatmapPoints"]:
+            if not point["lat"] or not point["lon"]:
+                coords = city_coordinates(point["region"])
                 if coords:
-                    lat = coords["lat"]
-                    lon = coords["lon"]
+                    point["lat"] = coords["lat"]
+                    point["lon"] = coords["lon"]
                 else:
-                    lat = 20.5937
-                    lon = 78.9629
-            
-            heatmap_points.append({
-                "shopId": shop.id,
-                "shopName": shop.name,
-                "region": shop.city or "Unknown",
-                "lat": lat,
-                "lon": lon,
-                "totalProducts": len(set(supplied_product_ids)),
-                "totalStock": shop_total_stock,
-                "stockValue": round(shop_total_value, 2),
-                "totalSold": shop_total_sold,
-                "criticalItems": critical_count,
-                "lowItems": low_count,
-                "healthyItems": healthy_count,
-                "healthScore": round(health_score, 2),
-                "stockLevel": stock_level,
-                "color": color,
-                "topProduct": top_product_name,
-                "criticalProducts": [p['product_name'] for p in critical_products[:3]],
-                "lowProducts": [p['product_name'] for p in low_products[:3]],
-                "stockDetails": shop_stock_data  # All products with full details
-            })
-        
-        # Sort heatmap points by health score (worst first)
-        heatmap_points.sort(key=lambda x: x['healthScore'])
-        
-        # Sort critical products by stock ratio (most critical first)
-        all_critical_products.sort(key=lambda x: x['stock_ratio'])
-        all_low_products.sort(key=lambda x: x['stock_ratio'])
-        
-        # Calculate summary
-        critical_shops = len([p for p in heatmap_points if p['stockLevel'] == 'critical'])
-        low_shops = len([p for p in heatmap_points if p['stockLevel'] == 'low'])
-        healthy_shops = len([p for p in heatmap_points if p['stockLevel'] == 'healthy'])
-        
-        # Build product category summary
-        category_summary = {}
-        for p in all_critical_products + all_low_products:
-            cat = p.get('category', 'Unknown')
-            if cat not in category_summary:
-                category_summary[cat] = {'critical': 0, 'low': 0}
-            if p['status'] == 'critical':
-                category_summary[cat]['critical'] += 1
-            else:
-                category_summary[cat]['low'] += 1
+                    point["lat"] = 20.5937
+                    point["lon"] = 78.9629
         
         return jsonify({
             "status": "success",
             "message": "Stock heatmap data generated successfully",
             "data": {
-                "heatmapPoints": heatmap_points,
-                "criticalProducts": all_critical_products[:20],  # Top 20 most critical
-                "lowProducts": all_low_products[:15],  # Top 15 low stock
-                "categorySummary": category_summary,
-                "summary": {
-                    "totalShops": len(heatmap_points),
-                    "criticalStockShops": critical_shops,
-                    "lowStockShops": low_shops,
-                    "healthyStockShops": healthy_shops,
-                    "totalProducts": total_products,
-                    "totalStockValue": round(total_stock_value, 2),
-                    "criticalProductCount": len(all_critical_products),
-                    "lowProductCount": len(all_low_products)
-                },
+                **heatmap,
                 "generatedAt": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
             }
         }), 200
@@ -647,20 +329,10 @@ def get_product_performance(current_user):
         if not distributor_id:
             return jsonify({"status": "error", "message": "User ID not found"}), 400
         
-        # Get all products this distributor supplies
-        distributor_supplies = db.session.query(
-            DistributorSupply.product_id,
-            DistributorSupply.shop_id,
-            DistributorSupply.quantity_supplied,
-            DistributorSupply.unit_price,
-            DistributorSupply.total_value,
-            DistributorSupply.supply_date,
-            DistributorSupply.status
-        ).filter(
-            DistributorSupply.distributor_id == distributor_id
-        ).all()
-        
-        if not distributor_supplies:
+        # Supply, inventory and unit sales of every linked product in one grouped query
+        performance = get_distributor_analytics(distributor_id).product_performance()
+        
+        if not performance:
             return jsonify({
                 "status": "success",
                 "message": "No supply data found",
@@ -678,179 +350,11 @@ def get_product_performance(current_user):
                 }
             }), 200
         
-        # Build supply lookup
-        product_supply = {}  # product_id -> {total_supplied, shops, ...}
-        all_product_ids = set()
-        all_shop_ids = set()
-        
-        for supply in distributor_supplies:
-            all_product_ids.add(supply.product_id)
-            all_shop_ids.add(supply.shop_id)
-            
-            if supply.product_id not in product_supply:
-                product_supply[supply.product_id] = {
-                    'total_supplied': 0,
-                    'total_value': 0,
-                    'shops': set(),
-                    'unit_price': supply.unit_price or 0
-                }
-            product_supply[supply.product_id]['total_supplied'] += supply.quantity_supplied or 0
-            product_supply[supply.product_id]['total_value'] += float(supply.total_value or 0)
-            product_supply[supply.product_id]['shops'].add(supply.shop_id)
-        
-        # Get product details
-        products = Product.query.filter(Product.id.in_(list(all_product_ids))).all()
-        products_dict = {p.id: p for p in products}
-        
-        # Get shop names
-        shops = Shop.query.filter(Shop.id.in_(list(all_shop_ids))).all()
-        shops_dict = {s.id: s.name for s in shops}
-        
-        # Get inventory for all products
-        inventories = Inventory.query.filter(Inventory.product_id.in_(list(all_product_ids))).all()
-        inventory_dict = {i.product_id: i for i in inventories}
-        
-        # Get aggregated sales data for these products (units only, not revenue - privacy)
-        sales_data = db.session.query(
-            SalesData.product_id,
-            func.sum(SalesData.quantity_sold).label('total_sold'),
-            func.count(SalesData.id).label('transaction_count'),
-            func.avg(SalesData.quantity_sold).label('avg_quantity'),
-            func.max(SalesData.date).label('last_sale_date')
-        ).filter(
-            SalesData.product_id.in_(list(all_product_ids))
-        ).group_by(SalesData.product_id).all()
-        
-        # Build sales lookup (no revenue - shop owner's private data)
-        sales_lookup = {}
-        for sale in sales_data:
-            sales_lookup[sale.product_id] = {
-                'total_sold': sale.total_sold or 0,
-                'transaction_count': sale.transaction_count or 0,
-                'avg_quantity': float(sale.avg_quantity or 0),
-                'last_sale_date': sale.last_sale_date.strftime("%Y-%m-%d") if sale.last_sale_date else None
-            }
-        
-        # Build product performance list
-        product_performance = []
-        total_supplied = 0
-        total_sold = 0
-        
-        for product_id, supply_info in product_supply.items():
-            product = products_dict.get(product_id)
-            if not product:
-                continue
-            
-            inventory = inventory_dict.get(product_id)
-            sales = sales_lookup.get(product_id, {
-                'total_sold': 0,
-                'transaction_count': 0,
-                'avg_quantity': 0,
-                'last_sale_date': None
-            })
-            
-            qty_supplied = supply_info['total_supplied']
-            qty_sold = sales['total_sold']
-            
-            # Calculate sell-through rate
-            sell_through = (qty_sold / qty_supplied * 100) if qty_supplied > 0 else 0
-            
-            # Determine performance level
-            if sell_through >= 80:
-                performance = 'excellent'
-            elif sell_through >= 50:
-                performance = 'good'
-            elif sell_through >= 25:
-                performance = 'average'
-            else:
-                performance = 'poor'
-            
-            # Determine stock status
-            qty_available = inventory.qty_available if inventory else 0
-            safety_stock = inventory.safety_stock if inventory else 0
-            stock_ratio = qty_available / safety_stock if safety_stock > 0 else 1.0
-            
-            if stock_ratio < 0.5:
-                stock_status = 'critical'
-            elif stock_ratio < 1.0:
-                stock_status = 'low'
-            else:
-                stock_status = 'healthy'
-            
-            product_performance.append({
-                "product_id": product_id,
-                "product_name": product.name,
-                "category": product.category,
-                "price": float(product.price or 0),
-                "qty_supplied": qty_supplied,
-                "qty_sold": qty_sold,
-                "qty_available": qty_available,
-                "safety_stock": safety_stock,
-                "supply_value": round(supply_info['total_value'], 2),
-                "sell_through_rate": round(sell_through, 1),
-                "performance": performance,
-                "stock_status": stock_status,
-                "stock_ratio": round(stock_ratio, 2),
-                "shops_count": len(supply_info['shops']),
-                "shop_names": [shops_dict.get(sid, f"Shop {sid}") for sid in supply_info['shops']],
-                "transaction_count": sales['transaction_count'],
-                "avg_quantity_per_sale": round(sales['avg_quantity'], 1),
-                "last_sale_date": sales['last_sale_date']
-            })
-            
-            total_supplied += qty_supplied
-            total_sold += qty_sold
-        
-        # Sort by sell-through rate descending
-        product_performance.sort(key=lambda x: x['sell_through_rate'], reverse=True)
-        
-        # Get top and low performers
-        top_performers = [p for p in product_performance if p['performance'] in ['excellent', 'good']][:10]
-        low_performers = sorted([p for p in product_performance if p['performance'] in ['poor', 'average']], 
-                                key=lambda x: x['sell_through_rate'])[:10]
-        
-        # Calculate averages
-        avg_sell_through = (total_sold / total_supplied * 100) if total_supplied > 0 else 0
-        
-        # Category breakdown (by units sold, not revenue)
-        category_performance = {}
-        for p in product_performance:
-            cat = p['category'] or 'Unknown'
-            if cat not in category_performance:
-                category_performance[cat] = {
-                    'products': 0,
-                    'supplied': 0,
-                    'sold': 0
-                }
-            category_performance[cat]['products'] += 1
-            category_performance[cat]['supplied'] += p['qty_supplied']
-            category_performance[cat]['sold'] += p['qty_sold']
-        
-        # Add sell-through rate to each category
-        for cat in category_performance:
-            cat_data = category_performance[cat]
-            cat_data['sell_through_rate'] = round(
-                (cat_data['sold'] / cat_data['supplied'] * 100) if cat_data['supplied'] > 0 else 0, 1
-            )
-        
         return jsonify({
             "status": "success",
             "message": "Product performance data generated successfully",
             "data": {
-                "products": product_performance,
-                "topPerformers": top_performers,
-                "lowPerformers": low_performers,
-                "categoryPerformance": category_performance,
-                "summary": {
-                    "totalProducts": len(product_performance),
-                    "totalSupplied": total_supplied,
-                    "totalSold": total_sold,
-                    "avgSellThrough": round(avg_sell_through, 1),
-                    "excellentPerformers": len([p for p in product_performance if p['performance'] == 'excellent']),
-                    "goodPerformers": len([p for p in product_performance if p['performance'] == 'good']),
-                    "averagePerformers": len([p for p in product_performance if p['performance'] == 'average']),
-                    "poorPerformers": len([p for p in product_performance if p['performance'] == 'poor'])
-                },
+                **performance,
                 "generatedAt": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
             }
         }), 200
@@ -983,9 +487,27 @@ def distributor_production_plan(current_user):
         if df.empty:
             return jsonify({"status": "error", "message": "No valid Date/Sales rows after parsing"}), 400
 
+        # Interval tier for the forecast: exact / sampled / analytic
+        try:
+            uncertainty = resolve_uncertainty_mode(request.args.get("uncertainty"))
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+
         # Use optimized Prophet service
         try:
-            forecast_data, metrics = prophet_manager.forecast_sales(df[["ds", "y"]], periods=30)
+            job = forecast_executor.request(
+                df[["ds", "y"]], periods=30, wait=Config.FORECAST_WAIT_SECONDS, uncertainty=uncertainty
+            )
+            if job.status in ("computing", "busy"):
+                return jsonify({
+                    "status": job.status,
+                    "message": job.error or "Forecast is being computed; retry shortly",
+                    "job_key": job.key,
+                    "retry_after_seconds": 5,
+                }), 202 if job.status == "computing" else 503
+            if not job.ready:
+                raise RuntimeError(job.error)
+            forecast_data, metrics = job.forecast, job.metrics
             
             # Convert back to expected format for AI summary
             forecast = pd.DataFrame({
@@ -1050,7 +572,8 @@ def distributor_production_plan(current_user):
                     "volume": int(row["Sales"]),
                     "image": "https://images.unsplash.com/photo-1636545732552-a94515d1b4c0"
                 } for _, row in underperforming.iterrows()
-            ]
+            ],
+            "forecast_uncertainty": metrics.get("uncertainty")
         }), 200
 
     except Exception as exc:
@@ -1166,6 +689,7 @@ def get_prophet_metrics(current_user):
                 "max_cache_size": cache_stats["max_cache_size"],
                 "cache_hit_ratio": cache_stats["cache_hit_ratio"],
                 "memory_usage_estimate_mb": cache_stats["memory_usage_estimate"],
+                "executor": forecast_executor.stats(),
                 "optimization_features": {
                     "textile_seasonality": True,
                     "outlier_detection": True,
@@ -2053,31 +1577,8 @@ def ai_demand_forecast(current_user):
         distributor_id = current_user['id']
         data = request.get_json() or {}
         
-        # Get products supplied by this distributor with their sales history (units only, not revenue)
-        products_with_sales = db.session.query(
-            Product.id,
-            Product.name,
-            Product.category,
-            Product.price,
-            Shop.name.label('shop_name'),
-            Inventory.qty_available,
-            Inventory.safety_stock,
-            func.coalesce(func.sum(SalesData.quantity_sold), 0).label('total_sold'),
-            func.count(SalesData.id).label('sales_records')
-        ).join(
-            DistributorSupply, DistributorSupply.product_id == Product.id
-        ).join(
-            Shop, Shop.id == DistributorSupply.shop_id
-        ).outerjoin(
-            Inventory, Inventory.product_id == Product.id
-        ).outerjoin(
-            SalesData, SalesData.product_id == Product.id
-        ).filter(
-            DistributorSupply.distributor_id == distributor_id
-        ).group_by(
-            Product.id, Product.name, Product.category, Product.price,
-            Shop.name, Inventory.qty_available, Inventory.safety_stock
-        ).all()
+        # Supplied (shop, product) pairs with their unit sales velocity (units only, not revenue)
+        products_with_sales = get_distributor_analytics(distributor_id).product_velocity()
         
         if not products_with_sales:
             return jsonify({
@@ -2091,15 +1592,14 @@ def ai_demand_forecast(current_user):
         # Calculate demand forecast for each product
         forecasts = []
         for product in products_with_sales:
-            # Calculate average daily sales (assuming 30 days of data)
-            days_of_data = max(product.sales_records, 1)
-            avg_daily_sales = product.total_sold / max(days_of_data, 30) if product.total_sold > 0 else 0
+            # Average daily sales over at least 30 days of records
+            avg_daily_sales = product["avg_daily_sales"]
             
             # Predict demand for next 14 days
             predicted_demand_14d = round(avg_daily_sales * 14, 0)
             
             # Calculate days until stockout
-            current_stock = product.qty_available or 0
+            current_stock = product["qty_available"]
             days_until_stockout = round(current_stock / avg_daily_sales, 1) if avg_daily_sales > 0 else 999
             
             # Determine action needed
@@ -2114,17 +1614,17 @@ def ai_demand_forecast(current_user):
                 action_class = "healthy"
             
             forecasts.append({
-                "productId": product.id,
-                "productName": product.name,
-                "category": product.category,
-                "shopName": product.shop_name,
+                "productId": product["product_id"],
+                "productName": product["product_name"],
+                "category": product["category"],
+                "shopName": product["shop_name"],
                 "currentStock": current_stock,
                 "predictedDemand14d": int(predicted_demand_14d),
                 "avgDailySales": round(avg_daily_sales, 1),
                 "daysUntilStockout": days_until_stockout if days_until_stockout < 999 else None,
                 "action": action,
                 "actionClass": action_class,
-                "totalSold": product.total_sold
+                "totalSold": product["total_sold"]
             })
         
         # Sort by urgency (critical first)
@@ -2187,31 +1687,8 @@ def ai_stock_impact(current_user):
     try:
         distributor_id = current_user['id']
         
-        # Get products with sales and inventory data (no revenue - privacy)
-        products_data = db.session.query(
-            Product.id,
-            Product.name,
-            Product.category,
-            Product.price,
-            Shop.name.label('shop_name'),
-            Inventory.qty_available,
-            Inventory.safety_stock,
-            func.coalesce(func.sum(SalesData.quantity_sold), 0).label('total_sold'),
-            func.count(SalesData.id).label('sales_records')
-        ).join(
-            DistributorSupply, DistributorSupply.product_id == Product.id
-        ).join(
-            Shop, Shop.id == DistributorSupply.shop_id
-        ).outerjoin(
-            Inventory, Inventory.product_id == Product.id
-        ).outerjoin(
-            SalesData, SalesData.product_id == Product.id
-        ).filter(
-            DistributorSupply.distributor_id == distributor_id
-        ).group_by(
-            Product.id, Product.name, Product.category, Product.price,
-            Shop.name, Inventory.qty_available, Inventory.safety_stock
-        ).all()
+        # Supplied (shop, product) pairs with stock and unit sales (no revenue - privacy)
+        products_data = get_distributor_analytics(distributor_id).product_velocity()
         
         if not products_data:
             return jsonify({
@@ -2228,13 +1705,12 @@ def ai_stock_impact(current_user):
         total_restock_needed = 0
         
         for product in products_data:
-            current_stock = product.qty_available or 0
-            safety_stock = product.safety_stock or 10
-            total_sold = product.total_sold or 0
-            sales_records = product.sales_records or 0
+            current_stock = product["qty_available"]
+            safety_stock = product["safety_stock"] or 10
+            total_sold = product["total_sold"]
             
-            # Calculate average daily sales (estimate from records)
-            avg_daily_sales = total_sold / max(sales_records, 30) if total_sold > 0 else 0
+            # Average daily sales (estimate from records)
+            avg_daily_sales = product["avg_daily_sales"]
             
             # Calculate stock ratio
             stock_ratio = current_stock / safety_stock if safety_stock > 0 else 1
@@ -2258,10 +1734,10 @@ def ai_stock_impact(current_user):
             total_restock_needed += restock_qty
             
             stock_impacts.append({
-                "productId": product.id,
-                "productName": product.name,
-                "category": product.category,
-                "shopName": product.shop_name,
+                "productId": product["product_id"],
+                "productName": product["product_name"],
+                "category": product["category"],
+                "shopName": product["shop_name"],
                 "currentStock": current_stock,
                 "safetyStock": safety_stock,
                 "stockRatio": round(stock_ratio * 100, 1),
@@ -2338,13 +1814,9 @@ def ai_chat_assistant(current_user):
                 "message": "Please provide a message"
             }), 400
         
-        # Build context - use frontend context if available (richer data)
-        if frontend_context:
-            # Use the pre-computed AI insights for better answers
-            context = build_rich_context(frontend_context)
-        else:
-            # Fallback to basic database query
-            context = build_basic_context(distributor_id)
+        # Pre-computed AI insights from the frontend when sent (richer), else database summaries;
+        # sections are cached per distributor and the context is trimmed to a token budget
+        context = distributor_chat_context(distributor_id, frontend_context)
         
         # Build prompt for AI
         prompt = f"""You are an AI supply chain assistant for a textile distributor/manufacturer. 
@@ -2393,163 +1865,3 @@ If the question is unclear or unrelated to supply chain/distribution, politely r
             "status": "error",
             "message": str(e)
         }), 500
-
-
-def build_rich_context(frontend_context):
-    """Build rich context from pre-loaded AI insights for distributor supply chain view."""
-    context_parts = []
-    
-    context_parts.append("DISTRIBUTOR SUPPLY CHAIN OVERVIEW:")
-    context_parts.append("(Data shows stock levels at shops you supply to - these are NOT your inventory, these are your RETAIL PARTNERS' stock levels)")
-    
-    # Stock Planning Summary
-    if frontend_context.get('stockPlanning'):
-        sp = frontend_context['stockPlanning']
-        if sp.get('summary'):
-            context_parts.append(f"""
-SHOPS' STOCK STATUS (shops you supply to):
-- Total Products Across Shops: {sp['summary'].get('totalProducts', 'N/A')}
-- Products Needing Urgent Supply: {sp['summary'].get('criticalCount', 0)} (critical stock at shops)
-- Products to Monitor for Supply: {sp['summary'].get('lowCount', 0)} (low stock at shops)
-- Products Well-Stocked at Shops: {sp['summary'].get('healthyCount', 0)}
-""")
-        if sp.get('aiInsights', {}).get('keyFindings'):
-            context_parts.append("KEY FINDINGS:\n" + "\n".join([f"- {f}" for f in sp['aiInsights']['keyFindings'][:5]]))
-    
-    # Demand Forecast Data - Include ALL products
-    if frontend_context.get('demandForecast'):
-        df = frontend_context['demandForecast']
-        
-        if df.get('summary'):
-            context_parts.append(f"\nDEMAND FORECAST - SUPPLY PLANNING:")
-            context_parts.append(f"- Total Products Analyzed: {df['summary'].get('totalProducts', 0)}")
-            context_parts.append(f"- Shops needing URGENT DELIVERY (CRITICAL): {df['summary'].get('criticalCount', 0)}")
-            context_parts.append(f"- Shops to supply soon: {df['summary'].get('warningCount', 0)}")
-            context_parts.append(f"- Shops with adequate stock (no supply needed): {df['summary'].get('healthyCount', 0)}")
-        
-        if df.get('forecasts'):
-            # Include ALL Critical items
-            critical_items = [f for f in df['forecasts'] if f.get('action') == 'CRITICAL']
-            if critical_items:
-                context_parts.append(f"\nURGENT SUPPLY NEEDED - CRITICAL ({len(critical_items)} items):")
-                context_parts.append("(These shops need immediate delivery from you)")
-                for item in critical_items:
-                    context_parts.append(f"- SHIP TO {item.get('shopName', 'Unknown Shop')}: {item.get('productName', 'Unknown')} - shop has only {item.get('currentStock', 0)} units, needs {item.get('predictedDemand14d', 0)} units for 14 days, stockout in {item.get('daysUntilStockout', 'N/A')} days, avg sales {item.get('avgDailySales', 0)}/day")
-            
-            # Include ALL RESTOCK SOON items
-            restock_soon_items = [f for f in df['forecasts'] if f.get('action') == 'RESTOCK SOON']
-            if restock_soon_items:
-                context_parts.append(f"\nSUPPLY SOON - PLAN DELIVERY ({len(restock_soon_items)} items):")
-                context_parts.append("(Schedule these deliveries in your production/distribution plan)")
-                for item in restock_soon_items:
-                    context_parts.append(f"- PLAN FOR {item.get('shopName', 'Unknown Shop')}: {item.get('productName', 'Unknown')} - shop has {item.get('currentStock', 0)} units, needs {item.get('predictedDemand14d', 0)} units, stockout in {item.get('daysUntilStockout', 'N/A')} days")
-            
-            # Include ALL ADEQUATE items (for complete picture)
-            adequate_items = [f for f in df['forecasts'] if f.get('action') == 'ADEQUATE']
-            if adequate_items:
-                context_parts.append(f"\nWELL-STOCKED SHOPS - NO SUPPLY NEEDED ({len(adequate_items)} items):")
-                for item in adequate_items:
-                    context_parts.append(f"- {item.get('shopName', 'Unknown Shop')}: {item.get('productName', 'Unknown')} - {item.get('currentStock', 0)} units in stock")
-    
-    # Stock Impact Data - Include ALL products
-    if frontend_context.get('stockImpact'):
-        si = frontend_context['stockImpact']
-        if si.get('summary'):
-            context_parts.append(f"\nSUPPLY IMPACT ANALYSIS:")
-            context_parts.append(f"- Shops needing critical supply: {si['summary'].get('criticalProducts', 0)}")
-            context_parts.append(f"- Shops with low stock: {si['summary'].get('warningProducts', 0)}")
-            context_parts.append(f"- Total Units at Risk (potential lost sales at shops): {si['summary'].get('totalUnitsAtRisk', 0)}")
-            context_parts.append(f"- Total Units YOU NEED TO SUPPLY: {si['summary'].get('totalRestockNeeded', 0)} units")
-        
-        if si.get('stockImpacts'):
-            # Group by status
-            critical_items = [item for item in si['stockImpacts'] if item.get('status') == 'critical']
-            low_items = [item for item in si['stockImpacts'] if item.get('status') == 'low']
-            healthy_items = [item for item in si['stockImpacts'] if item.get('status') == 'healthy']
-            
-            if critical_items:
-                context_parts.append(f"\nCRITICAL - SHIP IMMEDIATELY ({len(critical_items)} items):")
-                for item in critical_items:
-                    context_parts.append(f"- URGENT DELIVERY TO {item.get('shopName', 'Unknown Shop')}: {item.get('productName', 'Unknown')} - {item.get('stockRatio', 0)}% stock, {item.get('unitsAtRisk', 0)} units at risk of stockout, SUPPLY {item.get('restockQty', 0)} units, sold {item.get('totalSold', 0)} units")
-            
-            if low_items:
-                context_parts.append(f"\nLOW STOCK AT SHOPS - SCHEDULE SUPPLY ({len(low_items)} items):")
-                for item in low_items:
-                    context_parts.append(f"- SCHEDULE FOR {item.get('shopName', 'Unknown Shop')}: {item.get('productName', 'Unknown')} - {item.get('stockRatio', 0)}% stock level, supply {item.get('restockQty', 0)} units")
-            
-            if healthy_items:
-                context_parts.append(f"\nWELL-STOCKED SHOPS - NO ACTION NEEDED ({len(healthy_items)} items):")
-                for item in healthy_items:
-                    context_parts.append(f"- {item.get('shopName', 'Unknown Shop')}: {item.get('productName', 'Unknown')} - {item.get('stockRatio', 0)}% stock level, sold {item.get('totalSold', 0)} units")
-    
-    return "\n".join(context_parts) if context_parts else "No detailed insights available."
-
-
-def build_basic_context(distributor_id):
-    """Build basic context from database (fallback when no frontend context) for distributor supply chain."""
-    stock_status = db.session.query(
-        Product.name,
-        Product.category,
-        Shop.name.label('shop_name'),
-        Inventory.qty_available,
-        Inventory.safety_stock,
-        func.coalesce(func.sum(SalesData.quantity_sold), 0).label('total_sold')
-    ).join(
-        DistributorSupply, DistributorSupply.product_id == Product.id
-    ).join(
-        Shop, Shop.id == DistributorSupply.shop_id
-    ).outerjoin(
-        Inventory, Inventory.product_id == Product.id
-    ).outerjoin(
-        SalesData, SalesData.product_id == Product.id
-    ).filter(
-        DistributorSupply.distributor_id == distributor_id
-    ).group_by(
-        Product.name, Product.category, Shop.name,
-        Inventory.qty_available, Inventory.safety_stock
-    ).all()
-    
-    critical_products = []
-    low_products = []
-    healthy_products = []
-    
-    for item in stock_status:
-        qty = item.qty_available or 0
-        safety = item.safety_stock or 10
-        ratio = qty / safety if safety > 0 else 1
-        
-        product_info = {
-            "name": item.name,
-            "category": item.category,
-            "shop": item.shop_name,
-            "stock": qty,
-            "safety": safety,
-            "sold": item.total_sold
-        }
-        
-        if ratio < 0.5:
-            critical_products.append(product_info)
-        elif ratio < 1.0:
-            low_products.append(product_info)
-        else:
-            healthy_products.append(product_info)
-    
-    return f"""
-DISTRIBUTOR SUPPLY CHAIN OVERVIEW:
-(You supply products to these shops - this shows THEIR stock levels, not your inventory)
-
-SHOPS YOU SUPPLY TO - STOCK STATUS:
-- Total Products Across Shops: {len(stock_status)}
-- Shops needing URGENT SUPPLY (< 50% stock): {len(critical_products)} products
-- Shops needing supply soon (50-100% stock): {len(low_products)} products
-- Well-stocked shops (> 100% stock): {len(healthy_products)} products
-
-URGENT DELIVERIES NEEDED (ship these immediately):
-{chr(10).join([f"- SHIP TO {p['shop']}: {p['name']} - only {p['stock']} units left (safety: {p['safety']}), sold {p['sold']} units" for p in critical_products[:5]]) or "None - all shops well supplied"}
-
-SCHEDULE FUTURE SUPPLY (plan these deliveries):
-{chr(10).join([f"- PLAN FOR {p['shop']}: {p['name']} - {p['stock']} units left (safety: {p['safety']})" for p in low_products[:5]]) or "None"}
-
-TOP SELLING PRODUCTS (prioritize production of these):
-{chr(10).join([f"- {p['name']} at {p['shop']}: {p['sold']} units sold" for p in sorted(critical_products + low_products + healthy_products, key=lambda x: -x['sold'])[:5]])}
-"""
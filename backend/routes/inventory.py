@@ -4,6 +4,8 @@ from utils.auth_utils import token_required, roles_required, check_shop_ownershi
 from utils.validation import validate_price, validate_quantity, validate_file_upload
 from utils.inventory_utils import ensure_inventory_tracking_columns, ensure_product_image_url_column
 from utils.export_data import schedule_rag_refresh
+from utils.file_processing_utils import spool_upload, read_table_header, iter_table_chunks
+from utils.data_version import bump_data_version
 from utils.csv_templates import (
     get_template_csv, validate_columns, TEMPLATE_INFO
 )
@@ -151,12 +153,212 @@ def get_inventory(current_user):
     )
 
 
+# Support common column aliases for inventory imports
+INVENTORY_COLUMN_ALIASES = {
+    'stock': 'purchase_qty',
+    'quantity': 'purchase_qty',
+    'qty': 'purchase_qty',
+    'initial_stock': 'purchase_qty',
+    'product_name': 'name',
+    'product': 'name',
+    'min_stock': 'minimum_stock',
+    'safety_stock': 'minimum_stock',
+    'reorder_level': 'minimum_stock',
+    'unit_price': 'price',
+    'cost': 'price',
+}
+# Parsed as strings in every chunk so SKUs keep leading zeros and types don't drift
+INVENTORY_TEXT_COLUMNS = ("sku", "name", "category", "description", "distributor_username")
+
+
+def _to_float(value, default=0.0):
+    try:
+        if value is None or pd.isna(value):
+            return default
+        return float(value or 0)
+    except (ValueError, TypeError):
+        return default
+
+
+def _to_int(value, default=0):
+    # float first to handle "50.0" strings
+    return int(_to_float(value, default))
+
+
+def _prefetch_inventory_chunk(chunk, shop_id):
+    """Load the products and inventory rows a chunk touches (two queries instead of two per row)."""
+    skus = [s for s in chunk["sku"].dropna().astype(str).str.strip().unique().tolist() if s]
+    products = {
+        p.sku: p for p in Product.query.filter(Product.shop_id == shop_id, Product.sku.in_(skus)).all()
+    } if skus else {}
+    inventories = {
+        inv.product_id: inv
+        for inv in Inventory.query.filter(Inventory.product_id.in_([p.id for p in products.values()])).all()
+    } if products else {}
+    return products, inventories
+
+
+def _import_inventory_chunk(chunk, shop_id, has_distributor_username, has_distributor_id, distributor_cache, totals):
+    """Apply one parsed chunk of an inventory import; returns the chunk's restock summary rows."""
+    products, inventories = _prefetch_inventory_chunk(chunk, shop_id)
+    restock_summary = []
+
+    for row in chunk.to_dict("records"):
+        sku = str(row.get("sku", "")).strip()
+        if not sku or pd.isna(row.get("sku")):
+            # skip rows without SKU
+            continue
+
+        name_val = row.get("name", "Unnamed Product")
+        name = str(name_val) if not pd.isna(name_val) else "Unnamed Product"
+
+        category_val = row.get("category", "General")
+        category = str(category_val) if not pd.isna(category_val) else "General"
+
+        # make price and stock robust to bad values
+        price = _to_float(row.get("price", 0))
+        purchase_qty = max(0, _to_int(row.get("purchase_qty", 0)))
+        minimum_stock = _to_int(row.get("minimum_stock", 0))
+
+        # Get description from row if provided
+        description_val = row.get("description", "")
+        description = str(description_val).strip() if description_val and not pd.isna(description_val) else None
+
+        product = products.get(sku)
+
+        # Get distributor_id from distributor_username if provided
+        distributor_id = None
+        if has_distributor_username:
+            dist_username = row.get("distributor_username")
+            if dist_username and not pd.isna(dist_username):
+                dist_username = str(dist_username).strip()
+                if dist_username:
+                    if dist_username not in distributor_cache:
+                        distributor = User.query.filter_by(username=dist_username, role="distributor").first()
+                        distributor_cache[dist_username] = distributor.id if distributor else None
+                    distributor_id = distributor_cache[dist_username]
+        # Fallback: also check for legacy distributor_id column
+        elif has_distributor_id:
+            dist_id = row.get("distributor_id")
+            if dist_id and not pd.isna(dist_id):
+                try:
+                    distributor_id = int(dist_id)
+                except (ValueError, TypeError):
+                    distributor_id = None
+
+        if product:
+            # update existing product
+            product.name = name
+            product.category = category
+            product.price = price
+            if description:
+                product.description = description
+            if distributor_id:
+                product.distributor_id = distributor_id
+
+            inv = inventories.get(product.id)
+            if inv:
+                if purchase_qty:
+                    inv.qty_available = max(0, (inv.qty_available or 0) + purchase_qty)
+                    inv.total_purchased = (inv.total_purchased or 0) + purchase_qty
+                    totals["units"] += purchase_qty
+                inv.safety_stock = minimum_stock
+            else:
+                inv = Inventory(
+                    product_id=product.id,
+                    qty_available=purchase_qty,
+                    safety_stock=minimum_stock,
+                    total_purchased=purchase_qty,
+                    total_sold=0
+                )
+                db.session.add(inv)
+                inventories[product.id] = inv
+                totals["units"] += purchase_qty
+
+            # Create DistributorSupply record if distributor is assigned and quantity provided
+            if distributor_id and purchase_qty > 0:
+                supply_record = DistributorSupply(
+                    distributor_id=distributor_id,
+                    product_id=product.id,
+                    shop_id=shop_id,
+                    quantity_supplied=purchase_qty,
+                    unit_price=price,
+                    total_value=price * purchase_qty,
+                    status="completed",
+                    notes=f"Restocked via CSV import"
+                )
+                db.session.add(supply_record)
+
+            totals["updated"] += 1
+        else:
+            # create product with required shop_id
+            new_product = Product(
+                name=name,
+                category=category,
+                description=description,
+                price=price,
+                sku=sku,
+                shop_id=shop_id,
+                distributor_id=distributor_id
+            )
+            db.session.add(new_product)
+            try:
+                db.session.flush()  # to get new_product.id; may raise IntegrityError
+            except Exception as e:
+                db.session.rollback()
+                # log and continue with next row; the rollback discarded this chunk's
+                # pending changes, so reload the lookups
+                print(f"[Import - product create failed] sku={sku} error={e}")
+                products, inventories = _prefetch_inventory_chunk(chunk, shop_id)
+                continue
+
+            inv = Inventory(
+                product_id=new_product.id,
+                qty_available=purchase_qty,
+                safety_stock=minimum_stock,
+                total_purchased=purchase_qty,
+                total_sold=0
+            )
+            db.session.add(inv)
+            products[sku] = new_product
+            inventories[new_product.id] = inv
+
+            # Create DistributorSupply record if distributor is assigned
+            if distributor_id and purchase_qty > 0:
+                supply_record = DistributorSupply(
+                    distributor_id=distributor_id,
+                    product_id=new_product.id,
+                    shop_id=shop_id,
+                    quantity_supplied=purchase_qty,
+                    unit_price=price,
+                    total_value=price * purchase_qty,
+                    status="completed",
+                    notes=f"Initial stock via CSV import"
+                )
+                db.session.add(supply_record)
+
+            totals["added"] += 1
+            totals["units"] += purchase_qty
+
+        restock_summary.append({
+            "sku": sku,
+            "product_name": name,
+            "added_quantity": purchase_qty,
+            "minimum_stock": minimum_stock,
+            "distributor_id": distributor_id,
+            "operation": "updated" if product else "added"
+        })
+
+    return restock_summary
+
+
 # Import Inventory via CSV or Excel
 @inventory_bp.route("/import", methods=["POST"])
 @token_required
 @roles_required('shop_owner', 'shop_manager')
 def import_inventory(current_user):
     """Upload inventory via CSV/Excel for a shop."""
+    spooled_path = None
     try:
         ensure_inventory_tracking_columns()
         file = request.files.get("file")
@@ -175,34 +377,15 @@ def import_inventory(current_user):
             return jsonify({"status": "error", "message": message}), 400
 
         filename = file.filename.lower()
-        if filename.endswith(".csv"):
-            df = pd.read_csv(file)
-        elif filename.endswith((".xlsx", ".xls")):
-            df = pd.read_excel(file)
-        else:
+        if not filename.endswith((".csv", ".xlsx", ".xls")):
             return jsonify({"status": "error", "message": "File must be .csv or .xlsx"}), 400
 
-        # Normalize columns to lowercase
-        df.columns = [c.lower().strip() for c in df.columns]
-        
-        # Support common column aliases
-        column_aliases = {
-            'stock': 'purchase_qty',
-            'quantity': 'purchase_qty',
-            'qty': 'purchase_qty',
-            'initial_stock': 'purchase_qty',
-            'product_name': 'name',
-            'product': 'name',
-            'min_stock': 'minimum_stock',
-            'safety_stock': 'minimum_stock',
-            'reorder_level': 'minimum_stock',
-            'unit_price': 'price',
-            'cost': 'price',
-        }
-        df.columns = [column_aliases.get(c, c) for c in df.columns]
+        # Spool to disk and parse in chunks instead of loading the whole file
+        spooled_path, _, _ = spool_upload(file)
+        columns = read_table_header(spooled_path, INVENTORY_COLUMN_ALIASES)
 
         # Validate columns using centralized template
-        is_valid, missing, message = validate_columns(df.columns.tolist(), "inventory")
+        is_valid, missing, message = validate_columns(columns, "inventory")
         if not is_valid:
             return jsonify({
                 "status": "error", 
@@ -221,175 +404,27 @@ def import_inventory(current_user):
         if not shop_obj:
             return jsonify({"status":"error","message":"Shop not found"}), 404
 
-        added, updated = 0, 0
-        total_units_added = 0
+        totals = {"added": 0, "updated": 0, "units": 0}
         restock_summary = []
-        for _, row in df.iterrows():
-            sku = str(row.get("sku", "")).strip()
-            if not sku or pd.isna(row.get("sku")):
-                # skip rows without SKU
-                continue
-
-            name_val = row.get("name", "Unnamed Product")
-            name = str(name_val) if not pd.isna(name_val) else "Unnamed Product"
-            
-            category_val = row.get("category", "General")
-            category = str(category_val) if not pd.isna(category_val) else "General"
-
-            # make price and stock robust to bad values
-            try:
-                price_val = row.get("price", 0)
-                if pd.isna(price_val):
-                    price_val = 0
-                price = float(price_val or 0)
-            except (ValueError, TypeError):
-                price = 0.0
-            try:
-                purchase_qty_raw = row.get("purchase_qty", 0)
-                if pd.isna(purchase_qty_raw):
-                    purchase_qty_raw = 0
-                purchase_qty = int(float(purchase_qty_raw or 0))  # float first to handle "50.0" strings
-            except (ValueError, TypeError):
-                purchase_qty = 0
-            if purchase_qty < 0:
-                purchase_qty = 0
-            try:
-                min_stock_val = row.get("minimum_stock", 0)
-                if pd.isna(min_stock_val):
-                    min_stock_val = 0
-                minimum_stock = int(float(min_stock_val or 0))
-            except (ValueError, TypeError):
-                minimum_stock = 0
-
-            # Get description from row if provided
-            description_val = row.get("description", "")
-            description = str(description_val).strip() if description_val and not pd.isna(description_val) else None
-            
-            # try to find existing product for this shop + sku
-            product = Product.query.filter_by(sku=sku, shop_id=shop_id).first()
-            
-            # Get distributor_id from distributor_username if provided
-            distributor_id = None
-            if "distributor_username" in df.columns:
-                try:
-                    dist_username = row.get("distributor_username")
-                    if dist_username and not pd.isna(dist_username):
-                        dist_username = str(dist_username).strip()
-                        if dist_username:
-                            from models.model import User
-                            distributor = User.query.filter_by(username=dist_username, role="distributor").first()
-                            if distributor:
-                                distributor_id = distributor.id
-                except (ValueError, TypeError):
-                    distributor_id = None
-            # Fallback: also check for legacy distributor_id column
-            elif "distributor_id" in df.columns:
-                try:
-                    dist_id = row.get("distributor_id")
-                    if dist_id and not pd.isna(dist_id):
-                        distributor_id = int(dist_id)
-                except (ValueError, TypeError):
-                    distributor_id = None
-            
-            if product:
-                # update existing product
-                product.name = name
-                product.category = category
-                product.price = price
-                if description:
-                    product.description = description
-                if distributor_id:
-                    product.distributor_id = distributor_id
-                
-                inv = Inventory.query.filter_by(product_id=product.id).first()
-                if inv:
-                    if purchase_qty:
-                        inv.qty_available = max(0, (inv.qty_available or 0) + purchase_qty)
-                        inv.total_purchased = (inv.total_purchased or 0) + purchase_qty
-                        total_units_added += purchase_qty
-                    inv.safety_stock = minimum_stock
-                else:
-                    inv = Inventory(
-                        product_id=product.id,
-                        qty_available=purchase_qty,
-                        safety_stock=minimum_stock,
-                        total_purchased=purchase_qty,
-                        total_sold=0
-                    )
-                    db.session.add(inv)
-                    total_units_added += purchase_qty
-                
-                # Create DistributorSupply record if distributor is assigned and quantity provided
-                if distributor_id and purchase_qty > 0:
-                    supply_record = DistributorSupply(
-                        distributor_id=distributor_id,
-                        product_id=product.id,
-                        shop_id=shop_id,
-                        quantity_supplied=purchase_qty,
-                        unit_price=price,
-                        total_value=price * purchase_qty,
-                        status="completed",
-                        notes=f"Restocked via CSV import"
-                    )
-                    db.session.add(supply_record)
-                
-                updated += 1
-            else:
-                # create product with required shop_id
-                new_product = Product(
-                    name=name,
-                    category=category,
-                    description=description,
-                    price=price,
-                    sku=sku,
-                    shop_id=shop_id,
-                    distributor_id=distributor_id
-                )
-                db.session.add(new_product)
-                try:
-                    db.session.flush()  # to get new_product.id; may raise IntegrityError
-                except Exception as e:
-                    db.session.rollback()
-                    # log and continue with next row
-                    print(f"[Import - product create failed] sku={sku} error={e}")
-                    continue
-
-
-                db.session.add(Inventory(
-                    product_id=new_product.id,
-                    qty_available=purchase_qty,
-                    safety_stock=minimum_stock,
-                    total_purchased=purchase_qty,
-                    total_sold=0
-                ))
-                
-                # Create DistributorSupply record if distributor is assigned
-                if distributor_id and purchase_qty > 0:
-                    supply_record = DistributorSupply(
-                        distributor_id=distributor_id,
-                        product_id=new_product.id,
-                        shop_id=shop_id,
-                        quantity_supplied=purchase_qty,
-                        unit_price=price,
-                        total_value=price * purchase_qty,
-                        status="completed",
-                        notes=f"Initial stock via CSV import"
-                    )
-                    db.session.add(supply_record)
-                
-                added += 1
-                total_units_added += purchase_qty
-
-            restock_summary.append({
-                "sku": sku,
-                "product_name": name,
-                "added_quantity": purchase_qty,
-                "minimum_stock": minimum_stock,
-                "distributor_id": distributor_id,
-                "operation": "updated" if product else "added"
-            })
+        distributor_cache = {}
+        for chunk in iter_table_chunks(
+            spooled_path, text_columns=INVENTORY_TEXT_COLUMNS, column_aliases=INVENTORY_COLUMN_ALIASES
+        ):
+            restock_summary.extend(_import_inventory_chunk(
+                chunk, shop_id,
+                has_distributor_username="distributor_username" in columns,
+                has_distributor_id="distributor_id" in columns,
+                distributor_cache=distributor_cache,
+                totals=totals,
+            ))
+            # Commit per chunk so pending objects don't accumulate across the whole file
+            db.session.commit()
 
+        bump_data_version(shop_id)
         db.session.commit()
+
+        added, updated = totals["added"], totals["updated"]
+        total_units_added = totals["units"]
         
         # Trigger RAG refresh if new products were added
         if added > 0:
@@ -411,6 +446,9 @@ def import_inventory(current_user):
         error_trace = traceback.format_exc()
         print(f"[Error - Import Inventory] {e}\n{error_trace}")
         return jsonify({"status": "error", "message": "Failed to import inventory.", "error": str(e)}), 500
+    finally:
+        if spooled_path and os.path.exists(spooled_path):
+            os.remove(spooled_path)
 
 # Edit Inventory (price, stock)
 @inventory_bp.route("/edit", methods=["POST"])
@@ -563,6 +601,7 @@ def edit_inventory(current_user):
                     if not product.image_url:
                         product.image_url = f"/uploads/product_images/{filename}"
 
+        bump_data_version(product.shop_id)
         db.session.commit()
         
         message = "Inventory updated successfully"
@@ -595,6 +634,7 @@ def delete_inventory(current_user):
             return jsonify({"status": "error", "message": "You don't have permission to delete this product"}), 403
 
         Inventory.query.filter_by(product_id=product_id).delete()
+        bump_data_version(product.shop_id)
         db.session.delete(product)
         db.session.commit()
 
@@ -688,6 +728,7 @@ def delete_product_image(current_user, product_id, image_id):
         for idx, img in enumerate(remaining):
             img.ordering = idx
         
+        bump_data_version(product.shop_id)
         db.session.commit()
         
         return jsonify({
@@ -729,6 +770,7 @@ def set_primary_product_image(current_user, product_id, image_id):
             elif img.ordering < image.ordering:
                 img.ordering += 1
         
+        bump_data_version(product.shop_id)
         db.session.commit()
         
         return jsonify({
@@ -858,6 +900,7 @@ def bulk_assign_distributor(current_user):
                 "distributor_name": distributor.full_name if distributor else None
             })
         
+        bump_data_version(shop_id)
         db.session.commit()
         
         action = "assigned" if distributor_id else "cleared"
@@ -1063,6 +1106,7 @@ def bulk_upload_product_images(current_user):
                 
                 results["matched"] += 1
             
+            bump_data_version(shop_id)
             db.session.commit()
             
             return jsonify({
@@ -4,7 +4,16 @@ Performance monitoring and health check endpoints
 
 from flask import Blueprint, jsonify, request
 from utils.performance_utils import get_cache_stats, clear_cache
-from models.model import db
+from utils.sales_store import sales_store
+from utils.dashboard_cache import dashboard_cache_stats
+from services.sales_analytics_service import get_query_cache_stats, clear_query_cache
+from services.forecast_executor import forecast_executor
+from services.distributor_summary_service import distributor_summary_stats
+from services.regional_demand_service import regional_upload_cache_stats
+from services.distributor_chat_context_service import chat_context_stats
+from services.forecast_precompute_service import trigger_precompute, forecast_precompute_scheduler
+from models.model import db, ForecastPrecomputeRun, ForecastPrecomputeShopLog
+from utils.auth_utils import token_required, roles_required
 from sqlalchemy import text
 import psutil
 import time
@@ -84,7 +93,8 @@ def performance_metrics():
                 "num_threads": process.num_threads(),
                 "create_time": process.create_time()
             },
-            "cache": get_cache_stats()
+            "cache": get_cache_stats(),
+            "analytics_query_cache": get_query_cache_stats()
         }
         
         return jsonify({
@@ -102,9 +112,10 @@ def performance_metrics():
 def clear_cache_endpoint():
     """Clear performance cache"""
     try:
-        old_stats = get_cache_stats()
+        old_stats = {**get_cache_stats(), "analytics_query_cache": get_query_cache_stats()}
         clear_cache()
-        new_stats = get_cache_stats()
+        clear_query_cache()
+        new_stats = {**get_cache_stats(), "analytics_query_cache": get_query_cache_stats()}
         
         return jsonify({
             "status": "success",
@@ -123,14 +134,20 @@ def clear_cache_endpoint():
 def cache_performance():
     """Get cache performance statistics"""
     try:
-        from utils.performance_utils import get_cache_stats
-        
         cache_stats = get_cache_stats()
+        analytics_stats = get_query_cache_stats()
         
         return jsonify({
             "status": "success",
             "cache_performance": cache_stats,
-            "cache_hit_ratio": "N/A (requires implementation)",
+            "analytics_query_cache": analytics_stats,
+            "sales_store": sales_store.stats(),
+            "forecast_executor": forecast_executor.stats(),
+            "dashboard_cache": dashboard_cache_stats(),
+            "distributor_summaries": distributor_summary_stats(),
+            "regional_upload_cache": regional_upload_cache_stats(),
+            "distributor_chat_context": chat_context_stats(),
+            "cache_hit_ratio": analytics_stats["hit_rate"],
             "recommendations": [
                 "Consider Redis for production-scale caching",
                 "Monitor cache hit ratios",
@@ -177,3 +194,80 @@ def slow_queries():
             "status": "error",
             "message": f"Failed to analyze slow queries: {str(e)}"
         }), 500
+
+
+# ============================================================================
+# FORECAST PRECOMPUTE (admin)
+# ============================================================================
+
+@performance_bp.route("/forecast-precompute/run", methods=["POST"])
+@token_required
+@roles_required('admin')
+def trigger_forecast_precompute(current_user):
+    """Start a precompute run now; optional JSON body {"shop_ids": [...]} limits it to those shops."""
+    try:
+        payload = request.get_json(silent=True) or {}
+        shop_ids = payload.get("shop_ids")
+        if shop_ids is not None:
+            if not isinstance(shop_ids, list):
+                return jsonify({"status": "error", "message": "shop_ids must be a list"}), 400
+            shop_ids = [int(s) for s in shop_ids]
+
+        run = trigger_precompute(shop_ids)
+        if run is None:
+            return jsonify({
+                "status": "error",
+                "message": "A forecast precompute run is already in progress"
+            }), 409
+
+        return jsonify({"status": "success", "run": run.to_dict()}), 202
+
+    except (TypeError, ValueError):
+        return jsonify({"status": "error", "message": "shop_ids must be integers"}), 400
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": f"Failed to start precompute: {str(e)}"
+        }), 500
+
+
+@performance_bp.route("/forecast-precompute/runs", methods=["GET"])
+@token_required
+@roles_required('admin')
+def list_forecast_precompute_runs(current_user):
+    """Recent precompute runs (newest first) and scheduler status."""
+    try:
+        limit = min(request.args.get("limit", 20, type=int), 100)
+        runs = ForecastPrecomputeRun.query.order_by(ForecastPrecomputeRun.id.desc()).limit(limit).all()
+        return jsonify({
+            "status": "success",
+            "scheduler": forecast_precompute_scheduler.status(),
+            "runs": [run.to_dict() for run in runs]
+        }), 200
+
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": f"Failed to list precompute runs: {str(e)}"
+        }), 500
+
+
+@performance_bp.route("/forecast-precompute/runs/<int:run_id>", methods=["GET"])
+@token_required
+@roles_required('admin')
+def get_forecast_precompute_run(current_user, run_id):
+    """One precompute run with its per-shop durations and errors."""
+    try:
+        run = db.session.get(ForecastPrecomputeRun, run_id)
+        if not run:
+            return jsonify({"status": "error", "message": "Run not found"}), 404
+
+        data = run.to_dict()
+        data["shop_logs"] = [log.to_dict() for log in run.shop_logs.order_by(ForecastPrecomputeShopLog.id)]
+        return jsonify({"status": "success", "run": data}), 200
+
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": f"Failed to get precompute run: {str(e)}"
+        }), 500
@@ -1,13 +1,14 @@
 # backend/routes/products.py
 
 from flask import Blueprint, jsonify, request
-from models.model import db, Product, Shop, SalesData
+from models.model import db, Product, Shop
 from sqlalchemy import or_
 from werkzeug.exceptions import NotFound
 from utils.image_utils import resolve_product_image
 from utils.performance_utils import cached_ai_caption, batch_ai_captions, performance_monitor
 from services.ai_service import generate_ai_caption
 from services.forecasting_service import top_trending_products
+from utils.sales_query import load_sales_frame
 import pandas as pd
 
 product_bp = Blueprint("product", __name__)
@@ -174,8 +175,8 @@ def get_suggested_products():
     """
     try:
         # Load sales data for trend forecasting
-        sales_data = SalesData.query.all()
-        if not sales_data:
+        sales = load_sales_frame()
+        if sales.empty:
             # fallback to top-rated products if no data
             products = Product.query.order_by(Product.rating.desc()).limit(6).all()
             result = []
@@ -191,11 +192,11 @@ def get_suggested_products():
             return jsonify({"status": "success", "source": "fallback", "suggested": result}), 200
 
         # Create DataFrame for Prophet analysis
-        df = pd.DataFrame([{
-            "Date": s.date,
-            "Sales": s.revenue,
-            "Product": s.product.name if s.product else "Unknown"
-        } for s in sales_data])
+        df = pd.DataFrame({
+            "Date": sales["date"],
+            "Sales": sales["revenue"],
+            "Product": sales["product_name"].fillna("Unknown"),
+        })
 
         trending = top_trending_products(df, top_n=6)
         result = []
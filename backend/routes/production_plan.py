@@ -5,10 +5,12 @@ import io
 import pandas as pd
 from datetime import datetime
 from flask import Blueprint, request, jsonify, send_file
-from services.prophet_service import prophet_manager
+from services.forecast_executor import forecast_executor
+from services.prophet_service import resolve_uncertainty_mode
+from config import Config
 from services.ai_providers import get_provider
 from routes.auth_routes import token_required
-from models.model import Product, SalesData
+from utils.sales_query import load_sales_frame
 
 production_bp = Blueprint("production", __name__)
 
@@ -71,6 +73,34 @@ def generate_production_plan(df, forecast_df):
         return "Unable to generate AI insights currently."
 
 
+def _load_production_frame(window_start):
+    """Sales since window_start (all shops) in the Product/Category/Region/Sales/Quantity/Date shape."""
+    sales = load_sales_frame(start_date=window_start)
+    # Product details come from the same joined query
+    return pd.DataFrame({
+        "Product": sales["product_name"].fillna("Product #" + sales["product_id"].astype(str)),
+        "Category": sales["category"].where(sales["product_name"].notna()).fillna("Unknown"),
+        "Region": sales["region"].fillna("Unknown"),
+        "Sales": sales["revenue"],
+        "Quantity": sales["quantity_sold"],
+        "Date": sales["date"],
+    })
+
+
+def _forecast_pending_response(job):
+    """Response for a forecast job that is still running, over capacity or failed."""
+    if job.status == "failed":
+        return jsonify({"status": "error", "message": f"Forecasting failed: {job.error}"}), 500
+    if job.status == "busy":
+        return jsonify({"status": "busy", "message": job.error, "retry_after_seconds": 10}), 503
+    return jsonify({
+        "status": "computing",
+        "message": "Forecast is being computed; retry shortly",
+        "job_key": job.key,
+        "retry_after_seconds": 5,
+    }), 202
+
+
 # GET: Generate production plan from database data
 @production_bp.route("/production-plan-db", methods=["GET"])
 @token_required
@@ -79,37 +109,14 @@ def get_production_plan_db(current_user):
     try:
         # Get recent sales data from database
         window_start = datetime.utcnow().date().replace(day=1)
-        sales_rows = (
-            SalesData.query
-            .filter(SalesData.date >= window_start)
-            .all()
-        )
+        df = _load_production_frame(window_start)
 
-        if not sales_rows:
+        if df.empty:
             return jsonify({
                 "status": "error",
                 "message": "No sales data available for production planning"
             }), 404
 
-        # Get product information
-        product_ids = {row.product_id for row in sales_rows if row.product_id}
-        products = Product.query.filter(Product.id.in_(product_ids)).all()
-        product_lookup = {p.id: p for p in products}
-
-        # Convert to DataFrame
-        rows = []
-        for entry in sales_rows:
-            product = product_lookup.get(entry.product_id)
-            rows.append({
-                "Product": product.name if product else f"Product #{entry.product_id}",
-                "Category": product.category if product else "Unknown",
-                "Region": entry.region or "Unknown",
-                "Sales": float(entry.revenue or 0),
-                "Quantity": entry.quantity_sold or 0,
-                "Date": entry.date
-            })
-
-        df = pd.DataFrame(rows)
         
         if df.empty:
             return jsonify({
@@ -117,14 +124,26 @@ def get_production_plan_db(current_user):
                 "message": "No valid sales data found"
             }), 404
 
+        # Interval tier for the forecast: exact / sampled / analytic
+        try:
+            uncertainty = resolve_uncertainty_mode(request.args.get("uncertainty"))
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+
         # Generate forecast using optimized Prophet
         try:
             # Prepare data for optimized Prophet
             prophet_df = df.groupby('Date')['Sales'].sum().reset_index()
             prophet_df.columns = ['ds', 'y']
             
-            # Use optimized Prophet service
-            forecast_data, metrics = prophet_manager.forecast_sales(prophet_df, periods=30)
+            # Fit in the forecast worker pool; long fits answer 202 and finish in the background
+            job = forecast_executor.request(
+                prophet_df, periods=30, wait=Config.FORECAST_WAIT_SECONDS,
+                uncertainty=uncertainty
+            )
+            if not job.ready:
+                return _forecast_pending_response(job)
+            forecast_data, metrics = job.forecast, job.metrics
             
             # Convert forecast data to expected format
             forecast = pd.DataFrame({
@@ -152,7 +171,8 @@ def get_production_plan_db(current_user):
                     "forecast_metrics": {
                         "forecast_time_seconds": metrics.get('forecast_time_seconds', 0),
                         "mae": metrics.get('mae', 0),
-                        "rmse": metrics.get('rmse', 0)
+                        "rmse": metrics.get('rmse', 0),
+                        "uncertainty": metrics.get('uncertainty')
                     },
                     "generated_at": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
                 }
@@ -228,14 +248,26 @@ def production_plan_upload(current_user):
                 "message": "No valid Date/Sales data after processing"
             }), 400
 
+        # Interval tier for the forecast: exact / sampled / analytic
+        try:
+            uncertainty = resolve_uncertainty_mode(request.args.get("uncertainty"))
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+
         # Generate forecast using optimized Prophet
         try:
             # Prepare data for optimized Prophet
             prophet_df = df.groupby('Date')['Sales'].sum().reset_index()
             prophet_df.columns = ['ds', 'y']
             
-            # Use optimized Prophet service
-            forecast_data, metrics = prophet_manager.forecast_sales(prophet_df, periods=30)
+            # Fit in the forecast worker pool; long fits answer 202 and finish in the background
+            job = forecast_executor.request(
+                prophet_df, periods=30, wait=Config.FORECAST_WAIT_SECONDS,
+                uncertainty=uncertainty
+            )
+            if not job.ready:
+                return _forecast_pending_response(job)
+            forecast_data, metrics = job.forecast, job.metrics
             
             # Convert forecast data to expected format
             forecast = pd.DataFrame({
@@ -263,7 +295,8 @@ def production_plan_upload(current_user):
                     "forecast_metrics": {
                         "forecast_time_seconds": metrics.get('forecast_time_seconds', 0),
                         "mae": metrics.get('mae', 0),
-                        "rmse": metrics.get('rmse', 0)
+                        "rmse": metrics.get('rmse', 0),
+                        "uncertainty": metrics.get('uncertainty')
                     },
                     "data_summary": {
                         "total_products": df['Product'].nunique(),
@@ -296,37 +329,15 @@ def export_production_plan(current_user):
     try:
         # Get recent sales data
         window_start = datetime.utcnow().date().replace(day=1)
-        sales_rows = (
-            SalesData.query
-            .filter(SalesData.date >= window_start)
-            .all()
-        )
+        df = _load_production_frame(window_start)
 
-        if not sales_rows:
+        if df.empty:
             return jsonify({
                 "status": "error",
                 "message": "No sales data available for export"
             }), 404
 
-        # Get product information
-        product_ids = {row.product_id for row in sales_rows if row.product_id}
-        products = Product.query.filter(Product.id.in_(product_ids)).all()
-        product_lookup = {p.id: p for p in products}
-
-        # Prepare data
-        rows = []
-        for entry in sales_rows:
-            product = product_lookup.get(entry.product_id)
-            rows.append({
-                "Product": product.name if product else f"Product #{entry.product_id}",
-                "Category": product.category if product else "Unknown",
-                "Region": entry.region or "Unknown",
-                "Revenue": float(entry.revenue or 0),
-                "UnitsSold": entry.quantity_sold or 0,
-                "Date": entry.date.strftime('%Y-%m-%d') if entry.date else "Unknown"
-            })
-
-        df = pd.DataFrame(rows)
+        df = df.rename(columns={"Sales": "Revenue", "Quantity": "UnitsSold"})
         
         # Create summary for production planning
         summary = (
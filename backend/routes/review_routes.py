@@ -6,11 +6,62 @@ Production-ready implementation with authentication and auto user name fetching.
 from flask import Blueprint, request, jsonify, current_app
 from models.model import db, Review, User, Shop, Product
 from utils.auth_utils import token_required
+from utils.response_helpers import keyset_paginate, keyset_order_by, cursor_pagination_info
+from utils.data_version import bump_data_version
+from utils.inventory_utils import ensure_keyset_indexes
 from datetime import datetime
 from sqlalchemy import func
+from sqlalchemy.orm import joinedload
 
 reviews_bp = Blueprint("reviews", __name__)
 
+# Default / maximum page size for cursor-paginated review listings
+REVIEW_PAGE_SIZE = 20
+REVIEW_PAGE_SIZE_MAX = 100
+
+
+def _serialize_review(r):
+    """Frontend-friendly review dict (reviewer must be eager-loaded)."""
+    user = r.reviewer
+    return {
+        "id": r.id,
+        "user_id": r.user_id,
+        "user_name": r.user_name or (user.full_name if user else "Anonymous"),
+        "rating": r.rating,
+        "title": r.title or "",
+        "body": r.body or "",
+        "is_verified": bool(getattr(r, "is_verified_purchase", False)),
+        "created_at": r.created_at.isoformat() if getattr(r, "created_at", None) else None
+    }
+
+
+def _list_reviews(query):
+    """
+    Newest-first review listing.
+    
+    With a `cursor` (or `limit`) query param the listing is keyset-paginated on
+    (created_at, id); otherwise all reviews are returned as before.
+    
+    Returns:
+        tuple: (reviews_list, pagination_info or None)
+    """
+    ensure_keyset_indexes()
+    query = query.options(joinedload(Review.reviewer))
+    cursor = request.args.get("cursor")
+    limit = request.args.get("limit", type=int)
+    sort_keys = [
+        ("newest", Review.created_at, True),
+        ("id", Review.id, True),
+    ]
+    
+    if cursor is None and limit is None:
+        reviews = query.order_by(*keyset_order_by(sort_keys)).all()
+        return [_serialize_review(r) for r in reviews], None
+    
+    per_page = max(1, min(limit or REVIEW_PAGE_SIZE, REVIEW_PAGE_SIZE_MAX))
+    reviews, next_cursor = keyset_paginate(query, "newest", sort_keys, cursor=cursor or None, per_page=per_page)
+    return [_serialize_review(r) for r in reviews], cursor_pagination_info(next_cursor, per_page)
+
 
 # ============================================================================
 # GET REVIEWS
@@ -28,24 +79,8 @@ def get_shop_reviews(shop_id):
         if not shop:
             return jsonify({"status": "error", "message": "Shop not found"}), 404
         
-        # Optimized query: fetch reviews with explicit ordering
-        reviews = Review.query.filter(Review.shop_id == shop_id).order_by(Review.created_at.desc()).all()
-
-        # Build frontend-friendly reviews list
-        reviews_list = []
-        for r in reviews:
-            # Fetch user info if user_id exists
-            user = User.query.get(r.user_id) if r.user_id else None
-            reviews_list.append({
-                "id": r.id,
-                "user_id": r.user_id,
-                "user_name": r.user_name or (user.full_name if user else "Anonymous"),
-                "rating": r.rating,
-                "title": r.title or "",
-                "body": r.body or "",
-                "is_verified": bool(getattr(r, "is_verified_purchase", False)),
-                "created_at": r.created_at.isoformat() if getattr(r, "created_at", None) else None
-            })
+        # Reviewers are eager-loaded; pass `cursor`/`limit` for keyset pagination
+        reviews_list, pagination_info = _list_reviews(Review.query.filter(Review.shop_id == shop_id))
 
         # Aggregates in single query
         agg = db.session.query(
@@ -56,14 +91,20 @@ def get_shop_reviews(shop_id):
         avg_rating = float(agg.avg) if agg.avg is not None else 0.0
         review_count = int(agg.count or 0)
 
-        return jsonify({
+        response = {
             "status": "success",
             "reviews": reviews_list, 
             "avgRating": round(avg_rating, 2), 
             "reviewCount": review_count,
             "shop_name": shop.name
-        }), 200
+        }
+        if pagination_info is not None:
+            response["pagination"] = pagination_info
+        return jsonify(response), 200
         
+    except ValueError as e:
+        # Malformed or mismatched pagination cursor
+        return jsonify({"status": "error", "message": str(e)}), 400
     except Exception as e:
         current_app.logger.exception("Error fetching reviews")
         return jsonify({"status": "error", "message": "Failed to load reviews"}), 500
@@ -429,6 +470,7 @@ def _update_shop_rating(shop_id: int):
             # Optionally store review count if shop model has it
             if hasattr(shop, 'review_count'):
                 shop.review_count = int(agg.count or 0)
+        bump_data_version(shop_id)
     except Exception as e:
         current_app.logger.warning(f"Failed to update shop rating: {e}")
 
@@ -449,22 +491,8 @@ def get_product_reviews(product_id):
         if not product:
             return jsonify({"status": "error", "message": "Product not found"}), 404
         
-        # Fetch reviews
-        reviews = Review.query.filter(Review.product_id == product_id).order_by(Review.created_at.desc()).all()
-
-        reviews_list = []
-        for r in reviews:
-            user = db.session.get(User, r.user_id) if r.user_id else None
-            reviews_list.append({
-                "id": r.id,
-                "user_id": r.user_id,
-                "user_name": r.user_name or (user.full_name if user else "Anonymous"),
-                "rating": r.rating,
-                "title": r.title or "",
-                "body": r.body or "",
-                "is_verified": bool(getattr(r, "is_verified_purchase", False)),
-                "created_at": r.created_at.isoformat() if getattr(r, "created_at", None) else None
-            })
+        # Reviewers are eager-loaded; pass `cursor`/`limit` for keyset pagination
+        reviews_list, pagination_info = _list_reviews(Review.query.filter(Review.product_id == product_id))
 
         # Aggregates
         agg = db.session.query(
@@ -475,14 +503,20 @@ def get_product_reviews(product_id):
         avg_rating = float(agg.avg) if agg.avg is not None else 0.0
         review_count = int(agg.count or 0)
 
-        return jsonify({
+        response = {
             "status": "success",
             "reviews": reviews_list, 
             "avgRating": round(avg_rating, 2), 
             "reviewCount": review_count,
             "product_name": product.name
-        }), 200
+        }
+        if pagination_info is not None:
+            response["pagination"] = pagination_info
+        return jsonify(response), 200
         
+    except ValueError as e:
+        # Malformed or mismatched pagination cursor
+        return jsonify({"status": "error", "message": str(e)}), 400
     except Exception as e:
         current_app.logger.exception("Error fetching product reviews")
         return jsonify({"status": "error", "message": "Failed to load reviews"}), 500
@@ -674,5 +708,6 @@ def _update_product_rating(product_id: int):
         product = db.session.get(Product, product_id)
         if product:
             product.rating = float(agg.avg) if agg.avg else 0.0
+            bump_data_version(product.shop_id)
     except Exception as e:
         current_app.logger.warning(f"Failed to update product rating: {e}")
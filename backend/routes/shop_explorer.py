@@ -4,6 +4,7 @@ from flask import Blueprint, jsonify, request
 from models.model import Shop, Product
 from config import Config
 from utils.image_utils import resolve_product_image, resolve_shop_image
+from utils.fts_search import apply_text_search
 import requests
 from math import cos, radians
 from sqlalchemy import func
@@ -166,12 +167,8 @@ def search():
         if not query:
             return jsonify({"status": "success", "shops": [], "products": []}), 200
 
-        shops = Shop.query.filter(Shop.name.ilike(f"%{query}%")).all()
-        products = Product.query.filter(
-            (Product.name.ilike(f"%{query}%")) |
-            (Product.category.ilike(f"%{query}%")) |
-            (Product.description.ilike(f"%{query}%"))
-        ).limit(30).all()
+        shops = apply_text_search(Shop.query, Shop, "shops_fts", query).all()
+        products = apply_text_search(Product.query, Product, "products_fts", query).limit(30).all()
 
         shop_results = [{
             "id": s.id,
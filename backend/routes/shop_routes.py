@@ -1,15 +1,20 @@
 import os
-import hashlib
+import tempfile
 import time
 import json
 import logging
 import pandas as pd
 from datetime import datetime, timedelta
 from flask import Blueprint, jsonify, request, send_file
-from io import StringIO, BytesIO
 from utils.auth_utils import token_required, roles_required, check_shop_ownership
 from utils.validation import validate_file_upload
 from utils.performance_utils import performance_monitor
+from utils.background_jobs import BackgroundJobQueue
+from utils.inventory_utils import ensure_sales_upload_log_columns, ensure_cache_version_columns
+from utils.file_processing_utils import spool_upload, read_table_header, iter_table_chunks
+from utils.sales_store import sales_store, normalize_sales_frame
+from utils.data_version import get_data_version, bump_data_version
+from utils.dashboard_cache import get_cached_dashboard, store_dashboard
 from utils.csv_templates import validate_columns, SALES_COLUMNS
 from models.model import db, Product, Inventory, SalesData, Shop, User, SalesUploadLog, ShopImage, CachedAIInsight
 from config import Config
@@ -20,6 +25,8 @@ from services.ai_service import (
     generate_production_priorities,
 )
 from services.sales_analytics_service import get_sales_analytics_service, invalidate_shop_cache
+from services.prophet_service import resolve_uncertainty_mode
+from services.sales_ingest_service import ingest_sales_dataframe
 
 shop_bp = Blueprint("shop", __name__)
 INSTANCE_FOLDER = Config.DATA_DIR
@@ -60,19 +67,19 @@ def _invalidate_db_cache(shop_id):
         print(f"[Cache Invalidate Error] Failed to clear DB cache for shop_id={shop_id}: {e}")
 
 
-def _load_sales_dataframe(path):
-    if not os.path.exists(path):
-        return None
+def _load_sales_dataframe(shop_id):
+    """
+    Latest uploaded sales frame for a shop from the columnar store (memory-mapped, LRU cached).
+    Shops whose data predates the store are migrated from sales_shop_{id}.csv on first read.
+    """
     try:
-        df = pd.read_csv(path)
-        if df.empty:
-            return None
-        df.columns = [c.lower() for c in df.columns]
-        if "date" not in df.columns:
-            return None
-        df["date"] = pd.to_datetime(df["date"], errors="coerce")
-        df.dropna(subset=["date"], inplace=True)
-        if df.empty:
+        df = sales_store.read(shop_id)
+        if df is None:
+            path = os.path.join(INSTANCE_FOLDER, f"sales_shop_{shop_id}.csv")
+            if not os.path.exists(path):
+                return None
+            df = sales_store.write_from_csv(shop_id, path)
+        if df.empty or "date" not in df.columns:
             return None
         return df
     except Exception as exc:
@@ -89,6 +96,7 @@ def shop_dashboard(current_user):
     - Reads uploaded monthly CSV
     - Generates analytics & AI insights
     - Creates next-month synthetic forecast automatically
+    - Whole payload is cached per shop data version (see utils.dashboard_cache)
     """
     shop_id = request.args.get("shop_id", type=int)
     if not shop_id:
@@ -102,8 +110,12 @@ def shop_dashboard(current_user):
     shop = Shop.query.get(shop_id)
     actual_rating = round(shop.rating or 0.0, 1) if shop else 0.0
 
-    sales_path = os.path.join(INSTANCE_FOLDER, f"sales_shop_{shop_id}.csv")
-    df = _load_sales_dataframe(sales_path)
+    data_version = get_data_version(shop_id)
+    cached = get_cached_dashboard(shop_id, data_version)
+    if cached is not None:
+        return jsonify({"status": "success", "data": cached}), 200
+
+    df = _load_sales_dataframe(shop_id)
     
     # Check if shop has any products in inventory
     product_count = Product.query.filter_by(shop_id=shop_id, is_active=True).count()
@@ -248,26 +260,25 @@ def shop_dashboard(current_user):
         # Generate Insights using helper
         insights_data = _generate_insights(df, shop_id=shop_id, has_inventory=True)
         
-        return jsonify({
-            "status": "success",
-            "data": {
-                "shop_name": shop.name if shop else "Shop",
-                "weekly_sales": f"₹{weekly_sales:,.2f}",
-                "pending_reorders": total_pending_reorders,
-                "total_orders": total_orders,
-                "customer_rating": actual_rating,
-                "growth": f"{growth:+.1f}%",
-                "trend_chart": trend_chart,
-                "ai_insights": insights_data["ai_insights"],
-                "forecast": forecast,
-                "reorder_suggestions": reorder_suggestions,
-                "production_priorities": production_priorities,
-                "top_selling": top_selling,
-                "underperforming": underperforming,
-                "demand_summary": insights_data["demand_summary"],
-                "recommendation": insights_data["recommendation"]
-            }
-        }), 200
+        payload = {
+            "shop_name": shop.name if shop else "Shop",
+            "weekly_sales": f"₹{weekly_sales:,.2f}",
+            "pending_reorders": total_pending_reorders,
+            "total_orders": total_orders,
+            "customer_rating": actual_rating,
+            "growth": f"{growth:+.1f}%",
+            "trend_chart": trend_chart,
+            "ai_insights": insights_data["ai_insights"],
+            "forecast": forecast,
+            "reorder_suggestions": reorder_suggestions,
+            "production_priorities": production_priorities,
+            "top_selling": top_selling,
+            "underperforming": underperforming,
+            "demand_summary": insights_data["demand_summary"],
+            "recommendation": insights_data["recommendation"]
+        }
+        store_dashboard(shop_id, data_version, payload)
+        return jsonify({"status": "success", "data": payload}), 200
 
     except pd.errors.EmptyDataError:
         # Empty CSV file - not an error, just no data
@@ -302,11 +313,13 @@ def shop_dashboard(current_user):
             # No warning - don't show error to user for unexpected issues
         }), 200
 
-def _generate_insights(df, shop_id=None, force_refresh=False, has_inventory=True):
+def _generate_insights(df, shop_id=None, force_refresh=False, has_inventory=True, row_count=None):
     """Helper to generate AI insights from sales dataframe.
     
     Caches insights in DB to avoid redundant AI API calls.
     Invalidated when new sales data is uploaded (force_refresh=True).
+    Only revenue sums per fabric/category, region and product are used, so `df` may be
+    a pre-aggregated frame; pass the original row_count in that case.
     """
     try:
         # Check if inventory exists
@@ -321,10 +334,12 @@ def _generate_insights(df, shop_id=None, force_refresh=False, has_inventory=True
         # Check for cached insights first (unless force refresh requested)
         if shop_id and not force_refresh:
             try:
+                ensure_cache_version_columns()
                 cached = CachedAIInsight.query.filter_by(
                     shop_id=shop_id,
                     insight_type='dashboard',
-                    is_stale=False
+                    is_stale=False,
+                    data_version=get_data_version(shop_id, sales=True)
                 ).first()
                 
                 if cached and cached.expires_at and cached.expires_at > datetime.now():
@@ -339,7 +354,8 @@ def _generate_insights(df, shop_id=None, force_refresh=False, has_inventory=True
                 logging.warning(f"[Insights] Cache read failed: {cache_read_err}")
         
         # Early return if DataFrame is empty or too small
-        if df is None or df.empty or len(df) < 3:
+        n_rows = row_count if row_count is not None else (len(df) if df is not None else 0)
+        if df is None or df.empty or n_rows < 3:
             logging.info("[Insights] Skipping AI generation - insufficient data rows")
             return {
                 "ai_insights": [],
@@ -433,8 +449,10 @@ def _generate_insights(df, shop_id=None, force_refresh=False, has_inventory=True
                 ).first()
                 
                 expires_at = datetime.now() + timedelta(hours=AI_INSIGHT_TTL_HOURS)
+                data_version = get_data_version(shop_id, sales=True)
                 
                 if cached:
+                    cached.data_version = data_version
                     cached.insights_json = json.dumps(ai_insights)
                     cached.demand_summary = demand_summary
                     cached.recommendation = recommendation
@@ -449,6 +467,7 @@ def _generate_insights(df, shop_id=None, force_refresh=False, has_inventory=True
                         demand_summary=demand_summary,
                         recommendation=recommendation,
                         is_stale=False,
+                        data_version=data_version,
                         expires_at=expires_at
                     )
                     db.session.add(cached)
@@ -469,6 +488,234 @@ def _generate_insights(df, shop_id=None, force_refresh=False, has_inventory=True
             "recommendation": "Could not generate recommendation"
         }
 
+# ============================================================================
+# SALES UPLOAD PIPELINE
+# ============================================================================
+
+# Worker pool for background uploads (?async=true or SALES_UPLOAD_ASYNC)
+sales_upload_queue = BackgroundJobQueue("sales-upload", max_workers=Config.SALES_UPLOAD_WORKERS)
+
+# Parsed as strings in every chunk (keeps SKU leading zeros, no per-chunk type drift)
+SALES_TEXT_COLUMNS = ("sku", "product_name", "category", "fabric_type", "region")
+# Dimensions _generate_insights groups revenue by; uploads keep only these sums in memory
+SALES_INSIGHT_DIMENSIONS = ("fabric_type", "category", "region", "product_name")
+# Excel has no streaming reader, so it keeps the old in-memory cap
+SALES_EXCEL_MAX_MB = 16
+
+
+class SalesFileError(ValueError):
+    """Uploaded sales file is missing required columns."""
+
+
+def _validate_sales_header(path):
+    """Check the header row against the sales template without parsing the body."""
+    is_valid, missing, message = validate_columns(read_table_header(path), "sales")
+    if not is_valid:
+        raise SalesFileError(message)
+
+
+def _prepare_sales_chunk(chunk):
+    # Calculate revenue for insights
+    chunk["quantity_sold"] = pd.to_numeric(chunk["quantity_sold"], errors="coerce").fillna(0)
+    chunk["selling_price"] = pd.to_numeric(chunk["selling_price"], errors="coerce").fillna(0)
+    chunk["revenue"] = chunk["quantity_sold"] * chunk["selling_price"]
+    chunk["date"] = pd.to_datetime(chunk["date"], errors="coerce")
+    return chunk.dropna(subset=["date"])
+
+
+def _summarize_for_insights(frame):
+    """Collapse rows to revenue sums per insight dimension (works on chunks and on summaries)."""
+    dims = [c for c in SALES_INSIGHT_DIMENSIONS if c in frame.columns]
+    if not dims:
+        return frame[["revenue"]].sum().to_frame().T
+    return frame.groupby(dims, dropna=False)["revenue"].sum().reset_index()
+
+
+def _set_upload_phase(log_entry, phase, rows_processed=None):
+    """Record pipeline progress; committed so pollers of the upload log can see it."""
+    log_entry.phase = phase
+    if rows_processed is not None:
+        log_entry.rows_processed = rows_processed
+    db.session.commit()
+
+
+def _finish_upload_log(log_entry, start_time, status, message):
+    duration_ms = int((time.perf_counter() - start_time) * 1000)
+    log_entry.completed_at = datetime.utcnow()
+    log_entry.duration_ms = duration_ms
+    log_entry.status = status
+    log_entry.message = message[:250]
+    log_entry.sla_breached = duration_ms > SalesUploadLog.SLA_LIMIT_MS
+
+
+def _fail_upload_log(log_entry, start_time, error):
+    db.session.rollback()
+    if not log_entry:
+        return
+    try:
+        _finish_upload_log(log_entry, start_time, 'failed', str(error))
+        db.session.add(log_entry)
+        db.session.commit()
+    except Exception as log_err:
+        db.session.rollback()
+        print(f"[Sales Upload Log Error] {log_err}")
+
+
+def _process_sales_upload(shop_id, path, log_entry, start_time, generate_insights=True, keep_updates=True):
+    """
+    Stream a spooled sales file through validation, upsert and publication, chunk by chunk.
+
+    Each chunk is upserted and committed on its own (the upsert is idempotent, so a
+    retried upload converges), and only per-dimension revenue sums are kept for the
+    insights step - memory stays flat regardless of file size.
+    With generate_insights=False the (slow, LLM-backed) insight refresh is left to the caller.
+    """
+    _set_upload_phase(log_entry, 'parsing')
+    _validate_sales_header(path)
+
+    save_path = os.path.join(INSTANCE_FOLDER, f"sales_shop_{shop_id}.csv")
+    os.makedirs(os.path.dirname(save_path), exist_ok=True)
+    # Per-upload partial file: overlapping uploads for the shop never share or remove it
+    fd, partial_path = tempfile.mkstemp(dir=INSTANCE_FOLDER, prefix=f"sales_shop_{shop_id}.", suffix=".partial")
+    os.close(fd)
+
+    stock_updates = []
+    stock_update_count = 0
+    matched_products_count = 0
+    rows = 0
+    summaries = []
+    # Typed columnar copy read by the dashboard, built from the same chunks
+    store_writer = sales_store.begin_write(shop_id)
+
+    try:
+        _set_upload_phase(log_entry, 'upserting')
+        for chunk in iter_table_chunks(path, text_columns=SALES_TEXT_COLUMNS):
+            chunk = _prepare_sales_chunk(chunk)
+            if chunk.empty:
+                continue
+
+            # Set-based upsert of sales rows + inventory deltas (fixed number of queries per chunk)
+            updates, matched = ingest_sales_dataframe(chunk, shop_id)
+            # Committed with the chunk, so cached forecasts/analytics never outlive the rows they saw
+            bump_data_version(shop_id, sales=True)
+            stock_update_count += len(updates)
+            matched_products_count += matched
+            if keep_updates:
+                stock_updates.extend(updates)
+
+            # Normalized CSV for downstream analytics, appended chunk by chunk
+            chunk.to_csv(partial_path, mode='a', header=rows == 0, index=False)
+            store_writer.append(normalize_sales_frame(chunk))
+            summaries.append(_summarize_for_insights(chunk))
+            if len(summaries) >= 10:
+                summaries = [_summarize_for_insights(pd.concat(summaries, ignore_index=True))]
+            rows += len(chunk)
+            _set_upload_phase(log_entry, 'upserting', rows_processed=rows)
+
+        _set_upload_phase(log_entry, 'saving', rows_processed=rows)
+        if rows:
+            os.replace(partial_path, save_path)
+        else:
+            empty = pd.DataFrame(columns=read_table_header(path))
+            empty.to_csv(save_path, index=False)
+            store_writer.append(normalize_sales_frame(empty))
+    except Exception:
+        sales_store.discard(store_writer)
+        raise
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+    sales_store.publish(shop_id, store_writer)
+
+    # Invalidate ALL caches for this shop (insights, forecasts, analytics)
+    invalidate_shop_cache(shop_id)
+    _invalidate_db_cache(shop_id)
+    # The dashboard reads the store written above
+    bump_data_version(shop_id)
+
+    # Check if shop has any products in inventory
+    product_count = Product.query.filter_by(shop_id=shop_id, is_active=True).count()
+    has_inventory = product_count > 0
+
+    insight_df = _summarize_for_insights(pd.concat(summaries, ignore_index=True)) if summaries else pd.DataFrame()
+
+    insights_data = None
+    if generate_insights:
+        # Generate fresh AI Insights (force_refresh=True to bypass cache)
+        _set_upload_phase(log_entry, 'insights')
+        insights_data = _generate_insights(
+            insight_df, shop_id=shop_id, force_refresh=True, has_inventory=has_inventory, row_count=rows
+        )
+
+    log_entry.phase = 'done'
+    _finish_upload_log(log_entry, start_time, 'completed', f"Updated stock for {stock_update_count} products.")
+    db.session.commit()
+
+    print(f"[Sales Upload] Processed {stock_update_count} stock updates for shop {shop_id}")
+
+    warning_msg = None
+    if matched_products_count == 0 and rows > 0:
+        warning_msg = "Sales data uploaded, but no matching products found in inventory. Please upload inventory with matching SKUs to track stock and sales history."
+
+    return {
+        "insight_df": insight_df,
+        "rows": rows,
+        "has_inventory": has_inventory,
+        "stock_updates": stock_updates,
+        "stock_update_count": stock_update_count,
+        "warning": warning_msg,
+        "insights": insights_data,
+    }
+
+
+def _run_sales_upload_job(log_id, shop_id, path, start_time):
+    """Worker entrypoint: run the upload pipeline, then queue the AI insight refresh."""
+    try:
+        log_entry = SalesUploadLog.query.get(log_id)
+        if not log_entry:
+            return
+        try:
+            # Picked up by a worker: pollers see it running rather than still queued
+            log_entry.status = 'in_progress'
+            _set_upload_phase(log_entry, 'parsing')
+            result = _process_sales_upload(
+                shop_id, path, log_entry, start_time, generate_insights=False, keep_updates=False
+            )
+        except Exception as e:
+            _fail_upload_log(log_entry, start_time, e)
+            print(f"[Upload Job Error] upload #{log_id}: {e}")
+            return
+    finally:
+        _remove_spooled_file(path)
+
+    sales_upload_queue.submit(
+        _refresh_upload_insights, shop_id, result["insight_df"], result["has_inventory"], result["rows"]
+    )
+
+
+def _refresh_upload_insights(shop_id, insight_df, has_inventory, row_count):
+    """Follow-up task: regenerate and cache AI insights after a background upload."""
+    _generate_insights(insight_df, shop_id=shop_id, force_refresh=True, has_inventory=has_inventory, row_count=row_count)
+    # Dashboards cached while the insights were still being generated are now stale
+    bump_data_version(shop_id)
+    db.session.commit()
+
+
+def _remove_spooled_file(path):
+    try:
+        if path and os.path.exists(path):
+            os.remove(path)
+    except OSError as e:
+        print(f"[Sales Upload] Could not remove spooled file {path}: {e}")
+
+
+def _wants_async_upload():
+    flag = request.args.get("async") or request.form.get("async")
+    if flag is None:
+        return Config.SALES_UPLOAD_ASYNC
+    return flag.lower() in ["1", "true", "yes"]
+
+
 # Upload Sales CSV
 @shop_bp.route("/upload_sales_data", methods=["POST"])
 @token_required
@@ -476,6 +723,7 @@ def _generate_insights(df, shop_id=None, force_refresh=False, has_inventory=True
 def upload_sales_data(current_user):
     start_time = time.perf_counter()
     log_entry = None
+    spooled_path = None
     try:
         shop_id_raw = request.form.get("shop_id")
         file = request.files.get("file")
@@ -491,17 +739,22 @@ def upload_sales_data(current_user):
         if not check_shop_ownership(current_user.get("id"), shop_id):
             return jsonify({"status": "error", "message": "You don't have permission to manage this shop"}), 403
         
-        # Validate file upload (supports CSV/XLS/XLSX)
+        # Validate file upload (supports CSV/XLS/XLSX); CSV is streamed so it may be larger
         allowed_exts = ['.csv', '.xlsx', '.xls']
-        is_valid, message = validate_file_upload(file, allowed_exts, max_size_mb=16)
+        is_csv = (file.filename or "").lower().endswith(".csv")
+        max_size_mb = Config.SALES_UPLOAD_MAX_MB if is_csv else SALES_EXCEL_MAX_MB
+        is_valid, message = validate_file_upload(file, allowed_exts, max_size_mb=max_size_mb)
         if not is_valid:
             return jsonify({"status": "error", "message": message}), 400
 
-        file_bytes = file.read()
-        if not file_bytes:
+        # Copy to disk while hashing - the upload is never held in memory as a whole
+        spooled_path, file_hash, file_size = spool_upload(file)
+        if not file_size:
             return jsonify({"status": "error", "message": "Uploaded file is empty"}), 400
 
-        file_hash = hashlib.sha256(file_bytes).hexdigest()
+        ensure_sales_upload_log_columns()
+        run_async = _wants_async_upload()
+
         duplicate_log = SalesUploadLog.query.filter_by(
             shop_id=shop_id,
             file_hash=file_hash,
@@ -512,18 +765,16 @@ def upload_sales_data(current_user):
             shop_id=shop_id,
             file_name=file.filename,
             file_hash=file_hash,
-            status='duplicate' if duplicate_log else 'in_progress',
+            status='duplicate' if duplicate_log else ('queued' if run_async else 'in_progress'),
+            phase='queued',
             duplicate_of=duplicate_log.id if duplicate_log else None
         )
         db.session.add(log_entry)
         db.session.flush()
 
         if duplicate_log:
-            duration_ms = int((time.perf_counter() - start_time) * 1000)
-            log_entry.completed_at = datetime.utcnow()
-            log_entry.duration_ms = duration_ms
-            log_entry.sla_breached = duration_ms > SalesUploadLog.SLA_LIMIT_MS
-            log_entry.message = f"Duplicate of upload #{duplicate_log.id}"
+            log_entry.phase = 'done'
+            _finish_upload_log(log_entry, start_time, 'duplicate', f"Duplicate of upload #{duplicate_log.id}")
             db.session.commit()
             return jsonify({
                 "status": "duplicate",
@@ -532,145 +783,45 @@ def upload_sales_data(current_user):
                 "upload_log": log_entry.to_dict()
             }), 409
 
-        ext = os.path.splitext(file.filename)[1].lower()
-        buffer = BytesIO(file_bytes)
-        if ext == '.csv':
-            df = pd.read_csv(buffer)
-        else:
-            df = pd.read_excel(buffer)
+        if run_async:
+            # Validate the header up front so bad files are rejected before queueing
+            try:
+                _validate_sales_header(spooled_path)
+            except SalesFileError as e:
+                db.session.rollback()
+                return jsonify({
+                    "status": "error",
+                    "message": str(e),
+                    "hint": "Download the template from GET /api/v1/inventory/template/sales"
+                }), 400
 
-        # Normalize columns to lowercase
-        df.columns = [c.lower().strip() for c in df.columns]
-        
-        # Validate columns using centralized template
-        is_valid, missing, message = validate_columns(df.columns.tolist(), "sales")
-        if not is_valid:
+            db.session.commit()
+            sales_upload_queue.submit(_run_sales_upload_job, log_entry.id, shop_id, spooled_path, start_time)
+            # The worker owns the spooled file from here on
+            spooled_path = None
+            return jsonify({
+                "status": "accepted",
+                "message": "Sales file queued for processing.",
+                "job_id": log_entry.id,
+                "upload_log": log_entry.to_dict()
+            }), 202
+
+        try:
+            result = _process_sales_upload(shop_id, spooled_path, log_entry, start_time)
+        except SalesFileError as e:
+            _fail_upload_log(log_entry, start_time, e)
             return jsonify({
                 "status": "error", 
-                "message": message,
+                "message": str(e),
                 "hint": "Download the template from GET /api/v1/inventory/template/sales"
             }), 400
 
-        # Calculate revenue for insights
-        df["quantity_sold"] = pd.to_numeric(df["quantity_sold"], errors="coerce").fillna(0)
-        df["selling_price"] = pd.to_numeric(df["selling_price"], errors="coerce").fillna(0)
-        df["revenue"] = df["quantity_sold"] * df["selling_price"]
-        df["date"] = pd.to_datetime(df["date"], errors="coerce")
-        df.dropna(subset=["date"], inplace=True)
-
-        # Process each row and update inventory
-        stock_updates = []
-        matched_products_count = 0
-        for _, row in df.iterrows():
-            try:
-                sku = row.get("sku", "")
-                quantity_sold = int(row.get("quantity_sold", 0) or 0)
-                sale_date = row.get("date")
-                if pd.isna(sale_date):
-                    continue
-                if hasattr(sale_date, "date"):
-                    sale_date = sale_date.date()
-                
-                # Find product by SKU and shop_id
-                product = Product.query.filter_by(sku=sku, shop_id=shop_id).first()
-                if not product:
-                    continue
-                
-                matched_products_count += 1
-                
-                # Get inventory record
-                inventory = Inventory.query.filter_by(product_id=product.id).first()
-                
-                # Upsert into SalesData for delta tracking
-                sales_entry = SalesData.query.filter_by(
-                    shop_id=shop_id,
-                    product_id=product.id,
-                    date=sale_date
-                ).first()
-
-                previous_qty = sales_entry.quantity_sold if sales_entry else 0
-                delta_qty = quantity_sold - previous_qty
-
-                if sales_entry:
-                    sales_entry.quantity_sold = quantity_sold
-                    sales_entry.revenue = float(row.get("revenue", 0))
-                else:
-                    sales_entry = SalesData(
-                        date=sale_date,
-                        product_id=product.id,
-                        shop_id=shop_id,
-                        quantity_sold=quantity_sold,
-                        revenue=float(row.get("revenue", 0)),
-                        fabric_type=row.get("category") or row.get("fabric_type"),
-                        region=row.get("region")
-                    )
-                    db.session.add(sales_entry)
-
-                if inventory:
-                    # Track that we received sales data for this product
-                    inventory.last_sales_data_at = datetime.utcnow()
-
-                if not inventory or delta_qty == 0:
-                    continue
-
-                # Adjust stock based on delta (positive delta reduces stock, negative increases)
-                old_stock = inventory.qty_available
-                new_stock = max(0, old_stock - delta_qty)
-                inventory.qty_available = new_stock
-                
-                # Update total_sold to track cumulative sales quantity
-                inventory.total_sold = (inventory.total_sold or 0) + max(0, delta_qty)
-                
-                stock_updates.append({
-                    "product_name": product.name,
-                    "sku": sku,
-                    "sale_date": sale_date.isoformat(),
-                    "delta_quantity": -delta_qty,
-                    "recorded_quantity": quantity_sold,
-                    "old_stock": old_stock,
-                    "new_stock": new_stock
-                })
-                
-            except Exception as e:
-                print(f"[Sales Upload] Error processing row: {e}")
-                continue
-
-        # Save normalized CSV for downstream analytics
-        save_path = os.path.join(INSTANCE_FOLDER, f"sales_shop_{shop_id}.csv")
-        os.makedirs(os.path.dirname(save_path), exist_ok=True)
-        df.to_csv(save_path, index=False)
-        
-        # Invalidate ALL caches for this shop (insights, forecasts, analytics)
-        invalidate_shop_cache(shop_id)
-        _invalidate_db_cache(shop_id)
-        
-        # Check if shop has any products in inventory
-        product_count = Product.query.filter_by(shop_id=shop_id, is_active=True).count()
-        has_inventory = product_count > 0
-
-        # Generate fresh AI Insights (force_refresh=True to bypass cache)
-        insights_data = _generate_insights(df, shop_id=shop_id, force_refresh=True, has_inventory=has_inventory)
-
-        duration_ms = int((time.perf_counter() - start_time) * 1000)
-        log_entry.rows_processed = len(df)
-        log_entry.completed_at = datetime.utcnow()
-        log_entry.duration_ms = duration_ms
-        log_entry.status = 'completed'
-        log_entry.message = f"Updated stock for {len(stock_updates)} products."
-        log_entry.sla_breached = duration_ms > SalesUploadLog.SLA_LIMIT_MS
-        
-        db.session.commit()
-        
-        print(f"[Sales Upload] Processed {len(stock_updates)} stock updates for shop {shop_id}")
-        
-        warning_msg = None
-        if matched_products_count == 0 and len(df) > 0:
-            warning_msg = "Sales data uploaded, but no matching products found in inventory. Please upload inventory with matching SKUs to track stock and sales history."
-
+        stock_updates = result["stock_updates"]
+        insights_data = result["insights"]
         return jsonify({
             "status": "success", 
             "message": f"Sales data uploaded successfully! Updated stock for {len(stock_updates)} products.",
-            "warning": warning_msg,
+            "warning": result["warning"],
             "stock_updates": stock_updates,
             "ai_insights": insights_data["ai_insights"],
             "demand_summary": insights_data["demand_summary"],
@@ -679,22 +830,36 @@ def upload_sales_data(current_user):
         }), 200
         
     except Exception as e:
-        db.session.rollback()
-        if log_entry:
-            try:
-                duration_ms = int((time.perf_counter() - start_time) * 1000)
-                log_entry.status = 'failed'
-                log_entry.completed_at = datetime.utcnow()
-                log_entry.duration_ms = duration_ms
-                log_entry.sla_breached = duration_ms > SalesUploadLog.SLA_LIMIT_MS
-                log_entry.message = str(e)[:250]
-                db.session.add(log_entry)
-                db.session.commit()
-            except Exception as log_err:
-                db.session.rollback()
-                print(f"[Sales Upload Log Error] {log_err}")
+        _fail_upload_log(log_entry, start_time, e)
         print(f"[Upload Error] {e}")
         return jsonify({"status": "error", "message": str(e)}), 500
+    finally:
+        _remove_spooled_file(spooled_path)
+
+
+@shop_bp.route("/upload_sales_data/jobs/<int:job_id>", methods=["GET"])
+@token_required
+@roles_required('shop_owner', 'shop_manager')
+def get_sales_upload_job(current_user, job_id):
+    """Poll a background sales upload: status, phase and rows processed."""
+    try:
+        ensure_sales_upload_log_columns()
+        log_entry = SalesUploadLog.query.get(job_id)
+        if not log_entry:
+            return jsonify({"status": "error", "message": "Upload job not found"}), 404
+
+        if not check_shop_ownership(current_user.get("id"), log_entry.shop_id):
+            return jsonify({"status": "error", "message": "You don't have permission to access this shop"}), 403
+
+        return jsonify({
+            "status": "success",
+            "job_id": log_entry.id,
+            "done": log_entry.status in ('completed', 'failed', 'duplicate'),
+            "upload_log": log_entry.to_dict()
+        }), 200
+    except Exception as e:
+        print(f"[Upload Job Status Error] {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
 
 
 @shop_bp.route("/upload_sales_data/logs", methods=["GET"])
@@ -702,6 +867,7 @@ def upload_sales_data(current_user):
 @roles_required('shop_owner', 'shop_manager')
 def get_sales_upload_logs(current_user):
     try:
+        ensure_sales_upload_log_columns()
         shop_id = request.args.get("shop_id", type=int)
         limit = request.args.get("limit", default=5, type=int)
         if not shop_id:
@@ -815,6 +981,7 @@ def get_quarterly_forecast(current_user):
     """
     Get next quarter (90 days) demand forecast.
     Returns weekly and monthly predictions with confidence intervals.
+    Optional ?uncertainty=exact|sampled|analytic selects how the intervals are computed.
     """
     try:
         shop_id = request.args.get("shop_id", type=int)
@@ -825,9 +992,16 @@ def get_quarterly_forecast(current_user):
         if not check_shop_ownership(current_user.get("id"), shop_id):
             return jsonify({"status": "error", "message": "Access denied"}), 403
         
+        # Interval tier: exact / sampled / analytic (faster, labelled in the response)
+        uncertainty = request.args.get("uncertainty")
+        try:
+            uncertainty = resolve_uncertainty_mode(uncertainty)
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+        
         # Get analytics service for this shop
         analytics = get_sales_analytics_service(shop_id)
-        forecast = analytics.get_quarterly_demand_forecast()
+        forecast = analytics.get_quarterly_demand_forecast(uncertainty=uncertainty)
         
         return jsonify({
             "status": "success",
@@ -943,8 +1117,16 @@ def get_demand_forecast(current_user):
         df["date"] = pd.to_datetime(df["date"])
         daily_sales = df.rename(columns={"date": "Date", "quantity_sold": "Sales"})
         
-        # Generate Forecast using Prophet (via AI Service)
-        forecast_data = forecast_trends(daily_sales)
+        # Generate Forecast using Prophet (via AI Service); the fit runs on the
+        # forecast pool and the client polls while it is computing
+        forecast_data, job = forecast_trends(daily_sales)
+        if job is not None and job.status in ("computing", "busy"):
+            return jsonify({
+                "status": job.status,
+                "message": job.error or "Forecast is being computed; retry shortly",
+                "job_key": job.key,
+                "retry_after_seconds": 5,
+            }), 202 if job.status == "computing" else 503
         
         # Format for frontend
         formatted_forecast = []
@@ -1174,6 +1356,7 @@ def update_my_shop(current_user, shop_id):
                 shop.lon = None
 
         db.session.add(shop)
+        bump_data_version(shop.id)
         db.session.commit()
 
         return jsonify({"status": "success", "shop": _serialize_shop(shop)}), 200
@@ -5,11 +5,12 @@ Manages shop-distributor supply relationships.
 These routes complement the main distributor_routes.py which handles analytics.
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from sqlalchemy import func
 from models.model import db, User, Shop, Product, Inventory, DistributorSupply
 from utils.auth_utils import token_required, roles_required
 from utils.response_helpers import success_response, error_response, handle_exceptions
+from services.stock_alert_service import low_stock_alerts, low_stock_alert_events
 
 
 supply_chain_bp = Blueprint('supply_chain', __name__)
@@ -202,44 +203,23 @@ def get_supplied_products(current_user, shop_id):
 @handle_exceptions("Get Low Stock Alerts")
 def get_low_stock_alerts(current_user):
     """Get products that need restocking across all supplied shops."""
-    # Get all products this distributor supplies
-    supplies = DistributorSupply.query.filter_by(
-        distributor_id=current_user.id,
-        status='completed'
-    ).all()
-    
-    alerts = []
-    for s in supplies:
-        product = Product.query.get(s.product_id)
-        if not product:
-            continue
-        
-        inventory = product.inventory
-        if not inventory:
-            continue
-        
-        # Check if stock is at or below safety level
-        if inventory.qty_available <= inventory.safety_stock:
-            shop = Shop.query.get(s.shop_id)
-            alerts.append({
-                'product_id': product.id,
-                'product_name': product.name,
-                'shop_id': s.shop_id,
-                'shop_name': shop.name if shop else 'Unknown',
-                'current_stock': inventory.qty_available,
-                'safety_stock': inventory.safety_stock,
-                'last_supplied': s.quantity_supplied,
-                'urgency': 'critical' if inventory.qty_available == 0 else 'low'
-            })
-    
-    # Sort by urgency (critical first) then by current stock
-    alerts.sort(key=lambda x: (0 if x['urgency'] == 'critical' else 1, x['current_stock']))
-    
-    return success_response(data={
-        'alerts': alerts,
-        'summary': {
-            'critical_count': len([a for a in alerts if a['urgency'] == 'critical']),
-            'low_count': len([a for a in alerts if a['urgency'] == 'low']),
-            'total_alerts': len(alerts)
-        }
-    })
+    return success_response(data=low_stock_alerts(current_user['id']))
+
+
+@supply_chain_bp.route('/distributor/low-stock-alerts/stream', methods=['GET'])
+@token_required
+@roles_required('distributor', 'manufacturer')
+@handle_exceptions("Stream Low Stock Alerts")
+def stream_low_stock_alerts(current_user):
+    """
+    Server-sent events: a `snapshot` of current alerts, then `alerts` events
+    ({raised, resolved, summary}) as stock crosses safety levels. Holds this
+    worker for up to LOW_STOCK_STREAM_MAX_SECONDS; the fetch client in
+    apiSupplyChain.js then reconnects straight away.
+    """
+    events = low_stock_alert_events(current_user['id'])
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
@@ -14,7 +14,8 @@ import traceback
 from functools import lru_cache
 from typing import Dict, Any, Optional, Tuple
 from services.ai_providers import get_provider
-from services.prophet_service import prophet_manager
+from config import Config
+from services.forecast_executor import forecast_executor
 
 
 # Default Fallback Responses
@@ -412,32 +413,44 @@ def batch_generate_posters(image_paths: list, product_names: list = None, aspect
     return results
 
 
-def forecast_trends(df: pd.DataFrame):
-    """Generate 30-day sales forecast using Prophet (AI-independent)."""
+def forecast_trends(df: pd.DataFrame, wait: Optional[float] = None):
+    """
+    30-day sales forecast (AI-independent) through the forecast pool, without
+    blocking on the fit. Returns (records, job): records are filled once
+    job.ready; while the fit runs job.status is 'computing' (or 'busy') and the
+    caller should answer 202 and let the client poll. job is None when df has no
+    usable Date/Sales data or the request failed.
+    """
     try:
         if df is None or df.empty:
-            return []
+            return [], None
         if not {"Date", "Sales"}.issubset(df.columns):
-            return []
+            return [], None
         
         # Prepare data for optimized Prophet
         prophet_df = df[["Date", "Sales"]].copy()
         prophet_df.columns = ["ds", "y"]  # Prophet expects ds, y columns
         
-        # Use optimized Prophet service
-        forecast_data, metrics = prophet_manager.forecast_sales(prophet_df, periods=30)
+        # Queue on the forecast pool; wait only briefly for the result
+        job = forecast_executor.request(
+            prophet_df, periods=30, wait=Config.FORECAST_WAIT_SECONDS if wait is None else wait
+        )
+        if job.status == 'failed':
+            raise RuntimeError(job.error)
+        if not job.ready:
+            return [], job
         
         # Extract forecast values
         trend = pd.DataFrame({
-            'ds': forecast_data['ds'],
-            'yhat': forecast_data['yhat']
+            'ds': job.forecast['ds'],
+            'yhat': job.forecast['yhat']
         }).tail(30)
         
-        return trend.to_dict(orient="records")
+        return trend.to_dict(orient="records"), job
     
     except Exception as e:
         print("Forecasting Error:", e)
-        return []
+        return [], None
 
 
 def generate_demand_summary(region_data, top_product, engine="auto"):
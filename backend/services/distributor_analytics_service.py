@@ -0,0 +1,245 @@
+# backend/services/distributor_analytics_service.py
+"""
+Distributor dashboard views.
+
+Every distributor view (stock heatmap, product performance, demand forecast,
+stock impact) reads the materialized summaries kept by
+services.distributor_summary_service: one stock row per (shop, product) the
+distributor supplies and one performance row per product. Nothing is
+aggregated over supply or sales history at request time. Revenue is never
+loaded: distributors only see units.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from services.distributor_summary_service import load_stock_summaries, load_product_summaries
+
+STATUS_PRIORITY = {'critical': 0, 'low': 1, 'healthy': 2}
+
+
+# ============================================================================
+# Views
+# ============================================================================
+
+class DistributorAnalyticsService:
+    """Distributor dashboard metrics read from the distributor summary tables."""
+
+    def __init__(self, distributor_id: int):
+        self.distributor_id = distributor_id
+        self._frame = None
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """Stock summary rows, one per supplied (shop, product)."""
+        if self._frame is None:
+            frame = load_stock_summaries(self.distributor_id)
+            self._frame = frame.assign(region=frame["shop_city"].fillna("").replace("", "Unknown"))
+        return self._frame
+
+    # -------------------------------------------------------------------------
+    # Stock heatmap (per shop)
+    # -------------------------------------------------------------------------
+    def stock_heatmap(self) -> Dict[str, Any]:
+        """
+        Per-shop stock health points plus critical / low product lists.
+        Shop lat/lon are the stored coordinates (None when missing); callers resolve
+        city fallbacks.
+        """
+        frame = self.frame
+        if frame.empty:
+            return {}
+
+        details = frame.assign(
+            stock_ratio=frame["stock_ratio"].round(2),
+            sell_through_rate=frame["sell_through_rate"].round(1),
+        )
+        detail_columns = [
+            "product_id", "product_name", "category", "qty_available", "safety_stock",
+            "stock_ratio", "status", "price", "quantity_supplied", "total_sold", "sell_through_rate",
+        ]
+
+        heatmap_points = []
+        all_critical, all_low = [], []
+        for shop_id, shop_rows in details.groupby("shop_id", sort=False):
+            first = shop_rows.iloc[0]
+            shop_rows = shop_rows.sort_values(
+                ["status", "stock_ratio"], key=lambda col: col.map(STATUS_PRIORITY) if col.name == "status" else col,
+                kind="stable",
+            )
+            stock_data = _records(shop_rows[detail_columns])
+            counts = shop_rows["status"].value_counts()
+            critical_count = int(counts.get("critical", 0))
+            low_count = int(counts.get("low", 0))
+            healthy_count = int(counts.get("healthy", 0))
+
+            shop_info = {"shop_id": int(shop_id), "shop_name": first["shop_name"], "region": first["region"]}
+            critical_products = [{**d, **shop_info} for d in stock_data if d["status"] == "critical"]
+            low_products = [{**d, **shop_info} for d in stock_data if d["status"] == "low"]
+            all_critical.extend(critical_products)
+            all_low.extend(low_products)
+
+            total_items = critical_count + low_count + healthy_count
+            health_score = (low_count * 0.5 + healthy_count) / total_items if total_items else 1.0
+            if health_score < 0.5:
+                stock_level, color = 'critical', '#dc3545'  # Red
+            elif health_score < 0.8:
+                stock_level, color = 'low', '#ffc107'  # Yellow
+            else:
+                stock_level, color = 'healthy', '#28a745'  # Green
+
+            top_selling = max(stock_data, key=lambda d: d["total_sold"]) if stock_data else None
+
+            heatmap_points.append({
+                "shopId": int(shop_id),
+                "shopName": first["shop_name"],
+                "region": first["region"],
+                "lat": _optional_float(first["shop_lat"]),
+                "lon": _optional_float(first["shop_lon"]),
+                "totalProducts": len(stock_data),
+                "totalStock": int(shop_rows["qty_available"].sum()),
+                "stockValue": round(float(shop_rows["stock_value"].sum()), 2),
+                "totalSold": int(shop_rows["total_sold"].sum()),
+                "criticalItems": critical_count,
+                "lowItems": low_count,
+                "healthyItems": healthy_count,
+                "healthScore": round(health_score, 2),
+                "stockLevel": stock_level,
+                "color": color,
+                "topProduct": top_selling["product_name"] if top_selling else "N/A",
+                "criticalProducts": [p["product_name"] for p in critical_products[:3]],
+                "lowProducts": [p["product_name"] for p in low_products[:3]],
+                "stockDetails": stock_data,
+            })
+
+        heatmap_points.sort(key=lambda p: p["healthScore"])
+        all_critical.sort(key=lambda p: p["stock_ratio"])
+        all_low.sort(key=lambda p: p["stock_ratio"])
+
+        category_summary = {}
+        for p in all_critical + all_low:
+            cat = category_summary.setdefault(p.get("category") or "Unknown", {"critical": 0, "low": 0})
+            cat[p["status"]] += 1
+
+        levels = pd.Series([p["stockLevel"] for p in heatmap_points]).value_counts()
+        return {
+            "heatmapPoints": heatmap_points,
+            "criticalProducts": all_critical[:20],  # Top 20 most critical
+            "lowProducts": all_low[:15],  # Top 15 low stock
+            "categorySummary": category_summary,
+            "summary": {
+                "totalShops": len(heatmap_points),
+                "criticalStockShops": int(levels.get("critical", 0)),
+                "lowStockShops": int(levels.get("low", 0)),
+                "healthyStockShops": int(levels.get("healthy", 0)),
+                "totalProducts": len(frame),
+                "totalStockValue": round(float(frame["stock_value"].sum()), 2),
+                "criticalProductCount": len(all_critical),
+                "lowProductCount": len(all_low),
+            },
+        }
+
+    # -------------------------------------------------------------------------
+    # Product performance (per product, across shops)
+    # -------------------------------------------------------------------------
+    def product_performance(self) -> Dict[str, Any]:
+        """Sell-through, stock status and shop reach per supplied product."""
+        products = load_product_summaries(self.distributor_id)
+        if products.empty:
+            return {}
+        products["last_sale_date"] = products["last_sale_date"].dt.strftime("%Y-%m-%d")
+
+        product_performance = []
+        for row in _records(products):
+            product_performance.append({
+                "product_id": row["product_id"],
+                "product_name": row["product_name"],
+                "category": row["category"],
+                "price": row["price"],
+                "qty_supplied": row["qty_supplied"],
+                "qty_sold": row["qty_sold"],
+                "qty_available": row["qty_available"],
+                "safety_stock": row["safety_stock"],
+                "supply_value": round(row["supply_value"], 2),
+                "sell_through_rate": row["sell_through_rate"],
+                "performance": row["performance"],
+                "stock_status": row["stock_status"],
+                "stock_ratio": round(row["stock_ratio"], 2),
+                "shops_count": row["shops_count"],
+                "shop_names": row["shop_names"],
+                "transaction_count": row["transaction_count"],
+                "avg_quantity_per_sale": row["avg_quantity_per_sale"],
+                "last_sale_date": row["last_sale_date"],
+            })
+        product_performance.sort(key=lambda p: p["sell_through_rate"], reverse=True)
+
+        total_supplied = int(products["qty_supplied"].sum())
+        total_sold = int(products["qty_sold"].sum())
+        category_performance = {}
+        for p in product_performance:
+            cat = category_performance.setdefault(p["category"] or "Unknown", {"products": 0, "supplied": 0, "sold": 0})
+            cat["products"] += 1
+            cat["supplied"] += p["qty_supplied"]
+            cat["sold"] += p["qty_sold"]
+        for cat in category_performance.values():
+            cat["sell_through_rate"] = round(cat["sold"] / cat["supplied"] * 100 if cat["supplied"] > 0 else 0, 1)
+
+        performance_counts = products["performance"].value_counts()
+        return {
+            "products": product_performance,
+            "topPerformers": [p for p in product_performance if p["performance"] in ("excellent", "good")][:10],
+            "lowPerformers": sorted(
+                [p for p in product_performance if p["performance"] in ("poor", "average")],
+                key=lambda p: p["sell_through_rate"],
+            )[:10],
+            "categoryPerformance": category_performance,
+            "summary": {
+                "totalProducts": len(product_performance),
+                "totalSupplied": total_supplied,
+                "totalSold": total_sold,
+                "avgSellThrough": round(total_sold / total_supplied * 100 if total_supplied > 0 else 0, 1),
+                "excellentPerformers": int(performance_counts.get("excellent", 0)),
+                "goodPerformers": int(performance_counts.get("good", 0)),
+                "averagePerformers": int(performance_counts.get("average", 0)),
+                "poorPerformers": int(performance_counts.get("poor", 0)),
+            },
+        }
+
+    # -------------------------------------------------------------------------
+    # Per (shop, product) sales velocity for the AI demand / stock-impact views
+    # -------------------------------------------------------------------------
+    def product_velocity(self) -> List[Dict[str, Any]]:
+        """
+        One row per supplied (shop, product) with stock and an average daily sales
+        estimate (units over at least 30 days of records).
+        """
+        frame = self.frame
+        if frame.empty:
+            return []
+        days = np.maximum(frame["transaction_count"].to_numpy(), 30)
+        velocity = frame.assign(avg_daily_sales=frame["total_sold"] / days)
+        return _records(velocity[[
+            "product_id", "product_name", "category", "price", "shop_name",
+            "qty_available", "safety_stock", "total_sold", "transaction_count", "avg_daily_sales",
+        ]])
+
+
+def _records(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    """DataFrame rows as JSON-ready dicts (numpy scalars converted, NaN/NaT -> None)."""
+    frame = frame.astype(object).where(frame.notna(), None)
+    return [
+        {key: value.item() if isinstance(value, np.generic) else value for key, value in row.items()}
+        for row in frame.to_dict("records")
+    ]
+
+
+def _optional_float(value) -> Optional[float]:
+    if value is None or pd.isna(value) or not value:
+        return None
+    return float(value)
+
+
+def get_distributor_analytics(distributor_id: int) -> DistributorAnalyticsService:
+    return DistributorAnalyticsService(distributor_id)
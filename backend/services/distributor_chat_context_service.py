@@ -0,0 +1,343 @@
+# backend/services/distributor_chat_context_service.py
+"""
+Prompt context for the distributor AI chat.
+
+The context is built from sections, and each section is cached per distributor
+together with the key of the inputs it was built from:
+
+    basic (database)   stock         shops' summed data version
+                       top_sellers   shops' summed sales_version
+    rich (frontend)    one section per insights payload (stockPlanning,
+                       demandForecast, stockImpact), keyed by a hash of it
+
+Every message in a conversation costs one version lookup; a section is rebuilt
+only when its own key moved, and database sections read the materialized
+distributor summaries rather than aggregating supplies and sales.
+
+Sections are lists of blocks: fixed lines (headings and summary figures) plus
+item lines ranked by urgency (0 critical, 1 needs supply soon, 2 healthy).
+fit_to_budget() keeps every fixed line, then adds items in rank order until
+the token budget is spent, so prompts stay bounded and the urgent items are
+the last to go.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict, namedtuple
+from typing import Callable, Dict, List, Optional
+
+from config import Config
+from services.distributor_summary_service import load_stock_summaries
+from utils.data_version import distributor_data_versions
+
+# Rough size of a token in characters; enough to bound prompt size without a tokenizer
+CHARS_PER_TOKEN = 4
+MORE_LINE = "- ... {} more not shown"
+
+ContextBlock = namedtuple("ContextBlock", ["lines", "items", "rank"])
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def fit_to_budget(blocks: List[ContextBlock], max_tokens: int) -> str:
+    """Render blocks in order, keeping all fixed lines and as many items, by rank, as fit."""
+    budget = max_tokens * CHARS_PER_TOKEN
+    used = sum(len(line) + 1 for block in blocks for line in block.lines)
+    used += sum(len(MORE_LINE) + 4 for block in blocks if block.items)
+    shown = [0] * len(blocks)
+    full = False
+    for rank in sorted({block.rank for block in blocks}):
+        for i, block in enumerate(blocks):
+            if full or block.rank != rank:
+                continue
+            for item in block.items:
+                if used + len(item) + 1 > budget:
+                    full = True
+                    break
+                used += len(item) + 1
+                shown[i] += 1
+
+    lines = []
+    for block, count in zip(blocks, shown):
+        lines.extend(block.lines)
+        lines.extend(block.items[:count])
+        if count < len(block.items):
+            lines.append(MORE_LINE.format(len(block.items) - count))
+    return "\n".join(lines)
+
+
+# ============================================================================
+# Section cache
+# ============================================================================
+
+class ChatContextCache:
+    """Per-distributor LRU of context sections, each stored with the input key it was built for."""
+
+    def __init__(self, max_distributors: int = 64):
+        self.max_distributors = max_distributors
+        self._entries = OrderedDict()  # distributor_id -> {section name: (key, blocks)}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "refreshes": 0}
+
+    def section(self, distributor_id: int, name: str, key, build: Callable[[], List[ContextBlock]]):
+        with self._lock:
+            sections = self._entries.get(distributor_id)
+            if sections is not None:
+                self._entries.move_to_end(distributor_id)
+                cached = sections.get(name)
+                if cached is not None and cached[0] == key:
+                    self._stats["hits"] += 1
+                    return cached[1]
+
+        blocks = build()
+        with self._lock:
+            self._stats["refreshes"] += 1
+            self._entries.setdefault(distributor_id, {})[name] = (key, blocks)
+            self._entries.move_to_end(distributor_id)
+            while len(self._entries) > self.max_distributors:
+                self._entries.popitem(last=False)
+        return blocks
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"distributors": len(self._entries), "max_distributors": self.max_distributors, **self._stats}
+
+
+chat_context_cache = ChatContextCache(max_distributors=Config.AI_CHAT_CONTEXT_CACHE_SIZE)
+
+
+# ============================================================================
+# Basic context (database)
+# ============================================================================
+
+def _stock_rows(distributor_id: int) -> List[Dict]:
+    rows = []
+    for link in load_stock_summaries(distributor_id).itertuples(index=False):
+        qty = int(link.qty_available or 0)
+        safety = int(link.safety_stock or 10)
+        ratio = qty / safety if safety > 0 else 1
+        rows.append({
+            "name": link.product_name,
+            "shop": link.shop_name,
+            "stock": qty,
+            "safety": safety,
+            "sold": int(link.total_sold or 0),
+            "status": "critical" if ratio < 0.5 else "low" if ratio < 1.0 else "healthy",
+        })
+    return rows
+
+
+def _basic_stock_blocks(rows: List[Dict]) -> List[ContextBlock]:
+    critical = [p for p in rows if p["status"] == "critical"]
+    low = [p for p in rows if p["status"] == "low"]
+    healthy = len(rows) - len(critical) - len(low)
+    return [
+        ContextBlock((
+            "",
+            "DISTRIBUTOR SUPPLY CHAIN OVERVIEW:",
+            "(You supply products to these shops - this shows THEIR stock levels, not your inventory)",
+            "",
+            "SHOPS YOU SUPPLY TO - STOCK STATUS:",
+            f"- Total Products Across Shops: {len(rows)}",
+            f"- Shops needing URGENT SUPPLY (< 50% stock): {len(critical)} products",
+            f"- Shops needing supply soon (50-100% stock): {len(low)} products",
+            f"- Well-stocked shops (> 100% stock): {healthy} products",
+            "",
+            "URGENT DELIVERIES NEEDED (ship these immediately):",
+        ) + (() if critical else ("None - all shops well supplied",)), tuple(
+            f"- SHIP TO {p['shop']}: {p['name']} - only {p['stock']} units left (safety: {p['safety']}), sold {p['sold']} units"
+            for p in critical[:5]
+        ), 0),
+        ContextBlock((
+            "",
+            "SCHEDULE FUTURE SUPPLY (plan these deliveries):",
+        ) + (() if low else ("None",)), tuple(
+            f"- PLAN FOR {p['shop']}: {p['name']} - {p['stock']} units left (safety: {p['safety']})"
+            for p in low[:5]
+        ), 1),
+    ]
+
+
+def _basic_top_seller_blocks(rows: List[Dict]) -> List[ContextBlock]:
+    top = sorted(rows, key=lambda p: -p["sold"])[:5]
+    return [ContextBlock(
+        ("", "TOP SELLING PRODUCTS (prioritize production of these):"),
+        tuple(f"- {p['name']} at {p['shop']}: {p['sold']} units sold" for p in top),
+        2,
+    )]
+
+
+def build_basic_context(distributor_id: int, cache: ChatContextCache = None) -> List[ContextBlock]:
+    """Context from the distributor's stock summaries (used when the client sends no insights)."""
+    cache = cache or chat_context_cache
+    versions = distributor_data_versions(distributor_id)
+    loaded = []
+
+    def rows():
+        if not loaded:
+            loaded.append(_stock_rows(distributor_id))
+        return loaded[0]
+
+    return (
+        cache.section(distributor_id, "basic:stock", (versions["version"], versions["shops"]),
+                      lambda: _basic_stock_blocks(rows()))
+        + cache.section(distributor_id, "basic:top_sellers", (versions["sales_version"], versions["shops"]),
+                        lambda: _basic_top_seller_blocks(rows()))
+    )
+
+
+# ============================================================================
+# Rich context (AI insights sent by the client)
+# ============================================================================
+
+RICH_OVERVIEW = [ContextBlock((
+    "DISTRIBUTOR SUPPLY CHAIN OVERVIEW:",
+    "(Data shows stock levels at shops you supply to - these are NOT your inventory, these are your RETAIL PARTNERS' stock levels)",
+), (), 0)]
+
+
+def _stock_planning_blocks(sp: Dict) -> List[ContextBlock]:
+    blocks = []
+    if sp.get('summary'):
+        blocks.append(ContextBlock((
+            "",
+            "SHOPS' STOCK STATUS (shops you supply to):",
+            f"- Total Products Across Shops: {sp['summary'].get('totalProducts', 'N/A')}",
+            f"- Products Needing Urgent Supply: {sp['summary'].get('criticalCount', 0)} (critical stock at shops)",
+            f"- Products to Monitor for Supply: {sp['summary'].get('lowCount', 0)} (low stock at shops)",
+            f"- Products Well-Stocked at Shops: {sp['summary'].get('healthyCount', 0)}",
+        ), (), 0))
+    if sp.get('aiInsights', {}).get('keyFindings'):
+        blocks.append(ContextBlock(
+            ("KEY FINDINGS:",), tuple(f"- {f}" for f in sp['aiInsights']['keyFindings'][:5]), 0,
+        ))
+    return blocks
+
+
+def _demand_forecast_blocks(df: Dict) -> List[ContextBlock]:
+    blocks = []
+    if df.get('summary'):
+        blocks.append(ContextBlock((
+            "",
+            "DEMAND FORECAST - SUPPLY PLANNING:",
+            f"- Total Products Analyzed: {df['summary'].get('totalProducts', 0)}",
+            f"- Shops needing URGENT DELIVERY (CRITICAL): {df['summary'].get('criticalCount', 0)}",
+            f"- Shops to supply soon: {df['summary'].get('warningCount', 0)}",
+            f"- Shops with adequate stock (no supply needed): {df['summary'].get('healthyCount', 0)}",
+        ), (), 0))
+
+    forecasts = df.get('forecasts') or []
+    critical = [f for f in forecasts if f.get('action') == 'CRITICAL']
+    if critical:
+        blocks.append(ContextBlock((
+            "",
+            f"URGENT SUPPLY NEEDED - CRITICAL ({len(critical)} items):",
+            "(These shops need immediate delivery from you)",
+        ), tuple(
+            f"- SHIP TO {item.get('shopName', 'Unknown Shop')}: {item.get('productName', 'Unknown')} - shop has only {item.get('currentStock', 0)} units, needs {item.get('predictedDemand14d', 0)} units for 14 days, stockout in {item.get('daysUntilStockout', 'N/A')} days, avg sales {item.get('avgDailySales', 0)}/day"
+            for item in critical
+        ), 0))
+    restock_soon = [f for f in forecasts if f.get('action') == 'RESTOCK SOON']
+    if restock_soon:
+        blocks.append(ContextBlock((
+            "",
+            f"SUPPLY SOON - PLAN DELIVERY ({len(restock_soon)} items):",
+            "(Schedule these deliveries in your production/distribution plan)",
+        ), tuple(
+            f"- PLAN FOR {item.get('shopName', 'Unknown Shop')}: {item.get('productName', 'Unknown')} - shop has {item.get('currentStock', 0)} units, needs {item.get('predictedDemand14d', 0)} units, stockout in {item.get('daysUntilStockout', 'N/A')} days"
+            for item in restock_soon
+        ), 1))
+    adequate = [f for f in forecasts if f.get('action') == 'ADEQUATE']
+    if adequate:
+        blocks.append(ContextBlock((
+            "",
+            f"WELL-STOCKED SHOPS - NO SUPPLY NEEDED ({len(adequate)} items):",
+        ), tuple(
+            f"- {item.get('shopName', 'Unknown Shop')}: {item.get('productName', 'Unknown')} - {item.get('currentStock', 0)} units in stock"
+            for item in adequate
+        ), 2))
+    return blocks
+
+
+def _stock_impact_blocks(si: Dict) -> List[ContextBlock]:
+    blocks = []
+    if si.get('summary'):
+        blocks.append(ContextBlock((
+            "",
+            "SUPPLY IMPACT ANALYSIS:",
+            f"- Shops needing critical supply: {si['summary'].get('criticalProducts', 0)}",
+            f"- Shops with low stock: {si['summary'].get('warningProducts', 0)}",
+            f"- Total Units at Risk (potential lost sales at shops): {si['summary'].get('totalUnitsAtRisk', 0)}",
+            f"- Total Units YOU NEED TO SUPPLY: {si['summary'].get('totalRestockNeeded', 0)} units",
+        ), (), 0))
+
+    impacts = si.get('stockImpacts') or []
+    critical = [item for item in impacts if item.get('status') == 'critical']
+    if critical:
+        blocks.append(ContextBlock(("", f"CRITICAL - SHIP IMMEDIATELY ({len(critical)} items):"), tuple(
+            f"- URGENT DELIVERY TO {item.get('shopName', 'Unknown Shop')}: {item.get('productName', 'Unknown')} - {item.get('stockRatio', 0)}% stock, {item.get('unitsAtRisk', 0)} units at risk of stockout, SUPPLY {item.get('restockQty', 0)} units, sold {item.get('totalSold', 0)} units"
+            for item in critical
+        ), 0))
+    low = [item for item in impacts if item.get('status') == 'low']
+    if low:
+        blocks.append(ContextBlock(("", f"LOW STOCK AT SHOPS - SCHEDULE SUPPLY ({len(low)} items):"), tuple(
+            f"- SCHEDULE FOR {item.get('shopName', 'Unknown Shop')}: {item.get('productName', 'Unknown')} - {item.get('stockRatio', 0)}% stock level, supply {item.get('restockQty', 0)} units"
+            for item in low
+        ), 1))
+    healthy = [item for item in impacts if item.get('status') == 'healthy']
+    if healthy:
+        blocks.append(ContextBlock(("", f"WELL-STOCKED SHOPS - NO ACTION NEEDED ({len(healthy)} items):"), tuple(
+            f"- {item.get('shopName', 'Unknown Shop')}: {item.get('productName', 'Unknown')} - {item.get('stockRatio', 0)}% stock level, sold {item.get('totalSold', 0)} units"
+            for item in healthy
+        ), 2))
+    return blocks
+
+
+RICH_SECTIONS = [
+    ("stockPlanning", _stock_planning_blocks),
+    ("demandForecast", _demand_forecast_blocks),
+    ("stockImpact", _stock_impact_blocks),
+]
+
+
+def _payload_key(payload) -> str:
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode()
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+def build_rich_context(distributor_id: int, frontend_context: Dict,
+                       cache: ChatContextCache = None) -> List[ContextBlock]:
+    """Context from the AI insights the client already loaded (stock planning, forecasts, impact)."""
+    cache = cache or chat_context_cache
+    blocks = list(RICH_OVERVIEW)
+    for name, build in RICH_SECTIONS:
+        payload = frontend_context.get(name)
+        if payload:
+            blocks += cache.section(distributor_id, f"rich:{name}", _payload_key(payload),
+                                    lambda payload=payload, build=build: build(payload))
+    return blocks
+
+
+def distributor_chat_context(distributor_id: int, frontend_context: Optional[Dict] = None,
+                             max_tokens: Optional[int] = None, cache: ChatContextCache = None) -> str:
+    """Prompt context for one chat message, within max_tokens (Config.AI_CHAT_CONTEXT_TOKENS)."""
+    if frontend_context and isinstance(frontend_context, dict):
+        blocks = build_rich_context(distributor_id, frontend_context, cache=cache)
+    else:
+        blocks = build_basic_context(distributor_id, cache=cache)
+    return fit_to_budget(blocks, max_tokens or Config.AI_CHAT_CONTEXT_TOKENS)
+
+
+def chat_context_stats() -> Dict:
+    return chat_context_cache.stats()
+
+
+def clear_chat_context_cache():
+    chat_context_cache.clear()
@@ -0,0 +1,405 @@
+# backend/services/distributor_summary_service.py
+"""
+Materialized distributor summaries.
+
+distributor_stock_summaries holds one row per (distributor, shop, product)
+supplied - supply totals, shop and product details, inventory, unit sales and
+the derived stock status - and distributor_product_summaries folds those rows
+per (distributor, product) into sell-through and performance. Distributor
+dashboards read these rows directly, so a request costs as much as its result,
+not as much as the distributor's supply and sales history.
+
+Maintenance is per shop. Every write path that changes inventory, sales or
+supplies already calls utils.data_version.bump_data_version(); the shops it
+bumped are rebuilt in a before_commit hook, inside the same transaction as the
+change. Each row records the shop version it was built from (source_version),
+and reads rebuild any shop whose version has moved since, which covers writes
+committed while the hook could not run. `flask rebuild-distributor-summaries`
+rebuilds everything from scratch.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import and_, delete, event, func, insert, select
+from sqlalchemy.orm import Session
+
+from models.model import (
+    db, DistributorSupply, Shop, Product, Inventory, SalesData, ShopDataVersion,
+    DistributorStockSummary, DistributorProductSummary,
+)
+
+logger = logging.getLogger(__name__)
+
+STOCK_DTYPES = {
+    "distributor_id": "int64",
+    "shop_id": "int64",
+    "product_id": "int64",
+    "first_supply_id": "int64",
+    "quantity_supplied": "int64",
+    "supply_value": "float64",
+    "price": "float64",
+    "qty_available": "int64",
+    "safety_stock": "int64",
+    "total_sold": "int64",
+    "transaction_count": "int64",
+    "source_version": "int64",
+}
+
+STOCK_COLUMNS = [
+    "distributor_id", "shop_id", "product_id", "first_supply_id", "quantity_supplied",
+    "supply_value", "shop_name", "shop_city", "shop_lat", "shop_lon", "product_name",
+    "category", "price", "qty_available", "safety_stock", "total_sold", "transaction_count",
+    "last_sale_date", "stock_ratio", "status", "stock_value", "sell_through_rate", "source_version",
+]
+
+PRODUCT_COLUMNS = [
+    "distributor_id", "product_id", "first_supply_id", "product_name", "category", "price",
+    "qty_supplied", "qty_sold", "qty_available", "safety_stock", "stock_ratio", "stock_status",
+    "supply_value", "transaction_count", "last_sale_date", "shop_names", "shops_count",
+    "sell_through_rate", "avg_quantity_per_sale", "performance",
+]
+
+_stats_lock = threading.Lock()
+_stats = {"shop_refreshes": 0, "stale_refreshes": 0, "last_refresh_ms": None}
+
+
+# ============================================================================
+# Source rows
+# ============================================================================
+
+def link_rows_query(shop_ids: Optional[Iterable[int]] = None, distributor_id: Optional[int] = None):
+    """
+    One row per (distributor, shop, product) supplied: supply totals joined with shop,
+    product and inventory details and that pair's grouped SalesData units. Limited to
+    the given shops and/or distributor.
+    """
+    supply_filters = []
+    if shop_ids is not None:
+        supply_filters.append(DistributorSupply.shop_id.in_(list(shop_ids)))
+    if distributor_id is not None:
+        supply_filters.append(DistributorSupply.distributor_id == distributor_id)
+    supply = (
+        select(
+            DistributorSupply.distributor_id.label("distributor_id"),
+            DistributorSupply.shop_id.label("shop_id"),
+            DistributorSupply.product_id.label("product_id"),
+            func.coalesce(func.sum(DistributorSupply.quantity_supplied), 0).label("quantity_supplied"),
+            func.coalesce(func.sum(DistributorSupply.total_value), 0).label("supply_value"),
+            func.min(DistributorSupply.id).label("first_supply_id"),
+        )
+        .where(*supply_filters)
+        .group_by(DistributorSupply.distributor_id, DistributorSupply.shop_id, DistributorSupply.product_id)
+        .subquery()
+    )
+    sales_filters = [SalesData.product_id.in_(select(supply.c.product_id))]
+    if shop_ids is not None:
+        sales_filters.append(SalesData.shop_id.in_(list(shop_ids)))
+    sales = (
+        select(
+            SalesData.shop_id.label("shop_id"),
+            SalesData.product_id.label("product_id"),
+            func.sum(SalesData.quantity_sold).label("total_sold"),
+            func.count(SalesData.id).label("transaction_count"),
+            func.max(SalesData.date).label("last_sale_date"),
+        )
+        .where(*sales_filters)
+        .group_by(SalesData.shop_id, SalesData.product_id)
+        .subquery()
+    )
+    return (
+        select(
+            supply.c.distributor_id,
+            supply.c.shop_id,
+            supply.c.product_id,
+            supply.c.first_supply_id,
+            supply.c.quantity_supplied,
+            supply.c.supply_value,
+            Shop.name.label("shop_name"),
+            Shop.city.label("shop_city"),
+            Shop.lat.label("shop_lat"),
+            Shop.lon.label("shop_lon"),
+            Product.name.label("product_name"),
+            Product.category.label("category"),
+            func.coalesce(Product.price, 0).label("price"),
+            func.coalesce(Inventory.qty_available, 0).label("qty_available"),
+            func.coalesce(Inventory.safety_stock, 0).label("safety_stock"),
+            func.coalesce(sales.c.total_sold, 0).label("total_sold"),
+            func.coalesce(sales.c.transaction_count, 0).label("transaction_count"),
+            sales.c.last_sale_date,
+            func.coalesce(ShopDataVersion.version, 0).label("source_version"),
+        )
+        .select_from(supply)
+        .join(Shop, Shop.id == supply.c.shop_id)
+        .join(Product, Product.id == supply.c.product_id)
+        .outerjoin(Inventory, Inventory.product_id == supply.c.product_id)
+        .outerjoin(sales, and_(
+            sales.c.shop_id == supply.c.shop_id,
+            sales.c.product_id == supply.c.product_id,
+        ))
+        .outerjoin(ShopDataVersion, ShopDataVersion.shop_id == supply.c.shop_id)
+        .order_by(supply.c.first_supply_id)
+    )
+
+
+def with_stock_status(frame: pd.DataFrame) -> pd.DataFrame:
+    """Vectorized stock ratio / status / value / sell-through columns."""
+    qty = frame["qty_available"].to_numpy(dtype="float64")
+    safety = frame["safety_stock"].to_numpy(dtype="float64")
+    supplied = frame["quantity_supplied"].to_numpy(dtype="float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(safety > 0, qty / safety, np.where(qty > 0, 1.0, 0.0))
+        sell_through = np.where(supplied > 0, frame["total_sold"].to_numpy() / supplied * 100, 0.0)
+    return frame.assign(
+        stock_ratio=ratio,
+        status=np.select([ratio < 0.5, ratio < 1.0], ["critical", "low"], "healthy"),
+        stock_value=frame["price"] * frame["qty_available"],
+        sell_through_rate=sell_through,
+    )
+
+
+def fold_products(stock: pd.DataFrame) -> pd.DataFrame:
+    """Per (distributor, product) performance from stock summary rows (in supply order)."""
+    products = stock.groupby(["distributor_id", "product_id"], sort=False).agg(
+        first_supply_id=("first_supply_id", "min"),
+        product_name=("product_name", "first"),
+        category=("category", "first"),
+        price=("price", "first"),
+        qty_supplied=("quantity_supplied", "sum"),
+        qty_sold=("total_sold", "sum"),
+        qty_available=("qty_available", "first"),
+        safety_stock=("safety_stock", "first"),
+        stock_ratio=("stock_ratio", "first"),
+        stock_status=("status", "first"),
+        supply_value=("supply_value", "sum"),
+        transaction_count=("transaction_count", "sum"),
+        last_sale_date=("last_sale_date", "max"),
+        shop_names=("shop_name", list),
+    ).reset_index()
+
+    supplied = products["qty_supplied"].to_numpy(dtype="float64")
+    transactions = products["transaction_count"].to_numpy(dtype="float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sell_through = np.where(supplied > 0, products["qty_sold"] / supplied * 100, 0.0)
+        avg_quantity = np.where(transactions > 0, products["qty_sold"] / transactions, 0.0)
+    return products.assign(
+        shops_count=products["shop_names"].str.len(),
+        shop_names=products["shop_names"].map(json.dumps),
+        sell_through_rate=sell_through.round(1),
+        avg_quantity_per_sale=avg_quantity.round(1),
+        performance=np.select(
+            [sell_through >= 80, sell_through >= 50, sell_through >= 25],
+            ["excellent", "good", "average"], "poor",
+        ),
+    )
+
+
+def _load_link_rows(session, **filters) -> pd.DataFrame:
+    frame = pd.read_sql(
+        link_rows_query(**filters), session.connection(), parse_dates=["last_sale_date"]
+    ).astype(STOCK_DTYPES)
+    return with_stock_status(frame)
+
+
+def _db_records(frame: pd.DataFrame, columns: List[str]) -> List[Dict[str, Any]]:
+    """Rows ready for a core insert (numpy scalars converted, NaN/NaT -> None, timestamps -> dates)."""
+    frame = frame[columns].copy()
+    if "last_sale_date" in frame:
+        frame["last_sale_date"] = frame["last_sale_date"].dt.date
+    frame = frame.astype(object).where(frame.notna(), None)
+    return [
+        {key: value.item() if isinstance(value, np.generic) else value for key, value in row.items()}
+        for row in frame.to_dict("records")
+    ]
+
+
+# ============================================================================
+# Maintenance
+# ============================================================================
+
+def _refresh_products(session, pairs):
+    """Re-fold the product summaries of the given (distributor_id, product_id) pairs."""
+    by_distributor = defaultdict(set)
+    for distributor_id, product_id in pairs:
+        by_distributor[int(distributor_id)].add(int(product_id))
+
+    product_table = DistributorProductSummary.__table__
+    stock_table = DistributorStockSummary.__table__
+    for distributor_id, product_ids in by_distributor.items():
+        stock = pd.read_sql(
+            select(*[stock_table.c[c] for c in STOCK_COLUMNS])
+            .where(stock_table.c.distributor_id == distributor_id, stock_table.c.product_id.in_(product_ids))
+            .order_by(stock_table.c.first_supply_id),
+            session.connection(), parse_dates=["last_sale_date"],
+        ).astype(STOCK_DTYPES)
+        session.execute(delete(product_table).where(
+            product_table.c.distributor_id == distributor_id, product_table.c.product_id.in_(product_ids)
+        ))
+        if not stock.empty:
+            session.execute(insert(product_table), _db_records(fold_products(stock), PRODUCT_COLUMNS))
+
+
+def refresh_shop_summaries(shop_ids: Iterable[int], session=None) -> int:
+    """
+    Rebuild the summary rows of the given shops (for every distributor supplying them)
+    and the product summaries they feed. Does not commit. Returns stock rows written.
+    """
+    session = session or db.session
+    shop_ids = sorted({int(s) for s in shop_ids if s})
+    if not shop_ids:
+        return 0
+    start = time.time()
+    stock_table = DistributorStockSummary.__table__
+    session.flush()  # before_commit runs ahead of the commit's own flush
+
+    # Compute before writing so a failure leaves the previous rows in place
+    frame = _load_link_rows(session, shop_ids=shop_ids)
+    previous = session.execute(
+        select(stock_table.c.distributor_id, stock_table.c.product_id)
+        .where(stock_table.c.shop_id.in_(shop_ids)).distinct()
+    ).all()
+
+    session.execute(delete(stock_table).where(stock_table.c.shop_id.in_(shop_ids)))
+    if not frame.empty:
+        session.execute(insert(stock_table), _db_records(frame, STOCK_COLUMNS))
+
+    pairs = set(map(tuple, previous)) | set(zip(frame["distributor_id"], frame["product_id"]))
+    _refresh_products(session, pairs)
+
+    with _stats_lock:
+        _stats["shop_refreshes"] += len(shop_ids)
+        _stats["last_refresh_ms"] = int((time.time() - start) * 1000)
+    return len(frame)
+
+
+def refresh_stale_summaries(distributor_id: int) -> List[int]:
+    """
+    Rebuild (and commit) the distributor's shops whose data version moved since their
+    rows were built. A distributor with supplies but no rows yet (data that predates the
+    summaries, or seeded directly) is rebuilt in full.
+    """
+    stock_table = DistributorStockSummary.__table__
+    has_rows = db.session.query(
+        select(stock_table.c.id).where(stock_table.c.distributor_id == distributor_id).exists()
+    ).scalar()
+    if not has_rows:
+        if db.session.query(DistributorSupply.id).filter_by(distributor_id=distributor_id).first():
+            rebuild_distributor_summaries(distributor_id)
+        return []
+
+    stale = [
+        row[0] for row in db.session.execute(
+            select(stock_table.c.shop_id)
+            .select_from(stock_table)
+            .outerjoin(ShopDataVersion, ShopDataVersion.shop_id == stock_table.c.shop_id)
+            .where(
+                stock_table.c.distributor_id == distributor_id,
+                stock_table.c.source_version != func.coalesce(ShopDataVersion.version, 0),
+            )
+            .distinct()
+        )
+    ]
+    if stale:
+        refresh_shop_summaries(stale)
+        db.session.commit()
+        with _stats_lock:
+            _stats["stale_refreshes"] += len(stale)
+    return stale
+
+
+def rebuild_distributor_summaries(distributor_id: Optional[int] = None) -> int:
+    """Rebuild both summary tables (one distributor or all). Commits per distributor; returns stock rows written."""
+    stock_table = DistributorStockSummary.__table__
+    product_table = DistributorProductSummary.__table__
+    if distributor_id is None:
+        distributor_ids = [r[0] for r in db.session.query(DistributorSupply.distributor_id).distinct()]
+        # Distributors whose supplies were all removed keep no stale rows
+        db.session.execute(delete(stock_table).where(stock_table.c.distributor_id.notin_(distributor_ids)))
+        db.session.execute(delete(product_table).where(product_table.c.distributor_id.notin_(distributor_ids)))
+    else:
+        distributor_ids = [distributor_id]
+
+    written = 0
+    for did in distributor_ids:
+        frame = _load_link_rows(db.session, distributor_id=did)
+        db.session.execute(delete(stock_table).where(stock_table.c.distributor_id == did))
+        db.session.execute(delete(product_table).where(product_table.c.distributor_id == did))
+        if not frame.empty:
+            db.session.execute(insert(stock_table), _db_records(frame, STOCK_COLUMNS))
+            db.session.execute(insert(product_table), _db_records(fold_products(frame), PRODUCT_COLUMNS))
+        db.session.commit()
+        written += len(frame)
+    return written
+
+
+def ensure_distributor_summaries() -> int:
+    """Build the summaries once for a database whose supplies predate them. Returns rows written."""
+    if db.session.query(DistributorStockSummary.id).first() is not None:
+        return 0
+    if db.session.query(DistributorSupply.id).first() is None:
+        return 0
+    return rebuild_distributor_summaries()
+
+
+@event.listens_for(Session, "before_commit")
+def _refresh_bumped_shops(session):
+    """Rebuild summaries for shops whose data version was bumped in this transaction."""
+    shop_ids = session.info.pop("bumped_shops", None)
+    if not shop_ids:
+        return
+    try:
+        # Savepoint: a failed refresh must not abort the data change (PostgreSQL)
+        with session.begin_nested():
+            refresh_shop_summaries(shop_ids, session=session)
+    except Exception as e:
+        # The data change still commits; reads rebuild these shops from their version
+        logger.error(f"[Distributor Summaries] Refresh of shops {sorted(shop_ids)} failed: {e}")
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_bumped_shops(session, previous_transaction):
+    session.info.pop("bumped_shops", None)
+
+
+# ============================================================================
+# Reads
+# ============================================================================
+
+def load_stock_summaries(distributor_id: int) -> pd.DataFrame:
+    """The distributor's stock summary rows in supply order (fresh for every linked shop)."""
+    refresh_stale_summaries(distributor_id)
+    stock_table = DistributorStockSummary.__table__
+    return pd.read_sql(
+        select(*[stock_table.c[c] for c in STOCK_COLUMNS])
+        .where(stock_table.c.distributor_id == distributor_id)
+        .order_by(stock_table.c.first_supply_id),
+        db.session.connection(), parse_dates=["last_sale_date"],
+    ).astype(STOCK_DTYPES)
+
+
+def load_product_summaries(distributor_id: int) -> pd.DataFrame:
+    """The distributor's product summary rows in supply order; shop_names decoded to lists."""
+    refresh_stale_summaries(distributor_id)
+    product_table = DistributorProductSummary.__table__
+    frame = pd.read_sql(
+        select(*[product_table.c[c] for c in PRODUCT_COLUMNS])
+        .where(product_table.c.distributor_id == distributor_id)
+        .order_by(product_table.c.first_supply_id),
+        db.session.connection(), parse_dates=["last_sale_date"],
+    )
+    frame["shop_names"] = frame["shop_names"].map(lambda v: json.loads(v) if v else [])
+    return frame
+
+
+def distributor_summary_stats() -> Dict[str, Any]:
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["stock_rows"] = db.session.query(func.count(DistributorStockSummary.id)).scalar()
+    stats["product_rows"] = db.session.query(func.count(DistributorProductSummary.id)).scalar()
+    return stats
@@ -0,0 +1,201 @@
+# backend/services/fast_forecaster.py
+"""
+NumPy-only forecaster tier.
+
+Seasonal naive, simple exponential smoothing and additive Holt-Winters run in
+milliseconds on the short histories most shops have, where Prophet's rigid
+small-data configurations reduce to little more than a mean anyway. Models are
+compared with a rolling-origin backtest (fit on the history up to each origin,
+score the next `horizon` points) and the lowest mean absolute error wins.
+
+Every forecaster has the signature f(y, h, season) -> (yhat, sigma): the h-step
+point forecast and the standard deviation of each step's forecast error.
+"""
+
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Season length (in observations) per forecast frequency
+SEASON_LENGTHS = {"D": 7, "W": 52, "M": 12, "MS": 12}
+
+# 80% two-sided normal interval, matching Prophet's default interval_width
+INTERVAL_WIDTH = 0.8
+INTERVAL_Z = 1.2816
+
+SES_ALPHAS = (0.1, 0.2, 0.3, 0.5, 0.7, 0.9)
+HW_ALPHAS = (0.1, 0.3, 0.5, 0.8)
+HW_BETAS = (0.01, 0.1)
+HW_GAMMAS = (0.05, 0.2, 0.4)
+
+
+# ============================================================================
+# Series preparation
+# ============================================================================
+
+def regularize_series(df: pd.DataFrame, freq: str = "D") -> Tuple[pd.DatetimeIndex, np.ndarray]:
+    """
+    Put a ds/y frame on a regular `freq` grid (mean per period, gaps interpolated),
+    which the recursive models need. Returns (period index, values).
+    """
+    series = df.set_index(pd.to_datetime(df["ds"]))["y"].astype("float64")
+    series = series.resample(freq).mean()
+    series = series.interpolate(method="linear", limit_direction="both")
+    return series.index, series.to_numpy()
+
+
+def season_length(freq: str) -> Optional[int]:
+    return SEASON_LENGTHS.get(freq.upper())
+
+
+# ============================================================================
+# Forecasters
+# ============================================================================
+
+def seasonal_naive(y: np.ndarray, h: int, season: Optional[int]) -> Tuple[np.ndarray, np.ndarray]:
+    """Repeat the last season (plain naive when there is no full season)."""
+    m = season if season and len(y) >= season + 1 else 1
+    steps = np.arange(h)
+    yhat = y[len(y) - m + (steps % m)]
+    resid = y[m:] - y[:-m]
+    sd = resid.std(ddof=1) if len(resid) > 1 else np.abs(y).mean() * 0.1
+    return yhat, sd * np.sqrt(steps // m + 1)
+
+
+def _ses_errors(y: np.ndarray, alpha: float) -> Tuple[float, np.ndarray]:
+    level = y[0]
+    errors = np.empty(len(y) - 1)
+    for t in range(1, len(y)):
+        errors[t - 1] = y[t] - level
+        level += alpha * errors[t - 1]
+    return level, errors
+
+
+def simple_exponential_smoothing(y: np.ndarray, h: int, season: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Flat forecast at the smoothed level; alpha picked by in-sample one-step SSE."""
+    best = None
+    for alpha in SES_ALPHAS:
+        level, errors = _ses_errors(y, alpha)
+        sse = float(errors @ errors)
+        if best is None or sse < best[0]:
+            best = (sse, alpha, level, errors)
+    _, alpha, level, errors = best
+    sd = errors.std(ddof=1) if len(errors) > 1 else np.abs(y).mean() * 0.1
+    steps = np.arange(h)
+    return np.full(h, level), sd * np.sqrt(1 + steps * alpha ** 2)
+
+
+def _holt_winters_pass(y, m, alpha, beta, gamma):
+    level = y[:m].mean()
+    trend = (y[m:2 * m].mean() - y[:m].mean()) / m
+    seasonal = list(y[:m] - level)
+    errors = np.empty(len(y) - m)
+    for t in range(m, len(y)):
+        s = seasonal[t - m]
+        errors[t - m] = y[t] - (level + trend + s)
+        prev_level = level
+        level = alpha * (y[t] - s) + (1 - alpha) * (level + trend)
+        trend = beta * (level - prev_level) + (1 - beta) * trend
+        seasonal.append(gamma * (y[t] - level) + (1 - gamma) * s)
+    return level, trend, np.array(seasonal[-m:]), errors
+
+
+def holt_winters(y: np.ndarray, h: int, season: Optional[int]) -> Tuple[np.ndarray, np.ndarray]:
+    """Additive Holt-Winters (level + trend + season); needs two full seasons."""
+    m = season
+    if not m or len(y) < 2 * m + 2:
+        raise ValueError("Holt-Winters needs at least two full seasons")
+    best = None
+    for alpha in HW_ALPHAS:
+        for beta in HW_BETAS:
+            for gamma in HW_GAMMAS:
+                level, trend, seasonal, errors = _holt_winters_pass(y, m, alpha, beta, gamma)
+                sse = float(errors @ errors)
+                if best is None or sse < best[0]:
+                    best = (sse, alpha, level, trend, seasonal, errors)
+    _, alpha, level, trend, seasonal, errors = best
+    steps = np.arange(h)
+    yhat = level + (steps + 1) * trend + seasonal[steps % m]
+    sd = errors.std(ddof=1) if len(errors) > 1 else np.abs(y).mean() * 0.1
+    return yhat, sd * np.sqrt(1 + steps * alpha ** 2)
+
+
+FORECASTERS: Dict[str, Callable] = {
+    "seasonal_naive": seasonal_naive,
+    "simple_exponential_smoothing": simple_exponential_smoothing,
+    "holt_winters": holt_winters,
+}
+
+
+# ============================================================================
+# Backtest and selection
+# ============================================================================
+
+def backtest_origins(n: int, horizon: int, folds: int = 3, min_train: int = 7) -> List[int]:
+    """Rolling origins (training lengths) for the last `folds` windows of `horizon` points."""
+    origins = [n - horizon * i for i in range(folds, 0, -1)]
+    return [o for o in origins if o >= min_train]
+
+
+def backtest_errors(y: np.ndarray, forecaster: Callable, horizon: int, origins: List[int],
+                    season: Optional[int]) -> List[float]:
+    """Mean absolute error of `forecaster` at each rolling origin (NaN when it cannot fit)."""
+    errors = []
+    for origin in origins:
+        actual = y[origin:origin + horizon]
+        try:
+            yhat, _ = forecaster(y[:origin], len(actual), season)
+            errors.append(float(np.abs(actual - yhat).mean()))
+        except ValueError:
+            errors.append(float("nan"))
+    return errors
+
+
+def backtest_horizon(n: int, periods: int) -> int:
+    return max(1, min(periods, n // 5))
+
+
+def select_fast_model(y: np.ndarray, periods: int, season: Optional[int], folds: int = 3) -> Dict:
+    """
+    Backtest every fast forecaster on the same rolling origins.
+    Returns {"model", "origins", "horizon", "errors": {name: [mae per origin]}, "scores": {name: mean mae}}.
+    """
+    horizon = backtest_horizon(len(y), periods)
+    origins = backtest_origins(len(y), horizon, folds)
+    errors = {name: backtest_errors(y, f, horizon, origins, season) for name, f in FORECASTERS.items()}
+    scores = {
+        name: float(np.mean(errs))
+        for name, errs in errors.items()
+        if errs and not np.isnan(errs).any()
+    }
+    # Too short to backtest at all: exponential smoothing is the safe default
+    model = min(scores, key=scores.get) if scores else "simple_exponential_smoothing"
+    return {"model": model, "origins": origins, "horizon": horizon, "errors": errors, "scores": scores}
+
+
+def fast_forecast(df: pd.DataFrame, periods: int, freq: str = "D", model: Optional[str] = None) -> Tuple[pd.DataFrame, Dict]:
+    """
+    Forecast a ds/y frame with the fast tier. `model=None` selects by backtest.
+    Returns (DataFrame with ds, yhat, yhat_lower, yhat_upper, selection info).
+    """
+    start = time.time()
+    index, y = regularize_series(df, freq)
+    season = season_length(freq)
+    selection = select_fast_model(y, periods, season) if model is None else {"model": model, "scores": {}}
+    try:
+        yhat, sigma = FORECASTERS[selection["model"]](y, periods, season)
+    except ValueError:
+        selection["model"] = "simple_exponential_smoothing"
+        yhat, sigma = simple_exponential_smoothing(y, periods, season)
+
+    future = pd.date_range(index[-1], periods=periods + 1, freq=freq)[1:]
+    forecast = pd.DataFrame({
+        "ds": future,
+        "yhat": yhat,
+        "yhat_lower": yhat - INTERVAL_Z * sigma,
+        "yhat_upper": yhat + INTERVAL_Z * sigma,
+    })
+    selection["fit_time_seconds"] = time.time() - start
+    return forecast, selection
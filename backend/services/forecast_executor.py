@@ -0,0 +1,441 @@
+# backend/services/forecast_executor.py
+"""
+Process-pool executor for Prophet forecasts.
+
+Prophet fits are CPU-bound Stan runs that take seconds; running them on the
+Flask request thread blocks that worker for every user behind it. This module
+moves them to a small pool of worker processes:
+
+  - at most FORECAST_WORKERS fits run at once, and at most FORECAST_MAX_INFLIGHT
+    jobs may be queued or running (further requests report "busy")
+  - identical requests (same series, horizon, frequency and interval tier) share one job
+  - jobs running longer than FORECAST_TIMEOUT_SECONDS (counted from when a worker
+    picks them up, not from submission) are abandoned; once no live job is
+    running, the pool is recycled and its worker processes terminated
+  - finished results are kept in a small LRU so the next poll returns at once
+  - series short enough for the NumPy fast tier skip the pool entirely
+
+Request handlers use request(..., wait=N) / request_many(..., wait=N) and fall
+back to the last good cached forecast or a "computing" status when the job is
+not done yet. Background or CLI callers can use forecast() / forecast_many(),
+which block until the jobs finish.
+
+Workers report their PID and the moment they start each job over a queue set up
+by the pool initializer, so timeouts and recycling do not depend on the pool's
+private state.
+"""
+
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, TimeoutError as FutureTimeoutError, wait as wait_futures
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+import pandas as pd
+
+from config import Config
+from utils.prophet_model_store import series_fingerprint
+
+logger = logging.getLogger(__name__)
+
+
+class ForecastBusyError(RuntimeError):
+    """Raised when the in-flight job cap is reached."""
+
+
+_worker_events = None  # set in each pool worker by _init_worker
+
+
+def _init_worker(events):
+    global _worker_events
+    _worker_events = events
+    events.put(("worker", os.getpid(), None, time.time()))
+
+
+def _run_job(job_id: int, job: Callable, *args):
+    """Pool-side wrapper: report that this worker started the job, then run it."""
+    if _worker_events is not None:
+        _worker_events.put(("start", os.getpid(), job_id, time.time()))
+    return job(*args)
+
+
+def run_prophet_forecast(df: pd.DataFrame, periods: int, freq: str, uncertainty: Optional[str] = None):
+    """Worker-process entrypoint: the regular preprocess + fit + predict path."""
+    from services.prophet_service import prophet_manager
+    return prophet_manager.forecast_sales(df, periods=periods, freq=freq, uncertainty=uncertainty)
+
+
+def run_fast_tier(df: pd.DataFrame, periods: int, freq: str, uncertainty: Optional[str] = None):
+    """
+    In-process shortcut for series too short for Prophet to be a candidate: the
+    NumPy tier answers in milliseconds, so no pool round trip. None otherwise.
+    """
+    from services.prophet_service import prophet_manager
+    if prophet_manager.needs_prophet(df[["ds", "y"]], freq):
+        return None
+    return prophet_manager.forecast_sales(df[["ds", "y"]], periods=periods, freq=freq, uncertainty=uncertainty)
+
+
+@dataclass
+class ForecastJobResult:
+    """Outcome of ForecastExecutor.request()."""
+    status: str  # 'ready', 'computing', 'busy' or 'failed'
+    key: str
+    forecast: Optional[pd.DataFrame] = None
+    metrics: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+
+class ForecastExecutor:
+    """Bounded, deduplicating process pool for forecast jobs (pool created lazily)."""
+
+    def __init__(self, max_workers: int = 2, max_inflight: int = 8, timeout: float = 120.0,
+                 result_cache_size: int = 64, job: Callable = run_prophet_forecast,
+                 start_method: str = "spawn", fast_path: Optional[Callable] = None):
+        self.max_workers = max_workers
+        self.max_inflight = max_inflight
+        self.timeout = timeout
+        self.result_cache_size = result_cache_size
+        self.job = job
+        self.start_method = start_method
+        self.fast_path = fast_path
+        self._pool = None
+        self._events = None  # worker -> parent queue of the current pool
+        self._worker_pids = set()
+        self._started = {}  # job id -> time a worker picked it up
+        self._next_job_id = 0
+        self._lock = threading.Lock()
+        self._inflight = {}  # key -> (future, job id)
+        self._results = OrderedDict()  # key -> (forecast, metrics)
+        self._failures = {}  # key -> error message from the last attempt
+        self._stats = {"submitted": 0, "deduplicated": 0, "completed": 0, "failed": 0,
+                       "timed_out": 0, "rejected": 0, "result_hits": 0, "pool_restarts": 0,
+                       "fast_path": 0}
+
+    # ------------------------------------------------------------------
+    # Pool management
+    # ------------------------------------------------------------------
+    def _get_pool(self):
+        if self._pool is None:
+            context = multiprocessing.get_context(self.start_method)
+            self._events = context.Queue()
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(self._events,),
+            )
+        return self._pool
+
+    def _drain_events(self):
+        """Record worker PIDs and job start times reported by the pool (caller holds the lock)."""
+        while self._events is not None:
+            try:
+                kind, pid, job_id, at = self._events.get_nowait()
+            except (queue.Empty, OSError, ValueError):
+                return
+            self._worker_pids.add(pid)
+            if kind == "start":
+                self._started[job_id] = at
+
+    def _recycle_pool(self):
+        """Drop a pool whose workers are stuck on abandoned jobs (caller holds the lock)."""
+        pool, self._pool = self._pool, None
+        if pool is None:
+            return
+        self._drain_events()
+        pool.shutdown(wait=False, cancel_futures=True)
+        for pid in self._worker_pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                pass  # already exited
+        self._worker_pids.clear()
+        self._started.clear()
+        self._events = None
+        self._stats["pool_restarts"] += 1
+        logger.warning("[Forecast Executor] Recycled worker pool after timed-out jobs")
+
+    def _expire_timeouts(self):
+        """Abandon jobs running past the timeout (caller holds the lock)."""
+        self._drain_events()
+        now = time.time()
+        expired = [k for k, (fut, job_id) in self._inflight.items()
+                   if not fut.done() and job_id in self._started and now - self._started[job_id] > self.timeout]
+        for key in expired:
+            future, job_id = self._inflight.pop(key)
+            future.cancel()
+            self._started.pop(job_id, None)
+            self._failures[key] = f"Forecast timed out after {self.timeout:.0f}s"
+            self._stats["timed_out"] += 1
+        if expired and self._pool is not None:
+            # Running jobs cannot be cancelled; recycle the pool once no live job is running
+            # (jobs still queued are cancelled and resubmitted by their next request)
+            if not any(not fut.done() and job_id in self._started for fut, job_id in self._inflight.values()):
+                self._recycle_pool()
+
+    # ------------------------------------------------------------------
+    # Jobs
+    # ------------------------------------------------------------------
+    def _on_done(self, key, future):
+        with self._lock:
+            current = self._inflight.get(key)
+            if current is None or current[0] is not future:
+                return  # abandoned after a timeout
+            del self._inflight[key]
+            self._started.pop(current[1], None)
+            if future.cancelled():
+                return
+            error = future.exception()
+            if error is not None:
+                self._failures[key] = str(error)
+                self._stats["failed"] += 1
+                logger.error(f"[Forecast Executor] Job {key[:8]} failed: {error}")
+                return
+            forecast, metrics = future.result()
+            self._results[key] = (forecast, metrics)
+            self._results.move_to_end(key)
+            while len(self._results) > self.result_cache_size:
+                self._results.popitem(last=False)
+            self._failures.pop(key, None)
+            self._stats["completed"] += 1
+
+    @staticmethod
+    def _key(df: pd.DataFrame, periods: int, freq: str, uncertainty: str) -> str:
+        return series_fingerprint(df, periods, freq, uncertainty)
+
+    def submit(self, df: pd.DataFrame, periods: int = 30, freq: str = "D", uncertainty: Optional[str] = None):
+        """Queue a forecast (or join the identical in-flight one). Returns (key, future or None if settled)."""
+        uncertainty = uncertainty or Config.FORECAST_UNCERTAINTY_MODE
+        key = self._key(df, periods, freq, uncertainty)
+        with self._lock:
+            self._expire_timeouts()
+            if key in self._results or (key in self._failures and key not in self._inflight):
+                return key, None  # the failure is reported once, the next request retries
+            if key in self._inflight:
+                self._stats["deduplicated"] += 1
+                return key, self._inflight[key][0]
+            if len(self._inflight) >= self.max_inflight:
+                self._stats["rejected"] += 1
+                raise ForecastBusyError("Forecast capacity reached; try again shortly")
+            self._next_job_id += 1
+            job_id = self._next_job_id
+            future = self._get_pool().submit(_run_job, job_id, self.job, df[["ds", "y"]].copy(),
+                                             periods, freq, uncertainty)
+            self._inflight[key] = (future, job_id)
+            self._failures.pop(key, None)
+            self._stats["submitted"] += 1
+        future.add_done_callback(lambda f, k=key: self._on_done(k, f))
+        return key, future
+
+    def _finished(self, key) -> Optional[ForecastJobResult]:
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                self._stats["result_hits"] += 1
+                forecast, metrics = self._results[key]
+                return ForecastJobResult("ready", key, forecast.copy(), dict(metrics))
+            if key in self._failures and key not in self._inflight:
+                return ForecastJobResult("failed", key, error=self._failures.pop(key))
+        return None
+
+    def _run_fast_path(self, df, periods, freq, uncertainty=None) -> Optional[ForecastJobResult]:
+        uncertainty = uncertainty or Config.FORECAST_UNCERTAINTY_MODE
+        result = self.fast_path(df, periods, freq, uncertainty)
+        if result is None:
+            return None
+        with self._lock:
+            self._stats["fast_path"] += 1
+        forecast, metrics = result
+        return ForecastJobResult("ready", self._key(df, periods, freq, uncertainty), forecast, metrics)
+
+    def request(self, df: pd.DataFrame, periods: int = 30, freq: str = "D",
+                wait: float = 0.0, uncertainty: Optional[str] = None) -> ForecastJobResult:
+        """
+        Non-blocking forecast: returns the result if it is cached or finishes within
+        `wait` seconds, otherwise status 'computing' (job keeps running) or 'busy'.
+        `uncertainty` picks the interval tier (default FORECAST_UNCERTAINTY_MODE).
+        """
+        uncertainty = uncertainty or Config.FORECAST_UNCERTAINTY_MODE
+        if self.fast_path is not None:
+            try:
+                fast = self._run_fast_path(df, periods, freq, uncertainty)
+            except Exception as e:
+                return ForecastJobResult("failed", self._key(df, periods, freq, uncertainty), error=str(e))
+            if fast is not None:
+                return fast
+        try:
+            key, future = self.submit(df, periods, freq, uncertainty)
+        except ForecastBusyError as e:
+            return ForecastJobResult("busy", self._key(df, periods, freq, uncertainty), error=str(e))
+
+        if future is not None and wait > 0:
+            try:
+                future.result(timeout=wait)
+            except Exception:
+                pass  # timeouts leave the job running; failures are recorded by _on_done
+        if future is not None and future.done():
+            # The done-callback may not have run yet; recording twice is a no-op
+            self._on_done(key, future)
+        return self._finished(key) or ForecastJobResult("computing", key)
+
+    def request_many(self, frames: Dict[Any, pd.DataFrame], periods: int = 30, freq: str = "D",
+                     wait: float = 0.0, uncertainty: Optional[str] = None) -> Dict[Any, ForecastJobResult]:
+        """
+        Non-blocking forecast_many: every series is requested at once (fast-tier ones
+        answer inline, identical ones share a job, those past the in-flight cap report
+        'busy'), then the queued jobs get at most `wait` seconds in total.
+        Returns {name: ForecastJobResult}.
+        """
+        results = {name: self.request(df, periods, freq, wait=0, uncertainty=uncertainty)
+                   for name, df in frames.items()}
+        pending = {name: job.key for name, job in results.items() if job.status == "computing"}
+        with self._lock:
+            futures = {key: self._inflight[key][0] for key in set(pending.values()) if key in self._inflight}
+        if futures and wait > 0:
+            wait_futures(set(futures.values()), timeout=wait)
+        for future_key, future in futures.items():
+            if future.done():
+                self._on_done(future_key, future)
+        for name, key in pending.items():
+            results[name] = self._finished(key) or ForecastJobResult("computing", key)
+        return results
+
+    def forecast(self, df: pd.DataFrame, periods: int = 30, freq: str = "D",
+                 timeout: Optional[float] = None, uncertainty: Optional[str] = None):
+        """Blocking forecast through the pool. Returns (forecast_df, metrics)."""
+        if self.fast_path is not None:
+            fast = self._run_fast_path(df, periods, freq, uncertainty)
+            if fast is not None:
+                return fast.forecast, fast.metrics
+        key, future = self.submit(df, periods, freq, uncertainty)
+        if future is not None:
+            try:
+                forecast, metrics = future.result(timeout=timeout or self.timeout)
+            except FutureTimeoutError:
+                raise TimeoutError(f"Forecast timed out after {timeout or self.timeout:.0f}s")
+            finally:
+                if future.done():
+                    self._on_done(key, future)
+            return forecast.copy(), dict(metrics)
+        result = self._finished(key)
+        if result is None or not result.ready:
+            raise RuntimeError(result.error if result else "Forecast result was evicted")
+        return result.forecast, result.metrics
+
+    def forecast_many(self, frames: Dict[Any, pd.DataFrame], periods: int = 30,
+                      freq: str = "D", uncertainty: Optional[str] = None) -> Dict[Any, Any]:
+        """
+        Forecast several series (e.g. one per product) in parallel. Short series go through
+        the fast path inline; the rest are fed to the pool without exceeding max_inflight.
+        Returns {name: (forecast_df, metrics) or the exception raised for that series}.
+        """
+        results = {}
+        queue = []
+        for name, df in frames.items():
+            if self.fast_path is not None:
+                try:
+                    fast = self._run_fast_path(df, periods, freq, uncertainty)
+                except Exception as e:
+                    results[name] = e
+                    continue
+                if fast is not None:
+                    results[name] = (fast.forecast, fast.metrics)
+                    continue
+            queue.append((name, df))
+
+        pending = []  # (future, name, key); identical series share a future
+        stalled_since = None
+        while queue or pending:
+            while queue:
+                name, df = queue[0]
+                try:
+                    key, future = self.submit(df, periods, freq, uncertainty)
+                except ForecastBusyError:
+                    break  # wait for a slot
+                queue.pop(0)
+                if future is None:
+                    settled = self._finished(key)
+                    results[name] = ((settled.forecast, settled.metrics) if settled and settled.ready
+                                     else RuntimeError(settled.error if settled else "Forecast result was evicted"))
+                else:
+                    pending.append((future, name, key))
+
+            if not pending:
+                # Other requests hold every slot; poll until one frees up or we give up
+                stalled_since = stalled_since or time.time()
+                if time.time() - stalled_since > self.timeout:
+                    for name, _ in queue:
+                        results[name] = TimeoutError("Forecast capacity stayed full")
+                    break
+                time.sleep(0.1)
+                continue
+            stalled_since = None
+
+            done, _ = wait_futures({f for f, _, _ in pending}, timeout=self.timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                for _, name, _ in pending:
+                    results[name] = TimeoutError(f"Forecast timed out after {self.timeout:.0f}s")
+                for name, _ in queue:
+                    results[name] = TimeoutError("Forecast skipped after a timed-out job")
+                break
+            still_pending = []
+            for future, name, key in pending:
+                if future not in done:
+                    still_pending.append((future, name, key))
+                    continue
+                self._on_done(key, future)
+                if future.cancelled():
+                    results[name] = RuntimeError("Forecast was cancelled")
+                elif future.exception() is not None:
+                    results[name] = future.exception()
+                else:
+                    forecast, metrics = future.result()
+                    results[name] = (forecast.copy(), dict(metrics))
+            pending = still_pending
+        return results
+
+    # ------------------------------------------------------------------
+    # Monitoring
+    # ------------------------------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._expire_timeouts()
+            return {
+                "max_workers": self.max_workers,
+                "max_inflight": self.max_inflight,
+                "timeout_seconds": self.timeout,
+                "inflight": len(self._inflight),
+                "running": sum(1 for fut, job_id in self._inflight.values() if job_id in self._started),
+                "workers": len(self._worker_pids),
+                "cached_results": len(self._results),
+                **self._stats,
+            }
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            pool, self._pool = self._pool, None
+            self._inflight.clear()
+            self._started.clear()
+            self._worker_pids.clear()
+            self._events = None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+
+forecast_executor = ForecastExecutor(
+    max_workers=Config.FORECAST_WORKERS,
+    max_inflight=Config.FORECAST_MAX_INFLIGHT,
+    timeout=Config.FORECAST_TIMEOUT_SECONDS,
+    fast_path=run_fast_tier,
+)
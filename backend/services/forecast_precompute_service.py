@@ -0,0 +1,374 @@
+# backend/services/forecast_precompute_service.py
+"""
+Off-peak forecast precompute.
+
+A daemon scheduler wakes every FORECAST_PRECOMPUTE_CHECK_SECONDS and, once per
+day inside FORECAST_PRECOMPUTE_WINDOW (local time, e.g. "02:00-05:00"), refreshes
+the CachedForecast rows of every shop whose sales changed since its last
+successful precompute or whose quarterly forecast would expire before the next
+window. Dashboard requests then read the cache instead of fitting on demand.
+
+Each pass is recorded in forecast_precompute_runs, with one
+forecast_precompute_shop_logs row (status, duration) per shop. Admins can
+trigger a pass manually from /api/v1/performance/forecast-precompute/run.
+
+With FORECAST_PRECOMPUTE_ENABLED, init_app() starts the scheduler on a worker's
+first request. Every worker runs one, but only the holder of an exclusive lock
+on FORECAST_PRECOMPUTE_LOCK_PATH checks the window; when it exits, the OS drops
+the lock and another worker takes over. Runs themselves are admitted by a
+unique index (active_lock), so a manual trigger racing the schedule, or two
+processes without the file lock, still start only one run.
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, func
+from sqlalchemy.exc import IntegrityError
+
+from config import Config
+from models.model import (
+    db, SalesData, ShopDataVersion, CachedForecast,
+    ForecastPrecomputeRun, ForecastPrecomputeShopLog,
+)
+from services.sales_analytics_service import get_sales_analytics_service
+from utils.background_jobs import BackgroundJobQueue
+from utils.data_version import get_data_version
+
+try:
+    import fcntl
+except ImportError:  # Windows: rely on the run slot alone
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+TREND_PERIODS = ['weekly', 'monthly', 'yearly']
+PRECOMPUTE_FORECAST_TYPES = ['sales_summary'] + [f'{p}_trend' for p in TREND_PERIODS] + ['quarterly']
+
+# A queued/running run older than this is assumed to have died with its process
+ACTIVE_RUN_MAX_AGE = timedelta(hours=6)
+
+# Per-shop jobs; manual runs are driven from their own single-worker queue so a
+# run waiting on its shop jobs never occupies one of their workers
+precompute_queue = BackgroundJobQueue("forecast-precompute", max_workers=Config.FORECAST_PRECOMPUTE_CONCURRENCY)
+run_queue = BackgroundJobQueue("forecast-precompute-runs", max_workers=1)
+
+
+# ============================================================================
+# Candidate selection
+# ============================================================================
+
+def shops_due_for_precompute(horizon: Optional[datetime] = None) -> List[int]:
+    """
+    Shops with sales data whose forecasts need refreshing: the sales version moved
+    since the last successful precompute, or the cached quarterly forecast is stale
+    or expires before `horizon` (UTC, default: 24h from now, i.e. the next window).
+    """
+    horizon = horizon or datetime.utcnow() + timedelta(hours=24)
+    sales_shops = db.session.query(SalesData.shop_id.label('shop_id')).distinct().subquery()
+    last_ok = (
+        db.session.query(
+            ForecastPrecomputeShopLog.shop_id,
+            func.max(ForecastPrecomputeShopLog.id).label('log_id'),
+        )
+        .filter(ForecastPrecomputeShopLog.status == 'success')
+        .group_by(ForecastPrecomputeShopLog.shop_id)
+        .subquery()
+    )
+    rows = (
+        db.session.query(
+            sales_shops.c.shop_id,
+            func.coalesce(ShopDataVersion.sales_version, 0),
+            ForecastPrecomputeShopLog.sales_version,
+            CachedForecast.id,
+            CachedForecast.is_stale,
+            CachedForecast.expires_at,
+        )
+        .select_from(sales_shops)
+        .outerjoin(ShopDataVersion, ShopDataVersion.shop_id == sales_shops.c.shop_id)
+        .outerjoin(last_ok, last_ok.c.shop_id == sales_shops.c.shop_id)
+        .outerjoin(ForecastPrecomputeShopLog, ForecastPrecomputeShopLog.id == last_ok.c.log_id)
+        .outerjoin(CachedForecast, and_(
+            CachedForecast.shop_id == sales_shops.c.shop_id,
+            CachedForecast.forecast_type == 'quarterly',
+        ))
+        .order_by(sales_shops.c.shop_id)
+        .all()
+    )
+
+    due = []
+    for shop_id, sales_version, logged_version, cached_id, is_stale, expires_at in rows:
+        if logged_version is None or logged_version != sales_version:
+            due.append(shop_id)
+        elif cached_id is not None and (is_stale or (expires_at and expires_at <= horizon)):
+            due.append(shop_id)
+    return due
+
+
+# ============================================================================
+# Runs
+# ============================================================================
+
+def get_active_run() -> Optional[ForecastPrecomputeRun]:
+    return (
+        ForecastPrecomputeRun.query
+        .filter(ForecastPrecomputeRun.active_lock.isnot(None))
+        .filter(ForecastPrecomputeRun.started_at > datetime.utcnow() - ACTIVE_RUN_MAX_AGE)
+        .first()
+    )
+
+
+def start_run(trigger: str = 'schedule') -> Optional[ForecastPrecomputeRun]:
+    """
+    Record a queued run, or return None when another run is still active. The
+    insert itself claims the slot (unique active_lock), so concurrent callers in
+    different workers cannot both succeed.
+    """
+    # Runs that died with their process release the slot after ACTIVE_RUN_MAX_AGE
+    ForecastPrecomputeRun.query.filter(
+        ForecastPrecomputeRun.active_lock.isnot(None),
+        ForecastPrecomputeRun.started_at <= datetime.utcnow() - ACTIVE_RUN_MAX_AGE,
+    ).update({'active_lock': None, 'status': 'failed', 'message': 'abandoned'}, synchronize_session=False)
+    db.session.commit()
+
+    run = ForecastPrecomputeRun(trigger=trigger, status='queued', started_at=datetime.utcnow(), active_lock=True)
+    db.session.add(run)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return None
+    return run
+
+
+def precompute_shop(shop_id: int, run_id: int) -> str:
+    """Refresh every cached view of one shop and log the outcome. Returns 'success' or 'failed'."""
+    started_at = datetime.utcnow()
+    start = time.time()
+    sales_version = get_data_version(shop_id, sales=True)
+    written = []
+    error = None
+    try:
+        service = get_sales_analytics_service(shop_id)
+        service.get_weekly_sales_summary()
+        written.append('sales_summary')
+        for period in TREND_PERIODS:
+            service.get_sales_growth_trend(period)
+            written.append(f'{period}_trend')
+
+        # Nightly runs have the time for full Monte-Carlo intervals
+        forecast = service.get_quarterly_demand_forecast(
+            wait_seconds=Config.FORECAST_TIMEOUT_SECONDS, uncertainty='exact'
+        )
+        if forecast.get('status') in ('error', 'computing') or forecast.get('refreshing'):
+            raise RuntimeError(forecast.get('error') or f"quarterly forecast {forecast.get('status')}")
+        if forecast.get('status') == 'success':
+            written.append('quarterly')
+        status = 'success'
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"[Precompute] Shop {shop_id} failed: {e}")
+        status = 'failed'
+        error = str(e)[:255]
+
+    db.session.add(ForecastPrecomputeShopLog(
+        run_id=run_id,
+        shop_id=shop_id,
+        sales_version=sales_version,
+        status=status,
+        started_at=started_at,
+        duration_ms=int((time.time() - start) * 1000),
+        forecast_types=','.join(written),
+        error=error,
+    ))
+    db.session.commit()
+    return status
+
+
+def run_precompute(trigger: str = 'schedule', shop_ids: Optional[List[int]] = None,
+                   run_id: Optional[int] = None) -> Optional[Dict]:
+    """
+    Execute one precompute pass (blocking; needs an app context).
+    `shop_ids` overrides candidate selection; `run_id` continues a run created by start_run.
+    Returns the finished run as a dict, or None if another run is active.
+    """
+    run = db.session.get(ForecastPrecomputeRun, run_id) if run_id else start_run(trigger)
+    if run is None:
+        logger.info("[Precompute] Another run is active, skipping")
+        return None
+
+    start = time.time()
+    try:
+        candidates = list(shop_ids) if shop_ids else shops_due_for_precompute()
+        run.status = 'running'
+        run.shops_considered = len(candidates)
+        db.session.commit()
+        logger.info(f"[Precompute] Run {run.id} ({run.trigger}): {len(candidates)} shops")
+
+        futures = [precompute_queue.submit(precompute_shop, shop_id, run.id) for shop_id in candidates]
+        outcomes = []
+        for future in futures:
+            try:
+                outcomes.append(future.result())
+            except Exception:
+                outcomes.append('failed')
+
+        run.shops_refreshed = outcomes.count('success')
+        run.shops_failed = len(outcomes) - run.shops_refreshed
+        run.status = 'completed'
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"[Precompute] Run {run.id} failed: {e}")
+        run.status = 'failed'
+        run.message = str(e)[:255]
+
+    run.completed_at = datetime.utcnow()
+    run.duration_ms = int((time.time() - start) * 1000)
+    run.active_lock = None
+    db.session.commit()
+    logger.info(
+        f"[Precompute] Run {run.id} {run.status}: {run.shops_refreshed} refreshed, "
+        f"{run.shops_failed} failed in {run.duration_ms} ms"
+    )
+    return run.to_dict()
+
+
+def trigger_precompute(shop_ids: Optional[List[int]] = None) -> Optional[ForecastPrecomputeRun]:
+    """Queue a manual run in the background. Returns the queued run, or None if one is active."""
+    run = start_run(trigger='manual')
+    if run is None:
+        return None
+    run_queue.submit(run_precompute, 'manual', shop_ids, run.id)
+    return run
+
+
+# ============================================================================
+# Scheduler
+# ============================================================================
+
+def parse_window(window: str):
+    """'HH:MM-HH:MM' -> (start time, end time)."""
+    start, end = (datetime.strptime(part.strip(), "%H:%M").time() for part in window.split("-"))
+    return start, end
+
+
+class ForecastPrecomputeScheduler:
+    """Daemon thread that starts one scheduled precompute run per day inside the configured window."""
+
+    def __init__(self, window: str = None, check_seconds: float = None,
+                 lock_path: str = None, clock=datetime.now):
+        self.window = window or Config.FORECAST_PRECOMPUTE_WINDOW
+        self.check_seconds = check_seconds or Config.FORECAST_PRECOMPUTE_CHECK_SECONDS
+        self.lock_path = lock_path or Config.FORECAST_PRECOMPUTE_LOCK_PATH
+        self.clock = clock  # local time; injectable for tests
+        self._lock_file = None
+        self._app = None
+        self._thread = None
+        self._stop = threading.Event()
+        self.last_check = None
+        self.last_run_id = None
+
+    def in_window(self, now: Optional[datetime] = None) -> bool:
+        now = now or self.clock()
+        start, end = parse_window(self.window)
+        if start <= end:
+            return start <= now.time() < end
+        return now.time() >= start or now.time() < end  # window spans midnight
+
+    def ran_today(self) -> bool:
+        """Whether a scheduled run already started today (local day, stored as UTC)."""
+        local_midnight = datetime.combine(self.clock().date(), datetime.min.time())
+        since = local_midnight - (datetime.now() - datetime.utcnow())
+        return db.session.query(ForecastPrecomputeRun.id).filter(
+            ForecastPrecomputeRun.trigger == 'schedule',
+            ForecastPrecomputeRun.status.in_(['queued', 'running', 'completed']),
+            ForecastPrecomputeRun.started_at >= since,
+        ).first() is not None
+
+    def tick(self):
+        """One scheduler check (inside an app context)."""
+        self.last_check = datetime.utcnow()
+        if not self.in_window() or self.ran_today():
+            return None
+        result = run_precompute(trigger='schedule')
+        if result:
+            self.last_run_id = result['id']
+        return result
+
+    def acquire_leadership(self) -> bool:
+        """Take (or keep) the cross-worker scheduler lock; False while another process holds it."""
+        if self._lock_file is not None:
+            return True
+        if fcntl is None:
+            return True
+        lock_file = open(self.lock_path, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def release_leadership(self):
+        if self._lock_file is not None:
+            self._lock_file.close()  # closing drops the flock
+            self._lock_file = None
+
+    def _loop(self):
+        while not self._stop.wait(self.check_seconds):
+            if not self.acquire_leadership():
+                continue
+            with self._app.app_context():
+                try:
+                    self.tick()
+                except Exception as e:
+                    logger.error(f"[Precompute] Scheduler check failed: {e}")
+                finally:
+                    db.session.remove()
+
+    def start(self, app):
+        if self._thread and self._thread.is_alive():
+            return
+        self._app = app
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="forecast-precompute-scheduler", daemon=True)
+        self._thread.start()
+        print(f"Forecast precompute scheduler started (window {self.window})")
+
+    def stop(self):
+        self._stop.set()
+        self.release_leadership()
+
+    def status(self) -> Dict:
+        return {
+            "enabled": Config.FORECAST_PRECOMPUTE_ENABLED,
+            "running": bool(self._thread and self._thread.is_alive()),
+            "leader": self._lock_file is not None,
+            "window": self.window,
+            "check_seconds": self.check_seconds,
+            "last_check": self.last_check.isoformat() if self.last_check else None,
+            "last_run_id": self.last_run_id,
+            "queue": precompute_queue.stats(),
+        }
+
+
+forecast_precompute_scheduler = ForecastPrecomputeScheduler()
+
+
+def init_app(app):
+    """
+    Start the scheduler with the first request each worker serves (behind
+    FORECAST_PRECOMPUTE_ENABLED). Starting lazily keeps it out of CLI commands
+    and out of a pre-fork master, whose threads would not survive the fork.
+    """
+    if not Config.FORECAST_PRECOMPUTE_ENABLED:
+        return
+
+    @app.before_request
+    def _start_forecast_precompute_scheduler():
+        forecast_precompute_scheduler.start(app)
@@ -1,13 +1,17 @@
 # backend/services/forecasting_service.py
 
 import pandas as pd
-from services.prophet_service import prophet_manager
+from config import Config
+from services.forecast_executor import forecast_executor
 
 # -------------------- FORECAST SALES --------------------
-def forecast_sales(df: pd.DataFrame):
+def forecast_sales(df: pd.DataFrame, wait: float = None):
     """
     Run optimized Prophet forecast and return next 4 weeks demand by product.
     Expects columns: 'Date', 'Sales', 'Product'
+    Fits are queued on the forecast pool and waited on for at most `wait` seconds
+    (default FORECAST_WAIT_SECONDS); products still fitting are returned with
+    status 'computing' (or 'busy') and an empty forecast, so callers can poll.
     """
     results = []
 
@@ -15,46 +19,51 @@ def forecast_sales(df: pd.DataFrame):
         print("[Warning] Invalid or empty DataFrame for forecast_sales.")
         return results
 
-    for product in df['Product'].dropna().unique():
-        product_df = df[df['Product'] == product][['Date', 'Sales']].copy()
-        
+    # One split of the frame instead of re-filtering it per product
+    frames = {}
+    for product, product_df in df.dropna(subset=['Product']).groupby('Product', sort=False):
         # Skip if insufficient data
         if len(product_df) < 5:
             print(f"[Warning] Not enough data for product '{product}' to forecast.")
             continue
-
-        try:
-            # Prepare data for optimized Prophet
-            prophet_df = product_df.copy()
-            prophet_df.columns = ["ds", "y"]  # Prophet expects ds, y columns
-            
-            # Use optimized Prophet service with 4 weeks forecast
-            forecast_data, metrics = prophet_manager.forecast_sales(
-                prophet_df, periods=4, freq='W'
-            )
-            
-            # Convert to expected format
-            forecast_list = []
-            for _, row in forecast_data.iterrows():
-                forecast_list.append({
-                    "week": row['ds'].strftime('%Y-%m-%d'),
-                    "predicted_sales": round(row['yhat'], 2)
-                })
-
-            results.append({
-                "product": product,
-                "forecast": forecast_list,
-                "metrics": {
-                    "data_quality_score": metrics.get('data_quality_score', 0),
-                    "forecast_time_seconds": metrics.get('forecast_time_seconds', 0),
-                    "model_cached": metrics.get('model_cached', False)
-                }
-            })
-            
-            print(f"[Success] Forecast for {product}: {metrics.get('forecast_time_seconds', 0):.2f}s")
-            
-        except Exception as e:
-            print(f"[Error] Forecast error for {product}: {e}")
+        # Prophet expects ds, y columns
+        frames[product] = product_df[['Date', 'Sales']].rename(columns={'Date': 'ds', 'Sales': 'y'})
+
+    # 4 weeks forecast per product: short series are answered by the fast tier inline,
+    # the rest fit in parallel on the bounded forecast pool
+    jobs = forecast_executor.request_many(
+        frames, periods=4, freq='W', wait=Config.FORECAST_WAIT_SECONDS if wait is None else wait
+    )
+
+    for product in frames:
+        job = jobs[product]
+        if job.status == 'failed':
+            print(f"[Error] Forecast error for {product}: {job.error}")
+            continue
+        if not job.ready:
+            results.append({"product": product, "status": job.status, "job_key": job.key, "forecast": []})
+            continue
+        forecast_data, metrics = job.forecast, job.metrics
+
+        # Convert to expected format
+        forecast_list = [
+            {"week": ds.strftime('%Y-%m-%d'), "predicted_sales": round(yhat, 2)}
+            for ds, yhat in zip(forecast_data['ds'], forecast_data['yhat'])
+        ]
+
+        results.append({
+            "product": product,
+            "status": "ready",
+            "forecast": forecast_list,
+            "metrics": {
+                "data_quality_score": metrics.get('data_quality_score', 0),
+                "forecast_time_seconds": metrics.get('forecast_time_seconds', 0),
+                "model_cached": metrics.get('model_cached', False),
+                "model": metrics.get('model', 'prophet')
+            }
+        })
+
+        print(f"[Success] Forecast for {product}: {metrics.get('forecast_time_seconds', 0):.2f}s")
 
     return results
 
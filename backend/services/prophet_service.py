@@ -4,40 +4,82 @@ Optimized Prophet Service for Textile Forecasting
 Provides high-performance, accurate forecasting with caching and textile-specific configurations
 """
 
-import hashlib
+import threading
 import time
+from collections import OrderedDict
+from statistics import NormalDist
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
+import prophet
 from prophet import Prophet
+from prophet.serialize import model_to_json, model_from_json
 from functools import lru_cache
 import logging
 
+from config import Config
+from services.fast_forecaster import INTERVAL_WIDTH, fast_forecast, regularize_series, season_length, select_fast_model
+from utils.prophet_model_store import ProphetModelStore, prophet_model_store, series_fingerprint
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Bump when _create_textile_prophet_model / _add_textile_seasonality change so stored fits are not reused
+MODEL_CONFIG_VERSION = 1
+
+# Prediction interval tiers, most to least expensive:
+#   exact    - Prophet's Monte-Carlo draws at the model's configured uncertainty_samples
+#   sampled  - the same simulation with FORECAST_SAMPLED_UNCERTAINTY_SAMPLES draws
+#   analytic - normal intervals from the in-sample residuals, no simulation
+UNCERTAINTY_MODES = ('exact', 'sampled', 'analytic')
+
+
+def resolve_uncertainty_mode(mode: Optional[str]) -> str:
+    """Validate an uncertainty tier name; None means Config.FORECAST_UNCERTAINTY_MODE."""
+    mode = (mode or Config.FORECAST_UNCERTAINTY_MODE).lower()
+    if mode not in UNCERTAINTY_MODES:
+        raise ValueError(f"uncertainty must be one of {', '.join(UNCERTAINTY_MODES)}")
+    return mode
+
+
+def uncertainty_satisfies(available: Optional[str], requested: str) -> bool:
+    """Whether intervals computed with `available` are at least as precise as `requested`."""
+    if available not in UNCERTAINTY_MODES:
+        return False
+    return UNCERTAINTY_MODES.index(available) <= UNCERTAINTY_MODES.index(requested)
+
+
+def weakest_uncertainty_mode(modes) -> str:
+    """Least precise tier among per-model results; unknown or missing counts as 'analytic'."""
+    ranks = [UNCERTAINTY_MODES.index(m) if m in UNCERTAINTY_MODES else len(UNCERTAINTY_MODES) - 1
+             for m in modes]
+    return UNCERTAINTY_MODES[max(ranks, default=len(UNCERTAINTY_MODES) - 1)]
+
+
 class TextileProphetManager:
     """
     Optimized Prophet model manager for textile sales forecasting
     Features: caching, textile-specific configuration, enhanced validation
     """
     
-    def __init__(self, max_cache_size: int = 20, cache_ttl: int = 3600):
-        self.model_cache = {}
+    def __init__(self, max_cache_size: int = 20, model_store: Optional[ProphetModelStore] = None):
+        self.model_cache = OrderedDict()  # fingerprint -> fitted model (in-process LRU)
         self.forecast_cache = {}
         self.max_cache_size = max_cache_size
-        self.cache_ttl = cache_ttl  # Cache TTL in seconds
-        self.access_times = {}
+        self.model_store = model_store if model_store is not None else prophet_model_store
+        self.selection_cache = OrderedDict()  # (fingerprint, periods, freq, mode) -> selection
+        self._predict_lock = threading.Lock()  # predict temporarily changes a shared model's uncertainty_samples
+        self._cache_hits = 0
+        self._cache_requests = 0
         
     def _generate_data_hash(self, df: pd.DataFrame) -> str:
-        """Generate unique hash for DataFrame caching"""
-        # Use shape, column names, and last few rows for hash
-        key_data = f"{df.shape}_{df.columns.tolist()}"
-        if len(df) > 0:
-            key_data += f"_{df.tail(5).to_string()}"
-        return hashlib.md5(key_data.encode()).hexdigest()
+        """
+        Fingerprint of the full preprocessed ds/y series plus the model configuration
+        version, so any changed value (not just the tail) selects a different model.
+        """
+        return series_fingerprint(df, MODEL_CONFIG_VERSION, prophet.__version__)
     
     def _create_textile_prophet_model(self, data_points: int = 90, date_span_days: int = 90) -> Prophet:
         """
@@ -218,31 +260,53 @@ class TextileProphetManager:
         """
         Get cached Prophet model or create new one with textile optimizations
         """
+        model, _ = self._get_model(df)
+        return model
+    
+    def _get_model(self, df: pd.DataFrame) -> Tuple[Prophet, str]:
+        """
+        Look the series up in memory, then in the shared model store, and fit only on a miss.
+        Returns (model, source) where source is 'memory', 'store' or 'fit'.
+        """
         data_hash = self._generate_data_hash(df)
-        current_time = time.time()
+        self._cache_requests += 1
         
-        # Check cache
+        # 1. In-process LRU
         if data_hash in self.model_cache:
-            cache_time = self.access_times.get(data_hash, 0)
-            if current_time - cache_time < self.cache_ttl:
-                self.access_times[data_hash] = current_time
-                logger.info(f"Using cached Prophet model for hash {data_hash[:8]}")
-                return self.model_cache[data_hash]
-            else:
-                # Remove expired cache
-                del self.model_cache[data_hash]
-                del self.access_times[data_hash]
-        
-        # Cache management - remove oldest if at capacity
-        if len(self.model_cache) >= self.max_cache_size:
-            oldest_key = min(self.access_times, key=self.access_times.get)
-            del self.model_cache[oldest_key]
-            del self.access_times[oldest_key]
+            self.model_cache.move_to_end(data_hash)
+            self._cache_hits += 1
+            logger.info(f"Using cached Prophet model for hash {data_hash[:8]}")
+            return self.model_cache[data_hash], 'memory'
+        
+        # 2. Shared on-disk store (other workers, earlier runs)
+        model_json = self.model_store.get(data_hash)
+        if model_json is not None:
+            try:
+                model = model_from_json(model_json)
+                self._cache_hits += 1
+                self._remember_model(data_hash, model)
+                logger.info(f"Loaded stored Prophet model for hash {data_hash[:8]}")
+                return model, 'store'
+            except Exception as e:
+                logger.warning(f"Stored Prophet model {data_hash[:8]} unreadable, refitting: {e}")
+        
+        # 3. Create and fit new model with data-aware configuration
+        logger.info(f"Creating new Prophet model for hash {data_hash[:8]}")
+        model = self._fit_new_model(df)
+        
+        # Cache the model in memory and in the shared store
+        self._remember_model(data_hash, model)
+        try:
+            self.model_store.put(data_hash, model_to_json(model))
+        except Exception as e:
+            logger.warning(f"Could not persist Prophet model {data_hash[:8]}: {e}")
         
-        # Create and fit new model with data-aware configuration
+        return model, 'fit'
+    
+    def _fit_new_model(self, df: pd.DataFrame) -> Prophet:
+        """Fit a data-aware textile Prophet model (no caching)."""
         data_points = len(df)
         date_span_days = (df['ds'].max() - df['ds'].min()).days if len(df) > 1 else 0
-        logger.info(f"Creating new Prophet model for hash {data_hash[:8]} with {data_points} data points spanning {date_span_days} days")
         model = self._create_textile_prophet_model(data_points=data_points, date_span_days=date_span_days)
         
         # Add textile-specific seasonalities
@@ -253,20 +317,158 @@ class TextileProphetManager:
         model.fit(df)
         fit_time = time.time() - start_time
         
-        logger.info(f"Prophet model fitted in {fit_time:.2f}s")
-        
-        # Cache the model
-        self.model_cache[data_hash] = model
-        self.access_times[data_hash] = current_time
-        
+        logger.info(f"Prophet model fitted in {fit_time:.2f}s with {data_points} data points spanning {date_span_days} days")
         return model
     
+    def _remember_model(self, data_hash: str, model: Prophet):
+        self.model_cache[data_hash] = model
+        self.model_cache.move_to_end(data_hash)
+        while len(self.model_cache) > self.max_cache_size:
+            self.model_cache.popitem(last=False)
+    
+    # ------------------------------------------------------------------
+    # Model selection (fast NumPy tier vs Prophet)
+    # ------------------------------------------------------------------
+    def needs_prophet(self, df: pd.DataFrame, freq: str = 'D') -> bool:
+        """
+        Whether Prophet is a candidate for this series. Shorter histories are forecast
+        by the fast tier alone, in-process. Raises ValueError for unusable data.
+        """
+        processed_df = self._preprocess_textile_data(df.copy())
+        _, y = regularize_series(processed_df, freq)
+        return len(y) >= Config.FAST_FORECAST_MAX_POINTS
+    
+    def _backtest_prophet(self, df: pd.DataFrame, index: pd.DatetimeIndex, y: np.ndarray,
+                          origins: List[int], horizon: int, deadline: float) -> Optional[Dict[int, float]]:
+        """
+        Prophet MAE per rolling origin, latest origin first, stopping at the deadline.
+        None when Prophet cannot fit at all (e.g. no working Stan backend).
+        """
+        errors = {}
+        for origin in sorted(origins, reverse=True):
+            started = time.time()
+            if started >= deadline:
+                break
+            train = df[df['ds'] < index[origin]]
+            actual = y[origin:origin + horizon]
+            try:
+                model = self._fit_new_model(train)
+                model.uncertainty_samples = 0  # only the point forecast is scored
+                yhat = model.predict(pd.DataFrame({'ds': index[origin:origin + len(actual)]}))['yhat'].to_numpy()
+            except Exception as e:
+                logger.warning(f"Prophet backtest fold at origin {origin} failed: {e}")
+                return errors or None
+            errors[origin] = float(np.abs(actual - yhat).mean())
+            # Do not start a fold that would not finish inside the budget
+            if time.time() + (time.time() - started) > deadline:
+                break
+        return errors
+    
+    def _select_model(self, df: pd.DataFrame, periods: int, freq: str, model: str) -> Dict:
+        """
+        Choose the forecaster for a preprocessed series. Short series use the best fast
+        model; longer ones also backtest Prophet on the same origins within
+        FORECAST_SELECTION_BUDGET_SECONDS. Decisions are cached per series.
+        """
+        index, y = regularize_series(df, freq)
+        if model == 'prophet':
+            return {'model': 'prophet', 'reason': 'requested'}
+        
+        cache_key = (self._generate_data_hash(df), periods, freq, model)
+        if cache_key in self.selection_cache:
+            self.selection_cache.move_to_end(cache_key)
+            return self.selection_cache[cache_key]
+        
+        started = time.time()
+        fast = select_fast_model(y, periods, season_length(freq))
+        selection = {
+            'model': fast['model'],
+            'candidates': {name: round(score, 4) for name, score in fast['scores'].items()},
+            'backtest_folds': len(fast['origins']),
+            'backtest_horizon': fast['horizon'],
+        }
+        if model == 'fast':
+            selection['reason'] = 'requested'
+        elif len(y) < Config.FAST_FORECAST_MAX_POINTS:
+            selection['reason'] = 'short_history'
+        else:
+            deadline = started + Config.FORECAST_SELECTION_BUDGET_SECONDS
+            prophet_errors = self._backtest_prophet(df, index, y, fast['origins'], fast['horizon'], deadline)
+            if prophet_errors is None:
+                selection['reason'] = 'prophet_unavailable'
+            elif not prophet_errors:
+                # No Prophet fold fit in the budget: keep the long-history default
+                selection.update(model='prophet', reason='budget_exhausted')
+            else:
+                positions = [fast['origins'].index(o) for o in prophet_errors]
+                fast_score = float(np.mean([fast['errors'][fast['model']][i] for i in positions]))
+                prophet_score = float(np.mean(list(prophet_errors.values())))
+                selection['candidates']['prophet'] = round(prophet_score, 4)
+                selection['prophet_folds'] = len(prophet_errors)
+                if prophet_score < fast_score:
+                    selection['model'] = 'prophet'
+                selection['reason'] = 'backtest'
+        selection['selection_time_seconds'] = round(time.time() - started, 4)
+        
+        self.selection_cache[cache_key] = selection
+        while len(self.selection_cache) > self.max_cache_size * 4:
+            self.selection_cache.popitem(last=False)
+        return selection
+    
+    # ------------------------------------------------------------------
+    # Prediction intervals
+    # ------------------------------------------------------------------
+    def _predict_with_uncertainty(self, model: Prophet, periods: int, freq: str,
+                                  mode: str) -> Tuple[pd.DataFrame, Dict]:
+        """
+        Predict the next `periods` points with intervals from the requested tier.
+        Returns (ds/yhat/yhat_lower/yhat_upper frame, interval info for the metrics).
+        """
+        future = model.make_future_dataframe(periods=periods, freq=freq)
+        info = {'mode': mode, 'interval_width': model.interval_width}
+        with self._predict_lock:
+            configured_samples = model.uncertainty_samples
+            try:
+                if mode == 'analytic':
+                    model.uncertainty_samples = 0
+                    forecast = model.predict(future)
+                else:
+                    if mode == 'sampled':
+                        model.uncertainty_samples = min(configured_samples, Config.FORECAST_SAMPLED_UNCERTAINTY_SAMPLES)
+                    # Only the future rows are returned, so only they need simulated draws
+                    forecast = model.predict(future.tail(periods))
+                    info['samples'] = model.uncertainty_samples
+            finally:
+                model.uncertainty_samples = configured_samples
+        
+        if mode == 'analytic':
+            fitted = forecast.iloc[:-periods].set_index('ds')['yhat'].reindex(model.history['ds']).to_numpy()
+            residuals = model.history['y'].to_numpy() - fitted
+            sd = residuals.std(ddof=1) if len(residuals) > 1 else abs(model.history['y'].mean()) * 0.1
+            # Widen with the horizon as the trend extrapolates beyond the history
+            steps = np.arange(1, periods + 1)
+            sigma = sd * np.sqrt(1 + steps / len(residuals))
+            z = NormalDist().inv_cdf(0.5 + model.interval_width / 2)
+            forecast = forecast.tail(periods).copy()
+            forecast['yhat_lower'] = forecast['yhat'].to_numpy() - z * sigma
+            forecast['yhat_upper'] = forecast['yhat'].to_numpy() + z * sigma
+            info['samples'] = 0
+        
+        return forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].tail(periods).copy(), info
+    
     def forecast_sales(self, df: pd.DataFrame, periods: int = 30, 
-                      freq: str = 'D') -> Tuple[pd.DataFrame, Dict]:
+                      freq: str = 'D', model: str = 'auto',
+                      uncertainty: Optional[str] = None) -> Tuple[pd.DataFrame, Dict]:
         """
         Optimized sales forecasting with caching and textile-specific enhancements.
         Now supports forecasting with limited data while providing accuracy warnings.
+        
+        model: 'auto' (backtest-selected), 'fast' (NumPy tier only) or 'prophet'.
+        uncertainty: interval tier for Prophet forecasts (see UNCERTAINTY_MODES);
+        the fast tier's intervals are always analytic. The tier used is reported
+        in metrics['uncertainty'].
         """
+        uncertainty = resolve_uncertainty_mode(uncertainty)
         try:
             # Preprocess data
             processed_df = self._preprocess_textile_data(df.copy())
@@ -275,25 +477,29 @@ class TextileProphetManager:
             preprocessing_warnings = processed_df.attrs.get('preprocessing_warnings', [])
             date_span_days = processed_df.attrs.get('date_span_days', 0)
             
-            # Get cached model
-            model = self.get_cached_model(processed_df)
-            
             # Store historical stats for post-processing
             historical_mean = processed_df['y'].mean()
             historical_max = processed_df['y'].max()
             historical_min = processed_df['y'].min()
             
-            # Generate forecast
+            # Generate forecast with the selected model
             start_time = time.time()
-            future = model.make_future_dataframe(periods=periods, freq=freq)
-            
-            # Note: floor/cap only work with growth='logistic', so we use post-processing instead
-            forecast = model.predict(future)
+            selection = self._select_model(processed_df, periods, freq, model)
+            if selection['model'] == 'prophet':
+                # Get cached model
+                prophet_model, model_source = self._get_model(processed_df)
+                
+                # Note: floor/cap only work with growth='logistic', so we use post-processing instead
+                forecast_data, interval_info = self._predict_with_uncertainty(
+                    prophet_model, periods, freq, uncertainty
+                )
+            else:
+                forecast_data, _ = fast_forecast(processed_df, periods, freq, model=selection['model'])
+                model_source = 'fit'
+                interval_info = {'mode': 'analytic', 'interval_width': INTERVAL_WIDTH, 'samples': 0}
+            interval_info['requested'] = uncertainty
             forecast_time = time.time() - start_time
             
-            # Extract relevant forecast data and ensure non-negative values
-            forecast_data = forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].tail(periods).copy()
-            
             # CRITICAL: Clamp all predictions to be non-negative (revenue/sales can't be negative)
             # Use historical_min as a reasonable floor - predictions shouldn't go below observed minimum
             reasonable_floor = max(0, historical_min * 0.5)  # 50% of historical minimum, but never negative
@@ -336,7 +542,11 @@ class TextileProphetManager:
                 'data_points_used': len(processed_df),
                 'historical_days': date_span_days,
                 'forecast_time_seconds': forecast_time,
-                'model_cached': True,
+                'model_cached': model_source != 'fit',
+                'model_source': model_source,
+                'model': selection['model'],
+                'model_selection': selection,
+                'uncertainty': interval_info,
                 'data_quality_score': data_quality_score,
                 'accuracy_level': accuracy_level,
                 'has_low_accuracy_warning': has_low_accuracy_warning,
@@ -490,15 +700,17 @@ class TextileProphetManager:
         return {
             'cached_models': len(self.model_cache),
             'max_cache_size': self.max_cache_size,
-            'cache_hit_ratio': getattr(self, '_cache_hits', 0) / max(getattr(self, '_cache_requests', 1), 1),
-            'memory_usage_estimate': len(self.model_cache) * 10  # MB estimate
+            'cache_hit_ratio': self._cache_hits / max(self._cache_requests, 1),
+            'memory_usage_estimate': len(self.model_cache) * 10,  # MB estimate
+            'model_store': self.model_store.stats()
         }
     
     def clear_cache(self):
-        """Clear all cached models"""
+        """Clear all cached models (in memory and in the shared store)"""
         self.model_cache.clear()
         self.forecast_cache.clear()
-        self.access_times.clear()
+        self.selection_cache.clear()
+        self.model_store.clear()
         logger.info("Prophet model cache cleared")
 
 # Global instance for application-wide use
@@ -0,0 +1,316 @@
+# backend/services/regional_demand_service.py
+"""
+Regional demand uploads, parsed once.
+
+Distributors re-post the same sales file while they change map filters. Every
+upload is keyed by the BLAKE2b hash of its bytes; the first request parses it
+with safe_file_processing and writes two columnar snapshots (utils.sales_store
+layout) under instance/upload_snapshots/<hash>/:
+
+    rows/     normalized rows: Date, Region, Product, Sales, Quantity
+    groups/   Sales and Quantity summed per (Region, Product)
+
+Repeat requests - with the same file, or with just its `file_hash` - read the
+snapshots (kept decoded in an LRU) instead of re-parsing. Region and product
+filters are answered from the grouped snapshot; only date filters touch the
+rows. Filtered region summaries are memoized per (hash, filters).
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import pandas as pd
+
+from config import Config
+from utils.file_processing_utils import safe_file_processing, FileProcessingError
+from utils.sales_store import read_columns, write_columns
+
+SNAPSHOT_DIR = os.path.join(Config.DATA_DIR, "upload_snapshots")
+REGIONAL_DEMAND_COLUMNS = ['Date', 'Region', 'Product', 'Sales', 'Quantity']
+
+# Bump when the normalization below changes so old snapshots are not reused
+SNAPSHOT_FORMAT = 1
+FILE_HASH_PATTERN = re.compile(rf"[0-9a-f]{{40}}-v{SNAPSHOT_FORMAT}")
+
+
+class UploadSnapshotNotFound(LookupError):
+    """No snapshot for the given file hash (expired or never uploaded)."""
+
+
+def content_hash(file) -> str:
+    """BLAKE2b digest of an uploaded file's bytes; the stream is rewound afterwards."""
+    digest = hashlib.blake2b(digest_size=20)
+    file.stream.seek(0)
+    for block in iter(lambda: file.stream.read(1024 * 1024), b""):
+        digest.update(block)
+    file.stream.seek(0)
+    return f"{digest.hexdigest()}-v{SNAPSHOT_FORMAT}"
+
+
+def is_valid_file_hash(file_hash) -> bool:
+    """True for exactly what content_hash() returns; anything else never reaches the filesystem."""
+    return isinstance(file_hash, str) and FILE_HASH_PATTERN.fullmatch(file_hash) is not None
+
+
+def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+    rows = pd.DataFrame({
+        'Date': pd.to_datetime(df['Date'], errors='coerce'),
+        'Region': df['Region'].astype(str).str.strip(),
+        'Product': df['Product'].astype(str).str.strip(),
+        'Sales': pd.to_numeric(df['Sales'], errors='coerce').fillna(0).astype('float64'),
+        'Quantity': pd.to_numeric(df['Quantity'], errors='coerce').fillna(0).astype('float64'),
+    })
+    return rows.reset_index(drop=True)
+
+
+def _group(rows: pd.DataFrame) -> pd.DataFrame:
+    return rows.groupby(['Region', 'Product'], as_index=False, sort=False)[['Sales', 'Quantity']].sum()
+
+
+class RegionalDemandUpload:
+    """A parsed upload: its hash, normalized rows and per-(Region, Product) totals."""
+
+    def __init__(self, file_hash: str, rows: pd.DataFrame, groups: pd.DataFrame, source: str):
+        self.file_hash = file_hash
+        self.rows = rows
+        self.groups = groups
+        self.source = source  # 'parsed', 'snapshot' or 'memory'
+
+    def filter_options(self) -> Dict:
+        dates = self.rows['Date'].dropna()
+        return {
+            "regions": sorted(self.groups['Region'].unique().tolist()),
+            "products": sorted(self.groups['Product'].unique().tolist()),
+            "startDate": dates.min().strftime("%Y-%m-%d") if not dates.empty else None,
+            "endDate": dates.max().strftime("%Y-%m-%d") if not dates.empty else None,
+        }
+
+
+# ============================================================================
+# Snapshot store
+# ============================================================================
+
+class UploadSnapshotStore:
+    """Columnar snapshots of parsed uploads on disk, with an LRU of decoded uploads."""
+
+    def __init__(self, root=SNAPSHOT_DIR, max_entries=16, max_age_days=7):
+        self.root = root
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self._uploads = OrderedDict()  # file_hash -> RegionalDemandUpload
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "snapshot_hits": 0, "parses": 0}
+
+    def _path(self, file_hash):
+        if not is_valid_file_hash(file_hash):
+            raise ValueError(f"Invalid upload file hash: {file_hash!r}")
+        return os.path.join(self.root, file_hash)
+
+    def get(self, file_hash: str) -> Optional[RegionalDemandUpload]:
+        path = self._path(file_hash)
+        with self._lock:
+            upload = self._uploads.get(file_hash)
+            if upload is not None:
+                self._uploads.move_to_end(file_hash)
+                self._stats["memory_hits"] += 1
+                return RegionalDemandUpload(file_hash, upload.rows, upload.groups, 'memory')
+
+        if not os.path.isdir(path):
+            return None
+        try:
+            upload = RegionalDemandUpload(
+                file_hash, read_columns(os.path.join(path, "rows")),
+                read_columns(os.path.join(path, "groups")), 'snapshot',
+            )
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[Upload Snapshots] Could not read {file_hash}: {e}")
+            return None
+        os.utime(path)  # keep snapshots that are still in use from being pruned
+        with self._lock:
+            self._stats["snapshot_hits"] += 1
+        self._remember(upload)
+        return upload
+
+    def put(self, file_hash: str, rows: pd.DataFrame) -> RegionalDemandUpload:
+        path = self._path(file_hash)
+        upload = RegionalDemandUpload(file_hash, rows, _group(rows), 'parsed')
+        # Write next to the final directory, then rename it into place in one step
+        tmp = os.path.join(self.root, f".{file_hash}.{time.time_ns()}.tmp")
+        try:
+            write_columns(os.path.join(tmp, "rows"), upload.rows)
+            write_columns(os.path.join(tmp, "groups"), upload.groups)
+            os.replace(tmp, path)
+        except OSError as e:
+            # Concurrent upload of the same file already won, or the disk is unavailable
+            print(f"[Upload Snapshots] Snapshot for {file_hash} not written: {e}")
+            shutil.rmtree(tmp, ignore_errors=True)
+        with self._lock:
+            self._stats["parses"] += 1
+        self._remember(upload)
+        self.prune()
+        return upload
+
+    def _remember(self, upload):
+        with self._lock:
+            self._uploads[upload.file_hash] = upload
+            self._uploads.move_to_end(upload.file_hash)
+            while len(self._uploads) > self.max_entries:
+                self._uploads.popitem(last=False)
+
+    def prune(self):
+        """Delete snapshots not used for max_age_days."""
+        cutoff = time.time() - self.max_age_days * 86400
+        try:
+            entries = os.listdir(self.root)
+        except OSError:
+            return
+        for entry in entries:
+            path = os.path.join(self.root, entry)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    shutil.rmtree(path, ignore_errors=True)
+            except OSError:
+                continue
+
+    def clear(self):
+        with self._lock:
+            self._uploads.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._uploads), "max_entries": self.max_entries, **self._stats}
+
+
+upload_snapshots = UploadSnapshotStore(
+    max_entries=Config.REGIONAL_UPLOAD_CACHE_SIZE,
+    max_age_days=Config.REGIONAL_UPLOAD_SNAPSHOT_DAYS,
+)
+
+
+def load_regional_upload(file=None, file_hash: str = None,
+                         store: UploadSnapshotStore = None) -> RegionalDemandUpload:
+    """
+    Return the parsed upload for `file` (hashed, parsed only if never seen) or for a
+    previously returned `file_hash`. Raises FileProcessingError for unreadable files
+    or a malformed hash, and UploadSnapshotNotFound for an unknown hash.
+    """
+    store = store or upload_snapshots
+    if file is not None:
+        file_hash = content_hash(file)
+    elif file_hash and not is_valid_file_hash(file_hash):
+        raise FileProcessingError("Invalid file_hash")
+    upload = store.get(file_hash) if file_hash else None
+    if upload is not None:
+        return upload
+    if file is None:
+        raise UploadSnapshotNotFound(file_hash)
+
+    file_result = safe_file_processing(file, file.filename.split('.')[-1], REGIONAL_DEMAND_COLUMNS)
+    if file_result['status'] == 'error':
+        raise FileProcessingError(file_result['message'])
+    print(f"[PERF] Parsed {file_result['rows']} rows, {file_result['memory_usage']} bytes")
+    return store.put(file_hash, _normalize(file_result['data']))
+
+
+# ============================================================================
+# Filtered aggregation
+# ============================================================================
+
+_summaries = OrderedDict()  # (file_hash, filter key) -> region summary DataFrame
+_summary_lock = threading.Lock()
+_summary_stats = {"hits": 0, "misses": 0}
+
+
+def _split(value):
+    if not value:
+        return ()
+    return tuple(sorted({v.strip().lower() for v in str(value).split(',') if v.strip()}))
+
+
+def parse_filters(args) -> Dict:
+    """Map filters from request args/form: region, product (comma-separated), start_date, end_date."""
+    filters = {
+        "regions": _split(args.get("region")),
+        "products": _split(args.get("product")),
+        "start_date": None,
+        "end_date": None,
+    }
+    for key in ("start_date", "end_date"):
+        if args.get(key):
+            try:
+                filters[key] = pd.Timestamp(args.get(key)).strftime("%Y-%m-%d")
+            except ValueError:
+                raise ValueError(f"Invalid {key}: {args.get(key)}")
+    return filters
+
+
+def filtered_groups(upload: RegionalDemandUpload, filters: Dict) -> pd.DataFrame:
+    """Sales/Quantity per (Region, Product) after applying the filters."""
+    if filters.get("start_date") or filters.get("end_date"):
+        rows = upload.rows
+        mask = pd.Series(True, index=rows.index)
+        if filters.get("start_date"):
+            mask &= rows['Date'] >= pd.Timestamp(filters["start_date"])
+        if filters.get("end_date"):
+            mask &= rows['Date'] < pd.Timestamp(filters["end_date"]) + pd.Timedelta(days=1)
+        groups = _group(rows[mask])
+    else:
+        groups = upload.groups
+    if filters.get("regions"):
+        groups = groups[groups['Region'].str.lower().isin(filters["regions"])]
+    if filters.get("products"):
+        groups = groups[groups['Product'].str.lower().isin(filters["products"])]
+    return groups
+
+
+def region_summary(upload: RegionalDemandUpload, filters: Dict) -> pd.DataFrame:
+    """Region, Sales, Quantity, TopProduct and 0-1 Intensity for the filtered upload."""
+    key = (upload.file_hash, tuple(sorted(filters.items())))
+    with _summary_lock:
+        cached = _summaries.get(key)
+        if cached is not None:
+            _summaries.move_to_end(key)
+            _summary_stats["hits"] += 1
+            return cached.copy()
+        _summary_stats["misses"] += 1
+
+    groups = filtered_groups(upload, filters)
+    summary = groups.groupby('Region', as_index=False)[['Sales', 'Quantity']].sum()
+    if not groups.empty:
+        top = groups.loc[groups.groupby('Region')['Sales'].idxmax(), ['Region', 'Product']]
+        summary = summary.merge(top.rename(columns={'Product': 'TopProduct'}), on='Region', how='left')
+    else:
+        summary['TopProduct'] = pd.Series(dtype=object)
+
+    min_sales = summary['Sales'].min()
+    max_sales = summary['Sales'].max()
+    if max_sales > min_sales:
+        summary['Intensity'] = (summary['Sales'] - min_sales) / (max_sales - min_sales)
+    else:
+        summary['Intensity'] = 0.5
+
+    with _summary_lock:
+        _summaries[key] = summary
+        _summaries.move_to_end(key)
+        while len(_summaries) > Config.REGIONAL_UPLOAD_CACHE_SIZE * 8:
+            _summaries.popitem(last=False)
+    return summary.copy()
+
+
+def regional_upload_cache_stats() -> Dict:
+    with _summary_lock:
+        summaries = {"entries": len(_summaries), **_summary_stats}
+    return {"uploads": upload_snapshots.stats(), "summaries": summaries}
+
+
+def clear_regional_upload_cache():
+    """Drop decoded uploads and memoized summaries (snapshots on disk are kept)."""
+    upload_snapshots.clear()
+    with _summary_lock:
+        _summaries.clear()
@@ -8,15 +8,23 @@ Includes DB-backed caching for AI insights and forecasts to prevent redundant AP
 
 import pandas as pd
 import numpy as np
-import hashlib
 import json
+import threading
 import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple
 import logging
 
 from models.model import db, SalesData, Product, Shop, CachedAIInsight, CachedForecast
-from services.prophet_service import prophet_manager
+from services.forecast_executor import forecast_executor
+from services.prophet_service import resolve_uncertainty_mode, uncertainty_satisfies, weakest_uncertainty_mode
+from config import Config
+from utils.sales_store import sales_store
+from utils.sales_query import load_sales_frame
+from services.sales_rollup_service import load_rollup_frame, rollup_total, period_start
+from utils.data_version import get_data_version
+from utils.inventory_utils import ensure_cache_version_columns
 
 logger = logging.getLogger(__name__)
 
@@ -27,34 +35,134 @@ logger = logging.getLogger(__name__)
 FORECAST_TTL_HOURS = 24  # Forecasts valid for 24 hours unless new data uploaded
 INSIGHTS_TTL_HOURS = 24  # AI insights valid for 24 hours unless new data uploaded
 
+# CachedForecast types for the date-relative dashboard views (expire at local midnight)
+DAILY_VIEW_TYPES = ['sales_summary', 'weekly_trend', 'monthly_trend', 'yearly_trend']
+
+
+def end_of_day_utc(now: Optional[datetime] = None) -> datetime:
+    """Next local midnight, as naive UTC (CachedForecast.expires_at is compared with utcnow)."""
+    now = now or datetime.now()
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    return midnight - (datetime.now() - datetime.utcnow())
+
+
+# Columns of the frame returned by SalesAnalyticsService._load_sales_data
+SALES_HISTORY_COLUMNS = ['date', 'product_id', 'product_name', 'region', 'category', 'quantity_sold', 'revenue']
+
 
 # ============================================================================
 # Query Cache for Sales Analytics
 # ============================================================================
 class SalesQueryCache:
-    """Query cache DISABLED - always fetches fresh data from DB."""
+    """
+    In-process LRU of query results (mostly DataFrames) keyed by
+    (shop_id, data_version, method, args).
+
+    data_version is the shop's sales_version (utils.data_version), bumped in the
+    same transaction as every SalesData write, so a stale entry can never be
+    returned - newer versions simply miss. Total size is capped in bytes and the
+    least recently used entries are evicted first.
+    """
+    
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, ttl_seconds: Optional[int] = None):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict = OrderedDict()  # key -> (value, size, stored_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
     
-    def __init__(self, ttl_seconds: int = 300):
-        pass
+    def _make_key(self, shop_id: int, data_version: int, method: str, *args) -> Tuple:
+        return (shop_id, data_version, method, args)
+    
+    @staticmethod
+    def _sizeof(value: Any) -> int:
+        if isinstance(value, pd.DataFrame):
+            return int(value.memory_usage(deep=True).sum())
+        if isinstance(value, pd.Series):
+            return int(value.memory_usage(deep=True))
+        try:
+            return len(json.dumps(value, default=str))
+        except (TypeError, ValueError):
+            return 1024
     
-    def _make_key(self, shop_id: int, method: str, *args) -> str:
-        return ""
+    def get(self, shop_id: int, data_version: int, method: str, *args) -> Optional[Any]:
+        key = self._make_key(shop_id, data_version, method, *args)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl_seconds and time.time() - entry[2] > self.ttl_seconds:
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            value = entry[0]
+        # DataFrames are handed out as copies so callers can mutate them freely
+        return value.copy() if isinstance(value, pd.DataFrame) else value
     
-    def get(self, shop_id: int, method: str, *args) -> Optional[Any]:
-        # Always return None - no caching, fetch fresh from DB
-        return None
+    def set(self, shop_id: int, data_version: int, method: str, value: Any, *args):
+        if isinstance(value, pd.DataFrame):
+            value = value.copy()
+        size = self._sizeof(value)
+        if size > self.max_bytes:
+            return
+        key = self._make_key(shop_id, data_version, method, *args)
+        with self._lock:
+            # Entries for older versions of this shop can never hit again
+            for old in [k for k in self._entries if k[0] == shop_id and k[1] != data_version]:
+                self._drop(old)
+            self._drop(key)
+            self._entries[key] = (value, size, time.time())
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                self._drop(next(iter(self._entries)))
+                self._evictions += 1
     
-    def set(self, shop_id: int, method: str, value: Any, *args):
-        # No-op - caching disabled
-        pass
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
     
     def invalidate(self, shop_id: int):
-        # No-op - caching disabled
-        pass
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == shop_id]:
+                self._drop(key)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "shops": len({k[0] for k in self._entries}),
+                "memory_bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / total, 3) if total else 0.0,
+                "evictions": self._evictions,
+            }
 
 
 # Global query cache instance
-_query_cache = SalesQueryCache(ttl_seconds=300)
+_query_cache = SalesQueryCache(max_bytes=Config.SALES_QUERY_CACHE_MB * 1024 * 1024)
+
+
+def get_query_cache_stats() -> Dict[str, Any]:
+    """Stats of the shared analytics query cache (exposed by the performance blueprint)."""
+    return _query_cache.stats()
+
+
+def clear_query_cache():
+    _query_cache.clear()
 
 
 class SalesAnalyticsService:
@@ -73,25 +181,17 @@ class SalesAnalyticsService:
     # DB-BACKED FORECAST CACHING
     # =========================================================================
     
-    def _get_data_hash(self, days: int = 90) -> str:
-        """Generate a hash of sales data to detect changes."""
+    def _get_data_version(self) -> int:
+        """
+        Current sales data version of the shop (primary-key lookup).
+        Bumped in the same transaction as every SalesData write, so it replaces
+        the old COUNT/MAX/SUM scan over the whole sales history.
+        """
         try:
-            # Get count and latest date for quick hash
-            from sqlalchemy import func
-            result = db.session.query(
-                func.count(SalesData.id),
-                func.max(SalesData.date),
-                func.sum(SalesData.revenue)
-            ).filter(
-                SalesData.shop_id == self.shop_id
-            ).first()
-            
-            count, max_date, total_revenue = result if result else (0, None, 0)
-            hash_input = f"{self.shop_id}:{count}:{max_date}:{total_revenue}"
-            return hashlib.md5(hash_input.encode()).hexdigest()
+            return get_data_version(self.shop_id, sales=True)
         except Exception as e:
-            logger.error(f"Error generating data hash: {e}")
-            return ""
+            logger.error(f"Error reading data version: {e}")
+            return -1
     
     def _get_cached_forecast(self, forecast_type: str) -> Optional[Dict]:
         """
@@ -99,15 +199,16 @@ class SalesAnalyticsService:
         Returns None if no valid cache exists or data has changed.
         """
         try:
-            data_hash = self._get_data_hash()
+            ensure_cache_version_columns()
+            data_version = self._get_data_version()
             cached = CachedForecast.query.filter_by(
                 shop_id=self.shop_id,
                 forecast_type=forecast_type
             ).first()
             
             if cached:
-                # Check if data hash matches (data hasn't changed)
-                if cached.data_hash != data_hash:
+                # Check the data version matches (data hasn't changed)
+                if cached.is_stale or cached.data_version != data_version:
                     logger.info(f"[Cache Miss] Data changed for shop {self.shop_id}")
                     return None
                 
@@ -124,11 +225,19 @@ class SalesAnalyticsService:
             logger.error(f"Error getting cached forecast: {e}")
             return None
     
-    def _save_cached_forecast(self, forecast_type: str, forecast_data: Dict):
-        """Save forecast to database cache."""
+    def _save_cached_forecast(self, forecast_type: str, forecast_data: Dict, data_version: Optional[int] = None,
+                              expires_at: Optional[datetime] = None):
+        """
+        Save forecast to database cache.
+        Pass the data_version read before loading the data, so a concurrent upload
+        cannot label a forecast of older data with its newer version.
+        """
         try:
-            data_hash = self._get_data_hash()
-            expires_at = datetime.utcnow() + timedelta(hours=FORECAST_TTL_HOURS)
+            ensure_cache_version_columns()
+            if data_version is None:
+                data_version = self._get_data_version()
+            if expires_at is None:
+                expires_at = datetime.utcnow() + timedelta(hours=FORECAST_TTL_HOURS)
             
             # Delete existing cache for this shop/type
             CachedForecast.query.filter_by(
@@ -141,7 +250,7 @@ class SalesAnalyticsService:
                 shop_id=self.shop_id,
                 forecast_type=forecast_type,
                 forecast_json=json.dumps(forecast_data) if not isinstance(forecast_data, str) else forecast_data,
-                data_hash=data_hash,
+                data_version=data_version,
                 expires_at=expires_at,
                 created_at=datetime.utcnow()
             )
@@ -152,10 +261,42 @@ class SalesAnalyticsService:
             db.session.rollback()
             logger.error(f"Error saving cached forecast: {e}")
     
+    def _pending_forecast_response(self, forecast_type: str, default_response: Dict) -> Dict:
+        """
+        Response while a forecast is still being fitted: the last good cached forecast
+        (even if built from older data) flagged as refreshing, else a "computing" status.
+        """
+        try:
+            cached = CachedForecast.query.filter_by(
+                shop_id=self.shop_id,
+                forecast_type=forecast_type
+            ).first()
+            if cached and cached.forecast_json:
+                last_good = json.loads(cached.forecast_json)
+                if last_good.get("status") == "success":
+                    last_good["refreshing"] = True
+                    return last_good
+        except Exception as e:
+            logger.error(f"Error reading last good forecast: {e}")
+        
+        response = dict(default_response)
+        response["status"] = "computing"
+        response["insights"] = [{
+            "type": "info",
+            "title": "Forecast In Progress",
+            "message": "Your forecast is being generated. Refresh in a few seconds to see it.",
+            "icon": "bi bi-hourglass-split"
+        }]
+        return response
+    
     def invalidate_forecasts(self):
-        """Invalidate all cached forecasts for this shop."""
+        """
+        Invalidate all cached forecasts for this shop.
+        Rows are only marked stale so they can still be served as the last good
+        forecast while a replacement is being fitted.
+        """
         try:
-            CachedForecast.query.filter_by(shop_id=self.shop_id).delete()
+            CachedForecast.query.filter_by(shop_id=self.shop_id).update({"is_stale": True})
             db.session.commit()
             logger.info(f"[Cache Invalidate] Cleared forecast cache for shop {self.shop_id}")
         except Exception as e:
@@ -173,51 +314,24 @@ class SalesAnalyticsService:
         Uses caching to avoid repeated database queries.
         """
         try:
-            # Check cache first
-            cached = self._cache.get(self.shop_id, "_load_sales_data", days)
+            # Check cache first (the window moves daily, so the cutoff is part of the key)
+            cutoff_date = datetime.now().date() - timedelta(days=days)
+            data_version = get_data_version(self.shop_id, sales=True)
+            cached = self._cache.get(self.shop_id, data_version, "_load_sales_data", days, cutoff_date)
             if cached is not None:
                 return cached
             
-            cutoff_date = datetime.now().date() - timedelta(days=days)
-            
-            sales_records = SalesData.query.filter(
-                SalesData.shop_id == self.shop_id,
-                SalesData.date >= cutoff_date
-            ).all()
-            
-            if not sales_records:
+            # Single joined SELECT (category falls back to the row's fabric_type)
+            df = load_sales_frame(self.shop_id, start_date=cutoff_date)
+            if df.empty:
                 logger.info(f"No sales data found in DB for shop {self.shop_id}")
                 return pd.DataFrame()
             
-            data = []
-            for record in sales_records:
-                # Get product details if available
-                product_name = None
-                category = record.fabric_type  # Default to fabric_type
-                
-                if record.product_id:
-                    product = Product.query.get(record.product_id)
-                    if product:
-                        product_name = product.name
-                        # Product uses 'category'
-                        category = product.category or record.fabric_type
-                
-                data.append({
-                    'date': record.date,
-                    'product_id': record.product_id,
-                    'product_name': product_name,
-                    'region': record.region,
-                    'category': category,
-                    'quantity_sold': record.quantity_sold or 0,
-                    'revenue': float(record.revenue or 0)
-                })
-            
-            df = pd.DataFrame(data)
-            df['date'] = pd.to_datetime(df['date'])
+            df = df[SALES_HISTORY_COLUMNS]
             logger.info(f"Loaded {len(df)} sales records from DB for shop {self.shop_id}")
             
             # Cache the result
-            self._cache.set(self.shop_id, "_load_sales_data", df, days)
+            self._cache.set(self.shop_id, data_version, "_load_sales_data", df, days, cutoff_date)
             return df
             
         except Exception as e:
@@ -237,14 +351,33 @@ class SalesAnalyticsService:
     # WEEKLY SALES SUMMARY (Last 7 Days)
     # =========================================================================
     
+    def _cached_view(self, forecast_type: str, build) -> Dict[str, Any]:
+        """
+        Serve a "last N days" dashboard view from CachedForecast, building and storing it on a miss.
+        The view is valid for the sales version it was built from until the end of the day,
+        when its date window moves.
+        """
+        cached = self._get_cached_forecast(forecast_type)
+        if cached:
+            return cached
+        data_version = self._get_data_version()
+        result = build()
+        self._save_cached_forecast(forecast_type, result, data_version, expires_at=end_of_day_utc())
+        return result
+    
     def get_weekly_sales_summary(self) -> Dict[str, Any]:
+        """Weekly sales summary for the last 7 days (cached per sales version and day)."""
+        return self._cached_view('sales_summary', self._build_weekly_sales_summary)
+    
+    def _build_weekly_sales_summary(self) -> Dict[str, Any]:
         """
         Generate comprehensive weekly sales summary for last 7 days.
-        Uses ONLY database records from shop owner's uploaded sales data.
+        Uses ONLY database records from shop owner's uploaded sales data,
+        read from the daily rollups (one row per day/product/category/region).
         """
-        df = self.get_sales_data(days=21)  # Get 3 weeks for comparison
-        
         now = datetime.now()
+        df = load_rollup_frame(self.shop_id, 'day', start_date=(now - timedelta(days=21)).date())  # 3 weeks for comparison
+        
         week_start = now - timedelta(days=7)
         prev_week_start = now - timedelta(days=14)
         
@@ -291,7 +424,7 @@ class SalesAnalyticsService:
         # Calculate metrics
         current_revenue = current_week['revenue'].sum()
         current_quantity = current_week['quantity_sold'].sum()
-        current_orders = len(current_week)
+        current_orders = int(current_week['row_count'].sum())
         
         prev_revenue = prev_week['revenue'].sum()
         prev_quantity = prev_week['quantity_sold'].sum()
@@ -570,6 +703,10 @@ class SalesAnalyticsService:
     # =========================================================================
     
     def get_sales_growth_trend(self, period: str = 'weekly') -> Dict[str, Any]:
+        """Sales growth trend chart data (cached per sales version and day)."""
+        return self._cached_view(f'{period}_trend', lambda: self._build_sales_growth_trend(period))
+    
+    def _build_sales_growth_trend(self, period: str = 'weekly') -> Dict[str, Any]:
         """
         Get sales growth trend data for charting.
         
@@ -581,18 +718,19 @@ class SalesAnalyticsService:
         """
         now = datetime.now()
         
-        # Determine date range and aggregation based on period
+        # Determine date range and aggregation based on period; reads per-period
+        # rollups (daily for week/month views, monthly for the yearly view)
         if period == 'weekly':
             days = 7
-            df = self.get_sales_data(days=14)  # Get 2 weeks for comparison
+            df = self._load_period_totals('day', days=14)  # Get 2 weeks for comparison
             date_format = '%a'  # Mon, Tue, etc.
         elif period == 'monthly':
             days = 30
-            df = self.get_sales_data(days=60)  # Get 2 months for comparison
+            df = self._load_period_totals('day', days=60)  # Get 2 months for comparison
             date_format = '%d %b'  # 01 Dec, 02 Dec, etc.
         else:  # yearly
             days = 365
-            df = self.get_sales_data(days=730)  # Get 2 years for comparison
+            df = self._load_period_totals('month', days=365)
             date_format = '%b %Y'  # Jan 2025, Feb 2025, etc.
         
         default_response = {
@@ -628,7 +766,14 @@ class SalesAnalyticsService:
         
         # Previous period data for comparison
         prev_start = current_start - timedelta(days=days)
-        prev_df = df[(df['date'] >= prev_start) & (df['date'] < current_start)]
+        if period == 'yearly':
+            # Month rollups don't align with the rolling window; sum the daily rollups instead
+            prev_total, _, _ = rollup_total(
+                self.shop_id, 'day', (prev_start + timedelta(days=1)).date(), current_start.date()
+            )
+        else:
+            prev_df = df[(df['date'] >= prev_start) & (df['date'] < current_start)]
+            prev_total = prev_df['revenue'].sum() if not prev_df.empty else 0
         
         # Aggregate by time period
         if period == 'yearly':
@@ -703,7 +848,6 @@ class SalesAnalyticsService:
         
         # Calculate totals and growth
         current_total = sum(data)
-        prev_total = prev_df['revenue'].sum() if not prev_df.empty else 0
         
         if prev_total > 0:
             growth_percent = ((current_total - prev_total) / prev_total) * 100
@@ -788,6 +932,11 @@ class SalesAnalyticsService:
             }
         }
     
+    def _load_period_totals(self, grain: str, days: int) -> pd.DataFrame:
+        """Per-period totals (date, quantity_sold, revenue, row_count) from the rollups."""
+        start = period_start((datetime.now() - timedelta(days=days)).date(), grain)
+        return load_rollup_frame(self.shop_id, grain, start_date=start, by_dimension=False)
+    
     def _generate_svg_paths(self, data: List[float]) -> tuple:
         """
         Generate SVG path strings for the chart line and area fill.
@@ -859,17 +1008,29 @@ class SalesAnalyticsService:
     # QUARTERLY DEMAND FORECAST
     # =========================================================================
     
-    def get_quarterly_demand_forecast(self) -> Dict[str, Any]:
+    def get_quarterly_demand_forecast(self, wait_seconds: Optional[float] = None,
+                                      uncertainty: Optional[str] = None) -> Dict[str, Any]:
         """
         Generate next quarter (90 days) demand forecast using Prophet.
         Uses DB caching to avoid redundant Prophet computations.
         Returns weekly predictions with confidence intervals.
+        
+        wait_seconds: how long to wait for the forecast pool (default FORECAST_WAIT_SECONDS);
+        background precomputation waits for the full fit.
+        uncertainty: interval tier (exact / sampled / analytic, default FORECAST_UNCERTAINTY_MODE).
+        A cached forecast is reused when its intervals are at least that precise.
         """
-        # Check DB cache first
+        if wait_seconds is None:
+            wait_seconds = Config.FORECAST_WAIT_SECONDS
+        uncertainty = resolve_uncertainty_mode(uncertainty)
+        # Check DB cache first (forecasts cached before tiers existed used full sampling)
         cached_forecast = self._get_cached_forecast('quarterly')
         if cached_forecast:
-            return cached_forecast
+            cached_mode = cached_forecast.get('uncertainty', {}).get('mode', 'exact')
+            if uncertainty_satisfies(cached_mode, uncertainty):
+                return cached_forecast
         
+        data_version = self._get_data_version()
         df = self.get_sales_data(days=365)  # Use up to 1 year of data from DB
         
         now = datetime.now()
@@ -932,18 +1093,25 @@ class SalesAnalyticsService:
             daily_sales.columns = ['ds', 'y', 'quantity']
             daily_sales['ds'] = pd.to_datetime(daily_sales['ds'])
             
-            # Revenue forecast
+            # Revenue and quantity forecasts are fitted in the forecast process pool;
+            # wait briefly, otherwise serve the last good forecast / "computing"
             revenue_df = daily_sales[['ds', 'y']].copy()
-            revenue_forecast, revenue_metrics = prophet_manager.forecast_sales(
-                revenue_df, periods=90, freq='D'
-            )
-            
-            # Quantity forecast
             quantity_df = daily_sales[['ds', 'quantity']].copy()
             quantity_df.columns = ['ds', 'y']
-            quantity_forecast, quantity_metrics = prophet_manager.forecast_sales(
-                quantity_df, periods=90, freq='D'
+            revenue_job = forecast_executor.request(
+                revenue_df, periods=90, freq='D', wait=wait_seconds, uncertainty=uncertainty
             )
+            quantity_job = forecast_executor.request(
+                quantity_df, periods=90, freq='D', wait=wait_seconds, uncertainty=uncertainty
+            )
+            for job in (revenue_job, quantity_job):
+                if job.status == 'failed':
+                    raise RuntimeError(job.error)
+            if not (revenue_job.ready and quantity_job.ready):
+                return self._pending_forecast_response('quarterly', default_response)
+            
+            revenue_forecast, revenue_metrics = revenue_job.forecast, revenue_job.metrics
+            quantity_forecast, quantity_metrics = quantity_job.forecast, quantity_job.metrics
             
             # Extract future predictions only
             future_revenue = revenue_forecast[revenue_forecast['ds'] > now].copy()
@@ -1097,6 +1265,17 @@ class SalesAnalyticsService:
                 "monthly_forecast": monthly_forecast,
                 "category_forecast": category_forecast,
                 "insights": insights,
+                # Tier actually used (the weaker of the two models; the fast
+                # forecaster is always analytic), so cache reuse is not overstated
+                "uncertainty": {
+                    "mode": weakest_uncertainty_mode([
+                        (revenue_metrics.get('uncertainty') or {}).get('mode'),
+                        (quantity_metrics.get('uncertainty') or {}).get('mode'),
+                    ]),
+                    "requested": uncertainty,
+                    "revenue": revenue_metrics.get('uncertainty'),
+                    "quantity": quantity_metrics.get('uncertainty')
+                },
                 "model_metrics": {
                     "revenue_model": revenue_metrics,
                     "quantity_model": quantity_metrics
@@ -1106,7 +1285,7 @@ class SalesAnalyticsService:
             }
             
             # Cache the result in DB
-            self._save_cached_forecast('quarterly', forecast_result)
+            self._save_cached_forecast('quarterly', forecast_result, data_version)
             
             return forecast_result
             
@@ -1142,99 +1321,91 @@ class SalesAnalyticsService:
             logger.warning(f"No category column found for shop {self.shop_id}")
             return category_forecast
         
-        # Calculate historical category proportions
-        category_totals = historical_df.groupby(category_col).agg({
-            'revenue': 'sum',
-            'quantity_sold': 'sum'
-        }).reset_index()
-        
-        total_historical_revenue = category_totals['revenue'].sum()
-        total_historical_qty = category_totals['quantity_sold'].sum()
+        # One grouped pass: totals plus last-30 / previous-30 day revenue per category
+        now = datetime.now()
+        dates = historical_df['date']
+        revenue = historical_df['revenue']
+        recent_mask = dates >= now - timedelta(days=30)
+        prev_mask = (dates >= now - timedelta(days=60)) & (dates < now - timedelta(days=30))
+        totals = pd.DataFrame({
+            'category': historical_df[category_col],
+            'revenue': revenue,
+            'quantity_sold': historical_df['quantity_sold'],
+            'recent_revenue': revenue.where(recent_mask, 0),
+            'prev_revenue': revenue.where(prev_mask, 0),
+        }).groupby('category').sum()
+        
+        total_historical_revenue = totals['revenue'].sum()
         
         if total_historical_revenue == 0:
             return category_forecast
         
         # Calculate future revenue total
-        now = datetime.now()
         future_revenue_values = revenue_forecast[revenue_forecast['ds'] > now]['yhat'].clip(lower=0)
         future_total = max(0, float(future_revenue_values.sum()))
         
-        # Calculate recent data for trend analysis (last 30 days vs previous 30 days)
-        recent_30 = historical_df[historical_df['date'] >= now - timedelta(days=30)]
-        prev_30 = historical_df[
-            (historical_df['date'] >= now - timedelta(days=60)) & 
-            (historical_df['date'] < now - timedelta(days=30))
+        names = totals.index.to_series().astype(str).str.strip()
+        totals = totals[names != ''].assign(name=names)
+        if totals.empty:
+            return category_forecast
+        
+        proportion = totals['revenue'] / total_historical_revenue
+        recent, prev = totals['recent_revenue'], totals['prev_revenue']
+        
+        # Trend: recent vs previous 30 days; categories with no previous sales but recent ones are new
+        has_prev = prev > 0
+        growth_rate = np.where(
+            has_prev, (recent - prev) / prev.where(has_prev, 1) * 100, np.where(recent > 0, 100.0, 0.0)
+        )
+        trend = np.select(
+            [has_prev & (growth_rate > 10), has_prev & (growth_rate < -10), ~has_prev & (recent > 0)],
+            ["up", "down", "up"],
+            "stable",
+        )
+        
+        # Actionable insight for the shop owner (higher priority = more important to show)
+        rules = [
+            ((trend == "up") & (proportion >= 0.1), "High growth, high volume - prioritize stock", 100),
+            ((trend == "up") & (proportion < 0.1), "Growing category - consider expanding", 80),
+            ((trend == "down") & (proportion >= 0.1), "Declining but significant - investigate", 90),
+            ((trend == "down") & (proportion < 0.05), "Low performer - consider reducing", 40),
+            (proportion >= 0.15, "Top seller - maintain stock levels", 70),
         ]
+        conditions = [cond for cond, _, _ in rules]
+        
+        totals = totals.assign(
+            proportion=proportion,
+            predicted_revenue=(future_total * proportion).clip(lower=0),
+            predicted_quantity=(totals['quantity_sold'] * (future_total / total_historical_revenue)).clip(lower=0),
+            growth_rate=growth_rate,
+            trend=trend,
+            insight=np.select(conditions, [text for _, text, _ in rules], None),
+            priority=np.select(conditions, [priority for _, _, priority in rules], 0),
+        )
         
-        # Build forecast for each category
-        for _, row in category_totals.iterrows():
-            category = row[category_col]
-            if pd.isna(category) or str(category).strip() == '':
-                continue
-            
-            historical_revenue = row['revenue']
-            historical_qty = row['quantity_sold']
-            proportion = historical_revenue / total_historical_revenue
-            predicted_revenue = future_total * proportion
-            
-            # Calculate trend based on recent vs previous period performance
-            trend = "stable"
-            growth_rate = 0
-            recent_cat_revenue = recent_30[recent_30[category_col] == category]['revenue'].sum() if not recent_30.empty else 0
-            prev_cat_revenue = prev_30[prev_30[category_col] == category]['revenue'].sum() if not prev_30.empty else 0
-            
-            if prev_cat_revenue > 0:
-                growth_rate = ((recent_cat_revenue - prev_cat_revenue) / prev_cat_revenue) * 100
-                if growth_rate > 10:
-                    trend = "up"
-                elif growth_rate < -10:
-                    trend = "down"
-            elif recent_cat_revenue > 0:
-                trend = "up"  # New category with sales
-                growth_rate = 100
-            
-            # Determine actionable insight for shop owner
-            insight = None
-            priority = 0  # Higher = more important to show
-            
-            if trend == "up" and proportion >= 0.1:
-                insight = "High growth, high volume - prioritize stock"
-                priority = 100
-            elif trend == "up" and proportion < 0.1:
-                insight = "Growing category - consider expanding"
-                priority = 80
-            elif trend == "down" and proportion >= 0.1:
-                insight = "Declining but significant - investigate"
-                priority = 90
-            elif trend == "down" and proportion < 0.05:
-                insight = "Low performer - consider reducing"
-                priority = 40
-            elif proportion >= 0.15:
-                insight = "Top seller - maintain stock levels"
-                priority = 70
-            
+        # Sort by priority first (actionable items), then by predicted revenue;
+        # return all categories (up to 20) so frontend can decide what to show
+        top = totals.sort_values(['priority', 'predicted_revenue'], ascending=False, kind='stable').head(20)
+        
+        for row in top.itertuples(index=False):
             category_forecast.append({
-                "category": str(category).strip(),
-                "name": str(category).strip(),  # Alias for frontend compatibility
-                "predicted_revenue": round(max(0, float(predicted_revenue)), 2),
-                "predicted_revenue_formatted": f"₹{max(0, predicted_revenue):,.0f}",
-                "predicted": f"₹{max(0, predicted_revenue):,.0f}",  # Short format for display
-                "predicted_quantity": max(0, int(historical_qty * (future_total / total_historical_revenue))) if total_historical_revenue > 0 else 0,
-                "proportion_percent": round(proportion * 100, 1),
-                "proportion": round(proportion * 100, 1),  # Alias for frontend
-                "trend": trend,
-                "growth_rate": round(growth_rate, 1),
-                "historical_revenue": round(max(0, float(historical_revenue)), 2),
-                "insight": insight,
-                "priority": priority,
-                "is_actionable": priority >= 70  # Flag items shop owner should focus on
+                "category": row.name,
+                "name": row.name,  # Alias for frontend compatibility
+                "predicted_revenue": round(float(row.predicted_revenue), 2),
+                "predicted_revenue_formatted": f"₹{row.predicted_revenue:,.0f}",
+                "predicted": f"₹{row.predicted_revenue:,.0f}",  # Short format for display
+                "predicted_quantity": int(row.predicted_quantity),
+                "proportion_percent": round(row.proportion * 100, 1),
+                "proportion": round(row.proportion * 100, 1),  # Alias for frontend
+                "trend": row.trend,
+                "growth_rate": round(float(row.growth_rate), 1),
+                "historical_revenue": round(max(0, float(row.revenue)), 2),
+                "insight": row.insight,
+                "priority": int(row.priority),
+                "is_actionable": bool(row.priority >= 70)  # Flag items shop owner should focus on
             })
         
-        # Sort by priority first (actionable items), then by predicted revenue
-        category_forecast.sort(key=lambda x: (-x['priority'], -x['predicted_revenue']))
-        
-        # Return all categories (up to 20) so frontend can decide what to show
-        return category_forecast[:20]
+        return category_forecast
     
     def _generate_forecast_insights(
         self, weekly: List, monthly: List, categories: List,
@@ -1322,6 +1493,7 @@ def invalidate_shop_cache(shop_id: int):
     Call this after new sales data is uploaded.
     """
     _query_cache.invalidate(shop_id)
+    sales_store.invalidate(shop_id)
     if shop_id in _service_cache:
         _service_cache[shop_id].invalidate_cache()
         _service_cache[shop_id].invalidate_forecasts()  # Also invalidate DB-stored forecasts
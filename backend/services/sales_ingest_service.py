@@ -0,0 +1,195 @@
+# backend/services/sales_ingest_service.py
+"""
+Set-based ingestion of weekly sales uploads.
+
+Replaces the per-row ORM loop (3+ queries per CSV row) with a fixed number of
+statements regardless of file size:
+  1. one query resolving every SKU in the file to a product id
+  2. one query fetching the SalesData rows already stored for the upload's date range
+  3. pandas merges to compute per-row quantity deltas
+  4. one bulk INSERT ... ON CONFLICT DO UPDATE into sales_data
+  5. one bulk UPDATE of the affected inventory rows
+  6. a refresh of the day/week/month rollups for the touched periods
+"""
+
+from datetime import datetime
+
+import pandas as pd
+from sqlalchemy import inspect, text, update
+
+from models.model import db, Product, Inventory, SalesData, get_dialect_insert
+from services.sales_rollup_service import refresh_sales_rollups
+
+UPSERT_KEYS = ["shop_id", "product_id", "date"]
+
+_upsert_index_checked = False
+
+
+def ensure_sales_upsert_index():
+    """
+    Make sure sales_data has a unique (shop_id, product_id, date) index for ON CONFLICT.
+    Databases created before uq_sales_shop_product_date was added lack it.
+    """
+    global _upsert_index_checked
+    if _upsert_index_checked:
+        return
+
+    try:
+        inspector = inspect(db.engine)
+        unique_sets = [set(uc["column_names"]) for uc in inspector.get_unique_constraints("sales_data")]
+        unique_sets += [set(ix["column_names"]) for ix in inspector.get_indexes("sales_data") if ix.get("unique")]
+        if set(UPSERT_KEYS) not in unique_sets:
+            with db.engine.begin() as conn:
+                conn.execute(text(
+                    "CREATE UNIQUE INDEX IF NOT EXISTS uq_sales_shop_product_date "
+                    "ON sales_data (shop_id, product_id, date)"
+                ))
+        _upsert_index_checked = True
+    except Exception as exc:
+        # Existing duplicate rows block the index; surface it in logs, the upsert will report the error
+        print(f"[Sales Ingest] Could not ensure upsert index: {exc}")
+
+
+def _text_column(df, *names):
+    for name in names:
+        if name in df.columns:
+            return df[name].astype(object).where(df[name].notna(), None)
+    return pd.Series([None] * len(df), index=df.index, dtype=object)
+
+
+def ingest_sales_dataframe(df, shop_id):
+    """
+    Upsert a normalized sales DataFrame into SalesData and adjust inventory by the deltas.
+
+    Expects lowercase columns with parsed `date`, numeric `quantity_sold` and `revenue`.
+    Rows repeating the same (sku, date) behave as successive uploads: the last one wins
+    and stock moves by the difference to the previously stored quantity.
+    Does not commit; the caller owns the transaction.
+
+    Returns (stock_updates, matched_rows).
+    """
+    if df.empty or "sku" not in df.columns:
+        return [], 0
+
+    ensure_sales_upsert_index()
+
+    rows = pd.DataFrame({
+        "sku": df["sku"].astype(str).str.strip(),
+        "date": pd.to_datetime(df["date"]).dt.normalize(),
+        "quantity_sold": pd.to_numeric(df["quantity_sold"], errors="coerce").fillna(0).astype(int),
+        "revenue": pd.to_numeric(df["revenue"], errors="coerce").fillna(0.0).astype(float),
+        "fabric_type": _text_column(df, "category", "fabric_type"),
+        "region": _text_column(df, "region"),
+    })
+    rows = rows[rows["date"].notna()].reset_index(drop=True)
+
+    # 1. Resolve SKUs -> products (one query)
+    skus = rows["sku"].unique().tolist()
+    products = db.session.query(Product.id, Product.sku, Product.name).filter(
+        Product.shop_id == shop_id, Product.sku.in_(skus)
+    ).all()
+    if not products:
+        return [], 0
+    product_df = pd.DataFrame(products, columns=["product_id", "sku", "product_name"])
+    product_df["sku"] = product_df["sku"].astype(str)
+    rows = rows.merge(product_df.drop_duplicates("sku"), on="sku", how="inner")
+    matched_rows = len(rows)
+    if rows.empty:
+        return [], 0
+
+    # 2. Existing SalesData for the upload's date range (one query)
+    product_ids = rows["product_id"].unique().tolist()
+    existing = db.session.query(SalesData.product_id, SalesData.date, SalesData.quantity_sold).filter(
+        SalesData.shop_id == shop_id,
+        SalesData.product_id.in_(product_ids),
+        SalesData.date >= rows["date"].min().date(),
+        SalesData.date <= rows["date"].max().date(),
+    ).all()
+    existing_df = pd.DataFrame(existing, columns=["product_id", "date", "stored_qty"])
+    existing_df = existing_df.astype({"product_id": "int64", "stored_qty": "float64"})
+    existing_df["date"] = pd.to_datetime(existing_df["date"])
+
+    # 3. Deltas: within a (product, date) group each row is compared with the row before it,
+    #    the first one with the stored quantity (0 when new)
+    rows = rows.merge(existing_df, on=["product_id", "date"], how="left")
+    rows["stored_qty"] = rows["stored_qty"].fillna(0).astype(int)
+    previous = rows.groupby(["product_id", "date"])["quantity_sold"].shift(1)
+    rows["delta_qty"] = rows["quantity_sold"] - previous.fillna(rows["stored_qty"]).astype(int)
+
+    # 4. Bulk upsert (last row per key wins, matching sequential processing)
+    final = rows.drop_duplicates(["product_id", "date"], keep="last")
+    records = [
+        {
+            "shop_id": shop_id,
+            "product_id": int(r.product_id),
+            "date": r.date.date(),
+            "quantity_sold": int(r.quantity_sold),
+            "revenue": float(r.revenue),
+            "fabric_type": r.fabric_type,
+            "region": r.region,
+        }
+        for r in final.itertuples(index=False)
+    ]
+    insert = get_dialect_insert()
+    stmt = insert(SalesData.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=UPSERT_KEYS,
+        set_={"quantity_sold": stmt.excluded.quantity_sold, "revenue": stmt.excluded.revenue},
+    )
+    db.session.execute(stmt, records)
+    refresh_sales_rollups(shop_id, rows["date"].min().date(), rows["date"].max().date())
+
+    # 5. Bulk inventory update
+    inv = db.session.query(
+        Inventory.id, Inventory.product_id, Inventory.qty_available, Inventory.total_sold
+    ).filter(Inventory.product_id.in_(product_ids)).all()
+    if not inv:
+        return [], matched_rows
+    inv_df = pd.DataFrame(inv, columns=["inventory_id", "product_id", "qty_available", "total_sold"])
+    inv_df[["qty_available", "total_sold"]] = inv_df[["qty_available", "total_sold"]].fillna(0).astype(int)
+
+    # Stock floors at zero after every move, in file order (a sale that empties the
+    # shelf is not carried as negative stock into a later correction). Products have
+    # only a few moves per upload, so this is a short loop rather than a query.
+    moves = rows[rows["delta_qty"] != 0].merge(inv_df, on="product_id", how="inner")
+    stock = {}
+    old_stock, new_stock = [], []
+    for product_id, qty_available, delta in zip(moves["product_id"], moves["qty_available"], moves["delta_qty"]):
+        before = stock.get(product_id, int(qty_available))
+        stock[product_id] = max(0, before - int(delta))
+        old_stock.append(before)
+        new_stock.append(stock[product_id])
+    moves["old_stock"] = old_stock
+    moves["new_stock"] = new_stock
+
+    totals = moves.groupby("product_id").agg(
+        sold=("delta_qty", lambda s: int(s.clip(lower=0).sum())),
+    )
+    inv_df = inv_df.merge(totals, left_on="product_id", right_index=True, how="left")
+    inv_df["sold"] = inv_df["sold"].fillna(0).astype(int)
+    inv_df["final_stock"] = [stock.get(pid, int(qty)) for pid, qty in zip(inv_df["product_id"], inv_df["qty_available"])]
+
+    now = datetime.utcnow()
+    db.session.execute(update(Inventory), [
+        {
+            "id": int(r.inventory_id),
+            "qty_available": int(r.final_stock),
+            "total_sold": int(r.total_sold) + int(r.sold),
+            "last_sales_data_at": now,
+        }
+        for r in inv_df.itertuples(index=False)
+    ])
+
+    stock_updates = [
+        {
+            "product_name": r.product_name,
+            "sku": r.sku,
+            "sale_date": r.date.date().isoformat(),
+            "delta_quantity": -int(r.delta_qty),
+            "recorded_quantity": int(r.quantity_sold),
+            "old_stock": int(r.old_stock),
+            "new_stock": int(r.new_stock),
+        }
+        for r in moves.itertuples(index=False)
+    ]
+    return stock_updates, matched_rows
@@ -0,0 +1,256 @@
+# backend/services/sales_rollup_service.py
+"""
+Day / ISO-week / month sales rollups.
+
+sales_rollups holds SalesData summed per (shop, grain, period, product, category,
+region). The upsert path calls refresh_sales_rollups() for the date range it
+touched, which re-aggregates only the periods overlapping that range inside the
+upsert's own transaction, so rollups commit or roll back with the sales rows.
+Analytics then read one row per period and dimension instead of every
+transaction.
+
+Shops whose sales predate the rollups (or were written around the upsert path)
+are backfilled on first read: the reads compare the day rollups' row_count with
+the shop's SalesData rows once per process and rebuild the shop when they
+differ. `flask backfill-sales-rollups` rebuilds every shop from scratch.
+"""
+
+import threading
+
+from datetime import timedelta
+
+import pandas as pd
+from sqlalchemy import select, func, delete, insert, and_, or_
+
+from models.model import db, Product, SalesData, SalesRollup
+from utils.sales_query import load_sales_frame
+
+ROLLUP_DIMENSIONS = ["product_id", "category", "region"]
+
+_checked_shops = set()  # shops whose rollups were verified (or rebuilt) in this process
+_checked_lock = threading.Lock()
+
+
+# ============================================================================
+# Period helpers
+# ============================================================================
+
+def period_start(value, grain):
+    """First day of the day / ISO week (Monday) / month containing `value` (date)."""
+    if grain == "day":
+        return value
+    if grain == "week":
+        return value - timedelta(days=value.weekday())
+    if grain == "month":
+        return value.replace(day=1)
+    raise ValueError(f"Unknown rollup grain: {grain}")
+
+
+def period_end(value, grain):
+    """Last day of the period containing `value` (date)."""
+    if grain == "day":
+        return value
+    if grain == "week":
+        return period_start(value, grain) + timedelta(days=6)
+    if grain == "month":
+        next_month = (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+        return next_month - timedelta(days=1)
+    raise ValueError(f"Unknown rollup grain: {grain}")
+
+
+def _period_column(dates, grain):
+    """Vectorized period_start for a datetime64 Series."""
+    dates = dates.dt.normalize()
+    if grain == "day":
+        return dates
+    if grain == "week":
+        return dates - pd.to_timedelta(dates.dt.weekday, unit="D")
+    return dates.dt.to_period("M").dt.to_timestamp()
+
+
+# ============================================================================
+# Maintenance
+# ============================================================================
+
+def _aggregate(sales, grain):
+    frame = pd.DataFrame({
+        "period_start": _period_column(sales["date"], grain),
+        "product_id": sales["product_id"].fillna(0).astype("int64"),
+        "category": sales["category"].fillna("").astype(str),
+        "region": sales["region"].fillna("").astype(str),
+        "quantity_sold": sales["quantity_sold"],
+        "revenue": sales["revenue"],
+    })
+    return frame.groupby(["period_start"] + ROLLUP_DIMENSIONS, as_index=False).agg(
+        quantity_sold=("quantity_sold", "sum"),
+        revenue=("revenue", "sum"),
+        row_count=("revenue", "size"),
+    )
+
+
+def _rollup_records(shop_id, grain, sales):
+    if sales.empty:
+        return []
+    rollup = _aggregate(sales, grain)
+    return [
+        {
+            "shop_id": shop_id,
+            "grain": grain,
+            "period_start": r.period_start.date(),
+            "product_id": int(r.product_id),
+            "category": r.category,
+            "region": r.region,
+            "quantity_sold": int(r.quantity_sold),
+            "revenue": float(r.revenue),
+            "row_count": int(r.row_count),
+        }
+        for r in rollup.itertuples(index=False)
+    ]
+
+
+def refresh_sales_rollups(shop_id, start_date, end_date):
+    """
+    Recompute every rollup period overlapping [start_date, end_date] for a shop.
+    Reads only the SalesData rows of those periods. Runs in the caller's
+    transaction and does not commit.
+    """
+    windows = {
+        grain: (period_start(start_date, grain), period_end(end_date, grain))
+        for grain in SalesRollup.GRAINS
+    }
+    lo = min(w[0] for w in windows.values())
+    hi = max(w[1] for w in windows.values())
+    sales = load_sales_frame(shop_id, start_date=lo, end_date=hi)
+
+    table = SalesRollup.__table__
+    db.session.execute(delete(table).where(
+        table.c.shop_id == shop_id,
+        or_(*[
+            and_(table.c.grain == grain, table.c.period_start >= start, table.c.period_start <= end)
+            for grain, (start, end) in windows.items()
+        ]),
+    ))
+
+    records = []
+    for grain, (start, end) in windows.items():
+        in_window = sales[(sales["date"] >= pd.Timestamp(start)) & (sales["date"] <= pd.Timestamp(end))]
+        records.extend(_rollup_records(shop_id, grain, in_window))
+    if records:
+        db.session.execute(insert(table), records)
+
+
+def rebuild_sales_rollups(shop_id=None):
+    """Rebuild all rollups (one shop or every shop with sales). Commits per shop; returns rows written."""
+    if shop_id is None:
+        shop_ids = [r[0] for r in db.session.query(SalesData.shop_id).filter(SalesData.shop_id.isnot(None)).distinct()]
+        # Shops whose sales were all removed keep no stale rollups
+        db.session.execute(delete(SalesRollup.__table__).where(SalesRollup.shop_id.notin_(shop_ids)))
+    else:
+        shop_ids = [shop_id]
+
+    table = SalesRollup.__table__
+    written = 0
+    for sid in shop_ids:
+        sales = load_sales_frame(sid)
+        db.session.execute(delete(table).where(table.c.shop_id == sid))
+        records = [rec for grain in SalesRollup.GRAINS for rec in _rollup_records(sid, grain, sales)]
+        if records:
+            db.session.execute(insert(table), records)
+        db.session.commit()
+        written += len(records)
+    return written
+
+
+def ensure_sales_rollups(shop_id):
+    """
+    Backfill a shop's rollups if they do not cover its SalesData rows (checked
+    once per process per shop). Returns True when a rebuild ran; the rebuild commits.
+    """
+    if shop_id in _checked_shops:
+        return False
+    rolled_up = db.session.query(func.coalesce(func.sum(SalesRollup.row_count), 0)).filter(
+        SalesRollup.shop_id == shop_id, SalesRollup.grain == "day",
+    ).scalar()
+    raw = db.session.query(func.count(SalesData.id)).filter(SalesData.shop_id == shop_id).scalar()
+    rebuilt = False
+    if rolled_up != raw:
+        try:
+            written = rebuild_sales_rollups(shop_id)
+            rebuilt = True
+            print(f"[Sales Rollups] Backfilled {written} rollup rows for shop_id={shop_id}")
+        except Exception as e:
+            db.session.rollback()
+            print(f"[Sales Rollups Error] Backfill failed for shop_id={shop_id}: {e}")
+            return False
+    with _checked_lock:
+        _checked_shops.add(shop_id)
+    return rebuilt
+
+
+# ============================================================================
+# Reads
+# ============================================================================
+
+def load_rollup_frame(shop_id, grain, start_date=None, end_date=None, by_dimension=True):
+    """
+    Rollup rows for a shop as a DataFrame shaped like the sales frame.
+
+    by_dimension=True: one row per period/product/category/region with columns
+    date, product_id, product_name, category, region, quantity_sold, revenue, row_count
+    (missing dimensions come back as NA/None).
+    by_dimension=False: one row per period (date, quantity_sold, revenue, row_count).
+    """
+    ensure_sales_rollups(shop_id)
+    if by_dimension:
+        stmt = (
+            select(
+                SalesRollup.period_start.label("date"),
+                SalesRollup.product_id,
+                Product.name.label("product_name"),
+                SalesRollup.category,
+                SalesRollup.region,
+                SalesRollup.quantity_sold,
+                SalesRollup.revenue,
+                SalesRollup.row_count,
+            )
+            .select_from(SalesRollup)
+            .outerjoin(Product, Product.id == SalesRollup.product_id)
+        )
+    else:
+        stmt = select(
+            SalesRollup.period_start.label("date"),
+            func.sum(SalesRollup.quantity_sold).label("quantity_sold"),
+            func.sum(SalesRollup.revenue).label("revenue"),
+            func.sum(SalesRollup.row_count).label("row_count"),
+        ).group_by(SalesRollup.period_start)
+
+    stmt = stmt.where(SalesRollup.shop_id == shop_id, SalesRollup.grain == grain)
+    if start_date is not None:
+        stmt = stmt.where(SalesRollup.period_start >= start_date)
+    if end_date is not None:
+        stmt = stmt.where(SalesRollup.period_start <= end_date)
+    stmt = stmt.order_by(SalesRollup.period_start)
+
+    df = pd.read_sql(stmt, db.session.connection(), parse_dates=["date"])
+    df = df.astype({"quantity_sold": "int64", "revenue": "float64", "row_count": "int64"})
+    if by_dimension:
+        df["product_id"] = df["product_id"].astype("Int64").mask(df["product_id"] == 0)
+        for col in ("category", "region"):
+            df[col] = df[col].mask(df[col] == "", None)
+    return df
+
+
+def rollup_total(shop_id, grain, start_date, end_date):
+    """Summed (revenue, quantity_sold, row_count) over periods starting in [start_date, end_date]."""
+    ensure_sales_rollups(shop_id)
+    row = db.session.query(
+        func.coalesce(func.sum(SalesRollup.revenue), 0.0),
+        func.coalesce(func.sum(SalesRollup.quantity_sold), 0),
+        func.coalesce(func.sum(SalesRollup.row_count), 0),
+    ).filter(
+        SalesRollup.shop_id == shop_id,
+        SalesRollup.grain == grain,
+        SalesRollup.period_start >= start_date,
+        SalesRollup.period_start <= end_date,
+    ).one()
+    return float(row[0]), int(row[1]), int(row[2])
@@ -707,19 +707,13 @@ def search_shops(
         return cached
     
     from sqlalchemy import or_, distinct
+    from utils.fts_search import apply_text_search
     
     query_obj = Shop.query
     
     if query:
-        pattern = f'%{query}%'
-        query_obj = query_obj.filter(
-            or_(
-                Shop.name.ilike(pattern),
-                Shop.description.ilike(pattern),
-                Shop.city.ilike(pattern),
-                Shop.address.ilike(pattern)
-            )
-        )
+        # Ranked FTS5 match; rating/popularity below only break ties
+        query_obj = apply_text_search(query_obj, Shop, 'shops_fts', query)
     
     if city:
         query_obj = query_obj.filter(Shop.city.ilike(f'%{city}%'))
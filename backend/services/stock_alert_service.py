@@ -0,0 +1,198 @@
+# backend/services/stock_alert_service.py
+"""
+Low-stock alerts for distributors.
+
+An alert is a (shop, product) the distributor has supplied whose inventory is
+at or below its safety stock ('critical' at zero, 'low' otherwise). They are
+computed by one joined query - latest completed supply per (shop, product),
+product, inventory and shop - with the threshold applied in SQL, so the cost
+follows the number of alerts rather than the number of supply records.
+
+Live alerts are streamed as server-sent events. Inventory writes bump the
+shop's data version; after the commit, utils.data_version wakes every open
+stream, which compares the combined version of its distributor's shops and
+only re-runs the alert query when that moved. Streams also re-check on a
+timer, which covers writes committed by other processes. Only threshold
+crossings are pushed: alerts that are new or changed urgency, and alerts that
+were resolved by a restock.
+
+A stream occupies its request worker while open, so it ends after
+LOW_STOCK_STREAM_MAX_SECONDS (25s by default, a long poll). The frontend reads
+it with fetch (EventSource cannot send the bearer token), reconnects as soon as
+a stream ends and receives a fresh snapshot; the `retry:` value only paces
+reconnects after a failed request. Longer streams need threaded or async
+workers (e.g. gunicorn --worker-class gthread --threads N).
+"""
+
+import json
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import case, func, select
+
+from config import Config
+from models.model import db, DistributorSupply, Inventory, Product, Shop
+from utils.data_version import distributor_data_versions, on_shops_committed
+
+
+# ============================================================================
+# Alert query
+# ============================================================================
+
+def low_stock_alerts_query(distributor_id: int):
+    """SELECT of the distributor's current alerts, critical first, then by stock."""
+    latest = (
+        select(func.max(DistributorSupply.id).label("id"))
+        .where(DistributorSupply.distributor_id == distributor_id, DistributorSupply.status == "completed")
+        .group_by(DistributorSupply.shop_id, DistributorSupply.product_id)
+        .subquery()
+    )
+    is_critical = Inventory.qty_available <= 0
+    return (
+        select(
+            Product.id.label("product_id"),
+            Product.name.label("product_name"),
+            DistributorSupply.shop_id,
+            func.coalesce(Shop.name, "Unknown").label("shop_name"),
+            Inventory.qty_available.label("current_stock"),
+            Inventory.safety_stock,
+            DistributorSupply.quantity_supplied.label("last_supplied"),
+            case((is_critical, "critical"), else_="low").label("urgency"),
+        )
+        .join(latest, DistributorSupply.id == latest.c.id)
+        .join(Product, Product.id == DistributorSupply.product_id)
+        .join(Inventory, Inventory.product_id == Product.id)
+        .outerjoin(Shop, Shop.id == DistributorSupply.shop_id)
+        .where(Inventory.qty_available <= Inventory.safety_stock)
+        .order_by(case((is_critical, 0), else_=1), Inventory.qty_available, DistributorSupply.shop_id, Product.id)
+    )
+
+
+def low_stock_alerts(distributor_id: int) -> Dict:
+    """{"alerts": [...], "summary": {critical_count, low_count, total_alerts}}."""
+    alerts = [dict(row) for row in db.session.execute(low_stock_alerts_query(distributor_id)).mappings()]
+    critical = sum(1 for a in alerts if a["urgency"] == "critical")
+    return {
+        "alerts": alerts,
+        "summary": {
+            "critical_count": critical,
+            "low_count": len(alerts) - critical,
+            "total_alerts": len(alerts),
+        },
+    }
+
+
+def alerts_version(distributor_id: int) -> Tuple[int, int]:
+    """(summed version, shop count) of the distributor's shops; moves on any change to them."""
+    versions = distributor_data_versions(distributor_id)
+    return versions["version"], versions["shops"]
+
+
+def _alert_key(alert):
+    return alert["shop_id"], alert["product_id"]
+
+
+def diff_alerts(previous: Dict, alerts: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Compare alerts with the previous {(shop_id, product_id): alert}. Returns
+    (alerts that are new or changed urgency, previous alerts that are gone).
+    """
+    raised = []
+    for alert in alerts:
+        before = previous.get(_alert_key(alert))
+        if before is None or before["urgency"] != alert["urgency"]:
+            raised.append(alert)
+    current = {_alert_key(a) for a in alerts}
+    resolved = [a for key, a in previous.items() if key not in current]
+    return raised, resolved
+
+
+# ============================================================================
+# Live stream
+# ============================================================================
+
+class AlertBroker:
+    """Wakes open alert streams in this process when shops' data is committed."""
+
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self) -> threading.Event:
+        wakeup = threading.Event()
+        with self._lock:
+            self._subscribers.add(wakeup)
+        return wakeup
+
+    def unsubscribe(self, wakeup: threading.Event):
+        with self._lock:
+            self._subscribers.discard(wakeup)
+
+    def publish(self, shop_ids=None):
+        # Streams check their own distributor's version, so waking all of them is safe
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for wakeup in subscribers:
+            wakeup.set()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._subscribers)
+
+
+alert_broker = AlertBroker()
+on_shops_committed(alert_broker.publish)
+
+
+def _event(name: str, data, event_id=None) -> str:
+    lines = [f"event: {name}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def low_stock_alert_events(distributor_id: int, poll_seconds: Optional[float] = None,
+                           heartbeat_seconds: Optional[float] = None, max_seconds: Optional[float] = None,
+                           broker: AlertBroker = None) -> Iterator[str]:
+    """
+    Server-sent events for a distributor: one `snapshot` with all current alerts,
+    then an `alerts` event ({raised, resolved, summary}) whenever a committed
+    change crosses a threshold. Ends after max_seconds; the fetch client reconnects
+immediately and waits the `retry:` delay (poll_seconds) only after errors.
+    """
+    poll_seconds = poll_seconds or Config.LOW_STOCK_STREAM_POLL_SECONDS
+    heartbeat_seconds = heartbeat_seconds or Config.LOW_STOCK_STREAM_HEARTBEAT_SECONDS
+    max_seconds = max_seconds or Config.LOW_STOCK_STREAM_MAX_SECONDS
+    broker = broker or alert_broker
+
+    wakeup = broker.subscribe()
+    try:
+        version = alerts_version(distributor_id)
+        payload = low_stock_alerts(distributor_id)
+        db.session.rollback()  # end the read so later checks see new commits
+        known = {_alert_key(a): a for a in payload["alerts"]}
+        yield f"retry: {int(poll_seconds * 1000)}\n" + _event("snapshot", payload, version[0])
+
+        started = last_sent = time.monotonic()
+        while time.monotonic() - started < max_seconds:
+            wakeup.wait(poll_seconds)
+            wakeup.clear()
+            current = alerts_version(distributor_id)
+            if current != version:
+                version = current
+                payload = low_stock_alerts(distributor_id)
+                raised, resolved = diff_alerts(known, payload["alerts"])
+                known = {_alert_key(a): a for a in payload["alerts"]}
+                if raised or resolved:
+                    yield _event("alerts", {
+                        "raised": raised, "resolved": resolved, "summary": payload["summary"],
+                    }, version[0])
+                    last_sent = time.monotonic()
+            db.session.rollback()
+            if time.monotonic() - last_sent >= heartbeat_seconds:
+                yield ": keep-alive\n\n"
+                last_sent = time.monotonic()
+    finally:
+        broker.unsubscribe(wakeup)
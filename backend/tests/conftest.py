@@ -1,5 +1,67 @@
 import pytest
+from pathlib import Path
+import sys
+
+from flask import Flask
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from models.model import db, User, Shop, Product, Inventory
+
 
 @pytest.fixture
 def sample_fixture():
-    return "sample data"
\ No newline at end of file
+    return "sample data"
+
+
+@pytest.fixture
+def database_uri():
+    # Override with a file database in modules whose workers open their own connections
+    return 'sqlite:///:memory:'
+
+
+@pytest.fixture
+def app(database_uri):
+    """Flask app with an empty schema in a pushed app context; modules seed it by overriding `app`."""
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri
+    db.init_app(app)
+    ctx = app.app_context()
+    ctx.push()
+    db.create_all()
+    yield app
+    db.session.remove()
+    db.drop_all()
+    ctx.pop()
+
+
+@pytest.fixture
+def make_shop():
+    """make_shop(name='Shop', owner='owner', **fields): a shop with its own shop_owner user."""
+    def make_shop(name='Shop', owner='owner', **fields):
+        user = User(full_name=owner.title(), username=owner, password='x', role='shop_owner')
+        db.session.add(user)
+        db.session.flush()
+        shop = Shop(name=name, owner_id=user.id, **fields)
+        db.session.add(shop)
+        db.session.flush()
+        return shop
+    return make_shop
+
+
+@pytest.fixture
+def make_product():
+    """make_product(shop, name, sku=None, stock=None, safety_stock=None, **fields): a product,
+    with an inventory row when stock is given. The sku defaults to the name."""
+    def make_product(shop, name, sku=None, stock=None, safety_stock=None, **fields):
+        fields.setdefault('price', 10)
+        product = Product(name=name, sku=sku or name, shop_id=shop.id, **fields)
+        db.session.add(product)
+        db.session.flush()
+        if stock is not None:
+            inventory = Inventory(product_id=product.id, qty_available=stock)
+            if safety_stock is not None:
+                inventory.safety_stock = safety_stock
+            db.session.add(inventory)
+        return product
+    return make_product
@@ -0,0 +1,48 @@
+import pytest
+from pathlib import Path
+import sys
+
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from models.model import db, Product, CachedDashboard
+from utils.data_version import get_data_version, bump_data_version, bump_product_shop_version
+from utils.dashboard_cache import get_cached_dashboard, store_dashboard, clear_dashboard_cache
+
+
+@pytest.fixture
+def app(app, make_shop, make_product):
+    clear_dashboard_cache()
+    make_product(make_shop(), 'Saree', sku='SKU-1', price=100)
+    db.session.commit()
+    yield app
+    clear_dashboard_cache()
+
+
+def test_bump_increments_versions(app):
+    assert get_data_version(1) == 0
+    bump_data_version(1)
+    bump_data_version(1, sales=True)
+    db.session.commit()
+    assert get_data_version(1) == 2
+    assert get_data_version(1, sales=True) == 1
+
+    bump_product_shop_version(Product.query.first().id)
+    db.session.commit()
+    assert get_data_version(1) == 3
+
+
+def test_cached_payload_is_served_until_version_changes(app):
+    version = get_data_version(1)
+    assert get_cached_dashboard(1, version) is None
+
+    store_dashboard(1, version, {"weekly_sales": "₹10.00"})
+    assert get_cached_dashboard(1, version) == {"weekly_sales": "₹10.00"}
+
+    # Another worker process only sees the shared table
+    clear_dashboard_cache()
+    assert get_cached_dashboard(1, version) == {"weekly_sales": "₹10.00"}
+    assert CachedDashboard.query.count() == 1
+
+    bump_data_version(1)
+    db.session.commit()
+    assert get_cached_dashboard(1, get_data_version(1)) is None
@@ -0,0 +1,105 @@
+import pytest
+from datetime import date, timedelta
+from pathlib import Path
+import sys
+
+from sqlalchemy import event
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from models.model import (
+    db, User, Product, Inventory, SalesData, DistributorSupply, DistributorStockSummary,
+)
+from utils.data_version import bump_data_version
+from services.distributor_analytics_service import DistributorAnalyticsService
+
+
+@pytest.fixture
+def app(app, make_shop, make_product):
+    distributor = User(full_name='Dist', username='dist', password='x', role='distributor')
+    db.session.add(distributor)
+    db.session.flush()
+    today = date.today()
+    # shop 1: one healthy and one critical product; shop 2: one low product
+    for s, rows in enumerate([[('Silk', 100, 20, 40), ('Cotton', 2, 10, 5)], [('Linen', 7, 10, 0)]], start=1):
+        shop = make_shop(f'Shop {s}', owner=f'owner{s}', city='Chennai')
+        for name, qty, safety, sold in rows:
+            product = make_product(shop, name, sku=f'{name}-{s}', category=name, stock=qty, safety_stock=safety)
+            # two restocks of 50 units each
+            for _ in range(2):
+                db.session.add(DistributorSupply(distributor_id=distributor.id, product_id=product.id,
+                                                 shop_id=shop.id, quantity_supplied=50, total_value=500))
+            if sold:
+                db.session.add(SalesData(shop_id=shop.id, product_id=product.id, date=today - timedelta(days=1),
+                                         quantity_sold=sold, revenue=sold * 10))
+    db.session.commit()
+    return app
+
+
+def test_stock_heatmap_groups_links_by_shop(app):
+    heatmap = DistributorAnalyticsService(1).stock_heatmap()
+
+    assert heatmap['summary']['totalShops'] == 2
+    assert heatmap['summary']['totalProducts'] == 3
+    assert [p['product_name'] for p in heatmap['criticalProducts']] == ['Cotton']
+    assert [p['product_name'] for p in heatmap['lowProducts']] == ['Linen']
+
+    shop1 = next(p for p in heatmap['heatmapPoints'] if p['shopName'] == 'Shop 1')
+    assert [d['status'] for d in shop1['stockDetails']] == ['critical', 'healthy']
+    assert shop1['topProduct'] == 'Silk'
+    assert shop1['totalSold'] == 45
+    silk = shop1['stockDetails'][1]
+    assert silk['quantity_supplied'] == 100  # restocks are summed
+    assert silk['sell_through_rate'] == 40.0
+
+
+def test_product_performance_aggregates_across_shops(app):
+    performance = DistributorAnalyticsService(1).product_performance()
+
+    assert performance['summary']['totalSupplied'] == 300
+    assert performance['summary']['totalSold'] == 45
+    silk = next(p for p in performance['products'] if p['product_name'] == 'Silk')
+    assert silk['shop_names'] == ['Shop 1']
+    assert silk['performance'] == 'average'
+    assert silk['last_sale_date'] == (date.today() - timedelta(days=1)).isoformat()
+    linen = next(p for p in performance['products'] if p['product_name'] == 'Linen')
+    assert linen['last_sale_date'] is None
+
+
+def test_views_read_summaries_not_history(app):
+    DistributorAnalyticsService(1).stock_heatmap()  # first read builds the summaries
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        DistributorAnalyticsService(1).stock_heatmap()
+        DistributorAnalyticsService(1).product_performance()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert not [s for s in statements if 'sales_data' in s or 'distributor_supplies' in s]
+
+
+def test_inventory_write_refreshes_its_shop_on_commit(app):
+    inventory = Inventory.query.join(Product).filter(Product.name == 'Linen').one()
+    inventory.qty_available = 50
+    bump_data_version(2)
+    db.session.commit()
+    assert DistributorStockSummary.query.filter_by(shop_id=2).one().qty_available == 50
+
+    heatmap = DistributorAnalyticsService(1).stock_heatmap()
+    assert heatmap['summary']['lowProductCount'] == 0
+    linen = next(p for p in DistributorAnalyticsService(1).product_performance()['products']
+                 if p['product_name'] == 'Linen')
+    assert linen['stock_status'] == 'healthy'
+
+
+def test_reads_rebuild_shops_whose_version_moved(app):
+    db.session.add(SalesData(shop_id=2, product_id=3, date=date.today(), quantity_sold=30, revenue=300))
+    bump_data_version(2)
+    db.session.info.pop('bumped_shops')  # as if the commit hook never ran
+    db.session.commit()
+
+    linen = next(p for p in DistributorAnalyticsService(1).product_performance()['products']
+                 if p['product_name'] == 'Linen')
+    assert linen['qty_sold'] == 30
+    assert linen['sell_through_rate'] == 30.0
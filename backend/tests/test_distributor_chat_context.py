@@ -0,0 +1,83 @@
+import pytest
+from datetime import date
+from pathlib import Path
+import sys
+
+from sqlalchemy import event
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from models.model import db, User, Inventory, SalesData, DistributorSupply
+from utils.data_version import bump_data_version
+from services.distributor_chat_context_service import (
+    ChatContextCache, distributor_chat_context, estimate_tokens,
+)
+
+
+@pytest.fixture
+def app(app, make_shop, make_product):
+    distributor = User(full_name='Dist', username='dist', password='x', role='distributor')
+    db.session.add(distributor)
+    db.session.flush()
+    shop = make_shop('Shop 1', city='Chennai')
+    for name, qty, safety, sold in [('Silk', 100, 20, 40), ('Cotton', 2, 10, 5), ('Linen', 7, 10, 0)]:
+        product = make_product(shop, name, category=name, stock=qty, safety_stock=safety)
+        db.session.add(DistributorSupply(distributor_id=distributor.id, product_id=product.id,
+                                         shop_id=shop.id, quantity_supplied=50))
+        if sold:
+            db.session.add(SalesData(shop_id=shop.id, product_id=product.id, date=date.today(),
+                                      quantity_sold=sold, revenue=sold * 10))
+    bump_data_version(shop.id, sales=True)
+    db.session.commit()
+    return app
+
+
+def _count_statements(fn):
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        return fn(), len(statements)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+
+def test_basic_context_refreshes_only_changed_sections(app):
+    cache = ChatContextCache()
+    context = distributor_chat_context(1, cache=cache)
+    assert '- SHIP TO Shop 1: Cotton - only 2 units left (safety: 10), sold 5 units' in context
+    assert '- PLAN FOR Shop 1: Linen - 7 units left (safety: 10)' in context
+    assert context.index('- Silk at Shop 1: 40 units sold') < context.index('- Cotton at Shop 1: 5 units sold')
+
+    # Follow-up messages only look up the data versions
+    again, statements = _count_statements(lambda: distributor_chat_context(1, cache=cache))
+    assert again == context
+    assert statements == 1
+    assert cache.stats()['refreshes'] == 2
+
+    # An inventory change rebuilds the stock section; top sellers are kept
+    Inventory.query.filter_by(product_id=3).update({'qty_available': 0})
+    bump_data_version(1)
+    db.session.commit()
+    context = distributor_chat_context(1, cache=cache)
+    assert '- SHIP TO Shop 1: Linen - only 0 units left' in context
+    assert cache.stats()['refreshes'] == 3
+
+
+def test_rich_context_is_trimmed_to_budget_keeping_urgent_items(app):
+    forecasts = [
+        {'action': action, 'shopName': f'Shop {i}', 'productName': f'{action} product {i}', 'currentStock': i}
+        for action in ('CRITICAL', 'RESTOCK SOON', 'ADEQUATE') for i in range(40)
+    ]
+    frontend_context = {'demandForecast': {'summary': {'totalProducts': 120}, 'forecasts': forecasts}}
+    cache = ChatContextCache()
+
+    context = distributor_chat_context(1, frontend_context, max_tokens=2000, cache=cache)
+    assert estimate_tokens(context) <= 2000
+    assert context.count('- SHIP TO') == 40
+    assert 0 < context.count('- PLAN FOR') < 40
+    assert 'ADEQUATE product' not in context
+    assert 'WELL-STOCKED SHOPS - NO SUPPLY NEEDED (40 items):\n- ... 40 more not shown' in context
+
+    untrimmed = distributor_chat_context(1, frontend_context, max_tokens=100000, cache=cache)
+    assert untrimmed.count('ADEQUATE product') == 40
+    assert cache.stats() == {'distributors': 1, 'max_distributors': 64, 'hits': 1, 'refreshes': 1}
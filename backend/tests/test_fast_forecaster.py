@@ -0,0 +1,95 @@
+import pytest
+import numpy as np
+import pandas as pd
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from services import fast_forecaster
+from services.fast_forecaster import (
+    backtest_origins, fast_forecast, holt_winters, seasonal_naive,
+    select_fast_model, simple_exponential_smoothing,
+)
+from services.forecast_executor import ForecastExecutor, run_fast_tier
+from services.prophet_service import TextileProphetManager
+
+
+def _weekly_pattern(rows=63, noise=2.0, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(rows)
+    return pd.DataFrame({
+        "ds": pd.date_range("2024-01-01", periods=rows, freq="D"),
+        "y": 100 + 25 * np.sin(2 * np.pi * t / 7) + rng.normal(0, noise, rows),
+    })
+
+
+def test_seasonal_naive_repeats_last_season():
+    y = np.array([1, 2, 3, 4, 5, 6, 7, 1, 2, 3, 4, 5, 6, 7], dtype=float)
+    yhat, sigma = seasonal_naive(y, 9, 7)
+    assert yhat.tolist() == [1, 2, 3, 4, 5, 6, 7, 1, 2]
+    assert sigma.shape == (9,)
+
+
+def test_ses_is_flat_near_level():
+    y = np.full(30, 50.0) + np.random.default_rng(0).normal(0, 1, 30)
+    yhat, sigma = simple_exponential_smoothing(y, 5)
+    assert np.allclose(yhat, yhat[0])
+    assert abs(yhat[0] - 50) < 2
+    assert (np.diff(sigma) >= 0).all()
+
+
+def test_holt_winters_needs_two_seasons():
+    with pytest.raises(ValueError):
+        holt_winters(np.arange(10, dtype=float), 3, 7)
+
+
+def test_backtest_origins_are_rolling_and_bounded():
+    assert backtest_origins(60, 10, folds=3) == [30, 40, 50]
+    assert backtest_origins(20, 10, folds=3, min_train=7) == [10]
+
+
+def test_selection_prefers_seasonal_model_for_seasonal_series():
+    y = _weekly_pattern()["y"].to_numpy()
+    selection = select_fast_model(y, 14, 7)
+    assert selection["model"] in ("seasonal_naive", "holt_winters")
+    assert selection["scores"][selection["model"]] < selection["scores"]["simple_exponential_smoothing"]
+
+
+def test_fast_forecast_continues_dates_with_intervals():
+    forecast, selection = fast_forecast(_weekly_pattern(), periods=10)
+    assert len(forecast) == 10
+    assert forecast["ds"].iloc[0] == pd.Timestamp("2024-03-04")
+    assert (forecast["yhat_lower"] <= forecast["yhat"]).all()
+    assert (forecast["yhat"] <= forecast["yhat_upper"]).all()
+    assert selection["fit_time_seconds"] < 1
+
+
+def test_short_history_never_fits_prophet(monkeypatch):
+    manager = TextileProphetManager(model_store=None)
+    monkeypatch.setattr(manager, "_get_model", lambda df: pytest.fail("Prophet should not be fitted"))
+
+    forecast, metrics = manager.forecast_sales(_weekly_pattern(), periods=14)
+    assert len(forecast) == 14
+    assert metrics["model"] in fast_forecaster.FORECASTERS
+    assert metrics["model_selection"]["reason"] == "short_history"
+    assert set(metrics["model_selection"]["candidates"]) == set(fast_forecaster.FORECASTERS)
+
+
+def test_executor_answers_short_series_without_the_pool():
+    executor = ForecastExecutor(fast_path=run_fast_tier)
+    result = executor.request(_weekly_pattern(), periods=7)
+
+    assert result.ready
+    assert result.metrics["model_selection"]["reason"] == "short_history"
+    assert executor._pool is None
+    assert executor.stats()["fast_path"] == 1
+
+
+def test_fast_tier_labels_its_intervals_analytic():
+    manager = TextileProphetManager(model_store=None)
+    _, metrics = manager.forecast_sales(_weekly_pattern(), periods=7, uncertainty="exact")
+    assert metrics["uncertainty"]["mode"] == "analytic"
+    assert metrics["uncertainty"]["requested"] == "exact"
+
+    with pytest.raises(ValueError):
+        manager.forecast_sales(_weekly_pattern(), periods=7, uncertainty="bootstrap")
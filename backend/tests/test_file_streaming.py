@@ -0,0 +1,56 @@
+import pytest
+import hashlib
+import io
+from pathlib import Path
+import sys
+
+import pandas as pd
+from werkzeug.datastructures import FileStorage
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import utils.file_processing_utils as fpu
+from utils.file_processing_utils import spool_upload, read_table_header, iter_table_chunks, process_csv_streaming
+
+CSV = b"Date,SKU,Quantity\n2024-01-01,007,1\n2024-01-02,008,2\n2024-01-03,009,3\n2024-01-04,010,4\n2024-01-05,011,5\n"
+
+
+def _upload(body, name="sales.csv"):
+    return FileStorage(stream=io.BytesIO(body), filename=name)
+
+
+def test_spool_hashes_while_copying(monkeypatch):
+    monkeypatch.setattr(fpu, "SPOOL_CHUNK_BYTES", 7)
+    path, digest, size = spool_upload(_upload(CSV))
+    try:
+        assert digest == hashlib.sha256(CSV).hexdigest()
+        assert size == len(CSV)
+        assert Path(path).read_bytes() == CSV
+    finally:
+        Path(path).unlink()
+
+
+def test_spool_enforces_size_limit():
+    with pytest.raises(fpu.FileProcessingError):
+        spool_upload(_upload(CSV), max_bytes=10)
+
+
+def test_chunks_have_normalized_columns_and_text_dtypes(tmp_path):
+    path = tmp_path / "sales.csv"
+    path.write_bytes(CSV)
+
+    assert read_table_header(str(path), {"quantity": "qty"}) == ["date", "sku", "qty"]
+    chunks = list(iter_table_chunks(str(path), chunksize=2, text_columns=("sku",),
+                                    column_aliases={"quantity": "qty"}))
+
+    assert [len(c) for c in chunks] == [2, 2, 1]
+    assert pd.concat(chunks)["sku"].tolist() == ["007", "008", "009", "010", "011"]
+    assert pd.concat(chunks)["qty"].sum() == 15
+
+
+def test_process_csv_streaming_validates_and_concats(monkeypatch):
+    monkeypatch.setattr(fpu, "CHUNK_SIZE", 2)
+    df = process_csv_streaming(_upload(CSV), required_columns=["Date", "SKU"])
+    assert len(df) == 5
+
+    with pytest.raises(fpu.FileProcessingError):
+        process_csv_streaming(_upload(CSV), required_columns=["Price"])
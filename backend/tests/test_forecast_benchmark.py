@@ -0,0 +1,51 @@
+import copy
+import pytest
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from benchmarks.forecast_benchmark import coverage, compare_results, mape, run_benchmark, smape
+
+
+def test_accuracy_metrics():
+    assert mape([100, 200, 0], [110, 180, 5]) == pytest.approx(10.0)
+    assert smape([100, 0], [100, 0]) == 0.0
+    assert smape([100], [0]) == pytest.approx(200.0)
+    assert coverage([1, 5, 10], [0, 0, 0], [4, 6, 8]) == pytest.approx(2 / 3)
+
+
+@pytest.fixture(scope="module")
+def baseline():
+    # Fast tier only, no demo files or end-to-end scenarios: runs in well under a second
+    return run_benchmark({"model": "fast", "demo": False, "scenarios": False})
+
+
+def test_run_scores_every_synthetic_series(baseline):
+    assert baseline["summary"]["scored_series"] == baseline["summary"]["series"] == 6
+    series = baseline["series"]["synthetic/weekly_60d"]
+    assert series["folds"] == 3
+    assert series["mape"] < 20
+    assert 0 <= series["coverage"] <= 1
+
+
+def test_compare_passes_identical_results(baseline):
+    assert compare_results(baseline, copy.deepcopy(baseline)) == []
+
+
+def test_compare_flags_accuracy_and_latency_regressions(baseline):
+    current = copy.deepcopy(baseline)
+    series = current["series"]["synthetic/weekly_60d"]
+    series["mape"] *= 1.5
+    series["fit_predict_seconds"] += 1.0
+    current["summary"]["mean_coverage"] -= 0.3
+
+    regressions = compare_results(baseline, current)
+    assert any("weekly_60d: mape" in r for r in regressions)
+    assert any("weekly_60d: fit_predict_seconds" in r for r in regressions)
+    assert any("summary: coverage" in r for r in regressions)
+
+
+def test_compare_ignores_sub_floor_latency_noise(baseline):
+    current = copy.deepcopy(baseline)
+    current["series"]["synthetic/short_20d"]["cached_seconds"] = baseline["series"]["synthetic/short_20d"]["cached_seconds"] * 2
+    assert compare_results(baseline, current, min_latency_seconds=0.05) == []
@@ -0,0 +1,116 @@
+import pytest
+from pathlib import Path
+import sys
+
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from models.model import db, CachedForecast
+from utils.data_version import bump_data_version
+from services.sales_analytics_service import SalesAnalyticsService
+
+
+@pytest.fixture
+def app(app, make_shop):
+    make_shop()
+    db.session.commit()
+    return app
+
+
+def test_forecast_cache_is_validated_by_sales_version(app):
+    service = SalesAnalyticsService(1)
+    service._save_cached_forecast('quarterly', {"status": "success"})
+    assert CachedForecast.query.first().data_version == 0
+    assert service._get_cached_forecast('quarterly') == {"status": "success"}
+
+    # Non-sales changes (inventory, reviews) keep forecasts valid
+    bump_data_version(1)
+    db.session.commit()
+    assert service._get_cached_forecast('quarterly') == {"status": "success"}
+
+    bump_data_version(1, sales=True)
+    db.session.commit()
+    assert service._get_cached_forecast('quarterly') is None
+
+
+def test_forecast_saved_with_version_read_before_compute(app):
+    service = SalesAnalyticsService(1)
+    version = service._get_data_version()
+    bump_data_version(1, sales=True)  # upload lands while the forecast is computed
+    db.session.commit()
+
+    service._save_cached_forecast('quarterly', {"status": "success"}, version)
+    assert service._get_cached_forecast('quarterly') is None
+
+
+def test_cached_forecast_reused_only_for_equal_or_cheaper_tiers(app, monkeypatch):
+    import pandas as pd
+
+    service = SalesAnalyticsService(1)
+    service._save_cached_forecast('quarterly', {"status": "success", "uncertainty": {"mode": "sampled"}})
+    assert service.get_quarterly_demand_forecast(uncertainty='analytic')["uncertainty"]["mode"] == "sampled"
+
+    # An exact request (nightly precompute) does not accept sampled intervals and reloads the data
+    loads = []
+    monkeypatch.setattr(service, 'get_sales_data', lambda days=90: loads.append(days) or pd.DataFrame())
+    assert service.get_quarterly_demand_forecast(uncertainty='exact')["status"] == "no_data"
+    assert loads == [365]
+
+
+def test_forecast_records_the_weakest_tier_used(app, monkeypatch):
+    import pandas as pd
+    from datetime import datetime, timedelta
+    from types import SimpleNamespace
+    import services.sales_analytics_service as analytics
+
+    now = datetime.now()
+    history = pd.DataFrame({
+        "date": [now - timedelta(days=d) for d in range(60)],
+        "product_name": "Silk", "category": "Silk", "region": "North",
+        "revenue": 100.0, "quantity_sold": 2,
+    })
+    service = SalesAnalyticsService(1)
+    monkeypatch.setattr(service, 'get_sales_data', lambda days=90: history)
+
+    # Revenue got exact intervals; quantity fell back to the (analytic) fast forecaster
+    modes = iter(['exact', 'analytic'])
+
+    def request(df, periods, freq, wait=None, uncertainty=None):
+        future = pd.DataFrame({"ds": pd.date_range(now, periods=periods + 1, freq=freq)[1:]})
+        future["yhat"], future["yhat_lower"], future["yhat_upper"] = 10.0, 5.0, 15.0
+        metrics = {"uncertainty": {"mode": next(modes), "requested": uncertainty}}
+        return SimpleNamespace(status='done', ready=True, forecast=future, metrics=metrics, error=None)
+
+    monkeypatch.setattr(analytics.forecast_executor, 'request', request)
+    result = service.get_quarterly_demand_forecast(uncertainty='exact')
+    assert result["uncertainty"]["mode"] == "analytic"
+    assert result["uncertainty"]["requested"] == "exact"
+
+    # The cached forecast does not satisfy the next exact request
+    modes = iter(['exact', 'exact'])
+    assert service.get_quarterly_demand_forecast(uncertainty='exact')["uncertainty"]["mode"] == "exact"
+    assert service.get_quarterly_demand_forecast(uncertainty='sampled')["uncertainty"]["mode"] == "exact"
+
+
+def test_category_forecast_trends_and_priorities():
+    import pandas as pd
+    from datetime import datetime, timedelta
+
+    now = datetime.now()
+    history = pd.DataFrame({
+        "date": [now - timedelta(days=d) for d in (5, 45, 5, 45, 5, 45)],
+        "category": ["Silk", "Silk", "Cotton", "Cotton", "Linen", " "],
+        "revenue": [900.0, 300.0, 100.0, 500.0, 50.0, 10.0],
+        "quantity_sold": [9, 3, 1, 5, 1, 1],
+    })
+    forecast = pd.DataFrame({"ds": [now + timedelta(days=i) for i in range(1, 11)], "yhat": [186.0] * 10})
+
+    service = SalesAnalyticsService.__new__(SalesAnalyticsService)
+    service.shop_id = 1
+    result = {row["category"]: row for row in service._generate_category_forecast(history, forecast)}
+
+    assert set(result) == {"Silk", "Cotton", "Linen"}  # blank category skipped
+    assert result["Silk"]["trend"] == "up" and result["Silk"]["priority"] == 100
+    assert result["Cotton"]["trend"] == "down" and result["Cotton"]["growth_rate"] == -80.0
+    assert result["Linen"]["trend"] == "up" and result["Linen"]["growth_rate"] == 100
+    assert result["Silk"]["predicted_revenue"] == round(1860 * 1200 / 1860, 2)
+    assert list(result)[0] == "Silk"
@@ -0,0 +1,169 @@
+import time
+import pytest
+import pandas as pd
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from services.forecast_executor import ForecastExecutor, ForecastBusyError, series_fingerprint
+
+
+# Job functions run in worker processes, so they must be importable top-level functions
+def fast_job(df, periods, freq, uncertainty=None):
+    future = pd.DataFrame({
+        "ds": pd.date_range(df["ds"].max(), periods=periods + 1, freq=freq)[1:],
+        "yhat": float(df["y"].mean()),
+    })
+    return future, {"forecast_time_seconds": 0.0, "uncertainty": {"mode": uncertainty}}
+
+
+def slow_job(df, periods, freq, uncertainty=None):
+    time.sleep(2)
+    return fast_job(df, periods, freq)
+
+
+def failing_job(df, periods, freq, uncertainty=None):
+    raise ValueError("not enough data")
+
+
+def _series(offset=0.0, rows=30):
+    return pd.DataFrame({
+        "ds": pd.date_range("2024-01-01", periods=rows, freq="D"),
+        "y": [float(i) + offset for i in range(rows)],
+    })
+
+
+@pytest.fixture
+def make_executor():
+    executors = []
+
+    def factory(**kwargs):
+        kwargs.setdefault("start_method", "fork")
+        executor = ForecastExecutor(**kwargs)
+        executors.append(executor)
+        return executor
+
+    yield factory
+    for executor in executors:
+        executor.shutdown(wait=False)
+
+
+def test_fingerprint_covers_whole_series():
+    base = _series()
+    changed = base.copy()
+    changed.loc[15, "y"] += 1  # same length, same endpoints
+
+    assert series_fingerprint(base, 30, "D") == series_fingerprint(_series(), 30, "D")
+    assert series_fingerprint(base, 30, "D") != series_fingerprint(changed, 30, "D")
+    assert series_fingerprint(base, 30, "D") != series_fingerprint(base, 7, "D")
+
+
+def test_forecast_runs_in_pool_and_caches_result(make_executor):
+    executor = make_executor(job=fast_job)
+    forecast, metrics = executor.forecast(_series(), periods=5)
+
+    assert len(forecast) == 5
+    assert executor.request(_series(), periods=5).ready
+    stats = executor.stats()
+    assert stats["submitted"] == 1
+    assert stats["completed"] == 1
+    assert stats["result_hits"] == 1
+
+
+def test_identical_requests_share_one_job(make_executor):
+    executor = make_executor(job=slow_job)
+    first = executor.request(_series(), wait=0)
+    second = executor.request(_series(), wait=0)
+
+    assert first.status == second.status == "computing"
+    assert first.key == second.key
+    assert executor.stats()["submitted"] == 1
+    assert executor.stats()["deduplicated"] == 1
+
+
+def test_inflight_cap_rejects_new_series(make_executor):
+    executor = make_executor(job=slow_job, max_workers=1, max_inflight=1)
+    executor.request(_series(), wait=0)
+
+    assert executor.request(_series(offset=1), wait=0).status == "busy"
+    with pytest.raises(ForecastBusyError):
+        executor.forecast(_series(offset=2))
+
+
+def test_timed_out_job_is_abandoned(make_executor):
+    executor = make_executor(job=slow_job, max_workers=1, timeout=0.5)
+    assert executor.request(_series(), wait=0).status == "computing"
+    time.sleep(0.8)
+
+    result = executor.request(_series(), wait=0)
+    assert result.status == "failed"
+    assert "timed out" in result.error
+    stats = executor.stats()
+    assert stats["timed_out"] == 1
+    assert stats["pool_restarts"] == 1
+    assert stats["workers"] == 0  # the recycled pool's workers were terminated by PID
+
+
+def test_timeout_counts_from_when_the_job_starts(make_executor):
+    # One worker: the second job waits ~2s in the queue before it runs
+    executor = make_executor(job=slow_job, max_workers=1, timeout=3)
+    executor.request(_series(), wait=0)
+    second = executor.request(_series(offset=1), wait=0)
+    time.sleep(3.3)  # past the timeout since submission, ~1.3s since the second job started
+
+    stats = executor.stats()
+    assert stats["timed_out"] == 0
+    assert stats["running"] == 1 and stats["workers"] == 1
+    assert executor.request(_series(offset=1), wait=2).key == second.key
+    assert executor.stats()["completed"] == 2
+
+
+def test_failed_job_reports_error(make_executor):
+    executor = make_executor(job=failing_job)
+    result = executor.request(_series(), wait=5)
+
+    assert result.status == "failed"
+    assert "not enough data" in result.error
+    with pytest.raises(ValueError):
+        executor.forecast(_series())
+
+
+def test_uncertainty_tier_is_part_of_the_job_key(make_executor):
+    executor = make_executor(job=fast_job)
+    sampled = executor.request(_series(), periods=5, wait=5, uncertainty="sampled")
+    exact = executor.request(_series(), periods=5, wait=5, uncertainty="exact")
+
+    assert sampled.key != exact.key
+    assert exact.metrics["uncertainty"]["mode"] == "exact"
+    assert executor.stats()["submitted"] == 2
+
+
+def test_forecast_many_respects_inflight_cap(make_executor):
+    executor = make_executor(job=fast_job, max_workers=2, max_inflight=2)
+    frames = {f"product-{i}": _series(offset=i) for i in range(6)}
+    frames["duplicate"] = _series(offset=0)
+
+    results = executor.forecast_many(frames, periods=3)
+
+    assert set(results) == set(frames)
+    assert all(len(forecast) == 3 for forecast, _ in results.values())
+    assert executor.stats()["submitted"] == 6
+
+
+def test_request_many_waits_once_then_reports_computing(make_executor):
+    executor = make_executor(job=slow_job, max_workers=2, max_inflight=2)
+    frames = {"a": _series(), "b": _series(offset=1), "c": _series(offset=2)}
+
+    started = time.perf_counter()
+    results = executor.request_many(frames, periods=3, wait=0.2)
+    assert time.perf_counter() - started < 1
+    assert {name: job.status for name, job in results.items()} == {"a": "computing", "b": "computing", "c": "busy"}
+
+    results = executor.request_many({"a": _series(), "b": _series(offset=1)}, periods=3, wait=5)
+    assert all(job.ready for job in results.values())
+
+
+def test_forecast_many_reports_failures_per_series(make_executor):
+    executor = make_executor(job=failing_job)
+    results = executor.forecast_many({"a": _series(), "b": _series(offset=1)})
+    assert all(isinstance(outcome, ValueError) for outcome in results.values())
@@ -0,0 +1,113 @@
+import pytest
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from models.model import db, CachedForecast, ForecastPrecomputeRun, ForecastPrecomputeShopLog
+from services.sales_ingest_service import ingest_sales_dataframe
+from utils.data_version import bump_data_version
+from services.sales_analytics_service import SalesAnalyticsService
+from services.forecast_precompute_service import (
+    ForecastPrecomputeScheduler, run_precompute, shops_due_for_precompute, start_run,
+)
+
+
+@pytest.fixture
+def database_uri(tmp_path):
+    # File database: precompute jobs run on worker threads with their own connections
+    return f"sqlite:///{tmp_path / 'precompute.db'}"
+
+
+@pytest.fixture
+def app(app, make_shop, make_product):
+    make_product(make_shop(), 'Product', sku='SKU-0', category='Silk', stock=1000)
+    db.session.commit()
+    return app
+
+
+def _ingest(days):
+    today = date.today()
+    df = pd.DataFrame([
+        ((today - timedelta(days=d)).isoformat(), 'SKU-0', 2, 200, 'North') for d in range(1, days + 1)
+    ], columns=['date', 'sku', 'quantity_sold', 'revenue', 'region'])
+    df['date'] = pd.to_datetime(df['date'])
+    ingest_sales_dataframe(df, shop_id=1)
+    bump_data_version(1, sales=True)
+    db.session.commit()
+
+
+def test_run_refreshes_changed_shops_and_logs_durations(app):
+    _ingest(3)
+    assert shops_due_for_precompute() == [1]
+
+    result = run_precompute(trigger='manual')
+    assert result['status'] == 'completed'
+    assert result['shops_considered'] == 1
+    assert result['shops_refreshed'] == 1
+
+    log = ForecastPrecomputeShopLog.query.one()
+    assert log.status == 'success'
+    assert log.duration_ms is not None
+    assert 'sales_summary' in log.forecast_types.split(',')
+    assert CachedForecast.query.filter_by(shop_id=1, forecast_type='sales_summary').count() == 1
+
+    # Unchanged sales: nothing to do next time, and dashboards read the cache
+    assert shops_due_for_precompute() == []
+    summary = SalesAnalyticsService(1).get_weekly_sales_summary()
+    assert summary['metrics']['total_revenue'] == 600
+
+    _ingest(4)  # new upload bumps the sales version
+    assert shops_due_for_precompute() == [1]
+
+
+def test_only_one_run_at_a_time(app):
+    assert start_run('manual') is not None
+    assert start_run('schedule') is None
+    assert run_precompute(trigger='schedule') is None
+
+
+def test_run_slot_is_claimed_by_the_insert(app, monkeypatch):
+    import services.forecast_precompute_service as precompute
+
+    first = start_run('manual')
+    # A worker that read "no active run" just before the first insert committed
+    monkeypatch.setattr(precompute, 'get_active_run', lambda: None)
+    assert start_run('schedule') is None
+    assert ForecastPrecomputeRun.query.count() == 1
+
+    # A run that died with its process frees the slot once it is too old
+    first.started_at = datetime.utcnow() - precompute.ACTIVE_RUN_MAX_AGE - timedelta(minutes=1)
+    db.session.commit()
+    assert start_run('schedule') is not None
+    db.session.refresh(first)
+    assert first.status == 'failed' and first.active_lock is None
+
+
+def test_scheduler_runs_once_per_day_inside_window(app, tmp_path):
+    three_am = lambda: datetime.combine(date.today(), time(3, 0))
+    scheduler = ForecastPrecomputeScheduler(window='02:00-05:00', check_seconds=60,
+                                            lock_path=str(tmp_path / 'lock'), clock=three_am)
+    assert scheduler.in_window()
+    assert not scheduler.in_window(datetime(2024, 1, 1, 12, 0))
+    assert ForecastPrecomputeScheduler(window='23:00-01:00').in_window(datetime(2024, 1, 1, 0, 30))
+
+    assert scheduler.tick()['status'] == 'completed'
+    assert scheduler.tick() is None
+    assert ForecastPrecomputeRun.query.count() == 1
+    assert ForecastPrecomputeRun.query.one().active_lock is None
+
+
+def test_one_scheduler_leads_across_workers(tmp_path):
+    lock_path = str(tmp_path / 'lock')
+    first = ForecastPrecomputeScheduler(lock_path=lock_path)
+    second = ForecastPrecomputeScheduler(lock_path=lock_path)
+
+    assert first.acquire_leadership()
+    assert first.acquire_leadership()
+    assert not second.acquire_leadership()
+    first.release_leadership()
+    assert second.acquire_leadership()
+    second.release_leadership()
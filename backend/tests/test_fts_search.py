@@ -0,0 +1,60 @@
+import pytest
+from pathlib import Path
+import sys
+
+from sqlalchemy import text
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from models.model import db, Product, ProductCatalog
+from utils.fts_search import apply_text_search, build_match_query, rebuild_fts_index
+
+
+@pytest.fixture
+def app(app, make_shop, make_product):
+    shop = make_shop('Banarasi Silk House', city='Varanasi')
+    make_product(shop, 'Silk Saree', sku='S1', category='Saree', description='Pure silk', price=100)
+    make_product(shop, 'Cotton Kurta', sku='S2', category='Kurta', description='Soft cotton with silk border', price=100)
+    make_product(shop, 'Linen Shirt', sku='S3', category='Shirt', description='Summer wear', price=100)
+    db.session.add(ProductCatalog(product_id='C1', product_name='Blue Denim Jeans'))
+    db.session.commit()
+    return app
+
+
+def _names(query):
+    return [p.name for p in query.all()]
+
+
+def test_match_ranks_name_hits_first(app):
+    results = _names(apply_text_search(Product.query, Product, 'products_fts', 'silk'))
+    assert results == ['Silk Saree', 'Cotton Kurta']
+
+
+def test_prefix_and_multi_word_match(app):
+    assert _names(apply_text_search(Product.query, Product, 'products_fts', 'cott kur')) == ['Cotton Kurta']
+    assert [c.product_name for c in apply_text_search(
+        ProductCatalog.query, ProductCatalog, 'product_catalog_fts', 'denim').all()] == ['Blue Denim Jeans']
+
+
+def test_triggers_track_updates_and_deletes(app):
+    shirt = Product.query.filter_by(sku='S3').first()
+    shirt.name = 'Silk Shirt'
+    db.session.delete(Product.query.filter_by(sku='S1').first())
+    db.session.commit()
+
+    assert _names(apply_text_search(Product.query, Product, 'products_fts', 'silk')) == ['Silk Shirt', 'Cotton Kurta']
+    assert _names(apply_text_search(Product.query, Product, 'products_fts', 'linen')) == []
+
+
+def test_rebuild_backfills_rows_written_without_triggers(app):
+    db.session.execute(text("DROP TRIGGER products_fts_ai"))
+    db.session.execute(text("INSERT INTO products (name, sku, shop_id, price) VALUES ('Wool Shawl', 'S4', 1, 0)"))
+    db.session.commit()
+    assert _names(apply_text_search(Product.query, Product, 'products_fts', 'wool')) == []
+
+    assert 'products_fts' in rebuild_fts_index()
+    assert _names(apply_text_search(Product.query, Product, 'products_fts', 'wool')) == ['Wool Shawl']
+
+
+def test_match_query_escapes_operators():
+    assert build_match_query('silk OR "x" -y') == '"silk"* "or"* "x"* "y"*'
+    assert build_match_query('  ;; ') is None
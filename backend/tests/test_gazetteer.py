@@ -0,0 +1,43 @@
+import time
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from utils.gazetteer import Gazetteer, GazetteerEntry, city_coordinates, get_gazetteer
+
+
+def test_bundled_gazetteer_resolves_names_aliases_and_spellings():
+    gazetteer = get_gazetteer()
+    assert len(gazetteer) > 100
+
+    assert gazetteer.lookup('Chennai').name == 'Chennai'
+    assert gazetteer.lookup('  MADRAS ').name == 'Chennai'
+    assert gazetteer.lookup('Bangalore').name == 'Bengaluru'
+    assert gazetteer.lookup('मुंबई').name == 'Mumbai'
+    # Transliteration variants resolve through the phonetic index
+    assert gazetteer.lookup('Vishakapatnam').name == 'Visakhapatnam'
+    assert gazetteer.lookup('Kancheepuram').name == 'Kanchipuram'
+    assert gazetteer.lookup('Tiruchirapalli').name == 'Tiruchirappalli'
+
+    assert gazetteer.resolve('12 MG Road, Coimbatore, Tamil Nadu').name == 'Coimbatore'
+    assert gazetteer.resolve('Hydrabad').name == 'Hyderabad'
+    assert gazetteer.resolve('Hydrabad', fuzzy=False) is None
+    assert gazetteer.resolve('Atlantis') is None
+
+    assert city_coordinates('North') == {'lat': 28.6139, 'lon': 77.2090}
+    assert city_coordinates('') is None
+
+
+def test_fuzzy_lookup_is_sub_millisecond():
+    gazetteer = get_gazetteer()
+    queries = ['Luknow', 'Ahmadabad', 'Coimbator', 'Jaipoor', 'Tirupur city', 'Guwhati'] * 50
+    start = time.perf_counter()
+    for query in queries:
+        assert gazetteer.resolve(query) is not None
+    assert (time.perf_counter() - start) / len(queries) < 0.001
+
+
+def test_custom_entries():
+    gazetteer = Gazetteer([(GazetteerEntry('Erode', 'Tamil Nadu', 11.34, 77.72, 'city'), ['Erodu'])])
+    assert gazetteer.lookup('erodu').lat == 11.34
+    assert gazetteer.lookup('Chennai') is None
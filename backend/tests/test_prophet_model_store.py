@@ -0,0 +1,96 @@
+import pytest
+import numpy as np
+import pandas as pd
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from utils.prophet_model_store import ProphetModelStore
+from services.prophet_service import TextileProphetManager
+
+
+def _stan_backend_available():
+    try:
+        from prophet import Prophet
+        Prophet()
+        return True
+    except Exception:
+        return False
+
+
+def _series(rows=60, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "ds": pd.date_range("2024-01-01", periods=rows, freq="D"),
+        "y": 100 + rng.normal(0, 5, rows),
+    })
+
+
+def test_store_persists_across_instances(tmp_path):
+    path = str(tmp_path / "models.sqlite")
+    ProphetModelStore(path).put("abc", '{"model": 1}')
+
+    reopened = ProphetModelStore(path)
+    assert reopened.get("abc") == '{"model": 1}'
+    assert reopened.get("missing") is None
+    assert reopened.stats()["hits"] == 1
+
+
+def test_store_evicts_least_recently_used(tmp_path):
+    store = ProphetModelStore(str(tmp_path / "models.sqlite"), max_entries=2)
+    store.put("a", "1")
+    store.put("b", "2")
+    store.get("a")  # a is now more recent than b
+    store.put("c", "3")
+
+    assert store.get("b") is None
+    assert store.get("a") == "1"
+    assert store.get("c") == "3"
+
+
+def test_store_respects_byte_limit(tmp_path):
+    store = ProphetModelStore(str(tmp_path / "models.sqlite"), max_bytes=25)
+    store.put("a", "x" * 10)
+    store.put("b", "x" * 10)
+    store.put("c", "x" * 10)
+
+    stats = store.stats()
+    assert stats["entries"] == 2
+    assert stats["bytes"] <= 25
+
+
+def test_fingerprint_changes_with_any_value():
+    manager = TextileProphetManager(model_store=None)
+    base = _series()
+    changed = base.copy()
+    changed.loc[10, "y"] += 0.5  # outside the last rows the old hash looked at
+
+    assert manager._generate_data_hash(base) == manager._generate_data_hash(_series())
+    assert manager._generate_data_hash(base) != manager._generate_data_hash(changed)
+
+
+@pytest.mark.skipif(not _stan_backend_available(), reason="Prophet Stan backend not installed")
+def test_new_manager_reuses_stored_fit(tmp_path):
+    store = ProphetModelStore(str(tmp_path / "models.sqlite"))
+    _, first = TextileProphetManager(model_store=store).forecast_sales(_series(), periods=7)
+    assert first["model_source"] == "fit"
+
+    # A fresh manager (another worker or a restart) loads the model instead of refitting
+    forecast, second = TextileProphetManager(model_store=store).forecast_sales(_series(), periods=7)
+    assert second["model_source"] == "store"
+    assert second["model_cached"] is True
+    assert len(forecast) == 7
+    assert store.stats()["entries"] == 1
+
+
+@pytest.mark.skipif(not _stan_backend_available(), reason="Prophet Stan backend not installed")
+def test_uncertainty_tiers_are_labelled(tmp_path):
+    manager = TextileProphetManager(model_store=ProphetModelStore(str(tmp_path / "models.sqlite")))
+    series = _series(rows=120)
+    for mode, samples in (("exact", 1000), ("sampled", 100), ("analytic", 0)):
+        forecast, metrics = manager.forecast_sales(series, periods=14, model="prophet", uncertainty=mode)
+        assert metrics["uncertainty"]["mode"] == mode
+        assert metrics["uncertainty"]["samples"] == samples
+        assert (forecast["yhat_lower"] <= forecast["yhat_upper"]).all()
+    # The shared model keeps its configured draws for exact requests
+    assert next(iter(manager.model_cache.values())).uncertainty_samples == 1000
@@ -0,0 +1,89 @@
+import io
+from pathlib import Path
+import sys
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from services.regional_demand_service import (
+    UploadSnapshotStore, UploadSnapshotNotFound, load_regional_upload, parse_filters, region_summary,
+)
+from services.forecasting_service import forecast_sales
+from utils.file_processing_utils import FileProcessingError
+
+CSV = (
+    "Date,Region,Product,Sales,Quantity\n"
+    "2024-01-05,Chennai,Silk,100,2\n"
+    "2024-01-20,Chennai,Cotton,300,6\n"
+    "2024-02-03,Mumbai,Silk,50,1\n"
+    "2024-02-10, mumbai ,Silk,70,1\n"
+)
+
+
+def _file(text=CSV):
+    return FileStorage(stream=io.BytesIO(text.encode()), filename='sales.csv')
+
+
+def test_same_content_is_parsed_once_and_snapshotted(tmp_path):
+    store = UploadSnapshotStore(root=str(tmp_path))
+    first = load_regional_upload(file=_file(), store=store)
+    assert first.source == 'parsed'
+
+    again = load_regional_upload(file=_file(), store=store)
+    assert again.source == 'memory'
+    assert again.file_hash == first.file_hash
+
+    # A fresh process reads the columnar snapshot instead of the CSV
+    restarted = UploadSnapshotStore(root=str(tmp_path))
+    by_hash = load_regional_upload(file_hash=first.file_hash, store=restarted)
+    assert by_hash.source == 'snapshot'
+    assert by_hash.rows['Sales'].sum() == 520
+    assert restarted.stats()['parses'] == 0
+
+    assert load_regional_upload(file=_file(CSV + "2024-02-11,Pune,Silk,1,1\n"), store=store).source == 'parsed'
+    with pytest.raises(UploadSnapshotNotFound):
+        load_regional_upload(file_hash='0' * 40 + '-v1', store=restarted)
+
+
+@pytest.mark.parametrize('file_hash', [
+    '../../../etc', '../' + '0' * 40 + '-v1', '0' * 40 + '-v1/../..', '/tmp', '0' * 40 + '-v0', 'A' * 40 + '-v1',
+])
+def test_malformed_hashes_never_reach_the_filesystem(tmp_path, monkeypatch, file_hash):
+    store = UploadSnapshotStore(root=str(tmp_path / 'snapshots'))
+    (tmp_path / 'etc').mkdir()
+    touched = []
+    monkeypatch.setattr('os.path.isdir', lambda path: touched.append(path) or True)
+
+    with pytest.raises(FileProcessingError):
+        load_regional_upload(file_hash=file_hash, store=store)
+    with pytest.raises(ValueError):
+        store.get(file_hash)
+    assert touched == []
+
+
+def test_filters_are_served_from_the_snapshot(tmp_path):
+    upload = load_regional_upload(file=_file(), store=UploadSnapshotStore(root=str(tmp_path)))
+
+    everything = region_summary(upload, parse_filters({})).set_index('Region')
+    assert everything.loc['Chennai', 'Sales'] == 400
+    assert everything.loc['Chennai', 'TopProduct'] == 'Cotton'
+    assert everything.loc['Mumbai', 'Quantity'] == 1  # 'mumbai' is a different raw region
+
+    silk = region_summary(upload, parse_filters({'product': 'silk'})).set_index('Region')
+    assert silk.loc['Chennai', 'Sales'] == 100
+
+    february = region_summary(upload, parse_filters({'start_date': '2024-02-01'}))
+    assert set(february['Region']) == {'Mumbai', 'mumbai'}
+
+    with pytest.raises(ValueError):
+        parse_filters({'end_date': 'not a date'})
+
+
+def test_upload_rows_feed_the_per_product_forecast(tmp_path):
+    rows = "".join(f"2024-01-{d:02d},Chennai,Silk,{100 + d},2\n" for d in range(1, 15))
+    upload = load_regional_upload(file=_file(CSV + rows), store=UploadSnapshotStore(root=str(tmp_path)))
+
+    forecasts = forecast_sales(upload.rows)
+    assert [(f["product"], f["status"]) for f in forecasts] == [("Silk", "ready")]  # Cotton has too few rows
+    assert len(forecasts[0]["forecast"]) == 4
@@ -0,0 +1,93 @@
+import pytest
+from datetime import date
+from pathlib import Path
+import sys
+
+import pandas as pd
+from sqlalchemy import event
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from models.model import db, Inventory, SalesData
+from services.sales_ingest_service import ingest_sales_dataframe
+
+
+@pytest.fixture
+def app(app, make_shop, make_product):
+    shop = make_shop()
+    for i, stock in enumerate([100, 5, 50]):
+        make_product(shop, f'Product {i}', sku=f'SKU-{i}', stock=stock)
+    # Already uploaded: SKU-0 sold 10 on Jan 1
+    db.session.add(SalesData(shop_id=shop.id, product_id=1, date=date(2024, 1, 1), quantity_sold=10, revenue=100))
+    db.session.commit()
+    return app
+
+
+def _upload(rows):
+    df = pd.DataFrame(rows, columns=['date', 'sku', 'quantity_sold', 'selling_price', 'category'])
+    df['date'] = pd.to_datetime(df['date'])
+    df['revenue'] = df['quantity_sold'] * df['selling_price']
+    return df
+
+
+def test_upsert_applies_deltas_and_inventory(app):
+    df = _upload([
+        ('2024-01-01', 'SKU-0', 12, 10, 'Silk'),   # re-upload: +2 over stored 10
+        ('2024-01-02', 'SKU-0', 3, 10, 'Silk'),    # new row
+        ('2024-01-01', 'SKU-1', 8, 20, 'Cotton'),  # more than stock: clamps at 0
+        ('2024-01-01', 'SKU-9', 4, 20, 'Cotton'),  # unknown SKU is skipped
+    ])
+    updates, matched = ingest_sales_dataframe(df, shop_id=1)
+    db.session.commit()
+
+    assert matched == 3
+    stored = {(s.product_id, s.date): s for s in SalesData.query.all()}
+    assert len(stored) == 3
+    assert stored[(1, date(2024, 1, 1))].quantity_sold == 12
+    assert float(stored[(1, date(2024, 1, 1))].revenue) == 120
+    assert stored[(1, date(2024, 1, 2))].fabric_type == 'Silk'
+
+    inv = {i.product_id: i for i in Inventory.query.all()}
+    assert (inv[1].qty_available, inv[1].total_sold) == (95, 5)
+    assert (inv[2].qty_available, inv[2].total_sold) == (0, 8)
+    assert inv[3].last_sales_data_at is None
+    assert [u['delta_quantity'] for u in updates] == [-2, -3, -8]
+
+
+def test_repeated_key_in_one_file_acts_like_successive_uploads(app):
+    df = _upload([
+        ('2024-01-05', 'SKU-2', 10, 1, None),
+        ('2024-01-05', 'SKU-2', 4, 1, None),
+    ])
+    updates, _ = ingest_sales_dataframe(df, shop_id=1)
+    db.session.commit()
+
+    assert SalesData.query.filter_by(product_id=3).one().quantity_sold == 4
+    assert Inventory.query.filter_by(product_id=3).one().qty_available == 46
+    assert [(u['old_stock'], u['new_stock']) for u in updates] == [(50, 40), (40, 46)]
+
+
+def test_stock_floor_applies_after_each_move(app):
+    # SKU-1 has 5 in stock: a sale of 10 empties it, then a correction down to 7 returns 3
+    df = _upload([
+        ('2024-01-06', 'SKU-1', 10, 1, None),
+        ('2024-01-06', 'SKU-1', 7, 1, None),
+    ])
+    updates, _ = ingest_sales_dataframe(df, shop_id=1)
+    db.session.commit()
+
+    assert [(u['old_stock'], u['new_stock']) for u in updates] == [(5, 0), (0, 3)]
+    assert Inventory.query.filter_by(product_id=2).one().qty_available == 3
+
+
+def test_query_count_is_independent_of_row_count(app):
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        rows = [(f'2024-02-{d:02d}', f'SKU-{d % 3}', d, 5, 'Silk') for d in range(1, 29)]
+        ingest_sales_dataframe(_upload(rows), shop_id=1)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    # 5 for the upsert itself, 3 for the rollup refresh (read, delete, insert)
+    assert sum(1 for s in statements if not s.startswith('PRAGMA')) <= 8
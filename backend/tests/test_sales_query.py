@@ -0,0 +1,54 @@
+import pytest
+import pandas as pd
+from datetime import date, timedelta
+from pathlib import Path
+import sys
+
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from models.model import db, SalesData
+from utils.sales_query import load_sales_frame
+from services.sales_analytics_service import SalesAnalyticsService, SALES_HISTORY_COLUMNS
+
+
+@pytest.fixture
+def app(app, make_shop, make_product):
+    shop = make_shop()
+    saree = make_product(shop, 'Saree', sku='SKU-1', price=100, category='Silk')
+    today = date.today()
+    db.session.add_all([
+        SalesData(date=today - timedelta(days=2), shop_id=shop.id, product_id=saree.id,
+                  quantity_sold=3, revenue=300, fabric_type='Cotton', region='North'),
+        # Row without a product keeps its own fabric_type as category
+        SalesData(date=today - timedelta(days=1), shop_id=shop.id, product_id=None,
+                  quantity_sold=None, revenue=50.5, fabric_type='Linen'),
+        SalesData(date=today - timedelta(days=200), shop_id=shop.id, product_id=saree.id,
+                  quantity_sold=1, revenue=100),
+    ])
+    db.session.commit()
+    return app
+
+
+def test_load_sales_frame_joins_products(app):
+    df = load_sales_frame(1, start_date=date.today() - timedelta(days=30))
+
+    assert len(df) == 2
+    assert str(df['date'].dtype).startswith('datetime64')
+    assert df['product_name'].tolist()[0] == 'Saree'
+    assert pd.isna(df['product_name'].tolist()[1])
+    assert df['category'].tolist() == ['Silk', 'Linen']
+    assert df['quantity_sold'].tolist() == [3, 0]
+    assert df['revenue'].tolist() == [300.0, 50.5]
+
+
+def test_load_sales_frame_empty_keeps_columns(app):
+    df = load_sales_frame(99)
+    assert df.empty
+    assert 'revenue' in df.columns
+
+
+def test_analytics_history_uses_joined_loader(app):
+    df = SalesAnalyticsService(1)._load_sales_data(days=90)
+    assert list(df.columns) == SALES_HISTORY_COLUMNS
+    assert df['revenue'].sum() == pytest.approx(350.5)
+
@@ -0,0 +1,55 @@
+import pytest
+import pandas as pd
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from services.sales_analytics_service import SalesQueryCache
+
+
+def _frame(rows=100):
+    return pd.DataFrame({"revenue": [float(i) for i in range(rows)], "region": ["North"] * rows})
+
+
+def test_hit_requires_same_version_and_args():
+    cache = SalesQueryCache()
+    cache.set(1, 3, "_load_sales_data", _frame(), 90)
+
+    assert cache.get(1, 3, "_load_sales_data", 90) is not None
+    assert cache.get(1, 4, "_load_sales_data", 90) is None
+    assert cache.get(1, 3, "_load_sales_data", 365) is None
+    assert cache.stats()["hits"] == 1
+
+
+def test_returned_frames_are_copies():
+    cache = SalesQueryCache()
+    cache.set(1, 1, "m", _frame())
+    cache.get(1, 1, "m")["revenue"] = 0
+    assert cache.get(1, 1, "m")["revenue"].sum() > 0
+
+
+def test_memory_cap_evicts_least_recently_used():
+    one = SalesQueryCache._sizeof(_frame())
+    cache = SalesQueryCache(max_bytes=int(one * 2.5))
+    cache.set(1, 1, "m", _frame())
+    cache.set(2, 1, "m", _frame())
+    cache.get(1, 1, "m")  # shop 1 is now most recent
+    cache.set(3, 1, "m", _frame())
+
+    assert cache.get(2, 1, "m") is None
+    assert cache.get(1, 1, "m") is not None
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["memory_bytes"] <= stats["max_bytes"]
+
+
+def test_new_version_and_invalidate_drop_shop_entries():
+    cache = SalesQueryCache()
+    cache.set(1, 1, "m", _frame(), 90)
+    cache.set(1, 2, "m", _frame(), 90)
+    assert cache.stats()["entries"] == 1
+
+    cache.set(2, 1, "m", _frame())
+    cache.invalidate(1)
+    assert cache.stats()["entries"] == 1
+    assert cache.get(2, 1, "m") is not None
@@ -0,0 +1,102 @@
+import pytest
+from datetime import date, timedelta
+from pathlib import Path
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from models.model import db, SalesData, SalesRollup
+from services.sales_ingest_service import ingest_sales_dataframe
+import services.sales_rollup_service as sales_rollup_service
+from services.sales_rollup_service import load_rollup_frame, rebuild_sales_rollups, period_start
+from services.sales_analytics_service import SalesAnalyticsService
+from utils.sales_query import load_sales_frame
+
+
+@pytest.fixture
+def app(app, make_shop, make_product, monkeypatch):
+    monkeypatch.setattr(sales_rollup_service, '_checked_shops', set())
+    shop = make_shop()
+    for i, category in enumerate(['Silk', 'Cotton']):
+        make_product(shop, f'Product {i}', sku=f'SKU-{i}', category=category, stock=1000)
+    db.session.commit()
+    return app
+
+
+def _ingest(rows):
+    df = pd.DataFrame(rows, columns=['date', 'sku', 'quantity_sold', 'revenue', 'region'])
+    df['date'] = pd.to_datetime(df['date'])
+    ingest_sales_dataframe(df, shop_id=1)
+    db.session.commit()
+
+
+def _assert_rollups_match_raw():
+    raw = load_sales_frame(1)
+    for grain in SalesRollup.GRAINS:
+        rollup = load_rollup_frame(1, grain, by_dimension=False)
+        expected = raw.assign(
+            date=pd.to_datetime([period_start(d.date(), grain) for d in raw['date']])
+        ).groupby('date').agg(revenue=('revenue', 'sum'), row_count=('revenue', 'size')).reset_index()
+        assert rollup['date'].tolist() == expected['date'].tolist()
+        assert rollup['revenue'].tolist() == pytest.approx(expected['revenue'].tolist())
+        assert rollup['row_count'].tolist() == expected['row_count'].tolist()
+
+
+def test_upserts_keep_rollups_in_sync(app):
+    # Spans a month and an ISO-week boundary
+    _ingest([
+        ('2024-01-29', 'SKU-0', 2, 20, 'North'),
+        ('2024-01-31', 'SKU-1', 1, 10, None),
+        ('2024-02-01', 'SKU-0', 3, 30, 'North'),
+        ('2024-02-05', 'SKU-1', 4, 40, 'South'),
+    ])
+    _assert_rollups_match_raw()
+
+    # Re-upload of one day replaces its contribution everywhere
+    _ingest([('2024-01-31', 'SKU-1', 5, 50, None)])
+    _assert_rollups_match_raw()
+
+    week = load_rollup_frame(1, 'week', start_date=date(2024, 1, 29), end_date=date(2024, 1, 29))
+    assert sorted(week['category'].tolist()) == ['Cotton', 'Silk']
+    assert week.loc[week['category'] == 'Cotton', 'region'].isna().all()
+
+    before = len(SalesRollup.query.all())
+    SalesRollup.query.delete()
+    db.session.commit()
+    assert rebuild_sales_rollups() == before
+    _assert_rollups_match_raw()
+
+
+def test_weekly_summary_reads_rollups(app):
+    today = date.today()
+    _ingest([
+        ((today - timedelta(days=1)).isoformat(), 'SKU-0', 2, 200, 'North'),
+        ((today - timedelta(days=2)).isoformat(), 'SKU-1', 1, 100, 'North'),
+        ((today - timedelta(days=10)).isoformat(), 'SKU-0', 1, 100, 'North'),
+    ])
+    summary = SalesAnalyticsService(1).get_weekly_sales_summary()
+
+    assert summary['metrics']['total_revenue'] == 300
+    assert summary['metrics']['total_orders'] == 2
+    assert summary['comparison']['previous_revenue'] == 100
+    assert [p['name'] for p in summary['top_products']] == ['Product 0', 'Product 1']
+
+    trend = SalesAnalyticsService(1).get_sales_growth_trend('weekly')
+    assert trend['total_revenue'] == 300
+    assert trend['comparison']['previous_total'] == 100
+
+
+def test_reads_backfill_shops_without_rollups(app):
+    # Sales written before rollups existed (not through the upsert path)
+    today = date.today()
+    for days_ago, product_id, revenue in [(1, 1, 200), (2, 2, 100), (10, 1, 100)]:
+        db.session.add(SalesData(shop_id=1, product_id=product_id, date=today - timedelta(days=days_ago),
+                                 quantity_sold=1, revenue=revenue))
+    db.session.commit()
+    assert SalesRollup.query.count() == 0
+
+    summary = SalesAnalyticsService(1).get_weekly_sales_summary()
+    assert summary['metrics']['total_revenue'] == 300
+    assert summary['comparison']['previous_revenue'] == 100
+    _assert_rollups_match_raw()
@@ -0,0 +1,95 @@
+import os
+import pytest
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from utils.sales_store import SalesFrameStore, ColumnWriter, read_columns
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SalesFrameStore(root=str(tmp_path), max_entries=2)
+
+
+def _frame():
+    return pd.DataFrame({
+        "date": pd.to_datetime(["2024-01-01", "2024-01-02", "2024-01-03"]),
+        "sku": ["007", None, "009"],
+        "quantity_sold": [1.0, 2.0, 3.0],
+        "revenue": [10.0, 20.0, 30.0],
+    })
+
+
+def test_roundtrip_keeps_types_and_missing_text(store):
+    store.write(1, _frame())
+    df = store.read(1)
+
+    assert str(df["date"].dtype) == "datetime64[ns]"
+    assert df["revenue"].dtype == np.float64
+    assert df["sku"].tolist() == ["007", None, "009"]
+    pd.testing.assert_frame_equal(df, _frame())
+
+
+def test_reads_are_read_only_views_of_the_mapped_files(store, tmp_path):
+    store.write(1, _frame())
+    first = store.read(1)
+    base = first["revenue"].to_numpy()
+    while base.base is not None and not isinstance(base, np.memmap):
+        base = base.base
+    assert isinstance(base, np.memmap)
+    with pytest.raises(ValueError):
+        first.loc[0, "revenue"] = 0
+    # Replacing or adding columns only touches the caller's frame
+    first["revenue"] = 0
+    first["extra"] = 1
+    again = store.read(1)
+    assert again["revenue"].sum() == 60 and "extra" not in again.columns
+    assert store.stats()["hits"] == 1
+
+    # A write from another process is picked up through the CURRENT pointer
+    other = SalesFrameStore(root=str(tmp_path))
+    other.write(1, _frame().head(1))
+    assert len(store.read(1)) == 1
+
+
+def test_eviction_and_missing_shop(store):
+    for shop_id in (1, 2, 3):
+        store.write(shop_id, _frame())
+        store.read(shop_id)
+    assert store.stats()["entries"] == 2
+    assert store.read(99) is None
+
+
+def test_chunked_writes_match_a_single_write(tmp_path):
+    chunks = [
+        pd.DataFrame({"qty": [1, 2], "note": [np.nan, np.nan], "sku": ["a", None]}),
+        pd.DataFrame({"qty": [2.5, 3.0], "note": ["x", "y"], "sku": ["b", "a"]}),
+    ]
+    writer = ColumnWriter(str(tmp_path / "chunked"))
+    for chunk in chunks:
+        writer.append(chunk)
+    assert writer.close() == 4
+
+    df = read_columns(str(tmp_path / "chunked"))
+    assert df["qty"].tolist() == [1.0, 2.0, 2.5, 3.0]  # int chunk widened to float
+    assert df["note"].tolist() == [None, None, "x", "y"]  # became text after an all-NaN chunk
+    assert df["sku"].tolist() == ["a", None, "b", "a"]
+
+
+def test_interleaved_writers_do_not_remove_each_other(store):
+    store.write(1, _frame())
+    first = store.begin_write(1)
+    second = store.begin_write(1)
+    first.append(_frame().iloc[:1])
+    second.append(_frame().iloc[:2])
+
+    store.publish(1, second)
+    first.append(_frame().iloc[1:])  # still filling after the other upload published
+    store.publish(1, first)
+
+    assert store.read(1)["revenue"].tolist() == [10.0, 20.0, 30.0]
+    assert sorted(os.listdir(store._dataset_dir(1, "upload"))) == sorted(["CURRENT", first.version])
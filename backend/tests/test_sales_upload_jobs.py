@@ -0,0 +1,138 @@
+import pytest
+import io
+import time
+from pathlib import Path
+import sys
+
+from flask import Flask
+from sqlalchemy import text
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from models.model import db, User, Shop, Product, Inventory, SalesUploadLog
+from utils.auth_utils import generate_jwt
+import routes.shop_routes as shop_routes
+import utils.inventory_utils as inventory_utils
+
+CSV = b"date,sku,product_name,category,quantity_sold,selling_price\n2024-01-01,SKU-1,Saree,Silk,3,100\n2024-01-02,SKU-1,Saree,Silk,2,100\n"
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(shop_routes, "INSTANCE_FOLDER", str(tmp_path))
+    monkeypatch.setattr(shop_routes.sales_store, "root", str(tmp_path / "store"))
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    # File database: background workers use their own connections
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'jobs.db'}"
+    db.init_app(app)
+    app.register_blueprint(shop_routes.shop_bp, url_prefix='/shop')
+    with app.app_context():
+        db.create_all()
+        owner = User(full_name='Owner', username='owner', password='x', role='shop_owner', approved=True)
+        db.session.add(owner)
+        db.session.flush()
+        shop = Shop(name='Shop', owner_id=owner.id)
+        db.session.add(shop)
+        db.session.flush()
+        product = Product(name='Saree', sku='SKU-1', price=100, shop_id=shop.id)
+        db.session.add(product)
+        db.session.flush()
+        db.session.add(Inventory(product_id=product.id, qty_available=20))
+        db.session.commit()
+        token = generate_jwt(owner)
+    client = app.test_client()
+    client.environ_base['HTTP_AUTHORIZATION'] = f"Bearer {token}"
+    yield client, app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+def _post(client, body, **form):
+    data = {"shop_id": "1", "file": (io.BytesIO(body), "sales.csv"), **form}
+    return client.post('/shop/upload_sales_data', data=data, content_type='multipart/form-data')
+
+
+def test_async_upload_returns_job_and_completes(client):
+    client, app = client
+    resp = _post(client, CSV, **{"async": "true"})
+    assert resp.status_code == 202
+    job_id = resp.get_json()["job_id"]
+
+    for _ in range(100):
+        log = client.get(f'/shop/upload_sales_data/jobs/{job_id}').get_json()
+        if log["done"]:
+            break
+        time.sleep(0.05)
+
+    assert log["upload_log"]["status"] == "completed"
+    assert log["upload_log"]["phase"] == "done"
+    assert log["upload_log"]["rows_processed"] == 2
+    with app.app_context():
+        assert Inventory.query.first().qty_available == 15
+
+
+def test_async_upload_rejects_bad_header_before_queueing(client):
+    client, app = client
+    resp = _post(client, b"date,sku\n2024-01-01,SKU-1\n", **{"async": "true"})
+    assert resp.status_code == 400
+    with app.app_context():
+        assert SalesUploadLog.query.count() == 0
+
+
+def test_sync_upload_still_returns_results(client, monkeypatch):
+    client, _ = client
+    # The columnar store is built from the upload's chunks, not by re-reading the saved CSV
+    monkeypatch.setattr(shop_routes.sales_store, "write_from_csv", None)
+    resp = _post(client, CSV)
+    body = resp.get_json()
+    assert resp.status_code == 200
+    assert body["upload_log"]["phase"] == "done"
+    assert len(body["stock_updates"]) == 2
+    assert shop_routes.sales_store.read(1)["quantity_sold"].tolist() == [3.0, 2.0]
+
+
+def test_overlapping_uploads_keep_their_own_partial_files(client, tmp_path):
+    client, _ = client
+    # Another upload for the same shop is still appending to its partial file
+    other = tmp_path / "sales_shop_1.inflight.partial"
+    other.write_text("date,sku\n2024-01-05,SKU-9\n")
+
+    assert _post(client, CSV).status_code == 200
+    assert other.read_text() == "date,sku\n2024-01-05,SKU-9\n"
+    assert sorted(p.name for p in tmp_path.glob("*.partial")) == [other.name]
+    saved = (tmp_path / "sales_shop_1.csv").read_text().splitlines()
+    assert len(saved) == 3 and "SKU-9" not in "".join(saved)
+
+
+def test_job_is_in_progress_while_the_worker_runs(client, monkeypatch):
+    client, app = client
+    seen = []
+    process = shop_routes._process_sales_upload
+
+    def recording_process(shop_id, path, log_entry, *args, **kwargs):
+        seen.append(client.get(f'/shop/upload_sales_data/jobs/{log_entry.id}').get_json()["upload_log"]["status"])
+        return process(shop_id, path, log_entry, *args, **kwargs)
+
+    monkeypatch.setattr(shop_routes, "_process_sales_upload", recording_process)
+    job_id = _post(client, CSV, **{"async": "true"}).get_json()["job_id"]
+    for _ in range(100):
+        if client.get(f'/shop/upload_sales_data/jobs/{job_id}').get_json()["done"]:
+            break
+        time.sleep(0.05)
+
+    assert seen == ["in_progress"]
+
+
+def test_status_endpoints_add_missing_phase_column(client, monkeypatch):
+    client, app = client
+    _post(client, CSV)
+    with app.app_context():
+        db.session.execute(text("ALTER TABLE sales_upload_log DROP COLUMN phase"))
+        db.session.commit()
+    monkeypatch.setattr(inventory_utils, "_upload_log_schema_checked", False)
+
+    resp = client.get('/shop/upload_sales_data/logs?shop_id=1')
+    assert resp.status_code == 200
+    assert resp.get_json()["count"] == 1
+    assert client.get('/shop/upload_sales_data/jobs/1').status_code == 200
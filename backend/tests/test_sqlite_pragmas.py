@@ -0,0 +1,42 @@
+import pytest
+from pathlib import Path
+import sys
+
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from models.model import get_sqlite_pragmas
+from config import Config
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pragmas.db'}")
+    yield engine
+    engine.dispose()
+
+
+def test_connect_listener_applies_performance_profile(engine):
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar().lower() == "wal"
+        # synchronous=NORMAL is reported as 1
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 60000
+        # temp_store=MEMORY is reported as 2
+        assert conn.execute(text("PRAGMA temp_store")).scalar() == 2
+
+
+def test_every_pooled_connection_is_tuned(engine):
+    conns = [engine.connect() for _ in range(3)]
+    try:
+        for conn in conns:
+            assert conn.execute(text("PRAGMA cache_size")).scalar() == -64000
+    finally:
+        for conn in conns:
+            conn.close()
+
+
+def test_profiles_resolve_from_config():
+    assert get_sqlite_pragmas("durable")["synchronous"] == "FULL"
+    assert get_sqlite_pragmas("off") == {}
+    assert get_sqlite_pragmas() == Config.SQLITE_PRAGMA_PROFILES[Config.SQLITE_PRAGMA_PROFILE]
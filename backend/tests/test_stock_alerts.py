@@ -0,0 +1,88 @@
+import json
+import time
+import pytest
+from pathlib import Path
+import sys
+
+from sqlalchemy import event
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from models.model import db, User, Inventory, DistributorSupply
+from utils.data_version import bump_data_version, on_shops_committed, _commit_callbacks
+from services.stock_alert_service import alert_broker, low_stock_alerts, low_stock_alert_events
+
+
+@pytest.fixture
+def app(app, make_shop, make_product):
+    distributor = User(full_name='Dist', username='dist', password='x', role='distributor')
+    db.session.add(distributor)
+    db.session.flush()
+    shop = make_shop('Shop 1', city='Chennai')
+    for name, qty, safety in [('Silk', 100, 20), ('Cotton', 0, 10), ('Linen', 7, 10)]:
+        product = make_product(shop, name, category=name, stock=qty, safety_stock=safety)
+        for supplied in (50, 30):  # the latest restock is reported
+            db.session.add(DistributorSupply(distributor_id=distributor.id, product_id=product.id,
+                                             shop_id=shop.id, quantity_supplied=supplied))
+    db.session.commit()
+    return app
+
+
+def _parse(message):
+    fields = dict(line.split(': ', 1) for line in message.strip().splitlines() if ': ' in line)
+    return fields['event'], json.loads(fields['data'])
+
+
+def test_alerts_come_from_one_query(app):
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        result = low_stock_alerts(1)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert len(statements) == 1
+    assert [(a['product_name'], a['urgency']) for a in result['alerts']] == [('Cotton', 'critical'), ('Linen', 'low')]
+    assert result['alerts'][1]['last_supplied'] == 30
+    assert result['summary'] == {'critical_count': 1, 'low_count': 1, 'total_alerts': 2}
+
+
+def test_stream_pushes_threshold_crossings(app):
+    stream = low_stock_alert_events(1, poll_seconds=5, heartbeat_seconds=60, max_seconds=30)
+
+    name, snapshot = _parse(next(stream))
+    assert name == 'snapshot' and snapshot['summary']['total_alerts'] == 2
+
+    silk, cotton = Inventory.query.filter(Inventory.product_id.in_([1, 2])).order_by(Inventory.product_id)
+    silk.qty_available = 5      # healthy -> low
+    cotton.qty_available = 40   # critical -> restocked
+    bump_data_version(1)
+    db.session.commit()  # wakes the stream; no need to wait for the 5s poll
+
+    start = time.perf_counter()
+    name, update = _parse(next(stream))
+    assert time.perf_counter() - start < 2
+    assert name == 'alerts'
+    assert [a['product_name'] for a in update['raised']] == ['Silk']
+    assert [a['product_name'] for a in update['resolved']] == ['Cotton']
+    assert update['summary']['total_alerts'] == 2
+    stream.close()
+    assert len(alert_broker) == 0
+
+
+def test_only_committed_bumps_wake_streams(app):
+    published = []
+    callback = on_shops_committed(published.append)
+    try:
+        bump_data_version(1)
+        db.session.rollback()
+        db.session.commit()  # an empty commit must not replay the rolled-back bump
+        assert published == []
+
+        with db.session.begin_nested():
+            bump_data_version(1)
+        assert published == []  # a savepoint waits for the outer commit
+        db.session.commit()
+        assert published == [frozenset({1})]
+    finally:
+        _commit_callbacks.remove(callback)
@@ -14,7 +14,11 @@ from .response_helpers import (
     handle_exceptions,
     get_pagination_params,
     paginate_query,
-    serialize_pagination
+    serialize_pagination,
+    keyset_paginate,
+    keyset_order_by,
+    approximate_count,
+    cursor_pagination_info
 )
 
 from .auth_utils import (
@@ -41,6 +45,10 @@ __all__ = [
     'get_pagination_params',
     'paginate_query',
     'serialize_pagination',
+    'keyset_paginate',
+    'keyset_order_by',
+    'approximate_count',
+    'cursor_pagination_info',
     # Auth utilities
     'generate_jwt',
     'decode_jwt',
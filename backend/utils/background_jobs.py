@@ -0,0 +1,79 @@
+"""
+In-process background job queue.
+
+Thin wrapper around ThreadPoolExecutor that runs each job inside a Flask app
+context and releases the scoped DB session afterwards, so request handlers can
+hand off long work (file ingestion, AI calls) and return immediately.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundJobQueue:
+    """Bounded worker pool for app-context jobs; the executor is created lazily on first submit."""
+
+    def __init__(self, name, max_workers=2):
+        self.name = name
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._failed = 0
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix=self.name
+                )
+            return self._executor
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue fn(*args, **kwargs) to run in the current app's context. Returns the Future."""
+        app = current_app._get_current_object()
+        with self._lock:
+            self._pending += 1
+        return self._get_executor().submit(self._run, app, fn, args, kwargs)
+
+    def _run(self, app, fn, args, kwargs):
+        from models.model import db
+
+        with app.app_context():
+            try:
+                result = fn(*args, **kwargs)
+                with self._lock:
+                    self._completed += 1
+                return result
+            except Exception:
+                with self._lock:
+                    self._failed += 1
+                logger.exception(f"[{self.name}] Job {getattr(fn, '__name__', fn)} failed")
+                raise
+            finally:
+                with self._lock:
+                    self._pending -= 1
+                db.session.remove()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "name": self.name,
+                "max_workers": self.max_workers,
+                "pending": self._pending,
+                "completed": self._completed,
+                "failed": self._failed,
+            }
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=wait)
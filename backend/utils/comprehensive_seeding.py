@@ -12,6 +12,7 @@ from typing import Dict, Any, List
 from werkzeug.security import generate_password_hash
 
 from models.model import db, User, Shop, Product, DistributorSupply
+from utils.data_version import bump_data_version
 
 # Seeding limits
 MAX_CUSTOMERS = 3
@@ -217,6 +218,7 @@ def create_distributor_partnerships(distributors: List[User], shops: List[Shop])
                 )
                 db.session.add(supply)
                 partnerships_created += 1
+                bump_data_version(shop.id)
         
         print(f"[Seed] Created {len(products)} supply records for shop: {shop.name}")
     
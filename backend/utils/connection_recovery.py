@@ -56,17 +56,14 @@ def optimize_database_settings():
     try:
         engine = db.engine
         
-        # For SQLite, optimize settings
-        if "sqlite" in str(engine.url):
-            # Enable WAL mode for better concurrent access
+        # For SQLite, settings are applied per-connection by the engine "connect"
+        # listener; recycle the pool so every connection picks up the current profile
+        if engine.dialect.name == "sqlite":
+            engine.dispose()
             with engine.connect() as conn:
-                conn.execute(text("PRAGMA journal_mode=WAL"))
-                conn.execute(text("PRAGMA synchronous=NORMAL"))
-                conn.execute(text("PRAGMA cache_size=10000"))
-                conn.execute(text("PRAGMA temp_store=MEMORY"))
-                conn.commit()
+                journal_mode = conn.execute(text("PRAGMA journal_mode")).scalar()
             
-            print("SQLite optimization settings applied")
+            print(f"SQLite optimization settings applied (journal_mode={journal_mode})")
             return True
             
     except Exception as e:
@@ -0,0 +1,99 @@
+"""
+Whole-payload cache for the shop dashboard.
+
+Entries are keyed by the shop's data version (utils.data_version) and the day they
+were computed on (weekly windows are relative to today), so any bump makes them
+unreachable - no explicit invalidation is needed. A small in-process LRU sits in
+front of the shared cached_dashboards table used by other worker processes.
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+
+from models.model import db, CachedDashboard, get_dialect_insert
+
+DASHBOARD_CACHE_MAX_SHOPS = 256
+
+_memory = OrderedDict()  # shop_id -> (data_version, computed_on, payload)
+_lock = threading.Lock()
+_stats = {"memory_hits": 0, "db_hits": 0, "misses": 0}
+
+
+def get_cached_dashboard(shop_id, data_version):
+    """Return the cached payload for this version/day, or None."""
+    today = date.today()
+    with _lock:
+        entry = _memory.get(shop_id)
+        if entry and entry[0] == data_version and entry[1] == today:
+            _memory.move_to_end(shop_id)
+            _stats["memory_hits"] += 1
+            return entry[2]
+
+    try:
+        row = CachedDashboard.query.filter_by(
+            shop_id=shop_id, data_version=data_version, computed_on=today
+        ).first()
+    except Exception as e:
+        print(f"[Dashboard Cache] Read failed for shop {shop_id}: {e}")
+        row = None
+
+    if row is None:
+        with _lock:
+            _stats["misses"] += 1
+        return None
+
+    payload = json.loads(row.payload_json)
+    _remember(shop_id, data_version, today, payload)
+    with _lock:
+        _stats["db_hits"] += 1
+    return payload
+
+
+def store_dashboard(shop_id, data_version, payload):
+    """Cache a freshly computed payload in memory and in the shared table."""
+    today = date.today()
+    _remember(shop_id, data_version, today, payload)
+    try:
+        insert = get_dialect_insert()
+        stmt = insert(CachedDashboard.__table__).values(
+            shop_id=shop_id,
+            data_version=data_version,
+            computed_on=today,
+            payload_json=json.dumps(payload, default=str),
+            created_at=datetime.utcnow(),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["shop_id"],
+            set_={
+                "data_version": stmt.excluded.data_version,
+                "computed_on": stmt.excluded.computed_on,
+                "payload_json": stmt.excluded.payload_json,
+                "created_at": stmt.excluded.created_at,
+            },
+        )
+        db.session.execute(stmt)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"[Dashboard Cache] Write failed for shop {shop_id}: {e}")
+
+
+def _remember(shop_id, data_version, computed_on, payload):
+    with _lock:
+        _memory[shop_id] = (data_version, computed_on, payload)
+        _memory.move_to_end(shop_id)
+        while len(_memory) > DASHBOARD_CACHE_MAX_SHOPS:
+            _memory.popitem(last=False)
+
+
+def dashboard_cache_stats():
+    with _lock:
+        return {"entries": len(_memory), "max_entries": DASHBOARD_CACHE_MAX_SHOPS, **_stats}
+
+
+def clear_dashboard_cache():
+    """Drop the in-process entries (the shared table is left to version checks)."""
+    with _lock:
+        _memory.clear()
@@ -0,0 +1,99 @@
+"""
+Per-shop data versions.
+
+Every write path that changes what a shop's dashboard or analytics show bumps
+the shop's counters in shop_data_versions (in the caller's transaction), and
+caches key their entries by the current value instead of re-scanning data:
+  - version:        any dashboard-visible change (sales, inventory, reviews)
+  - sales_version:  SalesData changes only (forecasts, sales analytics)
+
+Bumped shop ids are also collected in session.info["bumped_shops"] so
+commit-time maintainers (distributor summaries) know which shops changed, and
+callbacks registered with on_shops_committed() are told after the commit lands
+(live low-stock alerts).
+"""
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models.model import db, DistributorSupply, Product, ShopDataVersion, get_dialect_insert
+
+_commit_callbacks = []
+
+
+def get_data_version(shop_id, sales=False):
+    """Current counter for a shop (0 when it has never been bumped)."""
+    column = ShopDataVersion.sales_version if sales else ShopDataVersion.version
+    value = db.session.query(column).filter(ShopDataVersion.shop_id == shop_id).scalar()
+    return int(value or 0)
+
+
+def distributor_data_versions(distributor_id):
+    """
+    Summed version and sales_version over the shops a distributor supplies, and
+    how many of them have counters; any change in those shops moves the result.
+    """
+    shop_ids = db.select(DistributorSupply.shop_id).where(DistributorSupply.distributor_id == distributor_id)
+    version, sales_version, shops = db.session.query(
+        db.func.coalesce(db.func.sum(ShopDataVersion.version), 0),
+        db.func.coalesce(db.func.sum(ShopDataVersion.sales_version), 0),
+        db.func.count(ShopDataVersion.shop_id),
+    ).filter(ShopDataVersion.shop_id.in_(shop_ids)).one()
+    return {"version": int(version), "sales_version": int(sales_version), "shops": int(shops)}
+
+
+def bump_data_version(shop_id, sales=False):
+    """
+    Atomically increment a shop's version (and sales_version when sales=True).
+    Runs in the current session; the caller's commit publishes it with the data change.
+    """
+    if not shop_id:
+        return
+    shop_id = int(shop_id)
+    insert = get_dialect_insert()
+    stmt = insert(ShopDataVersion.__table__).values(
+        shop_id=shop_id, version=1, sales_version=1 if sales else 0
+    )
+    table = ShopDataVersion.__table__
+    updates = {"version": table.c.version + 1, "updated_at": db.func.now()}
+    if sales:
+        updates["sales_version"] = table.c.sales_version + 1
+    db.session.execute(stmt.on_conflict_do_update(index_elements=["shop_id"], set_=updates))
+    db.session.info.setdefault("bumped_shops", set()).add(shop_id)
+    db.session.info.setdefault("committed_shops", set()).add(shop_id)
+
+
+def bump_product_shop_version(product_id, sales=False):
+    """Bump the version of the shop owning a product."""
+    shop_id = db.session.query(Product.shop_id).filter(Product.id == product_id).scalar()
+    bump_data_version(shop_id, sales=sales)
+
+
+# ============================================================================
+# Commit notifications
+# ============================================================================
+
+def on_shops_committed(callback):
+    """Register callback(shop_ids) to run after each commit that bumped those shops."""
+    _commit_callbacks.append(callback)
+    return callback
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed_shops(session):
+    if session.in_nested_transaction():
+        return  # a savepoint; wait for the outer commit
+    shop_ids = session.info.pop("committed_shops", None)
+    if not shop_ids:
+        return
+    for callback in list(_commit_callbacks):
+        try:
+            callback(frozenset(shop_ids))
+        except Exception as e:
+            print(f"[Data Version] Commit callback {getattr(callback, '__name__', callback)} failed: {e}")
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_committed_shops(session, previous_transaction):
+    if not previous_transaction.nested:
+        session.info.pop("committed_shops", None)
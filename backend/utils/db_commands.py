@@ -5,6 +5,9 @@ This script provides commands for database management:
 - seed: Run account creation seeding
 - reset: Clear all data
 - status: Show database status
+- rebuild-search-index: Create/backfill the FTS5 full-text search index
+- backfill-sales-rollups: Rebuild the day/week/month sales rollup tables
+- rebuild-distributor-summaries: Rebuild the distributor stock/performance summary tables
 """
 
 import click
@@ -160,6 +163,55 @@ def seed_demo():
     else:
         print("Demo accounts already exist!")
 
+@click.command("rebuild-search-index")
+@with_appcontext
+def rebuild_search_index():
+    """Create the FTS5 search tables/triggers and backfill them from existing rows."""
+    from utils.fts_search import rebuild_fts_index
+
+    print("Rebuilding full-text search index...")
+    try:
+        built = rebuild_fts_index()
+        if built:
+            print(f"Rebuilt: {', '.join(built)}")
+        else:
+            print("FTS5 is not available for this database; search falls back to LIKE.")
+    except Exception as e:
+        print(f"Search index rebuild failed: {e}")
+        raise
+
+@click.command("backfill-sales-rollups")
+@click.option("--shop-id", type=int, default=None, help="Only rebuild this shop's rollups.")
+@with_appcontext
+def backfill_sales_rollups(shop_id):
+    """Rebuild the day/week/month sales rollups from SalesData."""
+    from services.sales_rollup_service import rebuild_sales_rollups
+
+    print("Rebuilding sales rollups...")
+    try:
+        written = rebuild_sales_rollups(shop_id)
+        print(f"Wrote {written} rollup rows.")
+    except Exception as e:
+        db.session.rollback()
+        print(f"Sales rollup backfill failed: {e}")
+        raise
+
+@click.command("rebuild-distributor-summaries")
+@click.option("--distributor-id", type=int, default=None, help="Only rebuild this distributor's summaries.")
+@with_appcontext
+def rebuild_distributor_summaries(distributor_id):
+    """Rebuild the distributor stock and product performance summaries."""
+    from services.distributor_summary_service import rebuild_distributor_summaries as rebuild
+
+    print("Rebuilding distributor summaries...")
+    try:
+        written = rebuild(distributor_id)
+        print(f"Wrote {written} stock summary rows.")
+    except Exception as e:
+        db.session.rollback()
+        print(f"Distributor summary rebuild failed: {e}")
+        raise
+
 # Register commands
 def register_commands(app):
     """Register CLI commands with Flask app."""
@@ -167,3 +219,6 @@ def register_commands(app):
     app.cli.add_command(reset_db)
     app.cli.add_command(db_status)
     app.cli.add_command(seed_demo)
+    app.cli.add_command(rebuild_search_index)
+    app.cli.add_command(backfill_sales_rollups)
+    app.cli.add_command(rebuild_distributor_summaries)
@@ -6,7 +6,8 @@ import os
 import pandas as pd
 from io import StringIO
 from werkzeug.datastructures import FileStorage
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Iterator, Tuple
+import hashlib
 import tempfile
 
 # Configuration
@@ -24,35 +25,32 @@ def validate_file_size(file: FileStorage) -> None:
             raise FileProcessingError(f"File too large. Maximum size: {MAX_FILE_SIZE // (1024*1024)}MB")
 
 def process_csv_streaming(file: FileStorage, required_columns: List[str] = None) -> pd.DataFrame:
-    """Process CSV file in streaming mode to avoid memory exhaustion"""
+    """
+    Process CSV file in chunks to avoid memory exhaustion.
+    Each chunk is numerically downcast before being kept, so peak memory is the
+    compact result plus one raw chunk instead of the full raw frame.
+    """
     validate_file_size(file)
     
     try:
         # Reset file pointer
         file.seek(0)
         
-        # Read first chunk to validate structure
-        first_chunk = pd.read_csv(file, nrows=5)
-        
-        if required_columns:
-            missing_columns = set(required_columns) - set(first_chunk.columns)
-            if missing_columns:
-                raise FileProcessingError(f"Missing required columns: {missing_columns}")
-        
-        # Reset and read full file with chunking if needed
-        file.seek(0)
-        
-        # For files under 10MB, read normally
-        if hasattr(file, 'content_length') and file.content_length < 10 * 1024 * 1024:
-            return pd.read_csv(file)
-        
-        # For larger files, process in chunks
         chunks = []
         for chunk in pd.read_csv(file, chunksize=CHUNK_SIZE):
-            chunks.append(chunk)
-            
+            # Validate structure on the first chunk (no separate pre-read pass)
+            if not chunks and required_columns:
+                missing_columns = set(required_columns) - set(chunk.columns)
+                if missing_columns:
+                    raise FileProcessingError(f"Missing required columns: {missing_columns}")
+            chunks.append(_downcast_numeric(chunk))
+        
+        if not chunks:
+            raise FileProcessingError("CSV file is empty")
         return pd.concat(chunks, ignore_index=True)
         
+    except FileProcessingError:
+        raise
     except pd.errors.EmptyDataError:
         raise FileProcessingError("CSV file is empty")
     except pd.errors.ParserError as e:
@@ -88,7 +86,10 @@ def optimize_dataframe(df: pd.DataFrame) -> pd.DataFrame:
         if df[col].nunique() / len(df) < 0.5:  # If cardinality is low
             df[col] = df[col].astype('category')
     
-    # Convert numeric columns to smallest possible dtype
+    return _downcast_numeric(df)
+
+def _downcast_numeric(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert numeric columns to smallest possible dtype"""
     for col in df.select_dtypes(include=['int64']).columns:
         df[col] = pd.to_numeric(df[col], downcast='integer')
     
@@ -164,3 +165,81 @@ def get_file_stats(file: FileStorage) -> Dict[str, Any]:
         'size': getattr(file, 'content_length', 0),
         'size_mb': getattr(file, 'content_length', 0) / (1024 * 1024)
     }
+
+
+# ============================================================================
+# STREAMING INGESTION (bounded memory)
+# ============================================================================
+
+SPOOL_CHUNK_BYTES = 1024 * 1024  # copy uploads to disk 1MB at a time
+
+
+def spool_upload(file: FileStorage, max_bytes: int = None) -> Tuple[str, str, int]:
+    """
+    Copy an uploaded file to a temp file on disk, hashing it on the way.
+    Memory use is one SPOOL_CHUNK_BYTES buffer regardless of upload size.
+    Returns (path, sha256_hex, size_bytes); the caller deletes the file.
+    """
+    suffix = os.path.splitext(file.filename or "")[1].lower()
+    digest = hashlib.sha256()
+    size = 0
+    file.stream.seek(0)
+    handle = tempfile.NamedTemporaryFile(prefix="upload_", suffix=suffix, delete=False)
+    try:
+        with handle:
+            while True:
+                block = file.stream.read(SPOOL_CHUNK_BYTES)
+                if not block:
+                    break
+                size += len(block)
+                if max_bytes and size > max_bytes:
+                    raise FileProcessingError(f"File too large. Maximum size: {max_bytes // (1024*1024)}MB")
+                digest.update(block)
+                handle.write(block)
+    except Exception:
+        os.unlink(handle.name)
+        raise
+    return handle.name, digest.hexdigest(), size
+
+
+def _normalize_columns(columns, column_aliases: Dict[str, str] = None) -> List[str]:
+    normalized = [str(c).lower().strip() for c in columns]
+    if column_aliases:
+        normalized = [column_aliases.get(c, c) for c in normalized]
+    return normalized
+
+
+def read_table_header(path: str, column_aliases: Dict[str, str] = None) -> List[str]:
+    """Read only the header row of a CSV/XLS(X) file and return normalized column names."""
+    if path.lower().endswith(".csv"):
+        columns = pd.read_csv(path, nrows=0).columns
+    else:
+        columns = pd.read_excel(path, nrows=0).columns
+    return _normalize_columns(columns, column_aliases)
+
+
+def iter_table_chunks(path: str, chunksize: int = CHUNK_SIZE, text_columns=(),
+                      column_aliases: Dict[str, str] = None) -> Iterator[pd.DataFrame]:
+    """
+    Yield a CSV/XLS(X) file as DataFrames of at most `chunksize` rows with normalized
+    (lowercase, aliased) column names.
+
+    Columns listed in text_columns are parsed as strings in every chunk, so values
+    such as SKUs keep leading zeros and types don't drift between chunks.
+    CSV is streamed; Excel has no streaming reader and is loaded once, then sliced.
+    """
+    header = read_table_header(path, column_aliases)
+    text_columns = set(text_columns)
+    # Explicit dtypes are keyed by position so duplicate/odd raw headers don't matter
+    dtype = {i: str for i, col in enumerate(header) if col in text_columns}
+
+    if path.lower().endswith(".csv"):
+        for chunk in pd.read_csv(path, chunksize=chunksize, dtype=dtype or None):
+            chunk.columns = header
+            yield chunk
+        return
+
+    frame = pd.read_excel(path, dtype=dtype or None)
+    frame.columns = header
+    for start in range(0, len(frame), chunksize):
+        yield frame.iloc[start:start + chunksize].copy()
@@ -0,0 +1,96 @@
+"""
+Full-text search helpers backed by the SQLite FTS5 index.
+
+The FTS5 tables and their sync triggers are created alongside the ORM tables
+(see FTS_INDEXES in models.model). Routes call apply_text_search() which uses a
+ranked MATCH when the index exists and falls back to ILIKE otherwise.
+"""
+
+import re
+import weakref
+
+from sqlalchemy import select, text, func, or_, table, column, literal_column
+
+from models.model import db, FTS_INDEXES
+
+# Column weights for bm25 ranking, in FTS_INDEXES column order (name weighs most)
+FTS_WEIGHTS = {
+    "products_fts": (10.0, 3.0, 1.0),
+    "shops_fts": (10.0, 1.0, 2.0, 1.0),
+    "product_catalog_fts": (1.0,),
+}
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_available = weakref.WeakKeyDictionary()
+
+
+def build_match_query(search):
+    """
+    Turn free text into an FTS5 MATCH expression.
+    Every word must match as a prefix ("silk sar" -> "silk"* "sar"*); quoting
+    each token keeps FTS operators in user input from being interpreted.
+    """
+    tokens = _TOKEN_RE.findall((search or "").lower())
+    if not tokens:
+        return None
+    return " ".join(f'"{tok}"*' for tok in tokens)
+
+
+def fts_available(index):
+    """Check (once per engine) whether the FTS5 table exists in the database."""
+    engine = db.engine
+    if engine.dialect.name != "sqlite":
+        return False
+    if _available.get(engine) is None:
+        rows = db.session.execute(
+            text("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE '%_fts'")
+        ).all()
+        _available[engine] = {r[0] for r in rows}
+    return index in _available[engine]
+
+
+def fts_rank_subquery(index, match):
+    """Subquery of (rowid, rank) for rows matching the MATCH expression; lower rank is better."""
+    fts = table(index, column("rowid"))
+    target = literal_column(index)
+    return (
+        select(
+            fts.c.rowid.label("rowid"),
+            func.bm25(target, *FTS_WEIGHTS.get(index, ())).label("rank"),
+        )
+        .select_from(fts)
+        .where(target.op("MATCH")(match))
+        .subquery(f"{index}_match")
+    )
+
+
+def apply_text_search(query, model, index, search, fallback_columns=None, ranked=True):
+    """
+    Restrict an ORM query to rows whose indexed text matches `search`.
+
+    ranked=True joins the FTS rank and orders by it (callers may add further
+    order_by terms as tie-breakers); ranked=False only filters, leaving the
+    caller's ordering untouched. Without FTS5 the query falls back to ILIKE on
+    fallback_columns (defaults to the indexed columns).
+    """
+    match = build_match_query(search)
+    if match and fts_available(index):
+        matches = fts_rank_subquery(index, match)
+        if ranked:
+            return query.join(matches, model.id == matches.c.rowid).order_by(matches.c.rank)
+        return query.filter(model.id.in_(select(matches.c.rowid)))
+
+    if fallback_columns is None:
+        fallback_columns = [getattr(model, c) for c in FTS_INDEXES[index]["columns"]]
+    pattern = f"%{(search or '').strip()}%"
+    return query.filter(or_(*[col.ilike(pattern) for col in fallback_columns]))
+
+
+def rebuild_fts_index():
+    """Create missing FTS5 tables and re-populate every index from its source table."""
+    from models.model import ensure_fts_index
+
+    with db.engine.begin() as conn:
+        built = ensure_fts_index(conn, rebuild=True)
+    _available.pop(db.engine, None)
+    return built
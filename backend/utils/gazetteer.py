@@ -0,0 +1,188 @@
+"""
+Local gazetteer for city -> coordinate resolution.
+
+Loaded once from a bundled CSV (data/indian_cities.csv: name, state, lat, lon,
+kind, pipe-separated aliases) into three in-memory indexes:
+
+    exact      normalized name or alias -> entry (Bombay -> Mumbai)
+    phonetic   transliteration-folded key -> entry (Vishakhapatnam, Kancheepuram,
+               Tiruchirapalli match their canonical spellings)
+    trigrams   character trigram of a phonetic key -> key ids, for fuzzy matches
+               scored by Dice similarity over shared trigrams
+
+Lookups never scan the table or call a geocoding API, and results are memoized,
+so resolving every row of a large upload costs one dict hit per distinct name.
+"""
+
+import csv
+import re
+import threading
+import unicodedata
+from collections import Counter, namedtuple
+from functools import lru_cache
+from typing import Dict, Iterable, Optional
+
+from config import Config
+
+GazetteerEntry = namedtuple("GazetteerEntry", ["name", "state", "lat", "lon", "kind"])
+
+# Spelling variants common in romanized Indian place names, folded in order
+TRANSLITERATIONS = [
+    ("aa", "a"), ("ee", "i"), ("oo", "u"), ("ou", "u"), ("iya", "ia"),
+    ("w", "v"), ("ph", "f"), ("bh", "b"), ("dh", "d"), ("gh", "g"),
+    ("jh", "j"), ("kh", "k"), ("sh", "s"), ("th", "t"), ("zh", "l"),
+]
+
+# Suffixes that do not change which city is meant
+IGNORED_SUFFIXES = (" city", " district", " urban", " rural", " cantonment")
+
+FUZZY_MIN_SCORE = 0.6
+
+_repeats = re.compile(r"(.)\1+")
+_non_word = re.compile(r"[^\w\s]")
+_spaces = re.compile(r"\s+")
+
+
+def normalize_name(name) -> str:
+    """Lowercase, strip accents and punctuation, collapse whitespace."""
+    text = unicodedata.normalize("NFKD", str(name or ""))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    text = _spaces.sub(" ", _non_word.sub(" ", text).replace("_", " ")).strip()
+    for suffix in IGNORED_SUFFIXES:
+        if text.endswith(suffix) and len(text) > len(suffix):
+            text = text[: -len(suffix)]
+    return text
+
+
+def phonetic_key(name) -> str:
+    """Transliteration-insensitive key: normalized, folded variants, no spaces or doubled letters."""
+    key = normalize_name(name).replace(" ", "")
+    for source, target in TRANSLITERATIONS:
+        key = key.replace(source, target)
+    return _repeats.sub(r"\1", key)
+
+
+def _trigram_set(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class Gazetteer:
+    """Exact, phonetic and trigram-fuzzy lookup over a fixed set of places."""
+
+    def __init__(self, entries: Iterable = ()):
+        self._exact = {}
+        self._phonetic = {}
+        self._keys = []        # key id -> phonetic key
+        self._key_sizes = []   # key id -> trigram count
+        self._trigrams = {}    # trigram -> [key ids]
+        self._size = 0
+        for entry, aliases in entries:
+            self.add(entry, aliases)
+
+    @classmethod
+    def from_csv(cls, path):
+        gazetteer = cls()
+        with open(path, newline="", encoding="utf-8") as fh:
+            for row in csv.DictReader(fh):
+                entry = GazetteerEntry(
+                    name=row["name"].strip(),
+                    state=(row.get("state") or "").strip() or None,
+                    lat=float(row["lat"]),
+                    lon=float(row["lon"]),
+                    kind=(row.get("kind") or "city").strip(),
+                )
+                aliases = [a for a in (row.get("aliases") or "").split("|") if a.strip()]
+                gazetteer.add(entry, aliases)
+        return gazetteer
+
+    def add(self, entry: GazetteerEntry, aliases=()):
+        self._size += 1
+        for name in [entry.name, *aliases]:
+            self._exact.setdefault(normalize_name(name), entry)
+            key = phonetic_key(name)
+            if not key or key in self._phonetic:
+                continue
+            self._phonetic[key] = entry
+            key_id = len(self._keys)
+            self._keys.append(key)
+            grams = _trigram_set(key)
+            self._key_sizes.append(len(grams))
+            for gram in grams:
+                self._trigrams.setdefault(gram, []).append(key_id)
+
+    def __len__(self):
+        return self._size
+
+    def lookup(self, name) -> Optional[GazetteerEntry]:
+        """Exact match on the normalized name or an alias, then on the phonetic key."""
+        normalized = normalize_name(name)
+        if not normalized:
+            return None
+        entry = self._exact.get(normalized)
+        if entry is None:
+            entry = self._phonetic.get(phonetic_key(normalized))
+        return entry
+
+    def fuzzy(self, name, min_score: float = FUZZY_MIN_SCORE) -> Optional[GazetteerEntry]:
+        """Best trigram match (Dice coefficient >= min_score); only keys sharing a trigram are scored."""
+        key = phonetic_key(name)
+        if len(key) < 3:
+            return None
+        grams = _trigram_set(key)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._trigrams.get(gram, ()))
+        best, best_score = None, min_score
+        for key_id, count in shared.items():
+            score = 2.0 * count / (len(grams) + self._key_sizes[key_id])
+            if score >= best_score:
+                best, best_score = key_id, score
+        return self._phonetic[self._keys[best]] if best is not None else None
+
+    def resolve(self, name, fuzzy: bool = True) -> Optional[GazetteerEntry]:
+        """
+        Resolve a free-text place: exact/alias/phonetic on the whole string, then on
+        each comma-separated part ("MG Road, Chennai"), then a fuzzy match.
+        """
+        entry = self.lookup(name)
+        if entry is None and "," in str(name or ""):
+            for part in str(name).split(","):
+                entry = self.lookup(part)
+                if entry is not None:
+                    break
+        if entry is None and fuzzy:
+            entry = self.fuzzy(name)
+        return entry
+
+
+_gazetteer = None
+_load_lock = threading.Lock()
+
+
+def get_gazetteer() -> Gazetteer:
+    """Module-wide gazetteer, loaded from Config.GAZETTEER_PATH on first use."""
+    global _gazetteer
+    if _gazetteer is None:
+        with _load_lock:
+            if _gazetteer is None:
+                try:
+                    _gazetteer = Gazetteer.from_csv(Config.GAZETTEER_PATH)
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"[Gazetteer] Could not load {Config.GAZETTEER_PATH}: {e}")
+                    _gazetteer = Gazetteer()
+    return _gazetteer
+
+
+@lru_cache(maxsize=4096)
+def resolve_place(name, fuzzy: bool = True) -> Optional[GazetteerEntry]:
+    """Memoized get_gazetteer().resolve()."""
+    return get_gazetteer().resolve(name, fuzzy=fuzzy)
+
+
+def city_coordinates(name, fuzzy: bool = True) -> Optional[Dict[str, float]]:
+    """{"lat", "lon"} for a city/region name, or None when it is not in the gazetteer."""
+    if not name:
+        return None
+    entry = resolve_place(str(name).strip(), fuzzy)
+    return {"lat": entry.lat, "lon": entry.lon} if entry else None
@@ -52,3 +52,81 @@ def ensure_product_image_url_column():
     except Exception as exc:
         # Do not block requests; just log so we can inspect
         print(f"[Product Schema Ensure] {exc}")
+
+
+_upload_log_schema_checked = False
+
+
+def ensure_sales_upload_log_columns():
+    """Ensure sales_upload_log has the phase column used for background upload progress."""
+    global _upload_log_schema_checked
+    if _upload_log_schema_checked:
+        return
+
+    try:
+        inspector = inspect(db.engine)
+        columns = {col["name"] for col in inspector.get_columns("sales_upload_log")}
+
+        if "phase" not in columns:
+            with db.engine.begin() as conn:
+                conn.execute(text("ALTER TABLE sales_upload_log ADD COLUMN phase VARCHAR(40)"))
+            print("[Upload Log Schema] Added phase column to sales_upload_log table")
+
+        _upload_log_schema_checked = True
+    except Exception as exc:
+        # Do not block requests; just log so we can inspect
+        print(f"[Upload Log Schema Ensure] {exc}")
+
+
+_cache_version_schema_checked = False
+
+
+def ensure_cache_version_columns():
+    """Ensure cached_forecasts / cached_ai_insights have the data_version column used for validation."""
+    global _cache_version_schema_checked
+    if _cache_version_schema_checked:
+        return
+
+    try:
+        inspector = inspect(db.engine)
+        for table in ("cached_forecasts", "cached_ai_insights"):
+            columns = {col["name"] for col in inspector.get_columns(table)}
+            if "data_version" not in columns:
+                with db.engine.begin() as conn:
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN data_version INTEGER"))
+                print(f"[Cache Schema] Added data_version column to {table} table")
+
+        _cache_version_schema_checked = True
+    except Exception as exc:
+        # Do not block requests; just log so we can inspect
+        print(f"[Cache Schema Ensure] {exc}")
+
+
+_keyset_indexes_checked = False
+
+# Composite indexes the keyset listings seek on (see utils.response_helpers.keyset_paginate)
+KEYSET_INDEXES = {
+    "products": ("idx_product_created", "idx_product_rating"),
+    "reviews": ("idx_review_shop_created", "idx_review_product_created"),
+}
+
+
+def ensure_keyset_indexes():
+    """
+    Create the keyset pagination indexes on databases whose products / reviews
+    tables predate them (db.create_all() does not add indexes to existing tables).
+    """
+    global _keyset_indexes_checked
+    if _keyset_indexes_checked:
+        return
+
+    try:
+        for table_name, index_names in KEYSET_INDEXES.items():
+            table = db.metadata.tables[table_name]
+            for index in table.indexes:
+                if index.name in index_names:
+                    index.create(db.engine, checkfirst=True)
+        _keyset_indexes_checked = True
+    except Exception as exc:
+        # Listings still work without them, only slower; log so we can inspect
+        print(f"[Keyset Index Ensure] {exc}")
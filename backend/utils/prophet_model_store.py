@@ -0,0 +1,161 @@
+"""
+Persistent store for fitted Prophet models.
+
+Models are serialized with prophet.serialize.model_to_json and kept in a small
+standalone SQLite file keyed by a fingerprint of the full training series. The
+file is shared by every gunicorn worker and forecast process and survives
+restarts, so a series is fitted once rather than once per process. It is not
+the application database: forecast worker processes have no Flask app context.
+
+Entries are trimmed least-recently-used first once either the entry count or
+the total serialized size exceeds its limit.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from config import Config
+
+
+def series_fingerprint(df: pd.DataFrame, *extra) -> str:
+    """Stable digest of the full ds/y series (plus any extra key parts)."""
+    digest = hashlib.blake2b(digest_size=16)
+    ds = pd.to_datetime(df["ds"]).to_numpy(dtype="datetime64[ns]")
+    y = pd.to_numeric(df["y"], errors="coerce").to_numpy(dtype="float64")
+    digest.update(np.ascontiguousarray(ds).view(np.int64).tobytes())
+    digest.update(np.ascontiguousarray(y).tobytes())
+    for part in extra:
+        digest.update(repr(part).encode())
+    return digest.hexdigest()
+
+
+class ProphetModelStore:
+    """SQLite-backed LRU of serialized Prophet models, safe across threads and processes."""
+
+    def __init__(self, path=None, max_entries=500, max_bytes=256 * 1024 * 1024):
+        self.path = path or Config.PROPHET_MODEL_STORE_PATH
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._hits = 0
+        self._misses = 0
+        self._writes = 0
+
+    # ------------------------------------------------------------------
+    # Connection
+    # ------------------------------------------------------------------
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        # A forked process must not reuse its parent's connection
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS prophet_models ("
+            " key TEXT PRIMARY KEY,"
+            " model_json TEXT NOT NULL,"
+            " size_bytes INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_used_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_prophet_models_last_used ON prophet_models (last_used_at)")
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    # ------------------------------------------------------------------
+    # Read / write
+    # ------------------------------------------------------------------
+    def get(self, key):
+        """Serialized model JSON for `key`, or None. Marks the entry as recently used."""
+        try:
+            conn = self._connect()
+            row = conn.execute("SELECT model_json FROM prophet_models WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._misses += 1
+                return None
+            conn.execute("UPDATE prophet_models SET last_used_at = ? WHERE key = ?", (time.time(), key))
+            self._hits += 1
+            return row[0]
+        except sqlite3.Error as e:
+            print(f"[Prophet Model Store] Read failed for {key[:8]}: {e}")
+            return None
+
+    def put(self, key, model_json):
+        """Store a serialized model and trim the store to its limits."""
+        now = time.time()
+        try:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO prophet_models (key, model_json, size_bytes, created_at, last_used_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, model_json, len(model_json), now, now),
+                )
+                self._trim(conn)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            self._writes += 1
+        except sqlite3.Error as e:
+            print(f"[Prophet Model Store] Write failed for {key[:8]}: {e}")
+
+    def _trim(self, conn):
+        count, total = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM prophet_models"
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        evict = []
+        for key, size in conn.execute("SELECT key, size_bytes FROM prophet_models ORDER BY last_used_at"):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            evict.append((key,))
+            count -= 1
+            total -= size
+        conn.executemany("DELETE FROM prophet_models WHERE key = ?", evict)
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+    def clear(self):
+        try:
+            self._connect().execute("DELETE FROM prophet_models")
+        except sqlite3.Error as e:
+            print(f"[Prophet Model Store] Clear failed: {e}")
+
+    def stats(self):
+        try:
+            count, total = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM prophet_models"
+            ).fetchone()
+        except sqlite3.Error:
+            count, total = 0, 0
+        lookups = self._hits + self._misses
+        return {
+            "entries": count,
+            "max_entries": self.max_entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "hits": self._hits,
+            "misses": self._misses,
+            "writes": self._writes,
+            "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+prophet_model_store = ProphetModelStore(
+    max_entries=Config.PROPHET_MODEL_STORE_MAX_ENTRIES,
+    max_bytes=Config.PROPHET_MODEL_STORE_MAX_MB * 1024 * 1024,
+)
@@ -6,6 +6,10 @@ Reduces redundancy across routes by providing consistent response formatting.
 
 from flask import jsonify
 from functools import wraps
+from datetime import datetime
+from decimal import Decimal
+import base64
+import json
 import traceback
 
 
@@ -275,6 +279,180 @@ def serialize_pagination(pagination, serializer=None):
     }
 
 
+# ============================================================================
+# KEYSET (CURSOR) PAGINATION HELPERS
+# ============================================================================
+
+def _cursor_value(value):
+    """Make a sort key value JSON-safe, tagging datetimes so they round-trip."""
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _cursor_restore(value):
+    """Reverse _cursor_value()."""
+    if isinstance(value, dict) and "$dt" in value:
+        return datetime.fromisoformat(value["$dt"])
+    return value
+
+
+def encode_cursor(sort_name, values):
+    """
+    Build an opaque cursor token from the sort key values of the last row.
+    
+    Args:
+        sort_name: Name of the sort order the cursor belongs to
+        values: Sort key values of the last row, in key order (id last)
+    
+    Returns:
+        str: URL-safe cursor token
+    """
+    payload = {"s": sort_name, "v": [_cursor_value(v) for v in values]}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token, sort_name, key_count):
+    """
+    Decode a cursor token produced by encode_cursor().
+    
+    Raises:
+        ValueError: If the token is malformed or belongs to a different sort order
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = [_cursor_restore(v) for v in payload["v"]]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid pagination cursor")
+    
+    if payload.get("s") != sort_name or len(values) != key_count:
+        raise ValueError("Pagination cursor does not match the requested sort order")
+    return values
+
+
+def _nullable(expr):
+    """Whether a sort key can be NULL (plain non-nullable columns cannot)."""
+    column = getattr(expr, "expression", expr)
+    return getattr(column, "nullable", True)
+
+
+def keyset_order_by(sort_keys):
+    """ORDER BY clauses for sort keys; NULLs always sort last, whatever the direction."""
+    return [
+        (expr.desc() if descending else expr.asc()).nulls_last() if _nullable(expr)
+        else (expr.desc() if descending else expr.asc())
+        for _, expr, descending in sort_keys
+    ]
+
+
+def _keyset_filter(sort_keys, values):
+    """
+    Build the WHERE clause selecting rows strictly after the cursor position.
+
+    Keys are compared as raw columns so their indexes can serve the seek. When
+    all keys share a direction and only the leading one is nullable, this is a
+    row-value comparison (plus "IS NULL" for the NULL tail); otherwise it
+    expands to (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ..., with NULLs sorting
+    after every value.
+    """
+    from sqlalchemy import and_, or_, tuple_, false, literal
+
+    directions = {descending for _, _, descending in sort_keys}
+    exprs = [expr for _, expr, _ in sort_keys]
+    nullable = [_nullable(expr) for expr in exprs]
+    if len(directions) == 1 and not any(nullable[1:]):
+        descending = directions.pop()
+
+        def after(keys, vals):
+            return tuple_(*keys) < tuple_(*vals) if descending else tuple_(*keys) > tuple_(*vals)
+
+        if not nullable[0]:
+            return after(exprs, values)
+        if values[0] is None:
+            return and_(exprs[0].is_(None), after(exprs[1:], values[1:]))
+        return or_(after(exprs, values), exprs[0].is_(None))
+
+    def equal(i):
+        return exprs[i].is_(None) if values[i] is None else exprs[i] == values[i]
+
+    def step(i):
+        if values[i] is None:
+            return false()  # NULLs sort last: nothing follows a NULL but its ties
+        value = literal(values[i])  # booleans cannot be compared with < / > directly
+        beyond = exprs[i] < value if sort_keys[i][2] else exprs[i] > value
+        return or_(beyond, exprs[i].is_(None)) if nullable[i] else beyond
+
+    return or_(*[and_(*[equal(j) for j in range(i)], step(i)) for i in range(len(sort_keys))])
+
+
+def keyset_paginate(query, sort_name, sort_keys, cursor=None, per_page=20):
+    """
+    Fetch one page of a query using keyset (seek) pagination.
+    
+    Unlike paginate_query(), this never issues OFFSET or COUNT(*): each page
+    seeks directly past the previous page's last (sort value, id) pair, so
+    deep pages cost the same as the first one.
+    
+    Args:
+        query: SQLAlchemy query object (without ORDER BY)
+        sort_name: Name of the sort order, embedded in the cursor
+        sort_keys: List of (name, expression, descending) tuples; must end with
+                   a unique column (normally the primary key) as tie-breaker
+        cursor: Cursor token from a previous page, or None for the first page
+        per_page: Items per page
+    
+    Returns:
+        tuple: (items, next_cursor) where next_cursor is None on the last page
+    """
+    if cursor:
+        values = decode_cursor(cursor, sort_name, len(sort_keys))
+        query = query.filter(_keyset_filter(sort_keys, values))
+    
+    order_by = keyset_order_by(sort_keys)
+    key_columns = [expr.label(f"_k{i}") for i, (_, expr, _) in enumerate(sort_keys)]
+    rows = query.add_columns(*key_columns).order_by(*order_by).limit(per_page + 1).all()
+    
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+    items = [row[0] for row in rows]
+    
+    next_cursor = None
+    if has_next and rows:
+        next_cursor = encode_cursor(sort_name, list(rows[-1][1:]))
+    return items, next_cursor
+
+
+def approximate_count(query, cap=1000):
+    """
+    Count rows matching a query, stopping at `cap`.
+    
+    Returns:
+        tuple: (count, is_exact) - is_exact is False when more than `cap` rows match
+    """
+    from sqlalchemy import func, select
+    
+    limited = query.order_by(None).limit(cap + 1).subquery()
+    count = query.session.execute(select(func.count()).select_from(limited)).scalar() or 0
+    return min(count, cap), count <= cap
+
+
+def cursor_pagination_info(next_cursor, per_page, total=None, total_is_exact=None):
+    """Build the pagination block returned by cursor-paginated endpoints."""
+    info = {
+        "per_page": per_page,
+        "next_cursor": next_cursor,
+        "has_next": next_cursor is not None
+    }
+    if total is not None:
+        info["total"] = total
+        info["total_is_exact"] = total_is_exact
+    return info
+
+
 # ============================================================================
 # EXPORT
 # ============================================================================
@@ -291,5 +469,11 @@ __all__ = [
     'validate_required_params',
     'get_pagination_params',
     'paginate_query',
-    'serialize_pagination'
+    'serialize_pagination',
+    'encode_cursor',
+    'decode_cursor',
+    'keyset_paginate',
+    'keyset_order_by',
+    'approximate_count',
+    'cursor_pagination_info'
 ]
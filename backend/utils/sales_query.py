@@ -0,0 +1,59 @@
+"""
+Fast SalesData -> DataFrame loader.
+
+One joined SELECT of only the columns analytics need (sales_data LEFT JOIN
+products), read straight into a typed DataFrame with pd.read_sql. No ORM
+objects are hydrated and there are no per-row Product lookups.
+"""
+
+import pandas as pd
+from sqlalchemy import select, func
+
+from models.model import db, SalesData, Product
+
+SALES_FRAME_DTYPES = {
+    "product_id": "Int64",
+    "quantity_sold": "int64",
+    "revenue": "float64",
+}
+
+
+def sales_frame_query(shop_id=None, start_date=None, end_date=None):
+    """Selectable behind load_sales_frame(); filters are optional (None = all shops / dates)."""
+    stmt = (
+        select(
+            SalesData.date.label("date"),
+            SalesData.shop_id.label("shop_id"),
+            SalesData.product_id.label("product_id"),
+            Product.name.label("product_name"),
+            Product.sku.label("sku"),
+            func.coalesce(Product.category, SalesData.fabric_type).label("category"),
+            SalesData.fabric_type.label("fabric_type"),
+            SalesData.region.label("region"),
+            func.coalesce(SalesData.quantity_sold, 0).label("quantity_sold"),
+            func.coalesce(SalesData.revenue, 0).label("revenue"),
+        )
+        .select_from(SalesData)
+        .outerjoin(Product, Product.id == SalesData.product_id)
+    )
+    if shop_id is not None:
+        stmt = stmt.where(SalesData.shop_id == shop_id)
+    if start_date is not None:
+        stmt = stmt.where(SalesData.date >= start_date)
+    if end_date is not None:
+        stmt = stmt.where(SalesData.date <= end_date)
+    return stmt.order_by(SalesData.date)
+
+
+def load_sales_frame(shop_id=None, start_date=None, end_date=None):
+    """
+    Sales rows joined with product name/sku/category as a typed DataFrame.
+
+    Columns: date (datetime64), shop_id, product_id (nullable Int64), product_name,
+    sku, category (product category, falling back to the row's fabric_type),
+    fabric_type, region, quantity_sold (int64), revenue (float64).
+    Returns an empty frame with those columns when nothing matches.
+    """
+    stmt = sales_frame_query(shop_id, start_date, end_date)
+    df = pd.read_sql(stmt, db.session.connection(), parse_dates=["date"])
+    return df.astype(SALES_FRAME_DTYPES)
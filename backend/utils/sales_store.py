@@ -0,0 +1,354 @@
+"""
+Columnar per-shop sales store.
+
+Each shop's normalized upload is written once per upload as a directory of typed
+column files (NumPy .npy; text columns as int32 category codes plus a JSON list
+of categories) and read back with np.load(mmap_mode="r"), so a dashboard hit maps
+a few binary columns instead of re-parsing CSV text and dates. Uploads are
+written chunk by chunk (ColumnWriter), so building the store never holds more
+than one chunk of the file in memory.
+
+Numeric and date columns stay memory-mapped; only text columns are decoded.
+Frames are kept in an in-process LRU keyed by (shop_id, dataset) and handed out
+as read-only shallow copies: callers may add or replace columns, but writing
+into the stored arrays raises.
+
+Layout:
+    instance/sales_store/shop_<id>/<dataset>/CURRENT        -> active version
+    instance/sales_store/shop_<id>/<dataset>/<version>/meta.json, c0.npy, ...
+    instance/sales_store/shop_<id>/<dataset>/.<version>.writing/ -> writer not yet published
+
+Concurrent uploads for one shop each fill their own .writing directory, which is
+renamed into place on publish; pruning only touches published versions up to the
+one being replaced, never another writer's directory.
+"""
+
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from config import Config
+
+STORE_DIR = os.path.join(Config.DATA_DIR, "sales_store")
+# Unpublished writer directories older than this were left by a crashed process
+STALE_WRITER_SECONDS = 24 * 3600
+
+# Typed columns of the normalized sales upload frame
+SALES_DATETIME_COLUMNS = ("date",)
+SALES_NUMERIC_COLUMNS = ("quantity_sold", "selling_price", "revenue")
+
+
+def _column_kind(series):
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return "datetime"
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+        return "numeric"
+    return "text"
+
+
+class ColumnWriter:
+    """
+    Write a frame into directory `target` one chunk at a time, in the layout read by
+    read_columns(). Each column is appended to a raw file as chunks arrive and turned
+    into a .npy on close(), so memory holds one chunk plus the text categories.
+
+    Columns may change type between chunks: numeric dtypes are widened (int -> float)
+    and a numeric column that later receives text becomes a text column; both are
+    resolved while the .npy files are written. Date columns stay dates (values that
+    do not parse become NaT).
+    """
+
+    def __init__(self, target):
+        self.target = target
+        self.rows = 0
+        self._columns = None  # [{"name", "file", "kind"[, "categories"]}]
+        self._segments = []   # per column: [(kind, dtype, count)] appended to its raw file
+        self._codes = []      # per column: {text value: code}
+        os.makedirs(target, exist_ok=True)
+
+    def append(self, df):
+        if self._columns is None:
+            self._columns = [
+                {"name": str(name), "file": f"c{i}.npy", "kind": _column_kind(df[name])}
+                for i, name in enumerate(df.columns)
+            ]
+            self._segments = [[] for _ in self._columns]
+            self._codes = [{} for _ in self._columns]
+        for i, entry in enumerate(self._columns):
+            series = df[entry["name"]]
+            kind = _column_kind(series)
+            if entry["kind"] == "numeric" and kind == "text":
+                entry["kind"] = "text"
+            if entry["kind"] == "datetime":
+                kind = "datetime"
+                values = pd.to_datetime(series, errors="coerce").to_numpy(dtype="datetime64[ns]")
+            elif kind == "text":
+                values = self._text_codes(i, series.to_numpy(dtype=object))
+            else:
+                kind = "numeric"
+                values = pd.to_numeric(series, errors="coerce").to_numpy()
+            with open(os.path.join(self.target, f"c{i}.raw"), "ab") as fh:
+                fh.write(np.ascontiguousarray(values).tobytes())
+            self._segments[i].append((kind, values.dtype, len(values)))
+        self.rows += len(df)
+
+    def _text_codes(self, i, values):
+        """int32 codes of values in column i's category list (extended as needed); -1 = missing."""
+        codes = self._codes[i]
+        local, uniques = pd.factorize(values, use_na_sentinel=True)
+        lookup = np.array([codes.setdefault(str(u), len(codes)) for u in uniques] + [-1], dtype=np.int32)
+        return lookup[local]  # local code -1 picks the trailing -1
+
+    def close(self):
+        """Finish the .npy files and meta.json. Returns the number of rows written."""
+        for i, entry in enumerate(self._columns or []):
+            segments = self._segments[i]
+            if entry["kind"] == "text":
+                dtype = np.dtype(np.int32)
+            else:
+                dtype = np.result_type(*[d for _, d, _ in segments])
+            raw_path = os.path.join(self.target, f"c{i}.raw")
+            with open(os.path.join(self.target, entry["file"]), "wb") as out, open(raw_path, "rb") as raw:
+                np.lib.format.write_array_header_1_0(out, {
+                    "descr": np.lib.format.dtype_to_descr(dtype),
+                    "fortran_order": False,
+                    "shape": (self.rows,),
+                })
+                for kind, seg_dtype, count in segments:
+                    block = np.frombuffer(raw.read(count * seg_dtype.itemsize), dtype=seg_dtype)
+                    if entry["kind"] == "text" and kind != "text":
+                        # Numbers written before the column turned out to hold text
+                        block = self._text_codes(i, block.astype(object))
+                    out.write(block.astype(dtype, copy=False).tobytes())
+            os.remove(raw_path)
+            if entry["kind"] == "text":
+                entry["categories"] = list(self._codes[i])
+
+        with open(os.path.join(self.target, "meta.json"), "w") as fh:
+            json.dump({"rows": self.rows, "columns": self._columns or [], "written_at": time.time()}, fh)
+        return self.rows
+
+
+def write_columns(target, df):
+    """Write df into directory `target` as one .npy file per column plus meta.json."""
+    writer = ColumnWriter(target)
+    writer.append(df)
+    writer.close()
+
+
+def read_columns(path):
+    """
+    Decode a directory written by write_columns/ColumnWriter into a DataFrame.
+    Numeric and date columns are read-only views of the memory-mapped files;
+    text columns are decoded from their codes.
+    """
+    with open(os.path.join(path, "meta.json")) as fh:
+        meta = json.load(fh)
+
+    data = {}
+    for entry in meta["columns"]:
+        values = np.load(os.path.join(path, entry["file"]), mmap_mode="r", allow_pickle=False)
+        if entry["kind"] == "text":
+            categories = np.array(entry["categories"] + [None], dtype=object)
+            # code -1 (missing) indexes the trailing None
+            decoded = categories[np.asarray(values)]
+            decoded.flags.writeable = False
+            data[entry["name"]] = decoded
+        else:
+            data[entry["name"]] = np.asarray(values)
+    return pd.DataFrame(data, columns=[c["name"] for c in meta["columns"]], copy=False)
+
+
+def normalize_sales_frame(df):
+    """Lowercase column names, type the date and amount columns, drop rows without a date."""
+    df = df.rename(columns=lambda c: str(c).lower())
+    for col in SALES_DATETIME_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+    for col in SALES_NUMERIC_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0).astype("float64")
+    if "date" in df.columns:
+        df = df.dropna(subset=["date"]).reset_index(drop=True)
+    return df
+
+
+def _heap_bytes(df):
+    """Bytes held by the decoded text columns; mapped columns live in the page cache."""
+    total = 0
+    for _, series in df.items():
+        if series.dtype == object:
+            values = series.to_numpy()
+            total += values.nbytes + sum(sys.getsizeof(v) for v in values if v is not None)
+    return total
+
+
+class SalesFrameStore:
+    """On-disk columnar frames per shop with an in-process LRU of decoded DataFrames."""
+
+    def __init__(self, root=STORE_DIR, max_entries=32):
+        self.root = root
+        self.max_entries = max_entries
+        self._frames = OrderedDict()  # (shop_id, dataset) -> (version, DataFrame)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    # ------------------------------------------------------------------
+    # Paths
+    # ------------------------------------------------------------------
+    def _dataset_dir(self, shop_id, dataset):
+        return os.path.join(self.root, f"shop_{int(shop_id)}", dataset)
+
+    def current_version(self, shop_id, dataset="upload"):
+        """Version token of the stored dataset (changes on every write), or None."""
+        try:
+            with open(os.path.join(self._dataset_dir(shop_id, dataset), "CURRENT")) as fh:
+                return fh.read().strip() or None
+        except OSError:
+            return None
+
+    # ------------------------------------------------------------------
+    # Write
+    # ------------------------------------------------------------------
+    def begin_write(self, shop_id, dataset="upload"):
+        """
+        ColumnWriter for a new version of the dataset. Append chunks to it, then make it
+        current with publish() (or drop it with discard()).
+        """
+        version = str(time.time_ns())
+        writer = ColumnWriter(os.path.join(self._dataset_dir(shop_id, dataset), f".{version}.writing"))
+        writer.version = version
+        return writer
+
+    def publish(self, shop_id, writer, dataset="upload"):
+        """Finish a writer from begin_write() and make it the current version. Returns the version."""
+        writer.close()
+        base = self._dataset_dir(shop_id, dataset)
+        os.replace(writer.target, os.path.join(base, writer.version))
+        writer.target = os.path.join(base, writer.version)
+
+        # Atomically switch CURRENT, then drop published versions up to the replaced one
+        replaced = self.current_version(shop_id, dataset)
+        pointer = os.path.join(base, f"CURRENT.{writer.version}.tmp")
+        with open(pointer, "w") as fh:
+            fh.write(writer.version)
+        os.replace(pointer, os.path.join(base, "CURRENT"))
+        self._prune(shop_id, dataset, replaced)
+
+        with self._lock:
+            self._frames.pop((shop_id, dataset), None)
+        return writer.version
+
+    def _prune(self, shop_id, dataset, replaced):
+        base = self._dataset_dir(shop_id, dataset)
+        current = self.current_version(shop_id, dataset)  # another publish may have landed since
+        now = time.time()
+        for entry in os.listdir(base):
+            path = os.path.join(base, entry)
+            if entry.endswith(".writing"):
+                # Another writer's staging directory; only clean up ones abandoned long ago
+                try:
+                    stale = now - os.path.getmtime(path) > STALE_WRITER_SECONDS
+                except OSError:
+                    continue
+                if stale:
+                    shutil.rmtree(path, ignore_errors=True)
+            elif entry.isdigit() and replaced is not None and entry != current and int(entry) <= int(replaced):
+                shutil.rmtree(path, ignore_errors=True)
+
+    def discard(self, writer):
+        shutil.rmtree(writer.target, ignore_errors=True)
+
+    def write(self, shop_id, df, dataset="upload"):
+        """Persist df as typed column files and make it the current version. Returns the version."""
+        writer = self.begin_write(shop_id, dataset)
+        writer.append(df)
+        return self.publish(shop_id, writer, dataset)
+
+    def write_from_csv(self, shop_id, csv_path, dataset="upload", chunksize=50_000):
+        """
+        Build the store from a normalized sales CSV, streamed in chunks (used to migrate
+        shops whose data predates the store). Returns the stored frame.
+        """
+        writer = self.begin_write(shop_id, dataset)
+        try:
+            for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+                writer.append(normalize_sales_frame(chunk))
+        except Exception:
+            self.discard(writer)
+            raise
+        self.publish(shop_id, writer, dataset)
+        return self.read(shop_id, dataset)
+
+    # ------------------------------------------------------------------
+    # Read
+    # ------------------------------------------------------------------
+    def _load(self, shop_id, dataset, version):
+        return read_columns(os.path.join(self._dataset_dir(shop_id, dataset), version))
+
+    def read(self, shop_id, dataset="upload"):
+        """
+        Return the current frame, or None when the shop has no stored data. The frame is
+        a shallow copy over read-only (mostly memory-mapped) arrays: add or replace
+        columns freely, but in-place writes into its values raise.
+        """
+        version = self.current_version(shop_id, dataset)
+        if version is None:
+            return None
+
+        key = (shop_id, dataset)
+        with self._lock:
+            cached = self._frames.get(key)
+            if cached and cached[0] == version:
+                self._frames.move_to_end(key)
+                self._hits += 1
+                return cached[1].copy(deep=False)
+            self._misses += 1
+
+        try:
+            df = self._load(shop_id, dataset, version)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[Sales Store] Could not read shop {shop_id}/{dataset}: {e}")
+            return None
+
+        self._remember(key, version, df)
+        return df.copy(deep=False)
+
+    def _remember(self, key, version, df):
+        with self._lock:
+            self._frames[key] = (version, df)
+            self._frames.move_to_end(key)
+            while len(self._frames) > self.max_entries:
+                self._frames.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+    def invalidate(self, shop_id, dataset=None):
+        """Drop cached frames for a shop (all datasets by default). Files on disk are kept."""
+        with self._lock:
+            for key in [k for k in self._frames if k[0] == shop_id and (dataset is None or k[1] == dataset)]:
+                del self._frames[key]
+
+    def stats(self):
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "entries": len(self._frames),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / total, 3) if total else 0.0,
+                "memory_bytes": sum(_heap_bytes(df) for _, df in self._frames.values()),
+            }
+
+
+sales_store = SalesFrameStore(max_entries=Config.SALES_STORE_LRU_SIZE)
@@ -1,5 +1,6 @@
 # backend/shop_exportdata.py
-from models.model import db, SalesData, Shop
+from models.model import db, Shop
+from services.sales_rollup_service import load_rollup_frame
 from datetime import datetime, timedelta
 from collections import defaultdict
 import statistics
@@ -54,20 +55,18 @@ def export_sales_for_shop(shop_id, months=12):
         if not shop:
             return []
 
-        # Fetch ALL sales (no date filter in query to ensure we catch everything)
-        sales = db.session.query(SalesData).filter(
-            SalesData.shop_id == shop_id
-        ).order_by(SalesData.date.asc()).all()
+        now = datetime.utcnow().date()
+
+        # Daily totals from the rollups (one row per day, not per sale)
+        sales = load_rollup_frame(shop_id, 'day', by_dimension=False)
 
-        if not sales:
+        if sales.empty:
             docs.append({
                 'text': f"No sales data available for shop '{shop.name}'.", 
                 'source': 'SalesData'
             })
             return docs
 
-        now = datetime.utcnow().date()
-        
         # --- TIME CONFIG ---
         last_30_start = now - timedelta(days=30)
         year_start = now - timedelta(days=365)
@@ -93,11 +92,9 @@ def export_sales_for_shop(shop_id, months=12):
             month_key = d.strftime('%b %Y')
             monthly_breakdown[month_key] = 0.0
 
-        for s in sales:
+        for s_ts, rev, qty in zip(sales["date"], sales["revenue"].tolist(), sales["quantity_sold"].tolist()):
             try:
-                s_date = s.date.date() if isinstance(s.date, datetime) else s.date
-                rev = float(getattr(s, 'revenue', 0) or 0)
-                qty = int(getattr(s, 'quantity_sold', 0) or 0)
+                s_date = s_ts.date()
 
                 # --- YEARLY LOGIC (Past 12 Months) ---
                 if s_date >= year_start and s_date <= now:
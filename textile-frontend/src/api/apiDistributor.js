@@ -42,12 +42,21 @@ export const analyzeRegionalDemand = (file) => {
 
 /**
  * Get heatmap data for regional demand visualization
- * @param {File} file - CSV/Excel file with regional sales data (Date, Product, Region, Sales, Quantity)
+ * @param {File|null} file - CSV/Excel file with regional sales data (Date, Product, Region, Sales, Quantity)
+ * @param {Object} options - { fileHash, region, product, start_date, end_date }; pass the
+ *   fileHash from a previous response with file = null to change filters without re-uploading
  * @returns {Promise} Response with heatmap points containing coordinates and intensity
  */
-export const getRegionalDemandHeatmap = (file) => {
+export const getRegionalDemandHeatmap = (file, options = {}) => {
     const formData = new FormData();
-    formData.append('file', file);
+    if (file) {
+        formData.append('file', file);
+    } else if (options.fileHash) {
+        formData.append('file_hash', options.fileHash);
+    }
+    ['region', 'product', 'start_date', 'end_date'].forEach((key) => {
+        if (options[key]) formData.append(key, options[key]);
+    });
 
     return api.post('/distributor/regional-demand-heatmap', formData, {
         headers: { 'Content-Type': 'multipart/form-data' },
@@ -53,6 +53,65 @@ export const getLowStockAlerts = () => {
     return api.get('/supply-chain/distributor/low-stock-alerts');
 };
 
+/**
+ * Subscribe to live low stock alerts (server-sent events).
+ * Calls onEvent('snapshot', {alerts, summary}) first, then
+ * onEvent('alerts', {raised, resolved, summary}) when stock crosses a safety level.
+ * Reconnects right away when the server ends the stream (a long poll), and
+ * after the server's `retry:` delay when the request fails.
+ * @param {Function} onEvent - (eventName, data) callback
+ * @returns {Function} Call to stop streaming
+ */
+export const streamLowStockAlerts = (onEvent) => {
+    const controller = new AbortController();
+    let retryMs = 10000;
+
+    const connect = async () => {
+        const user = JSON.parse(localStorage.getItem('user') || 'null');
+        const token = user?.token || localStorage.getItem('token');
+        const response = await fetch(`${api.defaults.baseURL}/supply-chain/distributor/low-stock-alerts/stream`, {
+            headers: token ? { Authorization: `Bearer ${token}` } : {},
+            signal: controller.signal,
+        });
+        if (!response.ok) throw new Error(`Alert stream failed: ${response.status}`);
+
+        const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+        let buffer = '';
+        for (;;) {
+            const { value, done } = await reader.read();
+            if (done) return;
+            buffer += value;
+            const messages = buffer.split('\n\n');
+            buffer = messages.pop();
+            for (const message of messages) {
+                let name = 'message';
+                let data = '';
+                for (const line of message.split('\n')) {
+                    if (line.startsWith('event: ')) name = line.slice(7);
+                    else if (line.startsWith('data: ')) data += line.slice(6);
+                    else if (line.startsWith('retry: ')) retryMs = Number(line.slice(7)) || retryMs;
+                }
+                if (data) onEvent(name, JSON.parse(data));
+            }
+        }
+    };
+
+    const run = async () => {
+        while (!controller.signal.aborted) {
+            try {
+                await connect();
+            } catch (err) {
+                if (controller.signal.aborted) return;
+                console.error('Low stock alert stream error:', err);
+                await new Promise(resolve => setTimeout(resolve, retryMs));
+            }
+        }
+    };
+    run();
+
+    return () => controller.abort();
+};
+
 export default {
     // Shop owner
     getShopSuppliers,
@@ -60,5 +119,6 @@ export default {
     // Distributor
     getSuppliedShops,
     getSuppliedProducts,
-    getLowStockAlerts
+    getLowStockAlerts,
+    streamLowStockAlerts
 };